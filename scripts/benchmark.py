@@ -0,0 +1,39 @@
+import argparse
+import json
+
+from coach.benchmark import SUITES, run_benchmarks
+
+# Usage: python scripts/benchmark.py [--athletes 100] [--weeks 12] [--suite builder ...] [--output bench.json]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark zone resolution, builder text, export payloads and bulk push")
+    parser.add_argument('--athletes', type=int, default=100)
+    parser.add_argument('--weeks', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--suite', action='append', choices=SUITES, help="run only these suites (repeatable)")
+    parser.add_argument('--latency-ms', type=float, default=0, help="simulated server latency for the push suite")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    print(f"--- Benchmark: {args.athletes} athletes x {args.weeks} weeks (seed {args.seed}) ---")
+    report = run_benchmarks(args.athletes, args.weeks, args.seed, args.suite or SUITES, args.latency_ms / 1000)
+
+    print(f"{report['meta']['workouts']} workouts, {report['meta']['blocks']} blocks\n")
+    print(f"{'suite':<18}{'ops':>8}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS MB':>9}")
+    for row in report['results']:
+        if 'skipped' in row:
+            print(f"{row['suite']:<18}  skipped: {row['skipped']}")
+            continue
+        print(f"{row['suite']:<18}{row['ops']:>8}{row['ops_per_s']:>12.1f}"
+              f"{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['peak_rss_mb'] or 0:>9.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+    else:
+        print()
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
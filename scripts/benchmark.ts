@@ -0,0 +1,205 @@
+import fs from 'fs';
+import { convertStructureToText, workoutToEvent } from '../src/lib/intervals/client';
+import { buildZoneTables } from '../src/lib/training/zoneTables';
+import { calculateHRZones, calculatePaceZones, resolveHRTarget, resolvePaceTarget, Zone } from '../src/lib/training/zones';
+
+// TS side of scripts/benchmark.py: times the zone, builder and bulk payload code the app
+// actually runs (training/zones.ts, intervals/client.ts) on the same synthetic plan shape
+// and writes the same JSON report, so TS regressions show up next to the Python ones.
+//
+//   npx tsx scripts/benchmark.ts [--athletes 100] [--weeks 12] [--seed 0] [--suite builder ...] [--output bench-ts.json]
+
+const SUITES = ['zones', 'zone_tables', 'builder', 'serialize'] as const;
+type Suite = typeof SUITES[number];
+const PERCENTILES = [50, 95, 99];
+
+interface Athlete {
+    id: string;
+    thresholdPace: number;
+    lthr: number;
+    workouts: any[];
+}
+
+// --- Synthetic dataset (same templates and weekly layout as coach/benchmark.py) ---
+
+const TEMPLATES: [string, [string, Zone, number, number, number][]][] = [
+    ['Easy Run', [['warmup', 'Z1', 10, 1, 0.2], ['main', 'Z2', 30, 1, 0.4], ['cooldown', 'Z1', 5, 1, 0.1]]],
+    ['Long Run', [['warmup', 'Z1', 10, 1, 0.3], ['main', 'Z2', 70, 1, 0.5], ['cooldown', 'Z1', 10, 1, 0.2]]],
+    ['Tempo', [['warmup', 'Z1', 15, 1, 0.3], ['main', 'Z3', 25, 1, 0.6], ['cooldown', 'Z1', 10, 1, 0.2]]],
+    ['Threshold Intervals', [['warmup', 'Z1', 15, 1, 0.3], ['interval', 'Z4', 8, 4, 0.5],
+        ['recovery', 'Z1', 2, 1, 0.0], ['cooldown', 'Z1', 10, 1, 0.2]]],
+    ['VO2 Max Intervals', [['warmup', 'Z1', 15, 1, 0.3], ['interval', 'Z5', 3, 6, 0.7],
+        ['recovery', 'Z1', 1.5, 1, 0.0], ['cooldown', 'Z1', 10, 1, 0.2]]],
+];
+
+// Weekday -> template index; Tuesday alternates threshold / VO2 work by week.
+const WEEK: [number, number | null][] = [[0, 0], [1, null], [3, 2], [4, 0], [6, 1]];
+
+/**
+ * Small seeded PRNG (mulberry32), so a seed always gives the same dataset.
+ */
+function random(seed: number) {
+    let state = seed >>> 0;
+    return () => {
+        state = (state + 0x6D2B79F5) >>> 0;
+        let t = state;
+        t = Math.imul(t ^ (t >>> 15), t | 1);
+        t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+function syntheticDataset(athletes: number, weeks: number, seed: number): Athlete[] {
+    const rng = random(seed);
+    const randInt = (low: number, high: number) => low + Math.floor(rng() * (high - low + 1));
+    const now = new Date();
+    const today = Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate());
+    const firstMonday = today + (7 - (now.getUTCDay() + 6) % 7) * 86400000;
+
+    const dataset: Athlete[] = [];
+    for (let a = 0; a < athletes; a++) {
+        const id = `i${100000 + a}`;
+        const workouts: any[] = [];
+        for (let week = 0; week < weeks; week++) {
+            const scale = week % 4 !== 3 ? 1 + 0.05 * (week % 4) : 0.7; // 3 build weeks, 1 recovery
+            WEEK.forEach(([day, template]) => {
+                const [title, blocks] = TEMPLATES[template ?? 3 + week % 2];
+                workouts.push({
+                    id: `${id}-w${week}-${day}`,
+                    date: new Date(firstMonday + (week * 7 + day) * 86400000),
+                    title,
+                    sport: 'run',
+                    structure: blocks.map(([type, zone, minutes, reps, position]) => ({
+                        type,
+                        zone,
+                        duration_min: Math.round(minutes * scale * 2) / 2,
+                        zone_position: Math.min(1, position + rng() * 0.2),
+                        ...(reps > 1 ? { reps } : {}),
+                    })),
+                });
+            });
+        }
+        dataset.push({ id, thresholdPace: randInt(210, 330), lthr: randInt(155, 185), workouts });
+    }
+    return dataset;
+}
+
+// --- Measurement ---
+
+function percentile(sorted: number[], pct: number): number | null {
+    if (!sorted.length) return null;
+    return sorted[Math.max(1, Math.ceil(pct / 100 * sorted.length)) - 1];
+}
+
+function round(value: number, digits: number): number {
+    const factor = 10 ** digits;
+    return Math.round(value * factor) / factor;
+}
+
+function measure<T>(name: string, fn: (item: T) => unknown, items: T[]) {
+    if (items.length) fn(items[0]); // warm up the JIT
+
+    const samples: number[] = [];
+    const started = performance.now();
+    for (const item of items) {
+        const t0 = performance.now();
+        fn(item);
+        samples.push(performance.now() - t0);
+    }
+    const totalMs = performance.now() - started;
+
+    samples.sort((a, b) => a - b);
+    const row: Record<string, any> = {
+        suite: name,
+        ops: samples.length,
+        total_s: round(totalMs / 1000, 6),
+        ops_per_s: totalMs ? round(samples.length / (totalMs / 1000), 2) : null,
+    };
+    PERCENTILES.forEach(pct => {
+        const value = percentile(samples, pct);
+        row[`p${pct}_ms`] = value !== null ? round(value, 4) : null;
+    });
+    // maxRSS is in KB
+    row.peak_rss_mb = round(process.resourceUsage().maxRSS / 1024, 1);
+    return row;
+}
+
+// --- Suites ---
+
+function runSuite(name: Suite, dataset: Athlete[]) {
+    switch (name) {
+        case 'zones':
+            return measure(name, athlete => {
+                calculatePaceZones(athlete.thresholdPace);
+                calculateHRZones(athlete.lthr);
+                athlete.workouts.forEach(workout => workout.structure.forEach((block: any) => {
+                    resolvePaceTarget(athlete.thresholdPace, block.zone, block.zone_position);
+                    resolveHRTarget(athlete.lthr, block.zone, block.zone_position);
+                }));
+            }, dataset);
+        case 'zone_tables':
+            return measure(name, athlete => buildZoneTables(athlete.thresholdPace, athlete.lthr), dataset);
+        case 'builder': {
+            const structures = dataset.flatMap(athlete => athlete.workouts.map(workout => workout.structure));
+            return measure(name, structure => convertStructureToText(structure), structures);
+        }
+        case 'serialize':
+            // One athlete's /events/bulk payload, as pushed by reconcilePlanWorkouts
+            return measure(name, athlete => JSON.stringify(athlete.workouts.map(workout => workoutToEvent(workout))), dataset);
+    }
+}
+
+function option(args: string[], flag: string, fallback: string): string {
+    const index = args.indexOf(flag);
+    return index >= 0 && args[index + 1] !== undefined ? args[index + 1] : fallback;
+}
+
+function main() {
+    const args = process.argv.slice(2);
+    const athletes = Number(option(args, '--athletes', '100'));
+    const weeks = Number(option(args, '--weeks', '12'));
+    const seed = Number(option(args, '--seed', '0'));
+    const output = option(args, '--output', '');
+    const requested = args.filter((arg, i) => args[i - 1] === '--suite') as Suite[];
+    const unknown = requested.filter(suite => !SUITES.includes(suite));
+    if (unknown.length) {
+        console.error(`Unknown suite: ${unknown.join(', ')} (choose from ${SUITES.join(', ')})`);
+        process.exit(1);
+    }
+
+    console.log(`--- TS Benchmark: ${athletes} athletes x ${weeks} weeks (seed ${seed}) ---`);
+    const dataset = syntheticDataset(athletes, weeks, seed);
+    const workouts = dataset.reduce((sum, a) => sum + a.workouts.length, 0);
+    const blocks = dataset.reduce((sum, a) => sum + a.workouts.reduce((n, w) => n + w.structure.length, 0), 0);
+
+    const report = {
+        meta: {
+            athletes,
+            weeks,
+            seed,
+            workouts,
+            blocks,
+            node: process.version,
+            timestamp: new Date().toISOString().slice(0, 19) + '+00:00',
+        },
+        results: (requested.length ? requested : [...SUITES]).map(suite => runSuite(suite, dataset)),
+    };
+
+    console.log(`${workouts} workouts, ${blocks} blocks\n`);
+    console.log(`${'suite'.padEnd(18)}${'ops'.padStart(8)}${'ops/s'.padStart(12)}${'p50 ms'.padStart(10)}${'p95 ms'.padStart(10)}${'p99 ms'.padStart(10)}${'RSS MB'.padStart(9)}`);
+    report.results.forEach(row => {
+        console.log(`${row.suite.padEnd(18)}${String(row.ops).padStart(8)}${(row.ops_per_s ?? 0).toFixed(1).padStart(12)}`
+            + `${(row.p50_ms ?? 0).toFixed(3).padStart(10)}${(row.p95_ms ?? 0).toFixed(3).padStart(10)}${(row.p99_ms ?? 0).toFixed(3).padStart(10)}`
+            + `${row.peak_rss_mb.toFixed(1).padStart(9)}`);
+    });
+
+    if (output) {
+        fs.writeFileSync(output, JSON.stringify(report, null, 2));
+        console.log(`\n✅ Results written to ${output}`);
+    } else {
+        console.log();
+        console.log(JSON.stringify(report, null, 2));
+    }
+}
+
+main();
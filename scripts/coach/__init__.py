@@ -0,0 +1,15 @@
+"""
+Shared Python helpers for the endurance coach scripts.
+
+Mirrors the TypeScript modules under src/lib so the scripts in this folder
+can reuse one implementation instead of re-building requests by hand.
+"""
+
+from .intervals import ConnectionPool, IntervalsAPIError, IntervalsClient, is_future_or_today
+
+__all__ = [
+    "ConnectionPool",
+    "IntervalsAPIError",
+    "IntervalsClient",
+    "is_future_or_today",
+]
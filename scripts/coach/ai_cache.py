@@ -0,0 +1,121 @@
+"""
+Content-addressed cache for model responses (mirrors src/lib/ai/responseCache.ts).
+
+Keys hash the provider, model, normalized prompt and a canonical hash of the
+athlete profile. Entries expire after a TTL and the least recently used entry
+is evicted past max_entries. Concurrent identical requests (from threads)
+share one in-flight call; failures and None results are never cached.
+"""
+
+import collections
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+DEFAULT_TTL = 6 * 60 * 60
+DEFAULT_MAX_ENTRIES = 500
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt):
+    """Collapses whitespace so indentation / trailing spaces in prompt templates don't split the cache."""
+    lines = (_WHITESPACE.sub(' ', line.strip()) for line in prompt.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def _sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def profile_hash(profile):
+    """Hash of the profile as canonical JSON (sorted keys), so key order doesn't matter."""
+    return _sha256(json.dumps(profile, sort_keys=True, separators=(',', ':'), default=str))
+
+
+def cache_key(provider, model, prompt, profile=None):
+    return _sha256('\0'.join([provider, model, normalize_prompt(prompt), profile_hash(profile)]))
+
+
+class AIResponseCache:
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = collections.OrderedDict()  # key -> (expires_at, value)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.stats = collections.Counter()
+
+    def _get_locked(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.stats['expired'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key):
+        with self._lock:
+            value = self._get_locked(key)
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def get_or_call(self, key, fn):
+        """
+        Returns the cached value for `key`, or calls fn() once and caches a non-None result.
+        Threads asking for the same key while fn() runs wait for that call instead of
+        making their own. Each caller gets its own copy of the value.
+        """
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not None:
+                self.stats['hits'] += 1
+                return copy.deepcopy(value)
+
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not owner:
+            return copy.deepcopy(future.result())
+
+        try:
+            value = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            if value is not None:
+                self.put(key, value)
+            future.set_result(value)
+            return copy.deepcopy(value)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
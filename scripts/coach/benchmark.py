@@ -0,0 +1,224 @@
+"""
+Benchmark harness for the zone, builder, export and push paths.
+
+Runs against a fixed synthetic dataset (N athletes x M weeks of structured
+workouts, fully determined by the seed) so results from different commits
+are comparable. Each suite times one operation per item and reports ops/s,
+p50/p95/p99 latency in ms and the process peak RSS.
+
+Suites:
+  zones_scalar      resolve every block of an athlete's plan with coach.zones
+  zones_vectorized  the same through coach.zone_engine.resolve_plan (needs NumPy)
+  builder           compile one workout structure to builder text
+  serialize         build + JSON-encode one athlete's /events/bulk payloads
+  push              upload one athlete's plan to a local MockIntervalsServer
+
+These suites time the Python mirrors only. The TS code the app runs
+(training/zones.ts, intervals/client.ts) is timed by scripts/benchmark.ts on the
+same dataset shape, with the same JSON report format.
+"""
+
+import datetime
+import json
+import math
+import random
+import sys
+import time
+
+from .builder import convert_structure_to_text
+from .intervals import IntervalsClient
+from .mock_server import MockIntervalsServer
+from .plan_upload import upload_plan_workouts, workout_to_event
+from .zones import resolve_hr_target, resolve_pace_target
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SUITES = ('zones_scalar', 'zones_vectorized', 'builder', 'serialize', 'push')
+PERCENTILES = (50, 95, 99)
+
+# --- Synthetic dataset ---
+
+# (title, [(type, zone, duration_min, reps, zone_position), ...]); durations are scaled per week.
+_TEMPLATES = [
+    ("Easy Run", [('warmup', 'Z1', 10, 1, 0.2), ('main', 'Z2', 30, 1, 0.4), ('cooldown', 'Z1', 5, 1, 0.1)]),
+    ("Long Run", [('warmup', 'Z1', 10, 1, 0.3), ('main', 'Z2', 70, 1, 0.5), ('cooldown', 'Z1', 10, 1, 0.2)]),
+    ("Tempo", [('warmup', 'Z1', 15, 1, 0.3), ('main', 'Z3', 25, 1, 0.6), ('cooldown', 'Z1', 10, 1, 0.2)]),
+    ("Threshold Intervals", [('warmup', 'Z1', 15, 1, 0.3), ('interval', 'Z4', 8, 4, 0.5),
+                             ('recovery', 'Z1', 2, 1, 0.0), ('cooldown', 'Z1', 10, 1, 0.2)]),
+    ("VO2 Max Intervals", [('warmup', 'Z1', 15, 1, 0.3), ('interval', 'Z5', 3, 6, 0.7),
+                           ('recovery', 'Z1', 1.5, 1, 0.0), ('cooldown', 'Z1', 10, 1, 0.2)]),
+]
+
+# Weekday -> template index; Tuesday alternates threshold / VO2 work by week.
+_WEEK = ((0, 0), (1, None), (3, 2), (4, 0), (6, 1))
+
+
+def synthetic_dataset(athletes, weeks, seed=0, start=None):
+    """
+    Returns a list of athletes, each {'id', 'thresholdPace', 'lthr', 'workouts'}, where
+    workouts are Prisma-shaped rows (id, date, title, sport, structure) starting the
+    Monday after `start` (default: today) so the past-date safeguard never trips.
+    """
+    rng = random.Random(seed)
+    start = start or datetime.date.today()
+    first_monday = start + datetime.timedelta(days=7 - start.weekday())
+
+    dataset = []
+    for a in range(athletes):
+        athlete_id = f"i{100000 + a}"
+        workouts = []
+        for week in range(weeks):
+            scale = 1.0 + 0.05 * (week % 4) if week % 4 != 3 else 0.7  # 3 build weeks, 1 recovery
+            for day, template in _WEEK:
+                title, blocks = _TEMPLATES[template if template is not None else 3 + week % 2]
+                date = first_monday + datetime.timedelta(weeks=week, days=day)
+                workouts.append({
+                    'id': f"{athlete_id}-w{week}-{day}",
+                    'date': date.isoformat(),
+                    'title': title,
+                    'sport': 'run',
+                    'structure': [
+                        {
+                            'type': kind,
+                            'zone': zone,
+                            'duration_min': round(minutes * scale * 2) / 2,
+                            'zone_position': min(1.0, position + rng.uniform(0, 0.2)),
+                            **({'reps': reps} if reps > 1 else {}),
+                        }
+                        for kind, zone, minutes, reps, position in blocks
+                    ],
+                })
+        dataset.append({
+            'id': athlete_id,
+            'thresholdPace': rng.randint(210, 330),
+            'lthr': rng.randint(155, 185),
+            'workouts': workouts,
+        })
+    return dataset
+
+
+# --- Measurement ---
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def measure(name, fn, items, warmup=True):
+    """Calls fn(item) once per item and returns a result row for the suite."""
+    items = list(items)
+    if warmup and items:
+        fn(items[0])
+
+    samples = []
+    clock = time.perf_counter
+    started = clock()
+    for item in items:
+        t0 = clock()
+        fn(item)
+        samples.append(clock() - t0)
+    total = clock() - started
+
+    samples.sort()
+    row = {
+        'suite': name,
+        'ops': len(samples),
+        'total_s': round(total, 6),
+        'ops_per_s': round(len(samples) / total, 2) if total else None,
+    }
+    for pct in PERCENTILES:
+        value = percentile(samples, pct)
+        row[f"p{pct}_ms"] = round(value * 1000, 4) if value is not None else None
+    row['peak_rss_mb'] = peak_rss_mb()
+    return row
+
+
+# --- Suites ---
+
+def _zones_scalar(athlete):
+    tp, lthr = athlete['thresholdPace'], athlete['lthr']
+    for workout in athlete['workouts']:
+        for block in workout['structure']:
+            resolve_pace_target(tp, block['zone'], block['zone_position'])
+            resolve_hr_target(lthr, block['zone'], block['zone_position'])
+
+
+def _builder_items(dataset):
+    for athlete in dataset:
+        for workout in athlete['workouts']:
+            yield workout['structure']
+
+
+def _serialize(athlete):
+    events = [workout_to_event(w) for w in athlete['workouts']]
+    return json.dumps(events, separators=(',', ':'))
+
+
+def run_suite(name, dataset, latency=0.0):
+    if name == 'zones_scalar':
+        return measure(name, _zones_scalar, dataset)
+
+    if name == 'zones_vectorized':
+        try:
+            from .zone_engine import resolve_plan
+        except ImportError:
+            return {'suite': name, 'skipped': "NumPy not installed"}
+        return measure(name, lambda a: resolve_plan(a['workouts'], a['thresholdPace'], a['lthr']), dataset)
+
+    if name == 'builder':
+        return measure(name, convert_structure_to_text, _builder_items(dataset))
+
+    if name == 'serialize':
+        return measure(name, _serialize, dataset)
+
+    if name == 'push':
+        with MockIntervalsServer(latency=latency) as server:
+            def push(athlete):
+                client = IntervalsClient(f"key-{athlete['id']}", athlete['id'], base_url=server.base_url)
+                results = upload_plan_workouts(client, athlete['workouts'])
+                client.close()
+                failed = [r for r in results if r.error]
+                if failed:
+                    raise RuntimeError(f"{len(failed)} workouts failed for {athlete['id']}: {failed[0].error}")
+
+            row = measure(name, push, dataset, warmup=False)
+            row['requests'] = server.snapshot_stats().get('requests', 0)
+        return row
+
+    raise ValueError(f"Unknown suite: {name}")
+
+
+def run_benchmarks(athletes=100, weeks=12, seed=0, suites=SUITES, latency=0.0):
+    """Builds the dataset once and runs each suite; returns a JSON-serializable report."""
+    dataset = synthetic_dataset(athletes, weeks, seed)
+    workouts = sum(len(a['workouts']) for a in dataset)
+    blocks = sum(len(w['structure']) for a in dataset for w in a['workouts'])
+
+    return {
+        'meta': {
+            'athletes': athletes,
+            'weeks': weeks,
+            'seed': seed,
+            'workouts': workouts,
+            'blocks': blocks,
+            'latency_ms': latency * 1000,
+            'python': sys.version.split()[0],
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        },
+        'results': [run_suite(name, dataset, latency) for name in suites],
+    }
@@ -0,0 +1,126 @@
+"""
+Intervals.icu Builder Text compiler (mirrors convertStructureToText in src/lib/intervals/client.ts).
+
+Blocks are compiled one at a time into lines that are joined once at the end,
+so a workout (or a whole season of them) compiles in linear time and accepts
+any iterable of blocks, including generators.
+
+Repeats are kept as repeat groups instead of being flattened: a block with
+`reps` > 1 opens a group and the recovery blocks directly after it belong to
+the same group:
+
+    Interval 5x
+    - 3m 100%-111% pace VO2 Max
+    - 2m 69%-77% pace Recovery
+"""
+
+from .zones import PACE_ZONE_PERCENT
+
+# Descriptive step label per zone, so Garmin/Intervals show what the step is for.
+ZONE_LABELS = {
+    'Z5': "VO2 Max",
+    'Z4': "Threshold",
+    'Z3': "Tempo",
+    'Z2': "Endurance",
+    'Z1': "Recovery",
+}
+
+
+def _upper_first(value):
+    # Same as charAt(0).toUpperCase() + slice(1); str.capitalize() would lowercase "VO2 Max".
+    return value[:1].upper() + value[1:]
+
+
+# Target + label text per zone, built once instead of once per block. The ranges are
+# % of threshold pace and the same for every athlete; Intervals.icu resolves the pace.
+_ZONE_SUFFIXES = {
+    zone: f" {low}%-{high}% pace {ZONE_LABELS[zone]}"
+    for zone, (low, high) in PACE_ZONE_PERCENT.items()
+}
+
+
+def format_duration(minutes):
+    """10 -> "10m", 1.5 -> "1m30s", 0.5 -> "30s"."""
+    seconds = round(minutes * 60)
+    mins, secs = divmod(seconds, 60)
+    if not secs:
+        return f"{mins}m"
+    return f"{mins}m{secs}s" if mins else f"{secs}s"
+
+
+def _reps(block):
+    reps = block.get('reps')
+    return int(reps) if reps and reps > 1 else 1
+
+
+def _step(block):
+    suffix = _ZONE_SUFFIXES.get(block.get('zone'))
+    if suffix is None:
+        target = block.get('target') or {}
+        value = target.get('value') or block.get('intensity')
+        label = _upper_first(block['type'])
+        suffix = f" {value} {label}" if value else f" {label}"
+    return f"- {format_duration(block['duration_min'])}{suffix}"
+
+
+def iter_lines(blocks):
+    """Yields the builder text lines for an iterable of blocks, one block at a time."""
+    current_group = None
+    in_repeat = False
+    first = True
+
+    for block in blocks:
+        # Recoveries right after a repeated block are part of its repeat group
+        if in_repeat and block['type'] == 'recovery' and _reps(block) == 1:
+            yield _step(block)
+            continue
+        in_repeat = False
+
+        group_name = _upper_first(block['type'])
+        reps = _reps(block)
+
+        if reps > 1:
+            if not first:
+                yield ''
+            yield f"{group_name} {reps}x"
+            in_repeat = True
+            current_group = None
+        elif group_name != current_group:
+            # Add Group Header if it changes (e.g. Warmup, Main, Cooldown)
+            if not first:
+                yield ''
+            yield group_name
+            current_group = group_name
+
+        yield _step(block)
+        first = False
+
+
+def convert_structure_to_text(structure):
+    """
+    Converts the structured JSON workout into Intervals.icu text format.
+    Zones are exported as % of threshold pace so Intervals.icu resolves the exact pace.
+    """
+    if not structure or isinstance(structure, (str, dict)):
+        return ''
+    return '\n'.join(iter_lines(structure))
+
+
+def compile_workouts(structures):
+    """Lazily compiles many workout structures; yields one builder text per structure."""
+    for structure in structures:
+        yield convert_structure_to_text(structure)
+
+
+def total_duration_min(structure):
+    """Total minutes of a structure, counting each repeat group `reps` times."""
+    total = 0
+    group = 0
+    reps = 1
+    for block in structure or []:
+        if reps > 1 and block['type'] == 'recovery' and _reps(block) == 1:
+            group += block['duration_min']
+            continue
+        total += group * reps
+        group, reps = block['duration_min'], _reps(block)
+    return total + group * reps
@@ -0,0 +1,299 @@
+"""
+Incremental, cursor-based local cache for Intervals.icu activities / wellness / events.
+
+Records are stored in SQLite keyed by (athlete, kind, record id) and indexed by
+date. For each athlete and kind we keep the covered date range; its newest day
+is the high-water mark. A sync only fetches:
+  - days before the covered range that were never fetched, and
+  - the last LOOKBACK_DAYS before the high-water mark plus anything newer,
+    since recent activities and wellness entries still change (late uploads,
+    end-of-day HRV), and only when the last sync is older than `max_age`.
+Every other day of a range query is served from the local database.
+"""
+
+import datetime
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    'INTERVALS_CACHE_DB',
+    os.path.join(os.path.expanduser('~'), '.cache', 'endurance-ai-coach', 'intervals.sqlite3'),
+)
+
+KINDS = ('activities', 'wellness', 'events')
+
+# Days before the high-water mark that are re-fetched on every sync.
+LOOKBACK_DAYS = 2
+# A sync younger than this is served entirely from cache. The Next.js routes use the
+# same scheme through src/lib/intervals/cache.ts (Postgres); this file only serves the scripts.
+DEFAULT_MAX_AGE = 15 * 60  # seconds
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    athlete_id TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    record_id  TEXT NOT NULL,
+    date       TEXT NOT NULL,
+    payload    TEXT NOT NULL,
+    PRIMARY KEY (athlete_id, kind, record_id)
+);
+CREATE INDEX IF NOT EXISTS records_by_date ON records (athlete_id, kind, date);
+CREATE TABLE IF NOT EXISTS sync_state (
+    athlete_id TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    oldest     TEXT NOT NULL,
+    newest     TEXT NOT NULL,
+    synced_at  REAL NOT NULL,
+    PRIMARY KEY (athlete_id, kind)
+);
+CREATE TABLE IF NOT EXISTS training_load (
+    athlete_id TEXT NOT NULL,
+    date       TEXT NOT NULL,
+    load       REAL NOT NULL,
+    ctl        REAL NOT NULL,
+    atl        REAL NOT NULL,
+    PRIMARY KEY (athlete_id, date)
+);
+CREATE TABLE IF NOT EXISTS readiness (
+    athlete_id   TEXT NOT NULL,
+    date         TEXT NOT NULL,
+    score        REAL,
+    status       TEXT NOT NULL,
+    hrv_z        REAL,
+    rhr_z        REAL,
+    strain       REAL,
+    hrv_mean     REAL,
+    hrv_variance REAL NOT NULL,
+    hrv_days     INTEGER NOT NULL,
+    rhr_mean     REAL,
+    rhr_variance REAL NOT NULL,
+    rhr_days     INTEGER NOT NULL,
+    PRIMARY KEY (athlete_id, date)
+);
+"""
+
+
+def _to_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def record_date(kind, record):
+    """Local date (YYYY-MM-DD) a record belongs to. Wellness records are keyed by their date."""
+    if kind == 'wellness':
+        return str(record['id'])[:10]
+    return str(record.get('start_date_local') or record.get('start_date'))[:10]
+
+
+class IntervalsCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, lookback_days=LOOKBACK_DAYS, max_age=DEFAULT_MAX_AGE, clock=time.time):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+        self.lookback_days = lookback_days
+        self.max_age = max_age
+        self._clock = clock
+        self.hits = 0
+        self.fetches = 0
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- State ---
+
+    def high_water_mark(self, athlete_id, kind):
+        """Newest date fetched for this athlete/kind, or None if never synced."""
+        state = self._state(athlete_id, kind)
+        return state[1] if state else None
+
+    def _state(self, athlete_id, kind):
+        row = self.db.execute(
+            "SELECT oldest, newest, synced_at FROM sync_state WHERE athlete_id = ? AND kind = ?",
+            (str(athlete_id), kind),
+        ).fetchone()
+        if not row:
+            return None
+        return _to_date(row[0]), _to_date(row[1]), row[2]
+
+    def missing_ranges(self, athlete_id, kind, oldest, newest):
+        """
+        Returns the [(start, end)] date windows that must be fetched from the API
+        before [oldest, newest] can be answered locally.
+        """
+        oldest, newest = _to_date(oldest), _to_date(newest)
+        state = self._state(athlete_id, kind)
+        if state is None:
+            return [(oldest, newest)]
+
+        covered_oldest, covered_newest, synced_at = state
+        ranges = []
+
+        if oldest < covered_oldest:
+            ranges.append((oldest, covered_oldest - datetime.timedelta(days=1)))
+
+        # Re-check the still-changing tail when it is stale or the query runs past it.
+        tail_start = covered_newest - datetime.timedelta(days=self.lookback_days)
+        stale = self._clock() - synced_at >= self.max_age
+        if newest > covered_newest or (stale and newest >= tail_start):
+            ranges.append((max(tail_start, covered_oldest), max(newest, covered_newest)))
+
+        return ranges
+
+    # --- Storage ---
+
+    def store(self, athlete_id, kind, start, end, records):
+        """
+        Replaces everything cached in [start, end] with `records` (so remote deletions
+        are picked up) and extends the covered range / high-water mark.
+        """
+        athlete_id = str(athlete_id)
+        start, end = _to_date(start), _to_date(end)
+        rows = [
+            (athlete_id, kind, str(r['id']), record_date(kind, r), json.dumps(r))
+            for r in records or []
+        ]
+
+        with self.db:
+            self.db.execute(
+                "DELETE FROM records WHERE athlete_id = ? AND kind = ? AND date BETWEEN ? AND ?",
+                (athlete_id, kind, start.isoformat(), end.isoformat()),
+            )
+            self.db.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)", rows)
+
+            synced_at = self._clock()
+            state = self._state(athlete_id, kind)
+            if state:
+                # Back-filling older days does not make the tail any fresher.
+                if end < state[1]:
+                    synced_at = state[2]
+                start, end = min(start, state[0]), max(end, state[1])
+            self.db.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?)",
+                (athlete_id, kind, start.isoformat(), end.isoformat(), synced_at),
+            )
+
+    def query(self, athlete_id, kind, oldest, newest):
+        """Cached records for [oldest, newest], ordered by date. Never touches the network."""
+        cursor = self.db.execute(
+            "SELECT payload FROM records WHERE athlete_id = ? AND kind = ? AND date BETWEEN ? AND ? "
+            "ORDER BY date, record_id",
+            (str(athlete_id), kind, _to_date(oldest).isoformat(), _to_date(newest).isoformat()),
+        )
+        return [json.loads(payload) for (payload,) in cursor]
+
+    def invalidate(self, athlete_id, kind=None):
+        """Drops cached data for an athlete (all kinds, or one), forcing a full fetch next time."""
+        kinds = [kind] if kind else list(KINDS)
+        with self.db:
+            for k in kinds:
+                self.db.execute("DELETE FROM records WHERE athlete_id = ? AND kind = ?", (str(athlete_id), k))
+                self.db.execute("DELETE FROM sync_state WHERE athlete_id = ? AND kind = ?", (str(athlete_id), k))
+            if kind in (None, 'activities'):
+                self.db.execute("DELETE FROM training_load WHERE athlete_id = ?", (str(athlete_id),))
+            if kind in (None, 'wellness'):
+                self.db.execute("DELETE FROM readiness WHERE athlete_id = ?", (str(athlete_id),))
+
+    # --- Training load ---
+
+    def load_state_before(self, athlete_id, date):
+        """
+        (ctl, atl) at the end of the day before `date`, or (0.0, 0.0) without history.
+        Days between the last stored day and `date` were never synced (e.g. missed
+        nightly runs); they are replayed with zero load so both values decay as they
+        would have, instead of seeding the series with stale, too-high values.
+        """
+        from .load_engine import update  # NumPy-backed module, only needed here
+
+        date = _to_date(date)
+        row = self.db.execute(
+            "SELECT date, ctl, atl FROM training_load WHERE athlete_id = ? AND date < ? ORDER BY date DESC LIMIT 1",
+            (str(athlete_id), date.isoformat()),
+        ).fetchone()
+        if not row:
+            return (0.0, 0.0)
+        ctl, atl = row[1], row[2]
+        for _ in range((date - _to_date(row[0])).days - 1):
+            ctl, atl = update(ctl, atl, 0.0)
+        return (ctl, atl)
+
+    def store_load(self, athlete_id, start, loads, ctl, atl):
+        """Stores daily load / CTL / ATL from `start`, replacing days that were computed before."""
+        start = _to_date(start)
+        rows = [
+            (str(athlete_id), (start + datetime.timedelta(days=i)).isoformat(), float(l), float(c), float(a))
+            for i, (l, c, a) in enumerate(zip(loads, ctl, atl))
+        ]
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO training_load VALUES (?, ?, ?, ?, ?)", rows)
+
+    def query_load(self, athlete_id, oldest, newest):
+        """[(date, load, ctl, atl), ...] for [oldest, newest]."""
+        return self.db.execute(
+            "SELECT date, load, ctl, atl FROM training_load WHERE athlete_id = ? AND date BETWEEN ? AND ? ORDER BY date",
+            (str(athlete_id), _to_date(oldest).isoformat(), _to_date(newest).isoformat()),
+        ).fetchall()
+
+    # --- Readiness ---
+
+    def readiness_state_before(self, athlete_id, date):
+        """
+        HRV and RHR baselines at the end of the last stored day before `date`, as
+        ((mean, variance, days), (mean, variance, days)) with None means, or None.
+        """
+        row = self.db.execute(
+            "SELECT hrv_mean, hrv_variance, hrv_days, rhr_mean, rhr_variance, rhr_days FROM readiness "
+            "WHERE athlete_id = ? AND date < ? ORDER BY date DESC LIMIT 1",
+            (str(athlete_id), _to_date(date).isoformat()),
+        ).fetchone()
+        return (row[:3], row[3:]) if row else None
+
+    def store_readiness(self, athlete_id, start, days):
+        """
+        Stores readiness from `start`, replacing days computed before. `days` are
+        (score, status, hrv_z, rhr_z, strain, hrv_mean, hrv_variance, hrv_days,
+        rhr_mean, rhr_variance, rhr_days) tuples, None for unknown values.
+        """
+        start = _to_date(start)
+        rows = [
+            (str(athlete_id), (start + datetime.timedelta(days=i)).isoformat(), *day)
+            for i, day in enumerate(days)
+        ]
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO readiness VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def query_readiness(self, athlete_id, oldest, newest):
+        """[(date, score, status, hrv_z, rhr_z, strain), ...] for [oldest, newest]."""
+        return self.db.execute(
+            "SELECT date, score, status, hrv_z, rhr_z, strain FROM readiness "
+            "WHERE athlete_id = ? AND date BETWEEN ? AND ? ORDER BY date",
+            (str(athlete_id), _to_date(oldest).isoformat(), _to_date(newest).isoformat()),
+        ).fetchall()
+
+    # --- Sync ---
+
+    def get_range(self, client, kind, oldest, newest):
+        """
+        Range query through the cache: fetches only the missing windows with `client`
+        (an IntervalsClient), stores them, then answers from the local database.
+        """
+        fetch = getattr(client, f"get_{kind}")
+        windows = self.missing_ranges(client.athlete_id, kind, oldest, newest)
+        if not windows:
+            self.hits += 1
+
+        for start, end in windows:
+            self.fetches += 1
+            records = fetch(start.isoformat(), end.isoformat())
+            self.store(client.athlete_id, kind, start, end, records)
+
+        return self.query(client.athlete_id, kind, oldest, newest)
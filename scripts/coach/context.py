@@ -0,0 +1,194 @@
+"""
+Compact training context for AI prompts (mirrors src/lib/training/context.ts).
+
+Reduces raw Intervals.icu activities / wellness into a fixed-size summary:
+acute/chronic load, HRV and resting HR trends, readiness, the last key session, today's
+subjective wellness and weekly minutes per zone. Lines are added in priority
+order until the token budget is reached.
+"""
+
+import datetime
+import math
+import re
+
+from .zones import ZONES, calculate_hr_zones, js_round
+
+DEFAULT_CONTEXT_WEEKS = 4
+DEFAULT_MAX_TOKENS = 400
+
+# Minutes in Z4+Z5 that make a session a "key" session.
+KEY_SESSION_HARD_MIN = 10
+KEY_SESSION_NAME = re.compile(r'interval|threshold|tempo|vo2|race|fartlek|hill|long', re.IGNORECASE)
+
+_SUBJECTIVE_FIELDS = ('sleepQuality', 'fatigue', 'soreness', 'stress', 'mood')
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token), good enough for a budget."""
+    return math.ceil(len(text) / 4)
+
+
+def _day_number(date):
+    return datetime.date.fromisoformat(str(date)[:10]).toordinal()
+
+
+def _round1(value):
+    return js_round(value * 10) / 10
+
+
+def _fmt(value):
+    # 52.0 -> "52", like JS number formatting
+    return f"{value:g}"
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def _signed_percent(value, base):
+    pct = js_round((value / base - 1) * 100)
+    return f"{'+' if pct >= 0 else ''}{pct}%"
+
+
+def format_readiness(state):
+    """One prompt line for a readiness state (coach.readiness / IntervalsCache.query_readiness)."""
+    line = f"Readiness: {state['status']}"
+    if state.get('score') is not None:
+        line += f" (score {js_round(state['score'])})"
+    if state.get('hrv_z') is not None:
+        line += f", HRV z {state['hrv_z']:+.1f}"
+    if state.get('rhr_z') is not None:
+        line += f", RHR z {state['rhr_z']:+.1f}"
+    if state.get('strain') is not None:
+        line += f", strain {state['strain']:.2f}"
+    return line
+
+
+def zone_seconds(activity, lthr=None):
+    """
+    Seconds per zone for one activity: Intervals.icu's HR zone times when present,
+    otherwise the whole moving time in the zone of the average HR.
+    """
+    seconds = [0] * 5
+    zone_times = activity.get('icu_hr_zone_times')
+    if isinstance(zone_times, list) and zone_times:
+        # Athletes with more than five HR zones: fold the top ones into Z5
+        for i, secs in enumerate(zone_times):
+            seconds[min(i, 4)] += secs or 0
+        return seconds
+
+    zone = 1  # Unknown intensity counts as endurance
+    average_hr = activity.get('average_heartrate')
+    if lthr and average_hr:
+        hr_zones = calculate_hr_zones(lthr)
+        zone = max(i for i, z in enumerate(ZONES) if average_hr >= hr_zones[z]['min'])
+    seconds[zone] = activity.get('moving_time') or 0
+    return seconds
+
+
+def activity_load(activity):
+    """Training load for one activity; falls back to minutes when Intervals.icu has no load."""
+    load = activity.get('icu_training_load')
+    return load if load is not None else (activity.get('moving_time') or 0) / 60
+
+
+def build_training_context(activities, wellness, lthr=None, today=None,
+                           weeks=DEFAULT_CONTEXT_WEEKS, max_tokens=DEFAULT_MAX_TOKENS, readiness=None):
+    today = _day_number(today or datetime.date.today().isoformat())
+
+    sessions = sorted(
+        (
+            (today - _day_number(a['start_date_local']), a, zone_seconds(a, lthr))
+            for a in activities or [] if a and a.get('start_date_local')
+        ),
+        key=lambda s: s[0],
+    )
+    sessions = [s for s in sessions if s[0] >= 0]
+
+    days = sorted(
+        ((today - _day_number(w['id']), w) for w in wellness or [] if w and w.get('id')),
+        key=lambda d: d[0],
+    )
+    days = [d for d in days if d[0] >= 0]
+
+    lines = []
+
+    # --- Load ---
+    def load_within(n):
+        return sum(activity_load(a) for days_ago, a, _ in sessions if days_ago < n)
+
+    acute = load_within(7) / 7
+    chronic = load_within(28) / 28
+    line = f"Load/day: acute(7d) {_fmt(_round1(acute))}, chronic(28d) {_fmt(_round1(chronic))}"
+    if chronic > 0:
+        line += f", ratio {acute / chronic:.2f}"
+    lines.append(line)
+
+    fitness = next((w for _, w in days if w.get('ctl') is not None and w.get('atl') is not None), None)
+    if fitness:
+        ctl, atl = fitness['ctl'], fitness['atl']
+        lines.append(f"Fitness: CTL {js_round(ctl)}, ATL {js_round(atl)}, TSB {js_round(ctl - atl)}")
+
+    # --- HRV / RHR trends ---
+    def trend(label, field):
+        values = [(days_ago, w[field]) for days_ago, w in days if isinstance(w.get(field), (int, float))]
+        if not values:
+            return
+        recent = _mean([v for days_ago, v in values if days_ago < 7])
+        baseline = _mean([v for days_ago, v in values if days_ago < 28])
+        line = f"{label}: last {_fmt(_round1(values[0][1]))} ({values[0][0]}d ago)"
+        if recent is not None and baseline:
+            line += (f", 7d {_fmt(_round1(recent))} vs 28d {_fmt(_round1(baseline))}"
+                     f" ({_signed_percent(recent, baseline)})")
+        lines.append(line)
+
+    trend('HRV', 'hrv')
+    trend('Resting HR', 'restingHR')
+    if readiness:
+        age = today - _day_number(readiness['date'])
+        lines.append(format_readiness(readiness) + (f" ({age}d ago)" if age > 0 else ''))
+
+    # --- Last key session ---
+    key = next(
+        (s for s in sessions
+         if s[2][3] + s[2][4] >= KEY_SESSION_HARD_MIN * 60 or KEY_SESSION_NAME.search(s[1].get('name') or '')),
+        None,
+    )
+    if key:
+        days_ago, a, zones = key
+        name = (a.get('name') or a.get('type') or 'Session')[:40]
+        lines.append(
+            f"Last key session: {a['start_date_local'][:10]} ({days_ago}d ago) \"{name}\" "
+            f"{js_round((a.get('moving_time') or 0) / 60)}min, load {js_round(activity_load(a))}, "
+            f"Z4+ {js_round((zones[3] + zones[4]) / 60)}min"
+        )
+    else:
+        lines.append("Last key session: none in range")
+
+    # --- Today's subjective wellness ---
+    latest = days[0][1] if days and days[0][0] == 0 else None
+    if latest:
+        parts = []
+        if latest.get('sleepSecs'):
+            parts.append(f"sleep {_fmt(_round1(latest['sleepSecs'] / 3600))}h")
+        parts.extend(f"{field} {latest[field]}/4" for field in _SUBJECTIVE_FIELDS if latest.get(field) is not None)
+        if parts:
+            lines.append(f"Wellness today: {', '.join(parts)}")
+
+    # --- Weekly minutes per zone (most recent week first) ---
+    lines.append("Minutes per week Z1/Z2/Z3/Z4/Z5 = total (sessions):")
+    for w in range(weeks):
+        in_week = [zones for days_ago, _, zones in sessions if w * 7 <= days_ago < (w + 1) * 7]
+        minutes = [sum(zones[i] for zones in in_week) / 60 for i in range(5)]
+        label = 'last 7d' if w == 0 else f"{w * 7}-{(w + 1) * 7}d ago"
+        lines.append(f"  {label}: {'/'.join(str(js_round(m)) for m in minutes)} = {js_round(sum(minutes))} ({len(in_week)})")
+
+    # Keep whole lines in priority order until the budget is spent
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line + '\n')
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return '\n'.join(kept)
@@ -0,0 +1,51 @@
+"""
+Per-model latency histograms with the same buckets as LatencyHistogram in
+src/lib/ai/dispatcher.ts.
+
+The app's hedged dispatch runs in TS (AIService); list_models.py uses these to
+report the p90 latency the dispatcher waits before hedging to another provider.
+"""
+
+import math
+import threading
+
+# Bucket upper bounds in ms: 50ms * 1.25^i up to ~3 minutes (~10% resolution per bucket).
+BUCKET_BOUNDS = []
+_bound = 50.0
+while _bound < 180000:
+    BUCKET_BOUNDS.append(round(_bound))
+    _bound *= 1.25
+BUCKET_BOUNDS.append(float('inf'))
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds (ms)."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKET_BOUNDS)
+        self.count = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, ms):
+        i = 0
+        while ms > BUCKET_BOUNDS[i]:
+            i += 1
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = math.ceil(p * self.count)
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
@@ -0,0 +1,237 @@
+"""
+Intervals.icu API client (mirrors src/lib/intervals/client.ts).
+
+Connections are kept alive and pooled per host, and the auth headers are
+built once per client, so a sync over many athletes pays for one TLS
+handshake per pooled connection instead of one per request.
+"""
+
+import base64
+import datetime
+import http.client
+import json
+import os
+import queue
+import threading
+import urllib.parse
+
+# INTERVALS_BASE_URL points every script at another server, e.g. scripts/mock_intervals_server.py
+DEFAULT_BASE_URL = os.environ.get('INTERVALS_BASE_URL', "https://intervals.icu/api/v1")
+
+# Errors that mean a pooled keep-alive connection was closed by the server
+# while it sat idle. Idempotent requests are replayed once on a fresh connection.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+# Methods that can be sent twice without a second effect
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+
+
+def upload_is_idempotent(events, upsert):
+    """
+    Whether an /events/bulk upload can be repeated safely: only as an upsert where
+    every event carries an external_id. A plain POST the server already processed
+    would create every event a second time.
+    """
+    return bool(upsert) and all(event.get('external_id') for event in events)
+
+
+class IntervalsAPIError(Exception):
+    """Raised for any non-2xx response from Intervals.icu."""
+
+    def __init__(self, status, reason, body, headers=None):
+        super().__init__(f"Intervals.icu API Error: {status} {reason} - {body}")
+        self.status = status
+        self.reason = reason
+        self.body = body
+        self.headers = headers or {}
+
+
+def is_future_or_today(date_str):
+    """
+    Checks if a date string (YYYY-MM-DD or ISO) is today or in the future.
+    SAFEGUARD: Mirrors IntervalsClient.isFutureOrToday in the TS client.
+    """
+    date_part = str(date_str).split('T')[0]
+    return date_part >= datetime.date.today().isoformat()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of keep-alive HTTP(S) connections to a single host.
+
+    One pool can be shared by many IntervalsClient instances (one per
+    athlete / API key) so connections are reused across the whole sync.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, size=4, timeout=30):
+        parts = urllib.parse.urlsplit(base_url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported URL scheme: {base_url}")
+
+        self.base_url = base_url.rstrip('/')
+        self.path_prefix = parts.path.rstrip('/')
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.connections_opened = 0
+
+    def _new_connection(self):
+        conn_cls = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+        with self._lock:
+            self.connections_opened += 1
+        return conn_cls(self._host, self._port, timeout=self._timeout)
+
+    def acquire(self):
+        """Returns (connection, reused) - an idle connection if available, else a new one."""
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def release(self, conn):
+        """Returns a connection to the pool, closing it if the pool is full or closed."""
+        if self._closed:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class IntervalsClient:
+    def __init__(self, api_key, athlete_id='0', base_url=DEFAULT_BASE_URL, pool=None, timeout=30):
+        self.athlete_id = str(athlete_id)
+        self._owns_pool = pool is None
+        self.pool = pool or ConnectionPool(base_url, timeout=timeout)
+
+        auth = base64.b64encode(f"API_KEY:{api_key}".encode('ascii')).decode('ascii')
+        self._headers = {
+            'Authorization': f'Basic {auth}',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'Connection': 'keep-alive',
+        }
+
+    # --- Transport ---
+
+    def request(self, method, endpoint, payload=None, athlete_scoped=True, idempotent=None):
+        """
+        Sends a request to /athlete/{athlete_id}{endpoint} (or just {endpoint} when not
+        athlete_scoped) and returns the decoded JSON body (or None for an empty body).
+        Raises IntervalsAPIError on non-2xx responses.
+        `idempotent` (default: by method) allows replaying the request after a dropped
+        keep-alive connection.
+        """
+        scope = f"/athlete/{self.athlete_id}" if athlete_scoped else ''
+        path = f"{self.pool.path_prefix}{scope}{endpoint}"
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+
+        status, reason, headers, raw = self._send(method, path, body, idempotent)
+        text = raw.decode('utf-8') if raw else ''
+
+        if status >= 400:
+            raise IntervalsAPIError(status, reason, text, headers)
+        return json.loads(text) if text else None
+
+    def _send(self, method, path, body, idempotent):
+        conn, reused = self.pool.acquire()
+        try:
+            conn.request(method, path, body=body, headers=self._headers)
+            response = conn.getresponse()
+            # The body must be fully read before the connection can be reused.
+            raw = response.read()
+        except _STALE_CONNECTION_ERRORS:
+            conn.close()
+            # The server may have processed the request before dropping the connection
+            if not reused or not idempotent:
+                raise
+            # Idle connection was dropped server-side; retry once on a fresh one.
+            conn = self.pool._new_connection()
+            try:
+                conn.request(method, path, body=body, headers=self._headers)
+                response = conn.getresponse()
+                raw = response.read()
+            except Exception:
+                conn.close()
+                raise
+        except Exception:
+            conn.close()
+            raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self.pool.release(conn)
+        return response.status, response.reason, dict(response.getheaders()), raw
+
+    def close(self):
+        """Closes the underlying pool if this client created it."""
+        if self._owns_pool:
+            self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- API ---
+
+    def get_activities(self, start_date, end_date):
+        return self.request('GET', f"/activities?oldest={start_date}&newest={end_date}")
+
+    def get_activity_streams(self, activity_id, types=('time', 'heartrate', 'velocity_smooth')):
+        """Per-second streams of one activity: [{"type": ..., "data": [...]}, ...]."""
+        return self.request('GET', f"/activity/{activity_id}/streams?types={','.join(types)}", athlete_scoped=False)
+
+    def get_wellness(self, start_date, end_date):
+        return self.request('GET', f"/wellness?oldest={start_date}&newest={end_date}")
+
+    def get_events(self, start_date, end_date):
+        return self.request('GET', f"/events?oldest={start_date}&newest={end_date}")
+
+    def get_event(self, event_id):
+        return self.request('GET', f"/events/{event_id}")
+
+    def upload_workouts(self, events, upsert=False):
+        """
+        Creates/updates events via the /events/bulk endpoint.
+        `events` is a list of Intervals.icu event payloads; returns the created events.
+        With upsert=True, events carrying an `external_id` update their existing copy.
+        """
+        events = list(events)
+        endpoint = '/events/bulk?upsert=true' if upsert else '/events/bulk'
+        return self.request('POST', endpoint, events, idempotent=upload_is_idempotent(events, upsert))
+
+    def delete_event(self, event_id):
+        return self.request('DELETE', f"/events/{event_id}")
+
+    def delete_events(self, event_ids):
+        """Deletes many events in one /events/bulk-delete call."""
+        return self.request('PUT', '/events/bulk-delete', [{'id': event_id} for event_id in event_ids])
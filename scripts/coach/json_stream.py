@@ -0,0 +1,141 @@
+"""
+Incremental parser for streamed workout JSON (mirrors src/lib/ai/jsonStream.ts).
+
+Feed model output as it arrives; every block of the top-level "structure"
+array is returned as soon as its closing brace is seen, so the warmup can be
+shown while the main set is still being generated:
+
+    parser = StructureStreamParser()
+    for chunk in chunks:
+        for block in parser.feed(chunk):
+            print(block)
+    workout = parser.result()
+
+Only the characters that change nesting are inspected ({ } [ ] " : , and
+escapes inside strings), and each chunk is scanned once.
+"""
+
+import json
+import re
+
+BLOCK_TYPES = ('warmup', 'interval', 'recovery', 'cooldown', 'steady', 'main')
+ZONES = ('Z1', 'Z2', 'Z3', 'Z4', 'Z5')
+
+_SPECIAL = re.compile(r'[{}\[\]":,\\]')
+
+
+def is_valid_block(block):
+    """Minimal shape check before a streamed block is handed to the UI."""
+    if not isinstance(block, dict) or not isinstance(block.get('type'), str):
+        return False
+    duration = block.get('duration_min')
+    if isinstance(duration, bool) or not isinstance(duration, (int, float)) or duration <= 0:
+        return False
+    zone = block.get('zone')
+    return zone is None or zone in ZONES
+
+
+class StructureStreamParser:
+    def __init__(self, key='structure'):
+        self.key = key
+        self.buffer = ''
+        self.rejected = 0
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = -1
+        self._last_string = None
+        self._pending_key = None
+        self._array_depth = None   # depth of the structure array once found
+        self._element_start = -1
+        self._done = False
+
+    def feed(self, chunk):
+        """Adds a chunk of model output and returns the blocks completed by it."""
+        self.buffer += chunk
+        blocks = []
+        if self._done:
+            return blocks
+
+        text = self.buffer
+        pos = self._pos
+        if self._depth == 0 and not self._in_string:
+            # Skip any prose / markdown fence before the JSON object
+            start = text.find('{', pos)
+            if start == -1:
+                self._pos = len(text)
+                return blocks
+            pos = start
+
+        while True:
+            match = _SPECIAL.search(text, pos)
+            if match is None:
+                pos = len(text)
+                break
+            i = match.start()
+            c = text[i]
+            pos = i + 1
+
+            if self._in_string:
+                if c == '\\':
+                    if i + 1 >= len(text):
+                        pos = i  # escape split across chunks; rescan it next time
+                        break
+                    pos = i + 2
+                elif c == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1:i]
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in '{[':
+                self._depth += 1
+                if self._array_depth is None:
+                    if c == '[' and self._depth == 2 and self._pending_key == self.key:
+                        self._array_depth = self._depth
+                elif c == '{' and self._depth == self._array_depth + 1:
+                    self._element_start = i
+            elif c in '}]':
+                self._depth -= 1
+                if self._array_depth is not None:
+                    if self._depth < self._array_depth:
+                        self._done = True
+                        break
+                    if self._depth == self._array_depth and self._element_start >= 0:
+                        self._emit(text[self._element_start:i + 1], blocks)
+                        self._element_start = -1
+            elif c == ':' and self._depth == 1:
+                self._pending_key = self._last_string
+            elif c == ',' and self._depth == 1:
+                self._pending_key = None
+
+        self._pos = pos
+        return blocks
+
+    def _emit(self, raw, blocks):
+        try:
+            block = json.loads(raw)
+        except ValueError:
+            self.rejected += 1
+            return
+        if is_valid_block(block):
+            blocks.append(block)
+        else:
+            self.rejected += 1
+
+    def result(self):
+        """Parses the complete response (first '{' to last '}'). Raises ValueError if it is not JSON."""
+        start = self.buffer.find('{')
+        end = self.buffer.rfind('}')
+        if start == -1 or end == -1:
+            raise ValueError("No JSON found")
+        return json.loads(self.buffer[start:end + 1])
+
+
+def iter_blocks(chunks, parser=None):
+    """Yields validated structure blocks from an iterable of text chunks."""
+    parser = parser or StructureStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
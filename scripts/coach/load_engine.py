@@ -0,0 +1,136 @@
+"""
+Training-load engine (NumPy): daily load and CTL / ATL / TSB.
+
+    CTL (fitness)  exponentially weighted load, 42-day time constant
+    ATL (fatigue)  exponentially weighted load, 7-day time constant
+    TSB (form)     CTL - ATL
+
+Daily load is Intervals.icu's icu_training_load when present, otherwise an
+hrTSS estimate from average HR (or an HR stream) relative to LTHR, otherwise
+minutes at an assumed endurance intensity.
+
+Series for a whole cohort are computed at once: loads are an (athletes, days)
+matrix and each day is one vector step over all athletes. update() advances
+existing CTL / ATL by a single day, so a nightly job only computes new days.
+"""
+
+import datetime
+import math
+
+import numpy as np
+
+CTL_DAYS = 42
+ATL_DAYS = 7
+# Same decay Intervals.icu uses: value += (load - value) * (1 - e^(-1/days))
+CTL_ALPHA = 1 - math.exp(-1 / CTL_DAYS)
+ATL_ALPHA = 1 - math.exp(-1 / ATL_DAYS)
+
+# Intensity factor assumed when an activity has neither load nor HR (easy aerobic).
+DEFAULT_INTENSITY = 0.75
+
+
+def _to_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def hr_stream_load(heartrate, lthr, sample_seconds=1.0):
+    """hrTSS of an HR stream: sum over samples of (hr / lthr)^2, scaled to 100 per hour at LTHR."""
+    hr = np.asarray(heartrate, dtype=np.float64)
+    hr = hr[np.isfinite(hr) & (hr > 0)]
+    return float(np.sum((hr / lthr) ** 2) * sample_seconds / 3600 * 100)
+
+
+def activity_load(activity, lthr=None):
+    """TSS-like load for one activity summary."""
+    load = activity.get('icu_training_load')
+    if load is not None:
+        return float(load)
+
+    hours = (activity.get('moving_time') or 0) / 3600
+    average_hr = activity.get('average_heartrate')
+    intensity = average_hr / lthr if lthr and average_hr else DEFAULT_INTENSITY
+    return hours * intensity ** 2 * 100
+
+
+def daily_loads(activities, start, end, lthr=None):
+    """(days,) array of summed load per day for [start, end]; activities outside are ignored."""
+    start, end = _to_date(start), _to_date(end)
+    days = (end - start).days + 1
+    offsets, loads = [], []
+    for activity in activities or []:
+        if not activity.get('start_date_local'):
+            continue
+        offset = (_to_date(activity['start_date_local']) - start).days
+        if 0 <= offset < days:
+            offsets.append(offset)
+            loads.append(activity_load(activity, lthr))
+    return np.bincount(np.asarray(offsets, dtype=np.intp), weights=np.asarray(loads, dtype=np.float64),
+                       minlength=days)[:days]
+
+
+def cohort_loads(activities_by_athlete, start, end, lthrs=None):
+    """(athletes, days) load matrix; `lthrs` is one LTHR (or None) per athlete."""
+    lthrs = lthrs if lthrs is not None else [None] * len(activities_by_athlete)
+    days = (_to_date(end) - _to_date(start)).days + 1
+    matrix = np.zeros((len(activities_by_athlete), days))
+    for i, (activities, lthr) in enumerate(zip(activities_by_athlete, lthrs)):
+        matrix[i] = daily_loads(activities, start, end, lthr)
+    return matrix
+
+
+def update(ctl, atl, load):
+    """Advances CTL / ATL by one day of `load`. Works on scalars or arrays (one entry per athlete)."""
+    ctl = ctl + (load - ctl) * CTL_ALPHA
+    atl = atl + (load - atl) * ATL_ALPHA
+    return ctl, atl
+
+
+def load_series(loads, initial_ctl=0.0, initial_atl=0.0):
+    """
+    CTL / ATL / TSB after each day of `loads`, shape (days,) or (athletes, days).
+    `initial_*` is the state at the end of the day before the first column
+    (scalar, or one value per athlete). Returns (ctl, atl, tsb) arrays shaped like `loads`.
+    """
+    loads = np.asarray(loads, dtype=np.float64)
+    ctl = np.empty_like(loads)
+    atl = np.empty_like(loads)
+    c = np.asarray(initial_ctl, dtype=np.float64)
+    a = np.asarray(initial_atl, dtype=np.float64)
+    for day in range(loads.shape[-1]):
+        c, a = update(c, a, loads[..., day])
+        ctl[..., day] = c
+        atl[..., day] = a
+    return ctl, atl, ctl - atl
+
+
+def weekly_summary(activities, start, end, lthr=None, initial_ctl=0.0, initial_atl=0.0):
+    """
+    Week-by-week history for planning prompts: hours, load and the CTL / ATL / TSB
+    at the end of each 7-day block from `start` (a trailing partial week is included).
+    """
+    start, end = _to_date(start), _to_date(end)
+    loads = daily_loads(activities, start, end, lthr)
+    ctl, atl, tsb = load_series(loads, initial_ctl, initial_atl)
+
+    minutes = np.zeros(len(loads))
+    for activity in activities or []:
+        if not activity.get('start_date_local'):
+            continue
+        offset = (_to_date(activity['start_date_local']) - start).days
+        if 0 <= offset < len(loads):
+            minutes[offset] += (activity.get('moving_time') or 0) / 60
+
+    weeks = []
+    for first in range(0, len(loads), 7):
+        last = min(first + 7, len(loads)) - 1
+        weeks.append({
+            'week_start': (start + datetime.timedelta(days=first)).isoformat(),
+            'hours': round(float(minutes[first:last + 1].sum()) / 60, 1),
+            'load': round(float(loads[first:last + 1].sum())),
+            'ctl': round(float(ctl[last]), 1),
+            'atl': round(float(atl[last]), 1),
+            'tsb': round(float(tsb[last]), 1),
+        })
+    return weeks
@@ -0,0 +1,370 @@
+"""
+Local stand-in for the Intervals.icu API, for load and regression testing.
+
+Implements the endpoints the client uses under /api/v1/athlete/{id}:
+  GET    /events?oldest=&newest=
+  POST   /events/bulk[?upsert=true]
+  GET    /events/{id}
+  DELETE /events/{id}
+  PUT    /events/bulk-delete
+  GET    /activities?oldest=&newest=
+  GET    /wellness?oldest=&newest=
+
+and GET /api/v1/activity/{id}/streams (1 Hz time / heartrate / velocity_smooth).
+
+Activities and wellness are synthetic but deterministic: the same seed,
+athlete and date always produce the same records. Events live in memory.
+Latency, random 429s and a per-API-key rate limit are configurable, and
+GET /_stats returns request counters.
+"""
+
+import base64
+import collections
+import datetime
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_ATHLETE_PATH = re.compile(r'^/api/v1/athlete/(?P<athlete>[^/]+)(?P<rest>/.*)$')
+_EVENT_ID_PATH = re.compile(r'^/events/(?P<id>\d+)$')
+_EVENT_ID_SUFFIX = re.compile(r'/\d+$')
+_STREAMS_PATH = re.compile(r'^/api/v1/activity/(?P<activity>[^/]+)/streams$')
+
+
+def _date_range(oldest, newest):
+    start = datetime.date.fromisoformat(oldest[:10])
+    end = datetime.date.fromisoformat(newest[:10])
+    for offset in range((end - start).days + 1):
+        yield start + datetime.timedelta(days=offset)
+
+
+class SyntheticAthletes:
+    """Deterministic activity / wellness generator seeded per (seed, athlete, date)."""
+
+    def __init__(self, seed=42, training_days_per_week=5):
+        self.seed = seed
+        self.training_probability = training_days_per_week / 7
+
+    def _rng(self, athlete_id, date, kind):
+        return random.Random(f"{self.seed}:{athlete_id}:{date.isoformat()}:{kind}")
+
+    def athlete_profile(self, athlete_id):
+        rng = random.Random(f"{self.seed}:{athlete_id}:profile")
+        return {'thresholdPace': rng.randint(210, 330), 'lthr': rng.randint(155, 185)}
+
+    def activities(self, athlete_id, oldest, newest):
+        profile = self.athlete_profile(athlete_id)
+        records = []
+        for date in _date_range(oldest, newest):
+            rng = self._rng(athlete_id, date, 'activity')
+            if rng.random() > self.training_probability:
+                continue
+            moving_time = rng.choice([30, 40, 45, 50, 60, 75, 90, 120]) * 60
+            pace = profile['thresholdPace'] * rng.uniform(1.0, 1.4)
+            records.append({
+                'id': f"i{rng.randrange(10**8, 10**9)}",
+                'start_date_local': f"{date.isoformat()}T{rng.randint(6, 19):02d}:{rng.choice(['00', '30'])}:00",
+                'type': 'Run',
+                'name': rng.choice(['Easy Run', 'Long Run', 'Tempo', 'Intervals', 'Recovery Jog']),
+                'moving_time': moving_time,
+                'elapsed_time': moving_time + rng.randint(0, 600),
+                'distance': round(moving_time / pace * 1000, 1),
+                'average_heartrate': round(profile['lthr'] * rng.uniform(0.75, 0.98)),
+                'icu_training_load': round(moving_time / 60 * rng.uniform(0.6, 1.3)),
+            })
+        return records
+
+    def streams(self, activity_id):
+        """Random-walk 1 Hz HR / speed streams; the same activity id always gives the same data."""
+        rng = random.Random(f"{self.seed}:{activity_id}:streams")
+        seconds = rng.randint(20, 90) * 60
+        hr, speed = [], []
+        heart, velocity = rng.uniform(120, 150), rng.uniform(2.5, 3.5)
+        for _ in range(seconds):
+            heart = min(195.0, max(95.0, heart + rng.gauss(0, 1.5)))
+            velocity = min(6.0, max(1.5, velocity + rng.gauss(0, 0.05)))
+            hr.append(round(heart))
+            speed.append(round(velocity, 2))
+        return [
+            {'type': 'time', 'data': list(range(seconds))},
+            {'type': 'heartrate', 'data': hr},
+            {'type': 'velocity_smooth', 'data': speed},
+        ]
+
+    def wellness(self, athlete_id, oldest, newest):
+        records = []
+        for date in _date_range(oldest, newest):
+            rng = self._rng(athlete_id, date, 'wellness')
+            records.append({
+                'id': date.isoformat(),
+                'hrv': round(rng.gauss(65, 8), 1),
+                'restingHR': round(rng.gauss(50, 3)),
+                'sleepSecs': rng.randint(5 * 3600, 9 * 3600),
+                'sleepQuality': rng.randint(1, 4),
+                'fatigue': rng.randint(1, 4),
+                'soreness': rng.randint(1, 4),
+                'stress': rng.randint(1, 4),
+                'mood': rng.randint(1, 4),
+                'updated': f"{date.isoformat()}T08:00:00",
+            })
+        return records
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MockIntervals/1.0'
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response waits on the client's delayed ACK (~40ms).
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    # --- Plumbing ---
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _api_key(self):
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('Basic '):
+            return None
+        try:
+            user, _, key = base64.b64decode(auth[6:]).decode('ascii').partition(':')
+        except ValueError:
+            return None
+        return key if user == 'API_KEY' and key else None
+
+    def _handle(self, method):
+        mock = self.server.mock
+        parts = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(parts.query))
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        if parts.path == '/_stats':
+            return self._send(200, mock.snapshot_stats())
+
+        mock.delay()
+
+        api_key = self._api_key()
+        if api_key is None:
+            mock.count('401')
+            return self._send(401, {'error': 'Unauthorized'})
+
+        throttled, retry_after = mock.check_rate(api_key)
+        if throttled:
+            mock.count('429')
+            return self._send(429, {'error': 'Too Many Requests'}, {'Retry-After': f"{retry_after:g}"})
+
+        streams = _STREAMS_PATH.match(parts.path)
+        if streams and method == 'GET':
+            mock.count('GET /activity/{id}/streams')
+            return self._send(200, mock.data.streams(streams.group('activity')))
+
+        match = _ATHLETE_PATH.match(parts.path)
+        if not match:
+            mock.count('404')
+            return self._send(404, {'error': 'Not Found'})
+
+        athlete_id, rest = match.group('athlete'), match.group('rest')
+        mock.count(f"{method} {_EVENT_ID_SUFFIX.sub('/{id}', urllib.parse.urlsplit(rest).path)}")
+        status, payload = mock.route(method, athlete_id, rest, query, body)
+        self._send(status, payload)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+class MockIntervalsServer:
+    """
+    In-process Intervals.icu stand-in.
+
+        with MockIntervalsServer(latency=0.02, error_rate=0.05) as server:
+            client = IntervalsClient('key', 'i1', base_url=server.base_url)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit=None, burst=None, retry_after=1.0, seed=42):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit          # requests / second per API key, None = unlimited
+        self.burst = burst or (rate_limit or 0) * 2
+        self.retry_after = retry_after
+        self.data = SyntheticAthletes(seed)
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._events = collections.defaultdict(dict)  # athlete -> {id: event}
+        self._next_id = 1
+        self.stats = collections.Counter()
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    # --- Lifecycle ---
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Behaviour knobs ---
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+            self.stats['requests'] += 1
+
+    def snapshot_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def delay(self):
+        if self.latency or self.jitter:
+            with self._lock:
+                extra = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+            time.sleep(self.latency + extra)
+
+    def check_rate(self, api_key):
+        """Returns (throttled, retry_after_seconds) for one request from `api_key`."""
+        with self._lock:
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return True, self.retry_after
+            if not self.rate_limit:
+                return False, 0
+
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(api_key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate_limit)
+            if tokens < 1:
+                self._buckets[api_key] = (tokens, now)
+                return True, round((1 - tokens) / self.rate_limit, 3)
+            self._buckets[api_key] = (tokens - 1, now)
+            return False, 0
+
+    # --- Routes ---
+
+    def route(self, method, athlete_id, rest, query, body):
+        path = urllib.parse.urlsplit(rest).path
+        oldest, newest = query.get('oldest'), query.get('newest')
+
+        if method == 'GET' and path == '/activities' and oldest and newest:
+            return 200, self.data.activities(athlete_id, oldest, newest)
+        if method == 'GET' and path == '/wellness' and oldest and newest:
+            return 200, self.data.wellness(athlete_id, oldest, newest)
+        if method == 'GET' and path == '/events' and oldest and newest:
+            return 200, self._list_events(athlete_id, oldest, newest)
+        if method == 'POST' and path == '/events/bulk':
+            try:
+                events = json.loads(body or b'[]')
+            except ValueError:
+                return 400, {'error': 'Invalid JSON'}
+            if not isinstance(events, list):
+                return 400, {'error': 'Expected an array of events'}
+            return 200, self._bulk(athlete_id, events, query.get('upsert') == 'true')
+        if method == 'PUT' and path == '/events/bulk-delete':
+            try:
+                refs = json.loads(body or b'[]')
+            except ValueError:
+                return 400, {'error': 'Invalid JSON'}
+            return 200, {'eventsDeleted': self._bulk_delete(athlete_id, refs)}
+
+        match = _EVENT_ID_PATH.match(path)
+        if match:
+            event_id = int(match.group('id'))
+            with self._lock:
+                event = self._events[athlete_id].get(event_id)
+                if event is None:
+                    return 404, {'error': 'Event not found'}
+                if method == 'GET':
+                    return 200, event
+                if method == 'DELETE':
+                    del self._events[athlete_id][event_id]
+                    return 200, event
+                if method == 'PUT':
+                    event.update(json.loads(body or b'{}'))
+                    event['id'] = event_id
+                    return 200, event
+
+        return 404, {'error': 'Not Found'}
+
+    def _list_events(self, athlete_id, oldest, newest):
+        with self._lock:
+            events = list(self._events[athlete_id].values())
+        return sorted(
+            (e for e in events if oldest[:10] <= str(e.get('start_date_local', ''))[:10] <= newest[:10]),
+            key=lambda e: (e.get('start_date_local', ''), e['id']),
+        )
+
+    def _bulk(self, athlete_id, events, upsert):
+        created = []
+        with self._lock:
+            store = self._events[athlete_id]
+            by_external = {e['external_id']: e for e in store.values() if e.get('external_id')} if upsert else {}
+            for payload in events:
+                existing = by_external.get(payload.get('external_id'))
+                if existing is not None:
+                    existing.update(payload)
+                    created.append(dict(existing))
+                    continue
+                event = dict(payload, id=self._next_id, athlete_id=athlete_id)
+                self._next_id += 1
+                store[event['id']] = event
+                if event.get('external_id'):
+                    by_external[event['external_id']] = event
+                created.append(dict(event))
+        return created
+
+    def _bulk_delete(self, athlete_id, refs):
+        ids = {ref['id'] for ref in refs if ref.get('id') is not None}
+        external_ids = {ref['external_id'] for ref in refs if ref.get('external_id')}
+        with self._lock:
+            store = self._events[athlete_id]
+            doomed = [i for i, e in store.items() if i in ids or e.get('external_id') in external_ids]
+            for event_id in doomed:
+                del store[event_id]
+        return len(doomed)
@@ -0,0 +1,166 @@
+"""
+Batched plan upload through /events/bulk.
+
+Collects a week (or a whole Prisma `Plan` with its `workouts`) into chunked
+bulk payloads, so a 16-week plan takes a handful of requests instead of one
+round trip per workout. Each workout gets back its own UploadResult.
+
+Uploads upsert on external_id by default (as SyncEngine.push_workouts and
+reconcile do), so re-pushing a plan updates its events instead of adding a
+second copy. Pass upsert=False to always create new events.
+"""
+
+import collections
+import http.client
+import json
+
+from .builder import convert_structure_to_text, total_duration_min
+from .intervals import IntervalsAPIError, is_future_or_today
+
+# Events per /events/bulk request. Keeps request bodies small enough that a
+# single failing chunk does not cost a whole season's upload.
+BULK_CHUNK_SIZE = 50
+
+DEFAULT_START_TIME = "09:00:00"
+
+# Maps our sport names to Intervals.icu activity types.
+SPORT_TYPES = {
+    'run': 'Run',
+    'bike': 'Ride',
+    'strength': 'WeightTraining',
+    'yoga': 'Yoga',
+    'mobility': 'Workout',
+}
+
+UploadResult = collections.namedtuple('UploadResult', ['workout', 'event', 'error'])
+UploadResult.__doc__ = "Outcome for one workout: the created Intervals.icu event, or an error message."
+
+
+def start_date_local(date):
+    """Normalizes a date / ISO datetime into Intervals.icu's start_date_local (local 09:00 by default)."""
+    date_str = date.isoformat() if hasattr(date, 'isoformat') else str(date)
+    date_part = date_str.split('T')[0]
+    return f"{date_part}T{DEFAULT_START_TIME}"
+
+
+def _parse_structure(structure):
+    # Prisma stores Workout.structure as a JSON string; AI output has it as a list.
+    if isinstance(structure, str):
+        try:
+            return json.loads(structure)
+        except ValueError:
+            return None
+    return structure
+
+
+def workout_to_event(workout, date=None):
+    """
+    Builds an Intervals.icu event payload from either a Prisma `Workout` row
+    (date/title/sport/durationMin/structure) or an AI-generated workout
+    (workout_name/sport/description/structure) plus an explicit `date`.
+    """
+    structure = _parse_structure(workout.get('structure'))
+    builder_text = convert_structure_to_text(structure)
+    notes = workout.get('description') or ''
+    description = f"{builder_text}\n\n{notes}".strip() if builder_text else notes
+
+    if workout.get('durationMin') is not None:
+        moving_time = workout['durationMin'] * 60
+    else:
+        moving_time = round(total_duration_min(structure) * 60)
+
+    event = {
+        'category': 'WORKOUT',
+        'start_date_local': start_date_local(date or workout['date']),
+        'name': workout.get('title') or workout.get('workout_name'),
+        'description': description,
+        'type': SPORT_TYPES.get(workout.get('sport'), 'Ride'),
+        'moving_time': moving_time,
+    }
+    # Lets Intervals.icu upsert the same workout instead of duplicating it on re-push.
+    if workout.get('id'):
+        event['external_id'] = str(workout['id'])
+    return event
+
+
+def iter_chunks(items, size=BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def match_created(chunk, created):
+    """
+    Lines up a /events/bulk response with the (workout, payload) chunk that was sent.
+    Returns the created event (or None) for each item.
+    """
+    # The endpoint answers with the created events in request order. Fall back to
+    # matching on (start_date_local, name) if the response does not line up.
+    if isinstance(created, list) and len(created) == len(chunk):
+        return created
+
+    by_key = {}
+    for event in created or []:
+        by_key.setdefault((event.get('start_date_local'), event.get('name')), event)
+    return [by_key.get((payload['start_date_local'], payload['name'])) for _, payload in chunk]
+
+
+def upload_events(client, items, chunk_size=BULK_CHUNK_SIZE, upsert=True):
+    """
+    Uploads (workout, event_payload) pairs in chunked /events/bulk calls.
+    Returns one UploadResult per item, in input order. A failing chunk (an API
+    error or a dropped connection) marks only its own items as failed; the
+    remaining chunks are still sent.
+    """
+    items = list(items)
+    results = []
+
+    for chunk in iter_chunks(items, chunk_size):
+        try:
+            created = client.upload_workouts([payload for _, payload in chunk], upsert=upsert)
+        except IntervalsAPIError as e:
+            results.extend(UploadResult(workout, None, f"{e.status} {e.body}") for workout, _ in chunk)
+            continue
+        except (OSError, http.client.HTTPException) as e:
+            # URLError is an OSError
+            results.extend(UploadResult(workout, None, f"{type(e).__name__}: {e}") for workout, _ in chunk)
+            continue
+
+        for (workout, _), event in zip(chunk, match_created(chunk, created)):
+            error = None if event is not None else "Missing from bulk response"
+            results.append(UploadResult(workout, event, error))
+
+    return results
+
+
+def prepare_uploads(workouts):
+    """
+    Builds event payloads for `workouts`.
+    SAFEGUARD: Past-dated workouts are not sent (mirrors IntervalsClient.uploadWorkout).
+
+    Returns (results, pending): `results` has an UploadResult for each rejected workout
+    and None elsewhere; `pending` is a list of (index, (workout, event)) still to upload.
+    """
+    results = [None] * len(workouts)
+    pending = []
+
+    for i, workout in enumerate(workouts):
+        event = workout_to_event(workout)
+        if not is_future_or_today(event['start_date_local']):
+            results[i] = UploadResult(workout, None, "Cannot upload workouts to the past.")
+        else:
+            pending.append((i, (workout, event)))
+    return results, pending
+
+
+def upload_plan_workouts(client, workouts, chunk_size=BULK_CHUNK_SIZE, upsert=True):
+    """Uploads a list of workouts (a week, or a Plan's workouts) in bulk."""
+    results, pending = prepare_uploads(workouts)
+    uploaded = upload_events(client, [item for _, item in pending], chunk_size, upsert)
+    for (i, _), result in zip(pending, uploaded):
+        results[i] = result
+    return results
+
+
+def upload_plan(client, plan, chunk_size=BULK_CHUNK_SIZE, upsert=True):
+    """Uploads every workout of a Prisma `Plan` (loaded with `include: { workouts: true }`)."""
+    return upload_plan_workouts(client, plan.get('workouts') or [], chunk_size, upsert)
@@ -0,0 +1,197 @@
+"""
+Daily readiness from HRV, resting HR and subjective wellness (NumPy; mirrors src/lib/training/readiness.ts).
+
+Each athlete keeps an exponentially weighted baseline (mean and variance, ~28-day
+time constant) of ln(HRV) and resting HR. A day's reading is scored as a z-score
+against the baseline before that day and then folded into it; days without a
+reading leave the baseline unchanged. Subjective wellness (Intervals.icu 1-4,
+1 = best) becomes a 0 (fresh) - 1 (worst) strain.
+
+Backfills run on (athletes, days) matrices with NaN for missing readings: one
+vectorized step per day updates every athlete at once, as load_engine does for
+CTL / ATL, and `update` is the same step for a single new day.
+"""
+
+import datetime
+import warnings
+from collections import namedtuple
+
+import numpy as np
+
+BASELINE_DAYS = 28
+ALPHA = 1 - np.exp(-1 / BASELINE_DAYS)
+# Readings folded in before z-scores are reported
+MIN_BASELINE_DAYS = 7
+# |z| cap, so a single artefact reading cannot dominate the score
+MAX_Z = 3.0
+# Std floors: ln HRV 0.05 (~5%), RHR 1.5 bpm
+MIN_STD_HRV = 0.05
+MIN_STD_RHR = 1.5
+
+SUBJECTIVE_FIELDS = ('sleepQuality', 'fatigue', 'soreness', 'stress', 'mood')
+INTERVALS_SCALE = 4
+
+READY_Z = 0.5
+STRAINED_Z = -1.5
+STRAINED_STRAIN = 0.75
+
+STATUSES = ('unknown', 'normal', 'ready', 'strained')
+
+# Baselines per athlete: arrays (or scalars) of mean (NaN = no reading yet), variance and reading count
+Baseline = namedtuple('Baseline', 'mean variance days')
+
+
+def _to_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def empty_baseline(athletes=None):
+    shape = () if athletes is None else (athletes,)
+    return Baseline(np.full(shape, np.nan), np.zeros(shape), np.zeros(shape, dtype=np.int64))
+
+
+def stack_baselines(baselines):
+    """One Baseline of arrays from per-athlete (mean, variance, days) tuples; None = no history."""
+    baselines = [b or (None, 0.0, 0) for b in baselines]
+    return Baseline(
+        np.array([np.nan if b[0] is None else b[0] for b in baselines], dtype=np.float64),
+        np.array([b[1] for b in baselines], dtype=np.float64),
+        np.array([b[2] for b in baselines], dtype=np.int64),
+    )
+
+
+def subjective_strain(record, scale=INTERVALS_SCALE):
+    """Mean of the subjective fields present mapped to 0..1, or NaN."""
+    values = [
+        min(1.0, max(0.0, (record[f] - 1) / (scale - 1)))
+        for f in SUBJECTIVE_FIELDS if isinstance(record.get(f), (int, float))
+    ]
+    return sum(values) / len(values) if values else np.nan
+
+
+def wellness_matrix(wellness_by_athlete, start, end):
+    """
+    (hrv, rhr, strain) matrices of shape (athletes, days) for [start, end] from
+    Intervals.icu wellness records; NaN where there is no reading.
+    """
+    start, end = _to_date(start), _to_date(end)
+    days = (end - start).days + 1
+    hrv = np.full((len(wellness_by_athlete), days), np.nan)
+    rhr = np.full_like(hrv, np.nan)
+    strain = np.full_like(hrv, np.nan)
+    for i, records in enumerate(wellness_by_athlete):
+        for record in records or []:
+            if not record or not record.get('id'):
+                continue
+            offset = (_to_date(record['id']) - start).days
+            if not 0 <= offset < days:
+                continue
+            if isinstance(record.get('hrv'), (int, float)) and record['hrv'] > 0:
+                hrv[i, offset] = record['hrv']
+            if isinstance(record.get('restingHR'), (int, float)) and record['restingHR'] > 0:
+                rhr[i, offset] = record['restingHR']
+            strain[i, offset] = subjective_strain(record)
+    return hrv, rhr, strain
+
+
+def _advance(baseline, value, min_std):
+    """z-score of `value` against `baseline` and the baseline with it folded in (NaN values skip)."""
+    mean, variance, days = baseline
+    seen = np.isfinite(value)
+    first = seen & ~np.isfinite(mean)
+    diff = np.where(seen & ~first, value - mean, 0.0)
+    with np.errstate(invalid='ignore'):
+        z = np.where(seen & ~first & (days >= MIN_BASELINE_DAYS),
+                     np.clip(diff / np.maximum(np.sqrt(variance), min_std), -MAX_Z, MAX_Z), np.nan)
+    increment = ALPHA * diff
+    mean = np.where(first, value, np.where(seen, mean + increment, mean))
+    variance = np.where(seen & ~first, (1 - ALPHA) * (variance + diff * increment), variance)
+    return Baseline(mean, variance, days + seen), z
+
+
+def _score(hrv_z, rhr_z, strain):
+    """Score (NaN when nothing is known) and status index into STATUSES."""
+    with warnings.catch_warnings():
+        # No HRV and no RHR z-score: NaN, as intended
+        warnings.simplefilter('ignore', RuntimeWarning)
+        physio = np.nanmean(np.stack([hrv_z, -rhr_z]), axis=0)
+    has_physio = np.isfinite(physio)
+    has_strain = np.isfinite(strain)
+    score = np.clip(np.rint(50 + 15 * np.where(has_physio, physio, 0.0)
+                            - 40 * (np.where(has_strain, strain, 0.25) - 0.25)), 0, 100)
+    score = np.where(has_physio | has_strain, score, np.nan)
+
+    p = np.where(has_physio, physio, 0.0)
+    s = np.where(has_strain, strain, 0.0)
+    strained = (has_physio & (p <= STRAINED_Z)) | (has_strain & (s >= STRAINED_STRAIN)) \
+        | (has_physio & (p <= -1) & has_strain & (s >= 0.5))
+    ready = has_physio & (p >= READY_Z) & (s <= 0.5)
+    status = np.select([~(has_physio | has_strain), strained, ready], [0, 3, 2], default=1)
+    return score, status
+
+
+def update(hrv_baseline, rhr_baseline, hrv, rhr, strain):
+    """
+    One day for one athlete (scalars) or many (arrays): returns
+    (hrv_baseline, rhr_baseline, hrv_z, rhr_z, score, status).
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hrv_baseline, hrv_z = _advance(hrv_baseline, np.log(np.asarray(hrv, dtype=np.float64)), MIN_STD_HRV)
+    rhr_baseline, rhr_z = _advance(rhr_baseline, np.asarray(rhr, dtype=np.float64), MIN_STD_RHR)
+    score, status = _score(hrv_z, rhr_z, np.asarray(strain, dtype=np.float64))
+    return hrv_baseline, rhr_baseline, hrv_z, rhr_z, score, status
+
+
+def readiness_series(hrv, rhr, strain, hrv_initial=None, rhr_initial=None):
+    """
+    Readiness after each day of (athletes, days) matrices. `*_initial` are the
+    baselines at the end of the day before the first column (Baselines of arrays,
+    default empty). Returns a dict of (athletes, days) arrays (hrv_z, rhr_z, strain,
+    score, status) plus the per-day baselines, as stored by IntervalsCache.
+    """
+    hrv, rhr, strain = (np.asarray(m, dtype=np.float64) for m in (hrv, rhr, strain))
+    athletes, days = hrv.shape
+    hrv_b = hrv_initial if hrv_initial is not None else empty_baseline(athletes)
+    rhr_b = rhr_initial if rhr_initial is not None else empty_baseline(athletes)
+
+    out = {name: np.full((athletes, days), np.nan) for name in ('hrv_z', 'rhr_z', 'score',
+                                                               'hrv_mean', 'hrv_var', 'rhr_mean', 'rhr_var')}
+    out['status'] = np.zeros((athletes, days), dtype=np.int8)
+    out['hrv_days'] = np.zeros((athletes, days), dtype=np.int64)
+    out['rhr_days'] = np.zeros((athletes, days), dtype=np.int64)
+    out['strain'] = strain
+    for day in range(days):
+        hrv_b, rhr_b, hrv_z, rhr_z, score, status = update(hrv_b, rhr_b, hrv[:, day], rhr[:, day], strain[:, day])
+        out['hrv_z'][:, day], out['rhr_z'][:, day] = hrv_z, rhr_z
+        out['score'][:, day], out['status'][:, day] = score, status
+        out['hrv_mean'][:, day], out['hrv_var'][:, day], out['hrv_days'][:, day] = hrv_b
+        out['rhr_mean'][:, day], out['rhr_var'][:, day], out['rhr_days'][:, day] = rhr_b
+    return out
+
+
+def _optional(value, digits=None):
+    if not np.isfinite(value):
+        return None
+    return round(float(value), digits) if digits is not None else float(value)
+
+
+def stored_rows(series, athlete):
+    """One athlete's days of `series` as IntervalsCache.store_readiness tuples."""
+    return [
+        (
+            _optional(series['score'][athlete, day]),
+            STATUSES[series['status'][athlete, day]],
+            _optional(series['hrv_z'][athlete, day], 2),
+            _optional(series['rhr_z'][athlete, day], 2),
+            _optional(series['strain'][athlete, day], 2),
+            _optional(series['hrv_mean'][athlete, day]),
+            float(series['hrv_var'][athlete, day]),
+            int(series['hrv_days'][athlete, day]),
+            _optional(series['rhr_mean'][athlete, day]),
+            float(series['rhr_var'][athlete, day]),
+            int(series['rhr_days'][athlete, day]),
+        )
+        for day in range(series['status'].shape[1])
+    ]
@@ -0,0 +1,113 @@
+"""
+Diff-based calendar reconciliation (mirrors src/lib/intervals/reconcile.ts).
+
+Given the workouts that *should* be on the calendar for a date range, the
+reconciler lists the remote events once, compares content hashes and sends
+only what changed:
+
+    create  desired workouts with no remote copy          -> /events/bulk?upsert=true
+    update  remote copy exists but its content differs    -> same bulk call (upsert on external_id)
+    delete  owned remote events no longer desired         -> /events/bulk-delete
+
+Unchanged workouts cost no writes, so re-pushing a plan is one GET.
+Desired events are matched to remote ones by `external_id`. Callers must say
+which remote events are theirs (`owns`, e.g. owns_external_ids for the ids
+being pushed): other integrations set external_ids too, so having one does
+not make an event ours. Events that are not owned are never touched.
+SAFEGUARD: Events before today are never updated or deleted.
+"""
+
+import collections
+import hashlib
+import json
+
+from .intervals import is_future_or_today
+from .plan_upload import BULK_CHUNK_SIZE, iter_chunks, workout_to_event
+
+ReconcilePlan = collections.namedtuple('ReconcilePlan', ['create', 'update', 'delete', 'unchanged'])
+ReconcilePlan.__doc__ = "Diff result: payloads to create / update, remote events to delete, and the unchanged count."
+
+
+def content_hash(event):
+    """
+    Stable hash of the fields we write (category, start_date_local, name, description,
+    type, moving_time); remote events carry many more that must not affect the diff.
+    """
+    values = [
+        str(event.get('category') or ''),
+        str(event.get('start_date_local') or '')[:19],
+        event.get('name') or '',
+        (event.get('description') or '').strip(),
+        event.get('type') or '',
+        int(event.get('moving_time') or 0),
+    ]
+    encoded = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def owns_external_ids(external_ids):
+    """Ownership check that claims only events carrying one of `external_ids`."""
+    ids = {str(external_id) for external_id in external_ids}
+    return lambda event: bool(event.get('external_id')) and str(event['external_id']) in ids
+
+
+def diff_events(desired, remote, owns):
+    """
+    Computes the minimal change set.
+    `desired` are event payloads with an `external_id`; `remote` are events as
+    returned by GET /events for the same range; `owns(event)` decides which remote
+    events may be updated or deleted.
+    """
+    remote_by_external = {}
+    delete = []
+    for event in remote:
+        if not owns(event) or not is_future_or_today(event.get('start_date_local', '')):
+            continue
+        external_id = event.get('external_id')
+        if external_id and external_id not in remote_by_external:
+            remote_by_external[external_id] = event
+        else:
+            # Owned but unmatched, or a duplicate left behind by delete-then-push
+            delete.append(event)
+
+    create, update, unchanged = [], [], 0
+    seen = set()
+    for payload in desired:
+        external_id = payload['external_id']
+        seen.add(external_id)
+        current = remote_by_external.get(external_id)
+        if current is None:
+            create.append(payload)
+        elif content_hash(current) != content_hash(payload):
+            update.append(payload)
+        else:
+            unchanged += 1
+
+    delete.extend(e for key, e in remote_by_external.items() if key not in seen)
+    return ReconcilePlan(create, update, delete, unchanged)
+
+
+def reconcile(client, workouts, oldest, newest, owns, chunk_size=BULK_CHUNK_SIZE, dry_run=False):
+    """
+    Makes the calendar between `oldest` and `newest` (YYYY-MM-DD) match `workouts`.
+    `workouts` are Prisma Workout rows / AI workouts with an `id` (used as external_id),
+    or ready event payloads that already carry an `external_id`.
+    Past-dated workouts are left out. Returns the ReconcilePlan that was applied.
+    """
+    desired = []
+    for workout in workouts:
+        event = workout if 'external_id' in workout else workout_to_event(workout)
+        if not event.get('external_id'):
+            raise ValueError(f"Workout '{event.get('name')}' has no id to reconcile on")
+        if is_future_or_today(event['start_date_local']):
+            desired.append(event)
+
+    plan = diff_events(desired, client.get_events(oldest, newest) or [], owns)
+    if dry_run:
+        return plan
+
+    for chunk in iter_chunks(plan.create + plan.update, chunk_size):
+        client.upload_workouts(chunk, upsert=True)
+    for chunk in iter_chunks([e['id'] for e in plan.delete], chunk_size):
+        client.delete_events(chunk)
+    return plan
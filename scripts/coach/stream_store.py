@@ -0,0 +1,298 @@
+"""
+Columnar, memory-mapped store for per-second activity streams (NumPy).
+
+Each athlete gets a directory of append-only column files plus an index:
+
+    time.i32   seconds since the activity started
+    hr.i16     heart rate in bpm (0 = no reading)
+    speed.f32  speed in m/s (NaN = no reading); pace is 1000 / speed sec/km
+    index.bin  one fixed-size row per activity: id, sport, start (epoch s), first row, row count
+
+A year of 1 Hz running (~2M samples) is ~20 MB and is read through np.memmap,
+so queries never build per-sample Python objects. The index row is written last
+and is the commit point: column bytes past the last indexed row are left over
+from an interrupted ingest and are truncated before the next append.
+
+Time-in-zone uses the same boundaries as coach.zones (a reading belongs to the
+highest zone whose lower bound it reaches, as zoneSeconds does in context.ts)
+and weights each sample by the gap to the next one, capped at MAX_SAMPLE_GAP.
+"""
+
+import datetime
+import os
+
+import numpy as np
+
+from .zones import ZONES, calculate_hr_zones, calculate_pace_zones
+
+DEFAULT_STREAM_DIR = os.environ.get(
+    'INTERVALS_STREAM_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'endurance-ai-coach', 'streams'),
+)
+
+# Intervals.icu stream types the store keeps
+STREAM_TYPES = ('time', 'heartrate', 'velocity_smooth')
+
+COLUMNS = {
+    'time': ('time.i32', np.int32),
+    'hr': ('hr.i16', np.int16),
+    'speed': ('speed.f32', np.float32),
+}
+
+INDEX_DTYPE = np.dtype([
+    ('activity_id', 'S24'),
+    ('sport', 'S16'),
+    ('start', '<i8'),
+    ('offset', '<i8'),
+    ('count', '<i4'),
+])
+
+# Longest gap between samples credited to one sample (auto-pause, dropouts)
+MAX_SAMPLE_GAP = 10
+# Slower than this is standing still, not a pace (m/s)
+MIN_SPEED = 0.5
+
+
+def _epoch(start_date_local):
+    moment = datetime.datetime.fromisoformat(str(start_date_local)[:19])
+    return int(moment.replace(tzinfo=datetime.timezone.utc).timestamp())
+
+
+def _day_epoch(value):
+    if not isinstance(value, datetime.date):
+        value = datetime.date.fromisoformat(str(value)[:10])
+    return int(datetime.datetime(value.year, value.month, value.day, tzinfo=datetime.timezone.utc).timestamp())
+
+
+def _by_type(streams):
+    """Intervals.icu returns [{type, data}, ...]; also accepts an already keyed dict."""
+    if isinstance(streams, dict):
+        return streams
+    return {s['type']: s.get('data') for s in streams or [] if isinstance(s, dict) and s.get('type')}
+
+
+def _floats(values, count):
+    """First `count` values as float64, None -> NaN."""
+    return np.array([np.nan if v is None else v for v in values[:count]], dtype=np.float64)
+
+
+def hr_zone_edges(lthr):
+    """Lower bounds of Z2..Z5 in bpm."""
+    zones = calculate_hr_zones(lthr)
+    return np.array([zones[z]['min'] for z in ZONES[1:]], dtype=np.float64)
+
+
+def speed_zone_edges(threshold_pace):
+    """Lower speed bounds (m/s) of Z2..Z5, from the slow end of each pace zone."""
+    zones = calculate_pace_zones(threshold_pace)
+    return np.array([1000 / zones[z]['max'] for z in ZONES[1:]], dtype=np.float64)
+
+
+class AthleteStreams:
+    """Read-only, memory-mapped view over one athlete's streams."""
+
+    def __init__(self, path):
+        self.path = path
+        self.index = self._map('index.bin', INDEX_DTYPE)
+        rows = int(self.index['offset'][-1] + self.index['count'][-1]) if len(self.index) else 0
+        self.time = self._map(COLUMNS['time'][0], COLUMNS['time'][1], rows)
+        self.hr = self._map(COLUMNS['hr'][0], COLUMNS['hr'][1], rows)
+        self.speed = self._map(COLUMNS['speed'][0], COLUMNS['speed'][1], rows)
+
+    def _map(self, name, dtype, rows=None):
+        path = os.path.join(self.path, name)
+        size = os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0
+        rows = size if rows is None else min(rows, size)
+        if not rows:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def samples(self):
+        return len(self.time)
+
+    def select(self, start_date=None, end_date=None, sport=None):
+        """Boolean mask over activities started in [start_date, end_date] (inclusive days)."""
+        mask = np.ones(len(self.index), dtype=bool)
+        if start_date is not None:
+            mask &= self.index['start'] >= _day_epoch(start_date)
+        if end_date is not None:
+            mask &= self.index['start'] < _day_epoch(end_date) + 86400
+        if sport is not None:
+            mask &= self.index['sport'] == sport.encode('utf-8')
+        return mask
+
+    def _rows(self, activities):
+        """
+        Sample rows of the selected activities, the selected activity each row belongs to,
+        and for each row the output position where its activity starts.
+        """
+        picked = np.flatnonzero(activities)
+        counts = self.index['count'][picked].astype(np.int64)
+        offsets = self.index['offset'][picked]
+        total = int(counts.sum())
+        # Row r of activity k is offsets[k] + (r - first row of k in the output)
+        firsts = np.repeat(np.cumsum(counts) - counts, counts)
+        rows = np.repeat(offsets, counts) + (np.arange(total) - firsts)
+        return rows, np.repeat(np.arange(len(picked)), counts), firsts
+
+    def _weights(self, rows, firsts):
+        """Seconds each sample stands for: gap to the next sample of the same activity, capped."""
+        t = np.asarray(self.time[rows], dtype=np.int64)
+        dt = np.ones(len(t), dtype=np.float64)
+        if len(t) > 1:
+            dt[:-1] = np.diff(t)
+            # The last sample of each activity counts as one second
+            dt[np.flatnonzero(np.diff(firsts))] = 1
+            dt[-1] = 1
+        return np.clip(dt, 0, MAX_SAMPLE_GAP)
+
+    def time_in_zone(self, lthr=None, threshold_pace=None, per_activity=False, **selection):
+        """
+        Seconds per zone (Z1..Z5) over the selected activities, from HR when `lthr` is
+        given, else from speed against `threshold_pace`. With per_activity=True returns
+        (activity_ids, seconds[activities, 5]) instead of one total row.
+        """
+        activities = self.select(**selection)
+        rows, owner, firsts = self._rows(activities)
+        weights = self._weights(rows, firsts)
+
+        if lthr:
+            hr = self.hr[rows]
+            valid = hr > 0
+            zone = np.searchsorted(hr_zone_edges(lthr), hr, side='right')
+        elif threshold_pace:
+            speed = self.speed[rows]
+            valid = np.isfinite(speed) & (speed >= MIN_SPEED)
+            zone = np.searchsorted(speed_zone_edges(threshold_pace), np.nan_to_num(speed), side='right')
+        else:
+            raise ValueError('time_in_zone needs lthr or threshold_pace')
+
+        count = int(activities.sum())
+        bins = owner[valid] * len(ZONES) + zone[valid]
+        seconds = np.bincount(bins, weights=weights[valid], minlength=count * len(ZONES)).reshape(count, len(ZONES))
+        if per_activity:
+            ids = [i.decode('utf-8') for i in self.index['activity_id'][activities]]
+            return ids, seconds
+        return seconds.sum(axis=0)
+
+    def moving_average(self, channel='hr', window=60, **selection):
+        """
+        Trailing mean of `channel` ('hr' or 'speed') over `window` samples (seconds at 1 Hz),
+        restarting at each activity and ignoring missing readings. Returns one value per
+        selected sample (NaN until a reading has been seen).
+        """
+        activities = self.select(**selection)
+        rows, owner, firsts = self._rows(activities)
+        values = np.asarray(getattr(self, channel)[rows], dtype=np.float64)
+        valid = values > 0 if channel == 'hr' else np.isfinite(values)
+        values = np.where(valid, values, 0.0)
+
+        sums = np.concatenate(([0.0], np.cumsum(values)))
+        counts = np.concatenate(([0], np.cumsum(valid)))
+        end = np.arange(1, len(values) + 1)
+        start = np.maximum(end - window, firsts)
+        n = counts[end] - counts[start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(n > 0, (sums[end] - sums[start]) / np.maximum(n, 1), np.nan)
+
+    def peak_average(self, channel='hr', window=1200, **selection):
+        """Best `window`-sample average per selected activity, e.g. 20-min HR for LTHR checks."""
+        activities = self.select(**selection)
+        averages = self.moving_average(channel, window, **selection)
+        counts = self.index['count'][activities].astype(np.int64)
+        ids = [i.decode('utf-8') for i in self.index['activity_id'][activities]]
+        if not len(averages):
+            return ids, np.zeros(0)
+        # Only full windows count; shorter activities report NaN
+        position = np.arange(len(averages)) - np.repeat(np.cumsum(counts) - counts, counts)
+        full = np.where(position >= window - 1, averages, -np.inf)
+        starts = np.cumsum(counts) - counts
+        peaks = np.full(len(counts), np.nan)
+        nonempty = counts > 0
+        peaks[nonempty] = np.maximum.reduceat(full, starts[nonempty])
+        peaks[~np.isfinite(peaks)] = np.nan
+        return ids, peaks
+
+
+class StreamStore:
+    """
+    Per-athlete column files under `root`.
+
+        store = StreamStore()
+        store.ingest('i123', activity, streams)      # streams as returned by Intervals.icu
+        view = store.open('i123')
+        view.time_in_zone(lthr=170, start_date='2025-01-01', end_date='2025-12-31')
+    """
+
+    def __init__(self, root=DEFAULT_STREAM_DIR):
+        self.root = root
+
+    def _dir(self, athlete_id):
+        return os.path.join(self.root, str(athlete_id))
+
+    def open(self, athlete_id):
+        return AthleteStreams(self._dir(athlete_id))
+
+    def known_ids(self, athlete_id):
+        """Activity ids already stored for the athlete."""
+        index = self.open(athlete_id).index
+        return {i.decode('utf-8') for i in index['activity_id']}
+
+    def ingest(self, athlete_id, activity, streams):
+        """
+        Appends one activity's streams. Returns the number of samples written
+        (0 if the activity is already stored or has no time stream).
+        """
+        activity_id = str(activity['id'])
+        if activity_id in self.known_ids(athlete_id):
+            return 0
+        data = _by_type(streams)
+        time = data.get('time')
+        if not time:
+            return 0
+
+        count = len(time)
+        hr = data.get('heartrate') or []
+        speed = data.get('velocity_smooth') or []
+        columns = {
+            'time': np.asarray(time, dtype=np.int32),
+            'hr': np.zeros(count, dtype=np.int16),
+            'speed': np.full(count, np.nan, dtype=np.float32),
+        }
+        if len(hr):
+            columns['hr'][:min(count, len(hr))] = np.nan_to_num(_floats(hr, count)).round()
+        if len(speed):
+            columns['speed'][:min(count, len(speed))] = _floats(speed, count)
+
+        path = self._dir(athlete_id)
+        os.makedirs(path, exist_ok=True)
+        index = self.open(athlete_id).index
+        offset = int(index['offset'][-1] + index['count'][-1]) if len(index) else 0
+
+        for name, (filename, dtype) in COLUMNS.items():
+            file_path = os.path.join(path, filename)
+            with open(file_path, 'ab') as f:
+                # Drop bytes from an ingest that died before its index row was written
+                if f.tell() != offset * np.dtype(dtype).itemsize:
+                    f.truncate(offset * np.dtype(dtype).itemsize)
+                    f.seek(0, os.SEEK_END)
+                f.write(columns[name].tobytes())
+
+        index_path = os.path.join(path, 'index.bin')
+        row = np.zeros(1, dtype=INDEX_DTYPE)
+        row['activity_id'] = activity_id.encode('utf-8')[:24]
+        row['sport'] = str(activity.get('type') or '').encode('utf-8')[:16]
+        row['start'] = _epoch(activity.get('start_date_local') or '1970-01-01')
+        row['offset'] = offset
+        row['count'] = count
+        with open(index_path, 'ab') as f:
+            # A torn index row from an earlier crash would misalign every row after it
+            if f.tell() != len(index) * INDEX_DTYPE.itemsize:
+                f.truncate(len(index) * INDEX_DTYPE.itemsize)
+                f.seek(0, os.SEEK_END)
+            f.write(row.tobytes())
+        return count
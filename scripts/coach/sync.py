@@ -0,0 +1,273 @@
+"""
+Async multi-athlete sync engine for Intervals.icu.
+
+Fetches activities / wellness / events and pushes workouts for many athletes
+at once. Requests run on a bounded worker pool over one shared keep-alive
+ConnectionPool, each API key is throttled by its own token bucket, and
+429 / 5xx / connection errors are retried with exponential backoff + full
+jitter, honouring Retry-After when the server sends it.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import email.utils
+import http.client
+import random
+import time
+
+from .intervals import DEFAULT_BASE_URL, ConnectionPool, IntervalsAPIError, IntervalsClient, upload_is_idempotent
+from .plan_upload import BULK_CHUNK_SIZE, UploadResult, iter_chunks, match_created, prepare_uploads
+
+# Intervals.icu does not publish hard limits; these stay well under what a
+# single key can sustain without being throttled.
+DEFAULT_RATE_PER_KEY = 5.0   # requests / second
+DEFAULT_BURST = 10
+DEFAULT_CONCURRENCY = 16
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE = 0.5           # seconds
+BACKOFF_CAP = 60.0           # seconds
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+Athlete = collections.namedtuple('Athlete', ['athlete_id', 'api_key'])
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens/second, holding at most `capacity`."""
+
+    def __init__(self, rate=DEFAULT_RATE_PER_KEY, capacity=DEFAULT_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._resume_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = self._clock()
+                if now < self._resume_at:
+                    await asyncio.sleep(self._resume_at - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Stops handing out tokens for `seconds` (e.g. after a 429) and empties the bucket."""
+        self._resume_at = max(self._resume_at, self._clock() + seconds)
+        self._tokens = 0.0
+        self._updated = self._clock()
+
+
+def parse_retry_after(headers):
+    """Returns the Retry-After delay in seconds (delta-seconds or HTTP-date), or None."""
+    value = None
+    for name, header_value in (headers or {}).items():
+        if name.lower() == 'retry-after':
+            value = header_value
+            break
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(attempt, retry_after=None, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """
+    Exponential backoff with full jitter for retry number `attempt` (0-based).
+    A server-provided Retry-After is treated as the minimum wait.
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after) + random.uniform(0, base)
+    return delay
+
+
+class SyncEngine:
+    def __init__(self, base_url=DEFAULT_BASE_URL, concurrency=DEFAULT_CONCURRENCY,
+                 rate_per_key=DEFAULT_RATE_PER_KEY, burst=DEFAULT_BURST,
+                 max_retries=DEFAULT_MAX_RETRIES, chunk_size=BULK_CHUNK_SIZE, cache=None, stream_store=None):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.rate_per_key = rate_per_key
+        self.burst = burst
+        self.max_retries = max_retries
+        self.chunk_size = chunk_size
+        # Optional IntervalsCache: when set, only missing / stale days are fetched.
+        self.cache = cache
+        # Optional StreamStore: per-second streams of new activities are fetched and stored.
+        self.stream_store = stream_store
+        self.stats = collections.Counter()
+
+        self._pool = ConnectionPool(base_url, size=concurrency)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+        self._clients = {}
+        self._limiters = {}
+
+    # --- Plumbing ---
+
+    def _client(self, athlete):
+        key = (athlete.athlete_id, athlete.api_key)
+        if key not in self._clients:
+            self._clients[key] = IntervalsClient(athlete.api_key, athlete.athlete_id, pool=self._pool)
+        return self._clients[key]
+
+    def _limiter(self, api_key):
+        if api_key not in self._limiters:
+            self._limiters[api_key] = TokenBucket(self.rate_per_key, self.burst)
+        return self._limiters[api_key]
+
+    async def call(self, athlete, method, *args, **kwargs):
+        """
+        Runs IntervalsClient.<method>(*args) for `athlete` on the worker pool,
+        rate limited per API key and retried on 429 / 5xx / dropped connections.
+        A plain (non-upsert) upload may already have been applied when a 5xx or a
+        transport error comes back, so it is only retried on 429 (rejected unprocessed).
+        """
+        client = self._client(athlete)
+        limiter = self._limiter(athlete.api_key)
+        loop = asyncio.get_running_loop()
+        retry_safe = method != 'upload_workouts' or upload_is_idempotent(
+            args[0] if args else kwargs.get('events', ()),
+            args[1] if len(args) > 1 else kwargs.get('upsert', False),
+        )
+
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            self.stats['requests'] += 1
+            try:
+                return await loop.run_in_executor(
+                    self._executor, lambda: getattr(client, method)(*args, **kwargs)
+                )
+            except IntervalsAPIError as e:
+                if e.status not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    raise
+                if e.status != 429 and not retry_safe:
+                    raise
+                retry_after = parse_retry_after(e.headers)
+                delay = backoff_delay(attempt, retry_after)
+                if e.status == 429:
+                    self.stats['throttled'] += 1
+                    # Every in-flight request for this key should back off, not just this one.
+                    limiter.pause(delay)
+            except (OSError, http.client.HTTPException):
+                if attempt == self.max_retries or not retry_safe:
+                    raise
+                delay = backoff_delay(attempt)
+
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
+
+    # --- Sync ---
+
+    async def fetch_range(self, athlete, kind, start_date, end_date):
+        """Fetches `kind` (activities / wellness / events), going through the cache if configured."""
+        if self.cache is None:
+            return await self.call(athlete, f"get_{kind}", start_date, end_date)
+
+        for start, end in self.cache.missing_ranges(athlete.athlete_id, kind, start_date, end_date):
+            records = await self.call(athlete, f"get_{kind}", start.isoformat(), end.isoformat())
+            self.cache.store(athlete.athlete_id, kind, start, end, records)
+        return self.cache.query(athlete.athlete_id, kind, start_date, end_date)
+
+    async def fetch_streams(self, athlete, activities):
+        """Stores the streams of `activities` the stream store doesn't have yet; returns how many were added."""
+        known = self.stream_store.known_ids(athlete.athlete_id)
+
+        async def fetch(activity):
+            try:
+                streams = await self.call(athlete, 'get_activity_streams', activity['id'])
+            except IntervalsAPIError:
+                # Manual entries have no streams
+                return 0
+            # Stored as each one arrives, so a long backfill never holds every stream in memory
+            return 1 if self.stream_store.ingest(athlete.athlete_id, activity, streams) else 0
+
+        added = await asyncio.gather(*(
+            fetch(a) for a in activities if a.get('id') and str(a['id']) not in known
+        ))
+        self.stats['streams'] += sum(added)
+        return sum(added)
+
+    async def push_workouts(self, athlete, workouts, upsert=True):
+        """Bulk-uploads `workouts` for one athlete; returns one UploadResult per workout."""
+        results, pending = prepare_uploads(workouts)
+
+        async def push_chunk(chunk):
+            try:
+                created = await self.call(athlete, 'upload_workouts', [p for _, p in chunk], upsert=upsert)
+            except IntervalsAPIError as e:
+                return [UploadResult(w, None, f"{e.status} {e.body}") for w, _ in chunk]
+            return [
+                UploadResult(w, event, None if event is not None else "Missing from bulk response")
+                for (w, _), event in zip(chunk, match_created(chunk, created))
+            ]
+
+        items = [item for _, item in pending]
+        chunks = await asyncio.gather(*(push_chunk(c) for c in iter_chunks(items, self.chunk_size)))
+        uploaded = [result for chunk in chunks for result in chunk]
+        for (i, _), result in zip(pending, uploaded):
+            results[i] = result
+        return results
+
+    async def sync_athlete(self, athlete, start_date, end_date, workouts=None):
+        """
+        Fetches activities, wellness and events for [start_date, end_date] and pushes
+        `workouts` (if any). Errors are captured in the result instead of raised so
+        one bad athlete does not abort the whole run.
+        """
+        result = {'athlete_id': athlete.athlete_id, 'error': None}
+        try:
+            result['activities'], result['wellness'], result['events'] = await asyncio.gather(
+                self.fetch_range(athlete, 'activities', start_date, end_date),
+                self.fetch_range(athlete, 'wellness', start_date, end_date),
+                self.fetch_range(athlete, 'events', start_date, end_date),
+            )
+            if self.stream_store is not None:
+                result['streams'] = await self.fetch_streams(athlete, result['activities'])
+            if workouts:
+                result['uploads'] = await self.push_workouts(athlete, workouts)
+        except Exception as e:
+            result['error'] = str(e)
+            self.stats['failed_athletes'] += 1
+        return result
+
+    async def run(self, athletes, start_date, end_date, workouts_by_athlete=None):
+        """Syncs every athlete concurrently; returns one result dict per athlete, in input order."""
+        workouts_by_athlete = workouts_by_athlete or {}
+        return await asyncio.gather(*(
+            self.sync_athlete(a, start_date, end_date, workouts_by_athlete.get(a.athlete_id))
+            for a in athletes
+        ))
+
+    def run_sync(self, athletes, start_date, end_date, workouts_by_athlete=None):
+        """Blocking entry point for scripts / cron."""
+        return asyncio.run(self.run(athletes, start_date, end_date, workouts_by_athlete))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
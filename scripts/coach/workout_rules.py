@@ -0,0 +1,226 @@
+"""
+Rule-based workout generator (mirrors src/lib/training/workoutRules.ts).
+
+Builds WorkoutSchema-conformant workouts for the routine session types the AI
+prompt already spells out (easy, long, tempo, threshold, VO2 max) from the
+profile and current load state, without a model call. Requests that do not map
+onto one of these types still go to the LLM.
+"""
+
+import datetime
+import re
+
+from .context import zone_seconds
+from .load_engine import daily_loads, load_series
+from .zones import calculate_hr_zones, calculate_pace_zones, format_pace
+
+RULE_WORKOUT_TYPES = ('easy', 'long', 'tempo', 'threshold', 'vo2max')
+
+DEFAULT_DURATIONS = {
+    'easy': 45,
+    'long': 90,
+    'tempo': 50,
+    'threshold': 55,
+    'vo2max': 50,
+}
+
+# TSB below which hard sessions are replaced / trimmed.
+FATIGUED_TSB = -20
+# Minutes in Z4+Z5 that make a session "hard" for the back-to-back rule.
+HARD_SESSION_MIN = 10
+LONG_RUN_MIN = 75
+# Shortest session that still fits warmup, main set and cooldown.
+MIN_DURATION = {'easy': 20, 'long': 30, 'tempo': 35, 'threshold': 35, 'vo2max': 35}
+
+INTENSITY_BY_ZONE = {
+    'Z1': 'easy',
+    'Z2': 'endurance',
+    'Z3': 'tempo',
+    'Z4': 'threshold',
+    'Z5': 'vo2max',
+}
+
+# First match wins, so "easy long run" is a long run and "tempo intervals" a tempo.
+TYPE_PATTERNS = (
+    ('long', re.compile(r'\blong\b')),
+    ('vo2max', re.compile(r'\bvo2\s*(max)?\b|\bv02\b')),
+    ('threshold', re.compile(r'\bthreshold\b|\blt\b|\bcruise\b')),
+    ('tempo', re.compile(r'\btempo\b|\bsteady state\b')),
+    ('easy', re.compile(r'\beasy\b|\brecovery\b|\baerobic\b|\bbase\b|\bz[12]\b')),
+)
+
+# Requests for anything but a run; the rule engine only builds runs.
+OTHER_SPORT_PATTERN = re.compile(r'\b(ride|bike|cycl\w*|spin|swim\w*|strength|gym|yoga|mobility|row\w*)\b')
+RUN_PATTERN = re.compile(r'\brun(ning)?\b')
+
+
+def is_run_request(request, profile):
+    """
+    Whether a request is for a run: the sport named in the request ("Easy Run",
+    "Long Ride"), otherwise the athlete's primary sport. Only runs can come from
+    the rule engine; everything else goes to the model.
+    """
+    text = (request or '').lower()
+    if OTHER_SPORT_PATTERN.search(text):
+        return False
+    if RUN_PATTERN.search(text):
+        return True
+    return ((profile or {}).get('primarySport') or 'run') == 'run'
+
+
+def match_workout_type(request):
+    """
+    Maps a free-text workout request ("Easy Run", "VO2 Max", "long") onto a rule type.
+    Returns None for anything else, e.g. "hill sprints", "fartlek" or "Easy Ride".
+    """
+    text = re.sub(r'\brun\b', '', (request or '').lower()).strip()
+    if not text or text == 'any' or OTHER_SPORT_PATTERN.search(text):
+        return None
+    for workout_type, pattern in TYPE_PATTERNS:
+        if pattern.search(text):
+            return workout_type
+    return None
+
+
+def choose_workout_type(activities, lthr=None, today=None, readiness=None):
+    """
+    Picks today's session from recent activities:
+    fatigued (TSB < -20), strained readiness today or a hard session yesterday -> easy,
+    weekend without a long run in the last 6 days -> long,
+    otherwise the fresher the athlete, the harder the session.
+    `readiness` is a state dict with 'date' and 'status'. Returns (type, tsb).
+    """
+    today = datetime.date.fromisoformat(str(today)[:10]) if today else datetime.date.today()
+    start = today - datetime.timedelta(days=83)
+    _, _, tsb_series = load_series(daily_loads(activities, start, today, lthr))
+    # State going into today: yesterday's values, today's sessions are not done yet
+    tsb = float(tsb_series[-2]) if len(tsb_series) > 1 else 0.0
+
+    def days_ago(activity):
+        return (today - datetime.date.fromisoformat(activity['start_date_local'][:10])).days
+
+    recent = [a for a in activities or [] if a and a.get('start_date_local') and days_ago(a) > 0]
+    hard_yesterday = any(
+        days_ago(a) == 1 and sum(zone_seconds(a, lthr)[3:]) >= HARD_SESSION_MIN * 60 for a in recent
+    )
+    recent_long = any(days_ago(a) <= 6 and (a.get('moving_time') or 0) >= LONG_RUN_MIN * 60 for a in recent)
+
+    # Only today's readiness counts; an old reading says nothing about today
+    strained = bool(readiness) and str(readiness.get('date'))[:10] == today.isoformat() \
+        and readiness.get('status') == 'strained'
+
+    if tsb < FATIGUED_TSB or strained or hard_yesterday:
+        workout_type = 'easy'
+    elif today.weekday() >= 5 and not recent_long:
+        workout_type = 'long'
+    elif tsb > 5:
+        workout_type = 'vo2max'
+    elif tsb > -5:
+        workout_type = 'threshold'
+    elif tsb > -10:
+        workout_type = 'tempo'
+    else:
+        workout_type = 'easy'
+
+    return workout_type, round(tsb, 1)
+
+
+def _target(profile, zone):
+    if profile.get('thresholdPace'):
+        zone_range = calculate_pace_zones(profile['thresholdPace'])[zone]
+        return {'metric': 'pace', 'value': f"{format_pace(zone_range['max'])}-{format_pace(zone_range['min'])}/km"}
+    if profile.get('lthr'):
+        zone_range = calculate_hr_zones(profile['lthr'])[zone]
+        return {'metric': 'hr', 'value': f"{zone_range['min']}-{zone_range['max']} bpm"}
+    return {'metric': 'rpe', 'value': zone}
+
+
+def _block(profile, block_type, duration_min, zone, zone_position, reps=None):
+    block = {'type': block_type}
+    if reps and reps > 1:
+        block['reps'] = reps
+    block.update({
+        'duration_min': duration_min,
+        'intensity': INTENSITY_BY_ZONE[zone],
+        'target': _target(profile, zone),
+        'zone': zone,
+        'zone_position': zone_position,
+    })
+    return block
+
+
+def _fit_reps(available, work, rest, minimum, maximum, fatigued):
+    # Work / recovery pairs that fit between warmup and cooldown; one fewer when fatigued.
+    reps = min(maximum, available // (work + rest)) - (1 if fatigued else 0)
+    return max(minimum, reps)
+
+
+def generate_rule_workout(workout_type, profile, duration_min=None, tsb=None):
+    """
+    Generates a WorkoutSchema-conformant workout for a rule type.
+    Steady sessions fill `duration_min` exactly; interval sessions use as many
+    repeats as fit, one fewer when fatigued.
+    """
+    if workout_type not in DEFAULT_DURATIONS:
+        raise ValueError(f"Unknown workout type: {workout_type}")
+
+    profile = profile or {}
+    duration = max(MIN_DURATION[workout_type], round(duration_min or DEFAULT_DURATIONS[workout_type]))
+    fatigued = tsb is not None and tsb < FATIGUED_TSB
+    structure = []
+
+    if workout_type == 'easy':
+        name = f"Easy Run {duration}min"
+        description = "Conversational aerobic running. Stay low in Z2; walk breaks are fine if HR drifts."
+        tags = ['easy', 'aerobic']
+        structure.append(_block(profile, 'warmup', 5, 'Z1', 0.5))
+        structure.append(_block(profile, 'steady', duration - 5, 'Z2', 0.0 if fatigued else 0.2))
+
+    elif workout_type == 'long':
+        finish = 15 if not fatigued and duration >= LONG_RUN_MIN else 0
+        name = f"Long Run {duration}min"
+        description = "Long aerobic run in Z2." + (
+            " Finish the last 15 minutes at the top of Z2 if it feels good." if finish else "")
+        tags = ['long', 'endurance']
+        structure.append(_block(profile, 'warmup', 10, 'Z1', 0.5))
+        structure.append(_block(profile, 'steady', duration - 10 - finish, 'Z2', 0.5))
+        if finish:
+            structure.append(_block(profile, 'steady', finish, 'Z2', 0.9))
+
+    elif workout_type == 'tempo':
+        main = max(10, duration - 25)
+        name = f"Tempo {main}min"
+        description = "Continuous tempo in the middle of Z3: comfortably hard, controlled breathing."
+        tags = ['tempo']
+        structure.append(_block(profile, 'warmup', 15, 'Z1', 0.8))
+        structure.append(_block(profile, 'steady', main, 'Z3', 0.5))
+        structure.append(_block(profile, 'cooldown', duration - 15 - main, 'Z1', 0.5))
+
+    elif workout_type == 'threshold':
+        reps = _fit_reps(duration - 25, 8, 2, 2, 6, fatigued)
+        name = f"Threshold {reps}x8min"
+        description = f"{reps} x 8 minutes in Z4 with 2 minutes easy jog recovery. Even pacing across all reps."
+        tags = ['threshold', 'intervals']
+        structure.append(_block(profile, 'warmup', 15, 'Z1', 0.8))
+        structure.append(_block(profile, 'interval', 8, 'Z4', 0.5, reps))
+        structure.append(_block(profile, 'recovery', 2, 'Z1', 0.3))
+        structure.append(_block(profile, 'cooldown', 10, 'Z1', 0.5))
+
+    else:
+        reps = _fit_reps(duration - 25, 3, 3, 3, 8, fatigued)
+        name = f"VO2 Max {reps}x3min"
+        description = f"{reps} x 3 minutes in Z5 with 3 minutes easy jog recovery. Hard but repeatable."
+        tags = ['vo2max', 'intervals']
+        structure.append(_block(profile, 'warmup', 15, 'Z1', 0.8))
+        structure.append(_block(profile, 'interval', 3, 'Z5', 0.5, reps))
+        structure.append(_block(profile, 'recovery', 3, 'Z1', 0.3))
+        structure.append(_block(profile, 'cooldown', 10, 'Z1', 0.5))
+
+    return {
+        'workout_name': name,
+        'sport': 'run',
+        'description': description,
+        'tags': tags + ['rule-based'],
+        'structure': structure,
+        'intervals_icu_export': {'format': 'builder_v1', 'blocks': []},
+    }
@@ -0,0 +1,131 @@
+"""
+Vectorized zone engine (NumPy).
+
+Resolves zone targets for whole plans, or whole cohorts after a threshold
+change, in one array operation instead of building a zone dict per target.
+Results match coach.zones / src/lib/training/zones.ts.
+
+Zones are passed as int indices (0 = Z1 ... 4 = Z5); use zone_indices() to
+convert "Z1".."Z5" strings once. All inputs broadcast, so:
+
+    resolve_pace_targets(tp, zone_idx, positions)                  # one athlete, (M,)
+    resolve_pace_targets(tps[:, None], zone_idx, positions)        # cohort x blocks, (N, M)
+    resolve_pace_targets(tps[block_athlete], zone_idx, positions)  # per-block owner, (M,)
+"""
+
+import numpy as np
+
+from .zones import HR_MAX, PACE_FACTORS, ZONES
+
+ZONE_INDEX = {zone: i for i, zone in enumerate(ZONES)}
+
+# (5, 2) tables of [min, max] factors, indexed by zone.
+PACE_FACTOR_TABLE = np.array([PACE_FACTORS[z] for z in ZONES], dtype=np.float64)
+_PACE_SPAN = PACE_FACTOR_TABLE[:, 1] - PACE_FACTOR_TABLE[:, 0]
+
+# HR bounds are round(lthr * factor); Z1 min is 0 and Z1 max sits one bpm below Z2 min.
+_HR_MIN_FACTOR = np.array([0.0, 0.85, 0.90, 0.95, 1.00])
+_HR_MAX_FACTOR = np.array([0.85, 0.89, 0.94, 0.99, 0.0])
+_HR_MAX_OFFSET = np.array([-1, 0, 0, 0, HR_MAX])
+
+DEFAULT_POSITION = 0.5
+
+
+def _js_round(values):
+    # Math.round semantics (half up), matching zones.ts and coach.zones.js_round.
+    return np.floor(values + 0.5)
+
+
+def zone_indices(zones):
+    """Converts a sequence of "Z1".."Z5" labels into an int8 index array."""
+    return np.fromiter((ZONE_INDEX[z] for z in zones), dtype=np.int8, count=len(zones))
+
+
+def pace_zone_bounds(threshold_paces):
+    """(..., 5, 2) array of [min, max] sec/km per zone for each threshold pace."""
+    return np.asarray(threshold_paces, dtype=np.float64)[..., None, None] * PACE_FACTOR_TABLE
+
+
+def hr_zone_bounds(lthrs):
+    """(..., 5, 2) array of [min, max] bpm per zone for each LTHR."""
+    lthrs = np.asarray(lthrs, dtype=np.float64)[..., None]
+    low = _js_round(lthrs * _HR_MIN_FACTOR)
+    high = _js_round(lthrs * _HR_MAX_FACTOR) + _HR_MAX_OFFSET
+    return np.stack([low, high], axis=-1)
+
+
+def resolve_pace_targets(threshold_paces, zones, positions):
+    """
+    Target pace (sec/km) for every (threshold, zone, position) triple.
+    Position 0.0 = easiest (slowest end), 1.0 = hardest (fastest end).
+    """
+    tp = np.asarray(threshold_paces, dtype=np.float64)
+    zones = np.asarray(zones, dtype=np.intp)
+    positions = np.asarray(positions, dtype=np.float64)
+    return tp * (PACE_FACTOR_TABLE[zones, 1] - positions * _PACE_SPAN[zones])
+
+
+def resolve_hr_targets(lthrs, zones, positions):
+    """Target HR (bpm) for every (lthr, zone, position) triple. 0.0 = lowest bpm, 1.0 = highest."""
+    lthrs = np.asarray(lthrs, dtype=np.float64)
+    zones = np.asarray(zones, dtype=np.intp)
+    positions = np.asarray(positions, dtype=np.float64)
+
+    low = _js_round(lthrs * _HR_MIN_FACTOR[zones])
+    high = _js_round(lthrs * _HR_MAX_FACTOR[zones]) + _HR_MAX_OFFSET[zones]
+    return _js_round(low + positions * (high - low)).astype(np.int32)
+
+
+def flatten_blocks(workouts):
+    """
+    Flattens the zoned blocks of many workouts into arrays for one vectorized call.
+
+    Returns (zone_idx, positions, offsets): blocks of workouts[i] are the slice
+    offsets[i]:offsets[i + 1]. Blocks without a zone get index -1 and are skipped
+    by resolve_plan().
+    """
+    zones, positions, offsets = [], [], [0]
+    for workout in workouts:
+        for block in workout.get('structure') or []:
+            zones.append(ZONE_INDEX.get(block.get('zone'), -1))
+            position = block.get('zone_position')
+            positions.append(DEFAULT_POSITION if position is None else position)
+        offsets.append(len(zones))
+    return (
+        np.asarray(zones, dtype=np.int8),
+        np.asarray(positions, dtype=np.float64),
+        np.asarray(offsets, dtype=np.int64),
+    )
+
+
+def resolve_plan(workouts, threshold_pace=None, lthr=None):
+    """
+    Resolves every zoned block of a plan in one pass. Returns, per workout, a list of
+    {'pace': sec/km, 'hr': bpm} dicts aligned with its structure (None for unzoned blocks).
+    """
+    zone_idx, positions, offsets = flatten_blocks(workouts)
+    zoned = zone_idx >= 0
+    safe_zones = np.where(zoned, zone_idx, 0)
+
+    count = len(zone_idx)
+    paces = resolve_pace_targets(threshold_pace, safe_zones, positions).tolist() if threshold_pace else [None] * count
+    hrs = resolve_hr_targets(lthr, safe_zones, positions).tolist() if lthr else [None] * count
+    zoned = zoned.tolist()
+
+    resolved = []
+    for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+        resolved.append([
+            {'pace': paces[i], 'hr': hrs[i]} if zoned[i] else None
+            for i in range(start, end)
+        ])
+    return resolved
+
+
+def retarget_cohort(threshold_paces, block_athlete, zones, positions):
+    """
+    Re-resolves future blocks for many athletes after a threshold change.
+    `block_athlete[j]` is the index into `threshold_paces` of the athlete owning block j.
+    Returns one target pace per block.
+    """
+    tps = np.asarray(threshold_paces, dtype=np.float64)
+    return resolve_pace_targets(tps[np.asarray(block_athlete, dtype=np.intp)], zones, positions)
@@ -0,0 +1,109 @@
+"""
+Precomputed per-athlete zone tables (mirrors src/lib/training/zoneTables.ts).
+
+Tables are built once from thresholdPace / lthr, stored compactly in the
+AthleteProfile.paceZones / hrZones columns, and only rebuilt when those
+metrics change. ZoneTableCache counts hits / loads / misses so the reuse
+rate can be checked.
+
+Builder text export does not use these tables: its %-of-threshold ranges are
+the same for every athlete and come from zones.PACE_ZONE_PERCENT.
+"""
+
+import collections
+import json
+
+from .zones import ZONES, calculate_hr_zones, calculate_pace_zones
+
+ZoneTable = collections.namedtuple('ZoneTable', ['threshold_pace', 'lthr', 'pace', 'hr'])
+ZoneTable.__doc__ = "Zone bounds for one athlete: `pace` / `hr` map zone -> (min, max), or are None."
+
+DEFAULT_MAX_ENTRIES = 1000
+
+
+def build_zone_table(threshold_pace=None, lthr=None):
+    pace = hr = None
+    if threshold_pace:
+        zones = calculate_pace_zones(threshold_pace)
+        pace = {z: (zones[z]['min'], zones[z]['max']) for z in ZONES}
+    if lthr:
+        zones = calculate_hr_zones(lthr)
+        hr = {z: (zones[z]['min'], zones[z]['max']) for z in ZONES}
+    return ZoneTable(threshold_pace or None, lthr or None, pace, hr)
+
+
+def to_profile_columns(table):
+    """Compact JSON for AthleteProfile.paceZones / hrZones: source metric + [min, max] pairs in Z1..Z5 order."""
+    pace = hr = None
+    if table.pace and table.threshold_pace:
+        pace = json.dumps({'thresholdPace': table.threshold_pace, 'zones': [list(table.pace[z]) for z in ZONES]},
+                          separators=(',', ':'))
+    if table.hr and table.lthr:
+        hr = json.dumps({'lthr': table.lthr, 'zones': [list(table.hr[z]) for z in ZONES]}, separators=(',', ':'))
+    return {'paceZones': pace, 'hrZones': hr}
+
+
+def from_profile_columns(profile):
+    """
+    Reads a table back from a profile dict. Returns None when nothing is stored or the
+    stored tables were built from different metrics than the profile's current ones.
+    """
+    try:
+        pace = json.loads(profile['paceZones']) if profile.get('paceZones') else None
+        hr = json.loads(profile['hrZones']) if profile.get('hrZones') else None
+    except ValueError:
+        return None
+
+    if (pace or {}).get('thresholdPace') != (profile.get('thresholdPace') or None):
+        return None
+    if (hr or {}).get('lthr') != (profile.get('lthr') or None):
+        return None
+
+    return ZoneTable(
+        profile.get('thresholdPace') or None,
+        profile.get('lthr') or None,
+        {z: tuple(pair) for z, pair in zip(ZONES, pace['zones'])} if pace else None,
+        {z: tuple(pair) for z, pair in zip(ZONES, hr['zones'])} if hr else None,
+    )
+
+
+class ZoneTableCache:
+    """LRU cache of zone tables per athlete, invalidated when thresholdPace / lthr change."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.loads = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, athlete_id, profile):
+        """Zone table for `profile` (a dict with thresholdPace / lthr and optionally the stored columns)."""
+        cached = self._entries.get(athlete_id)
+        if cached is not None:
+            if cached.threshold_pace == (profile.get('thresholdPace') or None) and cached.lthr == (profile.get('lthr') or None):
+                self.hits += 1
+                self._entries.move_to_end(athlete_id)
+                return cached
+            self.invalidate(athlete_id)
+
+        table = from_profile_columns(profile)
+        if table is not None:
+            self.loads += 1
+        else:
+            self.misses += 1
+            table = build_zone_table(profile.get('thresholdPace'), profile.get('lthr'))
+
+        self._entries[athlete_id] = table
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return table
+
+    def invalidate(self, athlete_id):
+        if self._entries.pop(athlete_id, None) is not None:
+            self.invalidations += 1
+
+    def stats(self):
+        return {'hits': self.hits, 'loads': self.loads, 'misses': self.misses,
+                'invalidations': self.invalidations, 'size': len(self._entries)}
@@ -0,0 +1,76 @@
+"""
+Training zones (mirrors src/lib/training/zones.ts).
+
+Pure-Python, one-target-at-a-time versions. For resolving whole plans or
+cohorts at once see coach.zone_engine.
+"""
+
+import math
+
+ZONES = ('Z1', 'Z2', 'Z3', 'Z4', 'Z5')
+
+# Pace time factors relative to threshold pace: (min, max) seconds/km multipliers.
+# "min" is the faster end of the zone, "max" the slower end.
+PACE_FACTORS = {
+    'Z1': (1.30, 1.45),  # Easy
+    'Z2': (1.15, 1.30),
+    'Z3': (1.05, 1.15),
+    'Z4': (1.00, 1.05),
+    'Z5': (0.90, 1.00),  # Fast
+}
+
+# Theoretical max HR used as the top of Z5 for safety.
+HR_MAX = 220
+
+# Speed % of threshold per zone, used for Intervals.icu export (e.g. "77%-87% pace").
+PACE_ZONE_PERCENT = {
+    'Z1': (69, 77),
+    'Z2': (77, 87),
+    'Z3': (87, 95),
+    'Z4': (95, 100),
+    'Z5': (100, 111),
+}
+
+
+def js_round(value):
+    """Math.round semantics (half up). Python's round() rounds half to even: round(144.5) == 144."""
+    return math.floor(value + 0.5)
+
+
+def calculate_pace_zones(threshold_pace):
+    return {
+        zone: {'min': threshold_pace * low, 'max': threshold_pace * high}
+        for zone, (low, high) in PACE_FACTORS.items()
+    }
+
+
+def calculate_hr_zones(lthr):
+    return {
+        'Z1': {'min': 0, 'max': js_round(lthr * 0.85) - 1},
+        'Z2': {'min': js_round(lthr * 0.85), 'max': js_round(lthr * 0.89)},
+        'Z3': {'min': js_round(lthr * 0.90), 'max': js_round(lthr * 0.94)},
+        'Z4': {'min': js_round(lthr * 0.95), 'max': js_round(lthr * 0.99)},
+        'Z5': {'min': js_round(lthr * 1.00), 'max': HR_MAX},
+    }
+
+
+def format_pace(seconds):
+    mins = math.floor(seconds / 60)
+    secs = round(seconds % 60)
+    return f"{mins}:{secs:02d}"
+
+
+def get_pace_zone_as_percent(zone):
+    return PACE_ZONE_PERCENT[zone]
+
+
+def resolve_pace_target(threshold_pace, zone, position):
+    # Easiest (Pos 0) is MAX seconds (slower), Hardest (Pos 1) is MIN seconds (faster)
+    low, high = PACE_FACTORS[zone]
+    return threshold_pace * high - position * (threshold_pace * high - threshold_pace * low)
+
+
+def resolve_hr_target(lthr, zone, position):
+    # Easiest (Pos 0) is Min BPM, Hardest (Pos 1) is Max BPM
+    rng = calculate_hr_zones(lthr)[zone]
+    return js_round(rng['min'] + position * (rng['max'] - rng['min']))
@@ -1,8 +1,29 @@
 import urllib.request
 import json
 import sys
+import time
 
-def list_models(api_key):
+from coach.dispatcher import LatencyHistogram
+
+PROBE_PROMPT = {"contents": [{"parts": [{"text": "Reply with OK."}]}]}
+
+def probe_latency(api_key, model_name, samples):
+    """Times `samples` tiny generateContent calls; returns the model's latency histogram."""
+    url = f"https://generativelanguage.googleapis.com/v1beta/{model_name}:generateContent?key={api_key}"
+    histogram = LatencyHistogram()
+    for _ in range(samples):
+        req = urllib.request.Request(url, data=json.dumps(PROBE_PROMPT).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'}, method='POST')
+        started = time.monotonic()
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                response.read()
+            histogram.record((time.monotonic() - started) * 1000)
+        except Exception:
+            histogram.record_error()
+    return histogram
+
+def list_models(api_key, probe=0):
     url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
     
     try:
@@ -10,7 +31,10 @@ def list_models(api_key):
         with urllib.request.urlopen(req) as response:
             data = json.loads(response.read().decode('utf-8'))
             
-            print(f"\n{'Model Name':<40} | {'Supported Methods'}")
+            if probe:
+                print(f"\n{'Model Name':<40} | {'p50 ms':>7} | {'p90 ms':>7} | {'errors':>6}")
+            else:
+                print(f"\n{'Model Name':<40} | {'Supported Methods'}")
             print("-" * 80)
             
             found_any = False
@@ -21,7 +45,12 @@ def list_models(api_key):
                 if 'generateContent' in methods:
                     # Strip the "models/" prefix for easier reading
                     short_name = name.replace('models/', '')
-                    print(f"{short_name:<40} | {', '.join(methods)}")
+                    if probe:
+                        # p90 is what the dispatcher waits before hedging to another provider
+                        h = probe_latency(api_key, name, probe)
+                        print(f"{short_name:<40} | {h.percentile(0.5) or '-':>7} | {h.percentile(0.9) or '-':>7} | {h.errors:>6}")
+                    else:
+                        print(f"{short_name:<40} | {', '.join(methods)}")
                     found_any = True
             
             if not found_any:
@@ -31,13 +60,21 @@ def list_models(api_key):
         print(f"Error listing models: {e}")
 
 if __name__ == "__main__":
+    # Usage: python list_models.py [API_KEY] [--probe N]
+    args = sys.argv[1:]
+    probe = 0
+    if '--probe' in args:
+        i = args.index('--probe')
+        probe = int(args[i + 1])
+        del args[i:i + 2]
+
     print("--- Checking Available Gemini Models ---")
-    if len(sys.argv) > 1:
-        key = sys.argv[1]
-        list_models(key)
+    if args:
+        key = args[0]
+        list_models(key, probe)
     else:
         key = input("Enter your Gemini API Key: ").strip()
         if key:
-            list_models(key)
+            list_models(key, probe)
         else:
             print("Missing API Key.")
@@ -0,0 +1,35 @@
+import argparse
+
+from coach.mock_server import MockIntervalsServer
+
+# Offline stand-in for Intervals.icu. Point the scripts (and the Next.js app) at it with:
+#   INTERVALS_BASE_URL=http://127.0.0.1:8765/api/v1 python scripts/test_weekly_plan.py any-key i1
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Intervals.icu stand-in for load and regression testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0, help="fixed delay added to every request")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="extra uniform random delay, 0..jitter")
+    parser.add_argument('--error-rate', type=float, default=0, help="fraction of requests answered with 429")
+    parser.add_argument('--rate-limit', type=float, default=None, help="requests/second allowed per API key")
+    parser.add_argument('--burst', type=float, default=None, help="per-key burst (default 2x rate limit)")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After seconds on injected 429s")
+    parser.add_argument('--seed', type=int, default=42, help="seed for synthetic athletes and injected errors")
+    args = parser.parse_args()
+
+    server = MockIntervalsServer(
+        host=args.host, port=args.port,
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate, rate_limit=args.rate_limit, burst=args.burst,
+        retry_after=args.retry_after, seed=args.seed,
+    )
+    print(f"--- Mock Intervals.icu listening on {server.base_url} ---")
+    print(f"export INTERVALS_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping.")
+
+if __name__ == "__main__":
+    main()
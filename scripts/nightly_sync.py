@@ -0,0 +1,108 @@
+import datetime
+import json
+import sys
+import time
+
+from coach.cache import IntervalsCache
+from coach.sync import Athlete, SyncEngine
+
+# Usage: python scripts/nightly_sync.py athletes.json [days] [concurrency] [--streams]
+# athletes.json: [{"athlete_id": "i123456", "api_key": "...", "lthr": 170}, ...]
+# The first run should cover ~90 days so CTL starts from real history; later runs
+# continue from the CTL/ATL (and readiness baselines) stored for the day before the window.
+# --streams also stores per-second HR / speed streams of new activities
+# (coach.stream_store, needs NumPy) for time-in-zone analysis.
+
+def update_training_load(cache, results, start_date, end_date, lthrs=None):
+    """Recomputes daily load / CTL / ATL for the synced window, all athletes in one pass."""
+    try:
+        from coach.load_engine import cohort_loads, load_series
+    except ImportError:
+        print("Skipping training load (NumPy not installed)")
+        return
+    if not results:
+        return
+
+    started = time.perf_counter()
+    ids = [r['athlete_id'] for r in results]
+    initial = [cache.load_state_before(athlete_id, start_date) for athlete_id in ids]
+    loads = cohort_loads([r['activities'] for r in results], start_date, end_date, [(lthrs or {}).get(i) for i in ids])
+    ctl, atl, tsb = load_series(loads, [c for c, _ in initial], [a for _, a in initial])
+    for i, athlete_id in enumerate(ids):
+        cache.store_load(athlete_id, start_date, loads[i], ctl[i], atl[i])
+
+    print(f"Training load: {len(ids)} athletes x {loads.shape[1]} days in {time.perf_counter() - started:.2f}s "
+          f"(mean CTL {ctl[:, -1].mean():.1f}, ATL {atl[:, -1].mean():.1f}, TSB {tsb[:, -1].mean():.1f})")
+
+def update_readiness(cache, results, start_date, end_date):
+    """Recomputes daily readiness for the synced window, all athletes in one pass."""
+    try:
+        from coach.readiness import STATUSES, readiness_series, stack_baselines, stored_rows, wellness_matrix
+    except ImportError:
+        print("Skipping readiness (NumPy not installed)")
+        return
+    if not results:
+        return
+
+    started = time.perf_counter()
+    ids = [r['athlete_id'] for r in results]
+    initial = [cache.readiness_state_before(athlete_id, start_date) for athlete_id in ids]
+    hrv, rhr, strain = wellness_matrix([r['wellness'] for r in results], start_date, end_date)
+    series = readiness_series(hrv, rhr, strain,
+                              stack_baselines([s and s[0] for s in initial]),
+                              stack_baselines([s and s[1] for s in initial]))
+    for i, athlete_id in enumerate(ids):
+        cache.store_readiness(athlete_id, start_date, stored_rows(series, i))
+
+    latest = series['status'][:, -1]
+    print(f"Readiness: {len(ids)} athletes x {hrv.shape[1]} days in {time.perf_counter() - started:.2f}s "
+          f"(today: {', '.join(f'{(latest == k).sum()} {s}' for k, s in enumerate(STATUSES))})")
+
+def open_stream_store():
+    try:
+        from coach.stream_store import StreamStore
+    except ImportError:
+        print("Skipping streams (NumPy not installed)")
+        return None
+    return StreamStore()
+
+def nightly_sync(athletes, days=7, concurrency=16, lthrs=None, streams=False):
+    end_date = datetime.date.today()
+    start_date = end_date - datetime.timedelta(days=days)
+    print(f"--- Syncing {len(athletes)} athletes ({start_date} -> {end_date}, concurrency {concurrency}) ---")
+
+    started = time.perf_counter()
+    # Local cache: only days newer than each athlete's high-water mark are fetched again
+    stream_store = open_stream_store() if streams else None
+    with IntervalsCache() as cache, SyncEngine(concurrency=concurrency, cache=cache, stream_store=stream_store) as engine:
+        results = engine.run_sync(athletes, start_date.isoformat(), end_date.isoformat())
+        stats = dict(engine.stats)
+        elapsed = time.perf_counter() - started
+        update_training_load(cache, [r for r in results if not r['error']], start_date, end_date, lthrs)
+        update_readiness(cache, [r for r in results if not r['error']], start_date, end_date)
+
+    for result in results:
+        if result['error']:
+            print(f"❌ {result['athlete_id']}: {result['error']}")
+
+    ok = sum(1 for r in results if not r['error'])
+    print(f"\n✅ {ok}/{len(results)} athletes synced in {elapsed:.1f}s")
+    print(f"Requests: {stats.get('requests', 0)}, retries: {stats.get('retries', 0)}, throttled: {stats.get('throttled', 0)}")
+    if stream_store is not None:
+        print(f"Streams stored: {stats.get('streams', 0)}")
+
+if __name__ == "__main__":
+    streams = '--streams' in sys.argv
+    args = [a for a in sys.argv[1:] if a != '--streams']
+    if not args:
+        print("Usage: python scripts/nightly_sync.py athletes.json [days] [concurrency] [--streams]")
+        sys.exit(1)
+
+    with open(args[0]) as f:
+        config = json.load(f)
+    athletes = [Athlete(str(a['athlete_id']), a['api_key']) for a in config]
+    # Optional LTHR per athlete, used for hrTSS when an activity has no icu_training_load
+    lthrs = {str(a['athlete_id']): a.get('lthr') for a in config}
+    days = int(args[1]) if len(args) > 1 else 7
+    concurrency = int(args[2]) if len(args) > 2 else 16
+    nightly_sync(athletes, days, concurrency, lthrs, streams)
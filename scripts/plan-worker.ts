@@ -0,0 +1,79 @@
+import { prisma, queryStats } from '../src/lib/db';
+import { complianceJobHandlers, intervalsActivitySource, prismaComplianceStore } from '../src/lib/jobs/complianceJobs';
+import { aiPlanModel, planJobHandlers, prismaPlanStore } from '../src/lib/jobs/planJobs';
+import { PrismaJobQueue } from '../src/lib/jobs/queue';
+import { intervalsWellnessSource, prismaReadinessStore, readinessFor, readinessJobHandlers } from '../src/lib/jobs/readinessJobs';
+import { StubPlanModel } from '../src/lib/jobs/stubModel';
+import { JobWorker } from '../src/lib/jobs/worker';
+
+// Background worker for plan jobs queued via /api/jobs or /api/generatePlan { background: true },
+// for matching synced activities to planned workouts (queued after /api/fetchIntervalsData)
+// and for bulk readiness updates (/api/jobs { type: 'updateReadiness' }).
+//
+//   npx tsx scripts/plan-worker.ts                 # run until stopped (Ctrl+C)
+//   npx tsx scripts/plan-worker.ts --once          # drain the queue and exit (cron / overnight batch)
+//   npx tsx scripts/plan-worker.ts --stub-model    # no AI calls, deterministic plans
+//
+// Env: PLAN_WORKER_CONCURRENCY (default 8), PLAN_WORKER_PER_PROVIDER="openai=4,gemini=8,claude=2,intervals=8"
+
+// Jobs still 'running' after this long were left by a crashed worker.
+const STALE_MS = 15 * 60 * 1000;
+
+function perProviderLimits(spec: string | undefined): Record<string, number> {
+    const limits: Record<string, number> = {};
+    (spec || '').split(',').forEach(entry => {
+        const [provider, limit] = entry.split('=');
+        if (provider && Number(limit) > 0) limits[provider.trim()] = Number(limit);
+    });
+    return limits;
+}
+
+async function main() {
+    const once = process.argv.includes('--once');
+    const stub = process.argv.includes('--stub-model');
+
+    const queue = new PrismaJobQueue(prisma);
+    const stubModel = new StubPlanModel();
+    const readinessDeps = { store: prismaReadinessStore(prisma), source: intervalsWellnessSource };
+    const handlers = {
+        ...planJobHandlers({
+            store: prismaPlanStore(prisma),
+            model: stub ? () => stubModel : aiPlanModel,
+            readiness: readinessFor(readinessDeps),
+        }),
+        ...complianceJobHandlers({ store: prismaComplianceStore(prisma), source: intervalsActivitySource }),
+        ...readinessJobHandlers(readinessDeps),
+    };
+
+    const worker = new JobWorker(queue, handlers, {
+        concurrency: Number(process.env.PLAN_WORKER_CONCURRENCY) || undefined,
+        perProvider: perProviderLimits(process.env.PLAN_WORKER_PER_PROVIDER),
+        staleAfterMs: STALE_MS,
+        onError: (job, error) => console.error(`❌ ${job.type} ${job.id} (attempt ${job.attempts}/${job.maxAttempts}):`, error),
+    });
+
+    const requeued = await queue.requeueStale(STALE_MS);
+    if (requeued) console.log(`Requeued or failed ${requeued} stale job(s)`);
+
+    const started = Date.now();
+    if (once) {
+        await worker.drain();
+    } else {
+        process.on('SIGINT', () => worker.stop());
+        process.on('SIGTERM', () => worker.stop());
+        await worker.run();
+    }
+
+    const counts = await queue.counts();
+    console.log(`Done in ${((Date.now() - started) / 1000).toFixed(1)}s: ${worker.stats.completed} completed, ` +
+        `${worker.stats.failed} failed attempts. Queue: ${JSON.stringify(counts)}`);
+    Object.entries(queryStats()).forEach(([query, stat]) => {
+        console.log(`  ${query}: ${stat.count}x, mean ${stat.meanMs.toFixed(1)}ms, max ${stat.maxMs.toFixed(1)}ms`);
+    });
+    await prisma.$disconnect();
+}
+
+main().catch(error => {
+    console.error(error);
+    process.exit(1);
+});
@@ -3,46 +3,51 @@ import json
 import sys
 import os
 
-def generate_workout(api_key, user_request="Suggest a workout for today"):
-    # Using gemini-2.0-flash as confirmed by list_models.py
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
-    headers = {'Content-Type': 'application/json'}
-    
-    # Replicating the System Prompt from src/lib/ai/service.ts
-    system_prompt = """
-    You are an elite endurance coach for running.
-    Your goal is to generate a detailed, structured workout based on the user's request and context.
-    
-    CRITICAL RULES:
-    1.  **Structure**: The workout MUST be broken down into specific blocks (Warmup, Main Set, Cooldown).
-    2.  **Intensity**: Use ZONES (Z1-Z5) for intensity. Do NOT use specific paces (e.g. "5:00/km") or HR values.
-    3.  **Zone Position**: For each block, specify a `zone_position` from 0.0 to 1.0.
-        - 0.0 = Bottom of zone
-        - 0.5 = Middle of zone
-        - 1.0 = Top of zone
-    4.  **Format**: Return ONLY valid JSON matching the schema below. No markdown, no explanation.
-    
-    JSON Schema:
+from coach.ai_cache import AIResponseCache, cache_key
+from coach.json_stream import StructureStreamParser
+
+# Using gemini-2.0-flash as confirmed by list_models.py
+MODEL = "gemini-2.0-flash"
+
+# Identical requests within the TTL are answered from memory instead of calling the model again
+RESPONSE_CACHE = AIResponseCache()
+
+# Replicating the System Prompt from src/lib/ai/service.ts
+SYSTEM_PROMPT = """
+You are an elite endurance coach for running.
+Your goal is to generate a detailed, structured workout based on the user's request and context.
+
+CRITICAL RULES:
+1.  **Structure**: The workout MUST be broken down into specific blocks (Warmup, Main Set, Cooldown).
+2.  **Intensity**: Use ZONES (Z1-Z5) for intensity. Do NOT use specific paces (e.g. "5:00/km") or HR values.
+3.  **Zone Position**: For each block, specify a `zone_position` from 0.0 to 1.0.
+    - 0.0 = Bottom of zone
+    - 0.5 = Middle of zone
+    - 1.0 = Top of zone
+4.  **Format**: Return ONLY valid JSON matching the schema below. No markdown, no explanation.
+
+JSON Schema:
+{
+  "workout_name": "String (Short, punchy title)",
+  "description": "String (Motivational description of the goal)",
+  "sport": "run",
+  "structure": [
     {
-      "workout_name": "String (Short, punchy title)",
-      "description": "String (Motivational description of the goal)",
-      "sport": "run",
-      "structure": [
-        {
-          "type": "warmup" | "interval" | "recovery" | "cooldown",
-          "duration_min": Number,
-          "zone": "Z1" | "Z2" | "Z3" | "Z4" | "Z5",
-          "zone_position": Number (0.0-1.0),
-          "intensity_description": "String (e.g. 'Easy jog', 'Hard effort')"
-        }
-      ]
+      "type": "warmup" | "interval" | "recovery" | "cooldown",
+      "duration_min": Number,
+      "zone": "Z1" | "Z2" | "Z3" | "Z4" | "Z5",
+      "zone_position": Number (0.0-1.0),
+      "intensity_description": "String (e.g. 'Easy jog', 'Hard effort')"
     }
-    """
-    
-    payload = {
+  ]
+}
+"""
+
+def build_payload(user_request):
+    return {
         "contents": [{
             "parts": [
-                {"text": system_prompt},
+                {"text": SYSTEM_PROMPT},
                 {"text": f"User Request: {user_request}"}
             ]
         }],
@@ -50,7 +55,59 @@ def generate_workout(api_key, user_request="Suggest a workout for today"):
             "responseMimeType": "application/json"
         }
     }
-    
+
+def generate_workout(api_key, user_request="Suggest a workout for today", cache=RESPONSE_CACHE):
+    url = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL}:generateContent?key={api_key}"
+    headers = {'Content-Type': 'application/json'}
+
+    key = cache_key('gemini', MODEL, f"{SYSTEM_PROMPT}\nUser Request: {user_request}")
+    return cache.get_or_call(key, lambda: call_model(url, headers, build_payload(user_request)))
+
+def stream_workout(api_key, user_request="Suggest a workout for today", cache=RESPONSE_CACHE):
+    """
+    Streams the workout: yields ('block', block) for each structure block as soon as it
+    has been generated, then ('workout', workout) once the full response is in
+    (('workout', None) on failure).
+    """
+    key = cache_key('gemini', MODEL, f"{SYSTEM_PROMPT}\nUser Request: {user_request}")
+    cached = cache.get(key)
+    if cached is not None:
+        for block in cached.get('structure', []):
+            yield 'block', block
+        yield 'workout', cached
+        return
+
+    url = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL}:streamGenerateContent?alt=sse&key={api_key}"
+    headers = {'Content-Type': 'application/json'}
+    parser = StructureStreamParser()
+
+    try:
+        data = json.dumps(build_payload(user_request)).encode('utf-8')
+        req = urllib.request.Request(url, data=data, headers=headers, method='POST')
+        with urllib.request.urlopen(req) as response:
+            # Server-sent events: one "data: {...}" line per partial response
+            for line in response:
+                line = line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                chunk = json.loads(line[5:])
+                for part in chunk['candidates'][0].get('content', {}).get('parts', []):
+                    for block in parser.feed(part.get('text', '')):
+                        yield 'block', block
+        workout = parser.result()
+
+    except urllib.error.HTTPError as e:
+        print(f"HTTP Error: {e.code} - {e.read().decode('utf-8')}")
+        workout = None
+    except Exception as e:
+        print(f"Error: {e}")
+        workout = None
+
+    if workout is not None:
+        cache.put(key, workout)
+    yield 'workout', workout
+
+def call_model(url, headers, payload):
     try:
         data = json.dumps(payload).encode('utf-8')
         req = urllib.request.Request(url, data=data, headers=headers, method='POST')
@@ -74,19 +131,36 @@ def print_workout(workout):
     print(f"📝 GOAL: {workout.get('description')}")
     print("-" * 40)
     
-    total_time = 0
     for block in workout.get('structure', []):
-        duration = block.get('duration_min')
-        total_time += duration
-        zone = block.get('zone')
-        desc = block.get('intensity_description')
-        type_lbl = block.get('type').upper()
-        
-        print(f"[{type_lbl}] {duration} mins @ {zone} ({desc})")
-        
+        print_block(block)
+
+    print_total(workout)
+
+def print_block(block):
+    duration = block.get('duration_min')
+    zone = block.get('zone')
+    desc = block.get('intensity_description')
+    type_lbl = block.get('type').upper()
+
+    print(f"[{type_lbl}] {duration} mins @ {zone} ({desc})")
+
+def print_total(workout):
+    total_time = sum(block.get('duration_min') for block in workout.get('structure', []))
     print("-" * 40)
     print(f"⏱️  Total Duration: {total_time} mins\n")
 
+def print_streamed_workout(api_key, user_request):
+    """Prints each block as soon as it is generated, then the workout summary."""
+    print("-" * 40)
+    for kind, value in stream_workout(api_key, user_request):
+        if kind == 'block':
+            print_block(value)
+        elif value:
+            print("-" * 40)
+            print(f"🏃 WORKOUT: {value.get('workout_name')}")
+            print(f"📝 GOAL: {value.get('description')}")
+            print_total(value)
+
 if __name__ == "__main__":
     print("--- Gemini AI Workout Generator ---")
     
@@ -107,5 +181,5 @@ if __name__ == "__main__":
             break
             
         print("\n🤖 Asking Gemini...")
-        workout = generate_workout(key, user_input)
-        print_workout(workout)
+        # Blocks are printed as they stream in, so the warmup shows before the main set is done
+        print_streamed_workout(key, user_input)
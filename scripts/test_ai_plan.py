@@ -3,9 +3,16 @@ import json
 import sys
 import os
 
-def generate_plan(api_key, goal, fitness):
-    # Using gemini-2.0-flash as confirmed
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
+from coach.ai_cache import AIResponseCache, cache_key
+
+# Using gemini-2.0-flash as confirmed
+MODEL = "gemini-2.0-flash"
+
+# Identical goal + fitness inputs within the TTL reuse the previous plan
+RESPONSE_CACHE = AIResponseCache()
+
+def generate_plan(api_key, goal, fitness, cache=RESPONSE_CACHE):
+    url = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL}:generateContent?key={api_key}"
     headers = {'Content-Type': 'application/json'}
     
     # Replicating the Macro Plan Prompt from src/lib/ai/service.ts
@@ -55,6 +62,10 @@ def generate_plan(api_key, goal, fitness):
         }
     }
     
+    key = cache_key('gemini', MODEL, system_prompt + user_context)
+    return cache.get_or_call(key, lambda: call_model(url, headers, payload))
+
+def call_model(url, headers, payload):
     try:
         data = json.dumps(payload).encode('utf-8')
         req = urllib.request.Request(url, data=data, headers=headers, method='POST')
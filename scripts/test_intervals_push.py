@@ -1,9 +1,9 @@
-import urllib.request
 import json
-import base64
 import datetime
 import sys
 
+from coach.intervals import IntervalsAPIError, IntervalsClient
+
 def test_push_workout(api_key, athlete_id='0'):
     print(f"Testing connection to Intervals.icu for athlete {athlete_id}...")
     
@@ -20,34 +20,18 @@ def test_push_workout(api_key, athlete_id='0'):
         "moving_time": 35 * 60
     }]
     
-    # 2. Prepare Request
-    url = f"https://intervals.icu/api/v1/athlete/{athlete_id}/events/bulk"
-    auth_str = f"API_KEY:{api_key}"
-    auth_bytes = auth_str.encode('ascii')
-    base64_auth = base64.b64encode(auth_bytes).decode('ascii')
-    
-    headers = {
-        'Authorization': f'Basic {base64_auth}',
-        'Content-Type': 'application/json'
-    }
-    
-    # 3. Send Request
+    # 2. Send Request
     try:
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-        
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                print("✅ SUCCESS: Workout pushed successfully!")
-                print(f"Check your calendar for '{workout_name}'")
-                response_body = response.read().decode('utf-8')
-                print("Response:", response_body)
-            else:
-                print(f"❌ FAILED: Status Code {response.status}")
-                
-    except urllib.error.HTTPError as e:
-        print(f"❌ FAILED: Status Code {e.code}")
-        print("Response:", e.read().decode('utf-8'))
+        with IntervalsClient(api_key, athlete_id) as client:
+            created = client.upload_workouts(payload)
+
+        print("✅ SUCCESS: Workout pushed successfully!")
+        print(f"Check your calendar for '{workout_name}'")
+        print("Response:", json.dumps(created))
+
+    except IntervalsAPIError as e:
+        print(f"❌ FAILED: Status Code {e.status}")
+        print("Response:", e.body)
     except Exception as e:
         print(f"❌ ERROR: {str(e)}")
 
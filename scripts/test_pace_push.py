@@ -1,10 +1,9 @@
-import urllib.request
-import json
-import base64
 import datetime
 import sys
 import math
 
+from coach.intervals import IntervalsAPIError, IntervalsClient
+
 # --- Zone Logic (Percentage Based) ---
 
 def get_pace_zone_as_percent(zone):
@@ -71,29 +70,16 @@ def test_push_pace_workout(api_key, threshold_pace_str, athlete_id='0'):
     }]
     
     # 4. Send Request
-    url = f"https://intervals.icu/api/v1/athlete/{athlete_id}/events/bulk"
-    auth_str = f"API_KEY:{api_key}"
-    base64_auth = base64.b64encode(auth_str.encode('ascii')).decode('ascii')
-    
-    headers = {
-        'Authorization': f'Basic {base64_auth}',
-        'Content-Type': 'application/json'
-    }
-    
     try:
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-        
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                print("✅ SUCCESS: Workout pushed successfully!")
-                print(f"Check your calendar for '{workout_name}'")
-            else:
-                print(f"❌ FAILED: Status Code {response.status}")
-                
-    except urllib.error.HTTPError as e:
-        print(f"❌ FAILED: Status Code {e.code}")
-        print("Response:", e.read().decode('utf-8'))
+        with IntervalsClient(api_key, athlete_id) as client:
+            client.upload_workouts(payload)
+
+        print("✅ SUCCESS: Workout pushed successfully!")
+        print(f"Check your calendar for '{workout_name}'")
+
+    except IntervalsAPIError as e:
+        print(f"❌ FAILED: Status Code {e.status}")
+        print("Response:", e.body)
     except Exception as e:
         print(f"❌ ERROR: {str(e)}")
 
@@ -1,25 +1,12 @@
-import urllib.request
-import json
-import base64
 import datetime
 import sys
 
 # --- Safeguard Logic (Mirrors src/lib/intervals/client.ts) ---
-
-def is_future_or_today(date_str):
-    # date_str format: YYYY-MM-DD or YYYY-MM-DDT...
-    date_part = date_str.split('T')[0]
-    today_part = datetime.datetime.now().strftime('%Y-%m-%d')
-    return date_part >= today_part
+from coach.intervals import IntervalsAPIError, IntervalsClient, is_future_or_today
 
 # --- API Interaction ---
 
-def push_workout_raw(api_key, athlete_id, date_str, name):
-    url = f"https://intervals.icu/api/v1/athlete/{athlete_id}/events/bulk"
-    auth_str = f"API_KEY:{api_key}"
-    base64_auth = base64.b64encode(auth_str.encode('ascii')).decode('ascii')
-    headers = {'Authorization': f'Basic {base64_auth}', 'Content-Type': 'application/json'}
-    
+def push_workout_raw(client, date_str, name):
     payload = [{
         "category": "WORKOUT",
         "start_date_local": f"{date_str}T09:00:00",
@@ -30,44 +17,45 @@ def push_workout_raw(api_key, athlete_id, date_str, name):
     }]
     
     try:
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-        with urllib.request.urlopen(req) as response:
-            return response.status
+        client.upload_workouts(payload)
+        return 200
+    except IntervalsAPIError as e:
+        return e.status
     except Exception as e:
         return str(e)
 
 def test_safeguards(api_key, athlete_id='0'):
-    yesterday = (datetime.datetime.now() - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
-    print(f"--- Testing Safeguards (Date: {yesterday}) ---")
+    with IntervalsClient(api_key, athlete_id) as client:
+        yesterday = (datetime.datetime.now() - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+        print(f"--- Testing Safeguards (Date: {yesterday}) ---")
     
-    # Scenario 1: Raw API (No Safeguard)
-    print("\n1. Attempting upload to YESTERDAY (Raw API)...")
-    status = push_workout_raw(api_key, athlete_id, yesterday, "Past Workout (Unsafe)")
-    if status == 200:
-        print("⚠️  Result: SUCCESS. The API allowed it.")
-        print("   (This confirms why we need app-side checks!)")
-    else:
-        print(f"Result: Failed ({status})")
+        # Scenario 1: Raw API (No Safeguard)
+        print("\n1. Attempting upload to YESTERDAY (Raw API)...")
+        status = push_workout_raw(client, yesterday, "Past Workout (Unsafe)")
+        if status == 200:
+            print("⚠️  Result: SUCCESS. The API allowed it.")
+            print("   (This confirms why we need app-side checks!)")
+        else:
+            print(f"Result: Failed ({status})")
 
-    # Scenario 2: App Logic (With Safeguard)
-    print("\n2. Attempting upload to YESTERDAY (With App Safeguard)...")
-    if is_future_or_today(yesterday):
-        print("Result: Allowed (Unexpected!)")
-    else:
-        print("✅ Result: BLOCKED by Safeguard.")
-        print("   Error: Cannot upload workouts to the past.")
+        # Scenario 2: App Logic (With Safeguard)
+        print("\n2. Attempting upload to YESTERDAY (With App Safeguard)...")
+        if is_future_or_today(yesterday):
+            print("Result: Allowed (Unexpected!)")
+        else:
+            print("✅ Result: BLOCKED by Safeguard.")
+            print("   Error: Cannot upload workouts to the past.")
 
-    # Scenario 3: Future Date
-    tomorrow = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
-    print(f"\n3. Attempting upload to TOMORROW ({tomorrow}) (With App Safeguard)...")
-    if is_future_or_today(tomorrow):
-        print("✅ Result: ALLOWED. Proceeding to upload...")
-        status = push_workout_raw(api_key, athlete_id, tomorrow, "Future Workout (Safe)")
-        if status == 200:
-            print("   Upload Successful.")
-    else:
-        print("Result: Blocked (Unexpected!)")
+        # Scenario 3: Future Date
+        tomorrow = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+        print(f"\n3. Attempting upload to TOMORROW ({tomorrow}) (With App Safeguard)...")
+        if is_future_or_today(tomorrow):
+            print("✅ Result: ALLOWED. Proceeding to upload...")
+            status = push_workout_raw(client, tomorrow, "Future Workout (Safe)")
+            if status == 200:
+                print("   Upload Successful.")
+        else:
+            print("Result: Blocked (Unexpected!)")
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
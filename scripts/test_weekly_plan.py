@@ -1,9 +1,9 @@
-import urllib.request
-import json
-import base64
 import datetime
 import sys
 
+from coach.intervals import IntervalsClient
+from coach.plan_upload import upload_events
+
 # --- Helper: Get Next Monday ---
 def get_next_monday():
     today = datetime.date.today()
@@ -12,13 +12,8 @@ def get_next_monday():
         days_ahead += 7
     return today + datetime.timedelta(days=days_ahead)
 
-# --- Helper: Push Workout ---
-def push_workout(api_key, athlete_id, workout, date_str):
-    url = f"https://intervals.icu/api/v1/athlete/{athlete_id}/events/bulk"
-    auth_str = f"API_KEY:{api_key}"
-    base64_auth = base64.b64encode(auth_str.encode('ascii')).decode('ascii')
-    headers = {'Authorization': f'Basic {base64_auth}', 'Content-Type': 'application/json'}
-    
+# --- Helper: Build Workout Event ---
+def build_event(workout, date_str):
     # Construct Description
     desc_lines = []
     for block in workout['structure']:
@@ -32,23 +27,14 @@ def push_workout(api_key, athlete_id, workout, date_str):
         desc_lines.append(f"- {block['duration']}m {block['target']} {label}")
     final_desc = "\n\n".join(desc_lines)
 
-    payload = [{
+    return {
         "category": "WORKOUT",
         "start_date_local": f"{date_str}T09:00:00",
         "name": workout['name'],
         "description": final_desc,
         "type": "Run",
         "moving_time": sum(b['duration'] for b in workout['structure']) * 60
-    }]
-    
-    try:
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-        with urllib.request.urlopen(req) as response:
-            return response.status == 200
-    except Exception as e:
-        print(f"Error pushing {workout['name']}: {e}")
-        return False
+    }
 
 # --- Main Test ---
 def test_weekly_plan(api_key, athlete_id='0'):
@@ -80,17 +66,28 @@ def test_weekly_plan(api_key, athlete_id='0'):
         }
     ]
     
-    success_count = 0
+    events = []
     for item in plan:
         workout_date = monday + datetime.timedelta(days=item['day_offset'])
         print(f"Scheduling '{item['name']}' for {workout_date}...")
-        
-        if push_workout(api_key, athlete_id, item, str(workout_date)):
-            print("✅ Pushed.")
-            success_count += 1
+        events.append((item, build_event(item, str(workout_date))))
+
+    # Whole week goes up in a single /events/bulk call
+    with IntervalsClient(api_key, athlete_id) as client:
+        try:
+            results = upload_events(client, events)
+        except Exception as e:
+            print(f"Error pushing week: {e}")
+            results = []
+
+    success_count = 0
+    for result in results:
+        if result.error:
+            print(f"❌ Failed: {result.workout['name']} ({result.error})")
         else:
-            print("❌ Failed.")
-            
+            print(f"✅ Pushed: {result.workout['name']}")
+            success_count += 1
+
     print(f"\n--- Result: {success_count}/{len(plan)} Workouts Uploaded ---")
     if success_count == len(plan):
         print("Success! Check your Intervals.icu calendar for NEXT week.")
@@ -1,4 +1,4 @@
-import { IntervalsClient } from '../src/lib/intervals/client';
+import { convertStructureToText } from '../src/lib/intervals/client';
 import { AIService } from '../src/lib/ai/service';
 
 // Mock AI Service to test parsing
@@ -54,9 +54,7 @@ async function runVerification() {
 
     // 2. Test Intervals.icu Conversion
     console.log("\n2. Testing Intervals.icu Text Conversion...");
-    const client = new IntervalsClient('test-key', '0');
-    // Access private method via casting to any (for testing purposes)
-    const text = (client as any).convertStructureToText(mockWorkout.structure);
+    const text = convertStructureToText(mockWorkout.structure);
 
     console.log("Generated Text:");
     console.log("---------------------------------------------------");
@@ -0,0 +1,114 @@
+import { PlanJobDeps, PlanStore, PlanUser, planJobHandlers } from '../src/lib/jobs/planJobs';
+import { MemoryJobQueue } from '../src/lib/jobs/queue';
+import { StubPlanModel } from '../src/lib/jobs/stubModel';
+import { JobWorker } from '../src/lib/jobs/worker';
+import { adjustWeek } from '../src/lib/training/adjust';
+
+// Runs the plan worker against the in-memory queue, an in-memory store and the stub model:
+//   npx tsx scripts/verify-jobs.ts
+
+const USERS = 200;
+const PER_PROVIDER = { openai: 3, gemini: 5, claude: 2 };
+const PROVIDERS = Object.keys(PER_PROVIDER);
+
+async function verifyJobs() {
+    const users = new Map<string, PlanUser>();
+    for (let i = 0; i < USERS; i++) {
+        const id = `user_${i}`;
+        users.set(id, { id, aiProvider: PROVIDERS[i % PROVIDERS.length], aiApiKey: 'x', intervalsApiKey: null, profile: { availableHours: 8, primarySport: i % 10 === 9 ? 'bike' : 'run' } });
+    }
+    const plans: any[] = [];
+    const workouts: any[] = [];
+    const store: PlanStore = {
+        getUser: async id => users.get(id) ?? null,
+        createPlan: async (data, rows) => {
+            plans.push(data);
+            const planId = `plan_${plans.length}`;
+            workouts.push(...rows.map(row => ({ ...row, planId, userId: data.userId })));
+            return { id: planId, workouts: rows.length };
+        },
+        planForJob: async jobId => {
+            const index = plans.findIndex(p => p.jobId === jobId);
+            if (index === -1) return null;
+            const planId = `plan_${index + 1}`;
+            return { id: planId, macroPlan: plans[index].macroPlan, workouts: workouts.filter(w => w.planId === planId).length };
+        },
+        getPlan: async () => null,
+        planWorkouts: async () => [],
+        updateWorkout: async () => { },
+    };
+
+    // Track how many model calls run at once per provider
+    const active: Record<string, number> = {};
+    const peak: Record<string, number> = {};
+    const model = new StubPlanModel(5, 'FAIL');
+    const deps: PlanJobDeps = {
+        store,
+        history: async () => [],
+        model: user => ({
+            generateMacroPlan: async (profile, goal, history) => {
+                active[user.aiProvider] = (active[user.aiProvider] ?? 0) + 1;
+                peak[user.aiProvider] = Math.max(peak[user.aiProvider] ?? 0, active[user.aiProvider]);
+                try {
+                    return await model.generateMacroPlan(profile, goal, history);
+                } finally {
+                    active[user.aiProvider]--;
+                }
+            },
+            summarizeAdjustment: (profile, context) => model.summarizeAdjustment(profile, context),
+        }),
+    };
+
+    const queue = new MemoryJobQueue();
+    const goalDate = new Date(Date.now() + 16 * 7 * 24 * 60 * 60 * 1000).toISOString().split('T')[0];
+    await queue.enqueueMany(Array.from(users.values()).map((u, i) => ({
+        type: 'generatePlan' as const,
+        userId: u.id,
+        provider: u.aiProvider,
+        payload: { goal: { event: i === 0 ? 'FAIL Marathon' : 'Marathon', date: goalDate } },
+        maxAttempts: 1,
+    })));
+
+    const worker = new JobWorker(queue, planJobHandlers(deps), { concurrency: 8, perProvider: PER_PROVIDER });
+    const started = Date.now();
+    await worker.drain();
+    const elapsed = Date.now() - started;
+
+    const counts = await queue.counts();
+    console.log(`Processed ${USERS} jobs in ${elapsed}ms: ${JSON.stringify(counts)}`);
+    console.log(`Peak concurrency per provider: ${JSON.stringify(peak)}`);
+
+    const withinLimits = PROVIDERS.every(p => (peak[p] ?? 0) <= (PER_PROVIDER as any)[p]);
+    const allDone = counts.completed === USERS - 1 && counts.failed === 1 && plans.length === USERS - 1;
+    const validPlans = plans.every(p => JSON.parse(p.macroPlan).macro_plan.length >= 4);
+    // Only run athletes get materialized workouts (the rule engine builds runs only)
+    const materialized = workouts.length > 0 && workouts.every(w => w.durationMin > 0)
+        && workouts.every(w => users.get(w.userId)!.profile.primarySport === 'run');
+
+    // Week 1 of one materialized plan, adjusted after an injury report: every run easy, about half the volume
+    const week = workouts
+        .filter(w => w.planId === 'plan_1' && w.week === 1)
+        .map((w, i) => ({ ...w, id: `w${i}`, status: 'planned' }));
+    const runMin = week.filter(w => w.sport === 'run').reduce((sum, w) => sum + w.durationMin, 0);
+    const adjustment = adjustWeek({
+        profile: users.get('user_1')!.profile,
+        macroPlan: JSON.parse(plans[0].macroPlan),
+        upcoming: week,
+        previous: [],
+        feedback: { injury: true },
+        readiness: null,
+    });
+    const adjustedMin = runMin + adjustment.adjusted_week.reduce((sum, c) => sum + c.durationMin - week.find(w => w.id === c.workoutId)!.durationMin, 0);
+    const adjusted = adjustment.load_change === 'reduce'
+        && adjustment.adjusted_week.every(c => c.type === 'recovery')
+        && adjustedMin <= runMin * 0.6;
+    console.log(`Injury adjustment: run volume ${runMin} -> ${adjustedMin} min, ${adjustment.adjusted_week.length} workouts changed`);
+
+    if (withinLimits && allDone && validPlans && materialized && adjusted) {
+        console.log('✅ Job Worker Verification PASSED');
+    } else {
+        console.log('❌ Job Worker Verification FAILED', { withinLimits, allDone, validPlans, materialized, adjusted });
+    }
+}
+
+verifyJobs();
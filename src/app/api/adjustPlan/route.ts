@@ -1,61 +1,49 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { AIService } from '@/lib/ai/service';
-import { PrismaClient } from '@prisma/client';
-import { decrypt } from '@/lib/encryption';
-
-const prisma = new PrismaClient();
-
+import { getUserWithProfile, prisma, userCache } from '@/lib/db';
+import { adjustPlanForUser, aiPlanModel, prismaPlanStore } from '@/lib/jobs/planJobs';
+import { PrismaJobQueue } from '@/lib/jobs/queue';
+import { intervalsWellnessSource, prismaReadinessStore, readinessFor } from '@/lib/jobs/readinessJobs';
+
+const planStore = prismaPlanStore(prisma, userCache);
+const readiness = readinessFor({ store: prismaReadinessStore(prisma, userCache), source: intervalsWellnessSource });
+
+/**
+ * Adjusts the plan's next 7 days from feedback, last week's completion and readiness.
+ * Body: { userId, planId, feedback, background }
+ */
 export async function POST(req: NextRequest) {
     try {
-        const { userId, planId, feedback } = await req.json();
+        const { userId, planId, feedback, background } = await req.json();
 
-        const user = await prisma.user.findUnique({
-            where: { id: userId },
-            include: { profile: true },
-        });
-
-        if (!user || !user.aiApiKey) {
-            return NextResponse.json({ error: 'User or API key not found' }, { status: 404 });
+        if (!userId || !planId) {
+            return NextResponse.json({ error: 'Missing required parameters' }, { status: 400 });
         }
 
-        const plan = await prisma.plan.findUnique({
-            where: { id: planId },
-            include: { workouts: true }
-        });
+        const user = await getUserWithProfile(userId);
 
-        if (!plan) {
-            return NextResponse.json({ error: 'Plan not found' }, { status: 404 });
+        if (!user || !user.profile) {
+            return NextResponse.json({ error: 'User not found' }, { status: 404 });
         }
 
-        // Decrypt key
-        const apiKey = decrypt(user.aiApiKey);
-        const aiService = new AIService(user.aiProvider as any, apiKey);
-
-        // Context for AI
-        const context = `
-        Current Plan Status: ${plan.status}
-        Completed Workouts: ${plan.workouts.filter(w => w.status === 'completed').length}
-        User Feedback: ${JSON.stringify(feedback)}
-        
-        Please adjust the upcoming week based on this feedback.
-    `;
-
-        // We need a specific method for this in AIService, or reuse generateText with a specific prompt
-        // For now, we'll simulate a "generateWeeklyAdjustment" call
-        // In a real app, you'd add this method to AIService
-
-        // Mocking the response for now as we didn't add the method to AIService yet
-        // But let's try to use the generic generateText if we can, or just return a success for the MVP structure
-
-        return NextResponse.json({
-            message: "Plan adjusted successfully",
-            adjustment: {
-                summary: "Reduced volume by 10% due to reported fatigue.",
-                load_change: "reduce"
-            }
-        });
+        // Background: a plan worker (scripts/plan-worker.ts) picks it up; poll /api/jobs?id=...
+        if (background) {
+            const job = await new PrismaJobQueue(prisma).enqueue({
+                type: 'adjustPlan',
+                userId: user.id,
+                provider: user.aiProvider,
+                payload: { planId, feedback },
+            });
+            return NextResponse.json({ jobId: job.id, status: job.status }, { status: 202 });
+        }
+
+        // The rule engine decides the changes; the user's model (if any) only writes the summary
+        const adjustment = await adjustPlanForUser({ store: planStore, model: aiPlanModel, readiness }, user.id, planId, feedback);
 
+        return NextResponse.json({ message: 'Plan adjusted successfully', adjustment });
     } catch (error) {
+        if (error instanceof Error && error.message === 'Plan not found') {
+            return NextResponse.json({ error: 'Plan not found' }, { status: 404 });
+        }
         console.error('Error adjusting plan:', error);
         return NextResponse.json({ error: 'Internal Server Error' }, { status: 500 });
     }
@@ -1,36 +1,67 @@
 import { NextRequest, NextResponse } from 'next/server';
+import { getUserWithProfile, prisma } from '@/lib/db';
 import { IntervalsClient } from '@/lib/intervals/client';
-import { PrismaClient } from '@prisma/client';
-import { decrypt } from '@/lib/encryption';
-
-const prisma = new PrismaClient();
+import { reconcilePlanWorkouts } from '@/lib/intervals/reconcile';
+import { workoutBlocks } from '@/lib/training/blockCodec';
+import { userCredential } from '@/lib/credentials';
+import { repairWorkout } from '@/lib/ai/repair';
 
+/**
+ * Exports one generated workout ({ userId, workout, date }), or pushes a stored
+ * plan ({ userId, planId }) from today on. A plan push reconciles against the
+ * calendar, so re-pushing after an adjustment only sends the changed workouts.
+ */
 export async function POST(req: NextRequest) {
     try {
-        const { userId, workout, date } = await req.json();
+        const { userId, workout, date, planId } = await req.json();
 
-        if (!userId || !workout) {
+        if (!userId || (!workout && !planId)) {
             return NextResponse.json({ error: 'Missing required parameters' }, { status: 400 });
         }
 
-        const user = await prisma.user.findUnique({
-            where: { id: userId },
-            include: { profile: true }
-        });
+        // Reject malformed workouts here instead of after a round trip to Intervals.icu
+        const checked = workout ? repairWorkout(workout) : null;
+        if (checked && !checked.success) {
+            return NextResponse.json({ error: `Invalid workout: ${checked.error}` }, { status: 400 });
+        }
+
+        const user = await getUserWithProfile(userId);
 
         if (!user || !user.intervalsApiKey) {
             return NextResponse.json({ error: 'User or Intervals API key not found' }, { status: 404 });
         }
 
-        const apiKey = decrypt(user.intervalsApiKey);
+        const apiKey = userCredential(user, 'intervalsApiKey')!;
         // Defaulting to '0' (self) if no external athlete ID is managed
         const client = new IntervalsClient(apiKey, '0');
 
         // Use provided date or default to tomorrow
         const targetDate = date || new Date(Date.now() + 86400000).toISOString().split('T')[0];
 
-        const result = await client.uploadWorkout(workout, targetDate, {
-            thresholdPace: user.profile?.thresholdPace
+        if (planId) {
+            const plan = await prisma.plan.findFirst({ where: { id: planId, userId: user.id }, select: { id: true } });
+            if (!plan) {
+                return NextResponse.json({ error: 'Plan not found' }, { status: 404 });
+            }
+            const now = new Date();
+            const today = new Date(Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate()));
+            const rows = await prisma.workout.findMany({
+                where: { planId, date: { gte: today } },
+                orderBy: { date: 'asc' },
+            });
+            const workouts = rows.map(({ blocks, structure, ...row }) => ({ ...row, structure: workoutBlocks({ blocks, structure }) }));
+            const result = await reconcilePlanWorkouts(client, workouts);
+            return NextResponse.json({
+                success: true,
+                created: result.create.length,
+                updated: result.update.length,
+                deleted: result.delete.length,
+                unchanged: result.unchanged,
+            });
+        }
+
+        const result = await client.uploadWorkout(checked!.data, targetDate, {
+            thresholdPace: user.profile?.thresholdPace,
         });
 
         return NextResponse.json({ success: true, result });
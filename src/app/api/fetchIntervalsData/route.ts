@@ -1,9 +1,14 @@
 import { NextRequest, NextResponse } from 'next/server';
+import { getUserWithProfile, prisma, userCache } from '@/lib/db';
+import { IntervalsCache, prismaIntervalsCacheStore } from '@/lib/intervals/cache';
 import { IntervalsClient } from '@/lib/intervals/client';
-import { PrismaClient } from '@prisma/client';
-import { decrypt } from '@/lib/encryption';
+import { userCredential } from '@/lib/credentials';
+import { PrismaJobQueue } from '@/lib/jobs/queue';
+import { applyWellness, prismaReadinessStore } from '@/lib/jobs/readinessJobs';
 
-const prisma = new PrismaClient();
+const readinessStore = prismaReadinessStore(prisma, userCache);
+const intervalsCache = new IntervalsCache(prismaIntervalsCacheStore(prisma));
+const jobQueue = new PrismaJobQueue(prisma);
 
 export async function GET(req: NextRequest) {
     try {
@@ -16,15 +21,13 @@ export async function GET(req: NextRequest) {
             return NextResponse.json({ error: 'Missing required parameters' }, { status: 400 });
         }
 
-        const user = await prisma.user.findUnique({
-            where: { id: userId },
-        });
+        const user = await getUserWithProfile(userId);
 
         if (!user || !user.intervalsApiKey) {
             return NextResponse.json({ error: 'User or API key not found' }, { status: 404 });
         }
 
-        const apiKey = decrypt(user.intervalsApiKey);
+        const apiKey = userCredential(user, 'intervalsApiKey')!;
         // In a real app, we would store and retrieve the intervals.icu athlete ID.
         // For now, we assume the user knows it or we fetch "self".
         // The IntervalsClient currently takes an athleteId in constructor.
@@ -32,10 +35,23 @@ export async function GET(req: NextRequest) {
         // For this MVP, we'll use a placeholder or assume the key gives access to "athlete/0" (self).
         const client = new IntervalsClient(apiKey, 'i123456'); // Placeholder ID
 
-        const activities = await client.getActivities(start, end);
-        const wellness = await client.getWellness(start, end);
+        // Served from the local cache; only days not synced yet (and the recent tail) are fetched
+        const [activities, wellness] = await Promise.all([
+            intervalsCache.getActivities(user.id, client, start, end),
+            intervalsCache.getWellness(user.id, client, start, end),
+        ]);
+        // Readiness for the fetched days, continuing from the stored baseline before `start`
+        const readiness = await applyWellness(readinessStore, user.id, wellness, start, end);
+
+        // Link the new activities to planned workouts in the background (plan worker).
+        // One pending match covers every sync until it runs; failing to queue it must not fail the fetch.
+        try {
+            await jobQueue.enqueueUnique({ type: 'matchActivities', userId: user.id, provider: 'intervals', payload: {} });
+        } catch (error) {
+            console.error(`Could not queue activity matching for ${user.id}:`, error);
+        }
 
-        return NextResponse.json({ activities, wellness });
+        return NextResponse.json({ activities, wellness, readiness });
     } catch (error) {
         console.error('Error fetching intervals data:', error);
         return NextResponse.json({ error: 'Internal Server Error' }, { status: 500 });
@@ -1,19 +1,14 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { AIService } from '@/lib/ai/service';
-import { PrismaClient } from '@prisma/client';
-import { decrypt } from '@/lib/encryption';
-
-const prisma = new PrismaClient();
+import { getUserWithProfile, prisma, userCache } from '@/lib/db';
+import { aiPlanModel, generatePlanForUser, prismaPlanStore } from '@/lib/jobs/planJobs';
+import { PrismaJobQueue } from '@/lib/jobs/queue';
 
 export async function POST(req: NextRequest) {
     try {
-        const { userId, goal } = await req.json();
+        const { userId, goal, background } = await req.json();
 
         // Fetch user and profile
-        const user = await prisma.user.findUnique({
-            where: { id: userId },
-            include: { profile: true },
-        });
+        const user = await getUserWithProfile(userId);
 
         if (!user || !user.profile) {
             return NextResponse.json({ error: 'User not found' }, { status: 404 });
@@ -23,22 +18,20 @@ export async function POST(req: NextRequest) {
             return NextResponse.json({ error: 'AI API Key not configured' }, { status: 400 });
         }
 
-        // Decrypt key
-        const apiKey = decrypt(user.aiApiKey);
-        const aiService = new AIService(user.aiProvider as any, apiKey);
-
-        // Generate Plan
-        const planJson = await aiService.generateMacroPlan(user.profile, goal, []);
-
-        // Save to DB
-        const plan = await prisma.plan.create({
-            data: {
+        // Background: a plan worker (scripts/plan-worker.ts) picks it up; poll /api/jobs?id=...
+        if (background) {
+            const job = await new PrismaJobQueue(prisma).enqueue({
+                type: 'generatePlan',
                 userId: user.id,
-                startDate: new Date(), // Should be calculated based on goal
-                endDate: new Date(goal.date),
-                macroPlan: JSON.stringify(planJson),
-            },
-        });
+                provider: user.aiProvider,
+                payload: { goal },
+            });
+            return NextResponse.json({ jobId: job.id, status: job.status }, { status: 202 });
+        }
+
+        // Same steps as the background job: history from Intervals.icu, macro plan, save
+        const { planId } = await generatePlanForUser({ store: prismaPlanStore(prisma, userCache), model: aiPlanModel }, user.id, goal);
+        const plan = await prisma.plan.findUnique({ where: { id: planId } });
 
         return NextResponse.json({ plan });
     } catch (error) {
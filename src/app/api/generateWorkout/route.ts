@@ -1,24 +1,31 @@
 import { NextRequest, NextResponse } from 'next/server';
+import { getUserWithProfile } from '@/lib/db';
 import { AIService } from '@/lib/ai/service';
-import { PrismaClient } from '@prisma/client';
-import { decrypt } from '@/lib/encryption';
-
-const prisma = new PrismaClient();
+import { userCredential } from '@/lib/credentials';
+import { generateRuleWorkout, isRunRequest, matchWorkoutType } from '@/lib/training/workoutRules';
 
 export async function POST(req: NextRequest) {
     try {
         const { userId, type, duration, date } = await req.json();
 
-        const user = await prisma.user.findUnique({
-            where: { id: userId },
-            include: { profile: true },
-        });
+        const user = await getUserWithProfile(userId);
+
+        if (!user) {
+            return NextResponse.json({ error: 'User not found' }, { status: 404 });
+        }
+
+        // Routine run sessions come from the rule engine; other sports and unusual requests need the model
+        const ruleType = isRunRequest(type, user.profile) ? matchWorkoutType(type) : null;
+        if (ruleType) {
+            const workout = generateRuleWorkout(ruleType, user.profile, { durationMin: Number(duration) || null });
+            return NextResponse.json({ workout });
+        }
 
-        if (!user || !user.aiApiKey) {
+        if (!user.aiApiKey) {
             return NextResponse.json({ error: 'User or API key not found' }, { status: 404 });
         }
 
-        const apiKey = decrypt(user.aiApiKey);
+        const apiKey = userCredential(user, 'aiApiKey')!;
         const aiService = new AIService(user.aiProvider as any, apiKey);
 
         const context = `
@@ -30,7 +37,7 @@ export async function POST(req: NextRequest) {
       Generate a single workout matching these constraints.
     `;
 
-        const workout = await aiService.generateWorkout(user.profile, context);
+        const workout = await aiService.generateWorkout(user.profile, context, Number(duration) || null);
 
         return NextResponse.json({ workout });
     } catch (error) {
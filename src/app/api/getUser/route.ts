@@ -1,7 +1,5 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { PrismaClient } from '@prisma/client';
-
-const prisma = new PrismaClient();
+import { getUserWithProfile } from '@/lib/db';
 
 export async function GET(req: NextRequest) {
     const { searchParams } = new URL(req.url);
@@ -12,10 +10,7 @@ export async function GET(req: NextRequest) {
     }
 
     try {
-        const user = await prisma.user.findUnique({
-            where: { id: userId },
-            include: { profile: true }
-        });
+        const user = await getUserWithProfile(userId);
 
         if (!user) {
             return NextResponse.json({ error: 'User not found' }, { status: 404 });
@@ -0,0 +1,69 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { prisma } from '@/lib/db';
+import { JobType, PrismaJobQueue } from '@/lib/jobs/queue';
+
+const queue = new PrismaJobQueue(prisma);
+
+const JOB_TYPES: JobType[] = ['generatePlan', 'adjustPlan', 'matchActivities', 'updateReadiness'];
+
+/**
+ * Enqueues jobs for one user ({ userId }) or many ({ userIds }, e.g. a season rollover
+ * or matching activities / updating readiness after a bulk sync).
+ * Body: { type: 'generatePlan' | 'adjustPlan' | 'matchActivities' | 'updateReadiness', userId | userIds, payload }
+ */
+export async function POST(req: NextRequest) {
+    try {
+        const { type, userId, userIds, payload } = await req.json();
+
+        if (!JOB_TYPES.includes(type)) {
+            return NextResponse.json({ error: `Unknown job type: ${type}` }, { status: 400 });
+        }
+        const ids: string[] = userIds ?? (userId ? [userId] : []);
+        if (!ids.length) {
+            return NextResponse.json({ error: 'Missing required parameters' }, { status: 400 });
+        }
+
+        // Matching and readiness only call Intervals.icu; plan generation needs the user's AI provider,
+        // adjustments only use it (when configured) for the summary
+        const syncJob = type === 'matchActivities' || type === 'updateReadiness';
+        const required = syncJob ? { intervalsApiKey: { not: null } } : type === 'generatePlan' ? { aiApiKey: { not: null } } : {};
+        const users = await prisma.user.findMany({
+            where: { id: { in: ids }, ...required },
+            select: { id: true, aiProvider: true },
+        });
+        const providerOf = (u: { aiProvider: string }) => (syncJob ? 'intervals' : u.aiProvider);
+
+        if (users.length === 1 && !userIds) {
+            const job = await queue.enqueue({ type, userId: users[0].id, provider: providerOf(users[0]), payload });
+            return NextResponse.json({ jobId: job.id, status: job.status }, { status: 202 });
+        }
+
+        const queued = await queue.enqueueMany(users.map(u => ({ type, userId: u.id, provider: providerOf(u), payload })));
+        return NextResponse.json({ queued, skipped: ids.length - users.length }, { status: 202 });
+    } catch (error) {
+        console.error('Error enqueueing jobs:', error);
+        return NextResponse.json({ error: 'Internal Server Error' }, { status: 500 });
+    }
+}
+
+/**
+ * Job status (?id=...), or queue counts per status without an id.
+ */
+export async function GET(req: NextRequest) {
+    try {
+        const id = req.nextUrl.searchParams.get('id');
+        if (!id) {
+            return NextResponse.json({ counts: await queue.counts() });
+        }
+
+        const job = await queue.get(id);
+        if (!job) {
+            return NextResponse.json({ error: 'Job not found' }, { status: 404 });
+        }
+        const { payload, ...status } = job;
+        return NextResponse.json({ job: status });
+    } catch (error) {
+        console.error('Error reading job status:', error);
+        return NextResponse.json({ error: 'Internal Server Error' }, { status: 500 });
+    }
+}
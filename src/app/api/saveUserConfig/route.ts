@@ -1,8 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { PrismaClient } from '@prisma/client';
+import { prisma, userCache } from '@/lib/db';
 import { encrypt } from '@/lib/encryption';
-
-const prisma = new PrismaClient();
+import { buildZoneTables, serializeZoneTables, zoneTableCache } from '@/lib/training/zoneTables';
 
 export async function POST(req: NextRequest) {
     try {
@@ -14,6 +13,13 @@ export async function POST(req: NextRequest) {
             return NextResponse.json({ error: 'Email required' }, { status: 400 });
         }
 
+        // Precompute zone tables for whichever threshold metrics are part of the update
+        if (profile) {
+            const { paceZones, hrZones } = serializeZoneTables(buildZoneTables(profile.thresholdPace, profile.lthr));
+            if (profile.thresholdPace !== undefined) profile.paceZones = paceZones;
+            if (profile.lthr !== undefined) profile.hrZones = hrZones;
+        }
+
         const encryptedIntervalsKey = intervalsApiKey ? encrypt(intervalsApiKey) : undefined;
         const encryptedAiKey = aiApiKey ? encrypt(aiApiKey) : undefined;
 
@@ -41,6 +47,10 @@ export async function POST(req: NextRequest) {
             },
         });
 
+        // Threshold metrics may have changed, drop the cached user / profile and zone tables
+        userCache.invalidate(user.id);
+        zoneTableCache.invalidate(user.id);
+
         return NextResponse.json({ success: true, userId: user.id });
     } catch (error) {
         console.error('Error saving config:', error);
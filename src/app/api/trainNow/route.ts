@@ -1,44 +1,96 @@
 import { NextRequest, NextResponse } from 'next/server';
+import { getUserWithProfile, prisma, userCache } from '@/lib/db';
 import { AIService } from '@/lib/ai/service';
+import { IntervalsCache, prismaIntervalsCacheStore } from '@/lib/intervals/cache';
 import { IntervalsClient } from '@/lib/intervals/client';
-import { PrismaClient } from '@prisma/client';
-import { decrypt } from '@/lib/encryption';
+import { userCredential } from '@/lib/credentials';
+import { applyWellness, intervalsWellnessSource, prismaReadinessStore, updateReadinessForUser } from '@/lib/jobs/readinessJobs';
+import { buildTrainingContext, DEFAULT_CONTEXT_WEEKS } from '@/lib/training/context';
+import { chooseWorkoutType, generateRuleWorkout, isRunRequest } from '@/lib/training/workoutRules';
 
-const prisma = new PrismaClient();
+const readinessStore = prismaReadinessStore(prisma, userCache);
+const intervalsCache = new IntervalsCache(prismaIntervalsCacheStore(prisma));
 
 export async function POST(req: NextRequest) {
     try {
-        const { userId } = await req.json();
+        const { userId, stream, useAI } = await req.json();
 
-        const user = await prisma.user.findUnique({
-            where: { id: userId },
-            include: { profile: true },
-        });
+        const user = await getUserWithProfile(userId);
+        // The rule engine only builds runs, so other athletes always get the model
+        const ruleBased = !useAI && !!user?.profile && isRunRequest(null, user.profile);
 
-        if (!user || !user.profile || !user.intervalsApiKey || !user.aiApiKey) {
+        if (!user || !user.profile || !user.intervalsApiKey || (!ruleBased && !user.aiApiKey)) {
             return NextResponse.json({ error: 'User configuration missing' }, { status: 400 });
         }
 
-        const intervalsApiKey = decrypt(user.intervalsApiKey);
-        const aiApiKey = decrypt(user.aiApiKey);
+        const intervalsApiKey = userCredential(user, 'intervalsApiKey')!;
 
         // Fetch recent history
         const intervals = new IntervalsClient(intervalsApiKey, 'athlete_id_placeholder'); // Need to store athlete ID too
         // Mock dates for now
         const endDate = new Date().toISOString().split('T')[0];
-        const startDate = new Date(Date.now() - 7 * 24 * 60 * 60 * 1000).toISOString().split('T')[0];
 
-        const activities = await intervals.getActivities(startDate, endDate);
-        const wellness = await intervals.getWellness(startDate, endDate);
+        if (ruleBased) {
+            // Rule engine: the session type follows from load state and readiness, no model call.
+            // 12 weeks of history so CTL/ATL (and so TSB) have settled.
+            const historyStart = new Date(Date.now() - 12 * 7 * 24 * 60 * 60 * 1000).toISOString().split('T')[0];
+            const [history, readiness] = await Promise.all([
+                intervalsCache.getActivities(user.id, intervals, historyStart, endDate),
+                updateReadinessForUser({ store: readinessStore, source: intervalsWellnessSource }, user.id),
+            ]);
+            const { type, tsb } = chooseWorkoutType(history, { lthr: user.profile.lthr, today: endDate, readiness });
+            const workout = generateRuleWorkout(type, user.profile, { tsb });
+
+            if (stream) {
+                // Same NDJSON shape as the AI stream, all blocks at once
+                const lines = workout.structure.map((block, index) => JSON.stringify({ block, index }));
+                lines.push(JSON.stringify({ workout }));
+                return new Response(lines.join('\n') + '\n', { headers: { 'Content-Type': 'application/x-ndjson' } });
+            }
+            return NextResponse.json({ workout });
+        }
+
+        const aiApiKey = userCredential(user, 'aiApiKey')!;
+        // Four weeks, so chronic load and HRV/RHR baselines can be computed
+        const startDate = new Date(Date.now() - DEFAULT_CONTEXT_WEEKS * 7 * 24 * 60 * 60 * 1000).toISOString().split('T')[0];
+
+        // Only days not synced yet (and the recent tail) are fetched from Intervals.icu
+        const [activities, wellness] = await Promise.all([
+            intervalsCache.getActivities(user.id, intervals, startDate, endDate),
+            intervalsCache.getWellness(user.id, intervals, startDate, endDate),
+        ]);
+        const readiness = await applyWellness(readinessStore, user.id, wellness, startDate, endDate);
 
         // AI Decision
         const aiService = new AIService(user.aiProvider as any, aiApiKey);
+        // Raw activities/wellness are summarized into a fixed-size context instead of being stringified
+        const summary = buildTrainingContext(activities, wellness, { lthr: user.profile.lthr, today: endDate, readiness });
         const context = `
-      Recent Activities: ${JSON.stringify(activities)}
-      Recent Wellness: ${JSON.stringify(wellness)}
+      Training Summary:
+${summary}
       User wants to train NOW. Decide the best workout based on fatigue and history.
     `;
 
+        if (stream) {
+            // NDJSON: one {"block": ...} line per block as it is generated, then {"workout": ...}
+            const profile = user.profile;
+            const encoder = new TextEncoder();
+            const body = new ReadableStream({
+                async start(controller) {
+                    const send = (message: object) => controller.enqueue(encoder.encode(JSON.stringify(message) + '\n'));
+                    try {
+                        const workout = await aiService.streamWorkout(profile, context, (block, index) => send({ block, index }));
+                        send({ workout });
+                    } catch (error) {
+                        console.error('Error in Train Now stream:', error);
+                        send({ error: 'Failed to generate workout' });
+                    }
+                    controller.close();
+                },
+            });
+            return new Response(body, { headers: { 'Content-Type': 'application/x-ndjson' } });
+        }
+
         const workout = await aiService.generateWorkout(user.profile, context);
 
         return NextResponse.json({ workout });
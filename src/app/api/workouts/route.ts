@@ -0,0 +1,43 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { prisma } from '@/lib/db';
+import { workoutBlocks } from '@/lib/training/blockCodec';
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+/**
+ * Calendar view: a user's workouts dated in [from, to) (?userId=&from=&to=),
+ * defaulting to the current Monday-Sunday week. Served by the (userId, date) index.
+ */
+export async function GET(req: NextRequest) {
+    try {
+        const params = req.nextUrl.searchParams;
+        const userId = params.get('userId');
+        if (!userId) {
+            return NextResponse.json({ error: 'Missing required parameters' }, { status: 400 });
+        }
+
+        const now = new Date();
+        const today = Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate());
+        const monday = new Date(today - ((now.getUTCDay() + 6) % 7) * DAY_MS);
+        const from = params.get('from') ? new Date(params.get('from')!) : monday;
+        const to = params.get('to') ? new Date(params.get('to')!) : new Date(monday.getTime() + 7 * DAY_MS);
+        if (isNaN(from.getTime()) || isNaN(to.getTime())) {
+            return NextResponse.json({ error: 'Invalid date range' }, { status: 400 });
+        }
+
+        const rows = await prisma.workout.findMany({
+            // Rows stored before Workout.userId existed only link to the user through their plan
+            where: { OR: [{ userId }, { userId: null, plan: { userId } }], date: { gte: from, lt: to } },
+            orderBy: { date: 'asc' },
+        });
+
+        const workouts = rows.map(({ blocks, structure, ...workout }) => ({
+            ...workout,
+            structure: workoutBlocks({ blocks, structure }),
+        }));
+        return NextResponse.json({ from, to, workouts });
+    } catch (error) {
+        console.error('Error fetching workouts:', error);
+        return NextResponse.json({ error: 'Internal Server Error' }, { status: 500 });
+    }
+}
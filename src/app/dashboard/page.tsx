@@ -38,16 +38,47 @@ export default function DashboardPage() {
             const response = await fetch("/api/trainNow", {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ userId }),
+                body: JSON.stringify({ userId, stream: true }),
             });
-            const data = await response.json();
-            if (data.workout) {
-                setGeneratedWorkout(data.workout);
+            if (!response.ok || !response.body) throw new Error("Failed to generate workout");
+
+            // Render blocks as they stream in; the final line carries the complete workout.
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            const blocks: any[] = [];
+            let buffered = '';
+            let workout: any = null;
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop() || '';
+
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const message = JSON.parse(line);
+                    if (message.block) {
+                        blocks.push(message.block);
+                        setGeneratedWorkout({ workout_name: "Generating...", sport: "run", description: "", structure: [...blocks] });
+                    } else if (message.workout) {
+                        workout = message.workout;
+                    } else if (message.error) {
+                        throw new Error(message.error);
+                    }
+                }
+            }
+
+            if (workout) {
+                setGeneratedWorkout(workout);
             } else {
+                setGeneratedWorkout(null);
                 alert("Failed to generate workout");
             }
         } catch (error) {
             console.error(error);
+            setGeneratedWorkout(null);
             alert("Error generating workout");
         } finally {
             setLoadingWorkout(false);
@@ -195,6 +226,7 @@ export default function DashboardPage() {
                                     <button
                                         id="export-btn"
                                         onClick={handleExport}
+                                        disabled={loadingWorkout}
                                         className="flex-1 px-4 py-2 bg-green-600 text-white rounded hover:bg-green-700 disabled:opacity-50"
                                     >
                                         Export to Intervals.icu
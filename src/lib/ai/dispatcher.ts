@@ -0,0 +1,209 @@
+/**
+ * Hedged multi-provider dispatch with per-model latency histograms
+ * (the histogram buckets are mirrored by scripts/coach/dispatcher.py).
+ *
+ * A request goes to the first candidate (the user's provider). If it hasn't
+ * answered by that model's p90 latency, the next candidate is started as well,
+ * and so on; the first valid result wins and the rest are aborted. A candidate
+ * that fails (error or output that doesn't validate) hands over to the next one
+ * immediately instead of waiting for the hedge delay.
+ */
+
+export interface DispatchCandidate<T> {
+    provider: string;
+    model: string;
+    run: (signal: AbortSignal) => Promise<T>;
+}
+
+export interface DispatchOptions {
+    timeoutMs?: number;
+}
+
+export interface LatencyStats {
+    provider: string;
+    model: string;
+    count: number;
+    errors: number;
+    p50: number | null;
+    p90: number | null;
+    p99: number | null;
+}
+
+// Bucket upper bounds in ms: 50ms * 1.25^i up to ~3 minutes (~10% resolution per bucket).
+const BUCKET_BOUNDS: number[] = [];
+for (let bound = 50; bound < 180000; bound *= 1.25) BUCKET_BOUNDS.push(Math.round(bound));
+BUCKET_BOUNDS.push(Infinity);
+
+// Until a model has this many samples its hedge delay is DEFAULT_HEDGE_MS.
+const MIN_SAMPLES = 20;
+const DEFAULT_HEDGE_MS = 10000;
+const HEDGE_PERCENTILE = 0.9;
+
+/**
+ * Fixed-bucket latency histogram; percentiles are bucket upper bounds.
+ */
+export class LatencyHistogram {
+    private counts = new Array<number>(BUCKET_BOUNDS.length).fill(0);
+    count = 0;
+    errors = 0;
+
+    record(ms: number) {
+        let i = 0;
+        while (ms > BUCKET_BOUNDS[i]) i++;
+        this.counts[i]++;
+        this.count++;
+    }
+
+    recordError() {
+        this.errors++;
+    }
+
+    percentile(p: number): number | null {
+        if (!this.count) return null;
+        const rank = Math.ceil(p * this.count);
+        let seen = 0;
+        for (let i = 0; i < this.counts.length; i++) {
+            seen += this.counts[i];
+            if (seen >= rank) return BUCKET_BOUNDS[i];
+        }
+        return null;
+    }
+}
+
+export class ProviderDispatcher {
+    private histograms = new Map<string, LatencyHistogram>();
+    stats = { requests: 0, hedged: 0, failovers: 0, timeouts: 0 };
+
+    constructor(
+        private minSamples = MIN_SAMPLES,
+        private defaultHedgeMs = DEFAULT_HEDGE_MS,
+        private hedgePercentile = HEDGE_PERCENTILE,
+    ) { }
+
+    histogram(provider: string, model: string): LatencyHistogram {
+        const key = `${provider}/${model}`;
+        let histogram = this.histograms.get(key);
+        if (!histogram) {
+            histogram = new LatencyHistogram();
+            this.histograms.set(key, histogram);
+        }
+        return histogram;
+    }
+
+    /**
+     * How long to wait on this model before starting the next candidate.
+     */
+    hedgeDelay(provider: string, model: string): number {
+        const histogram = this.histogram(provider, model);
+        if (histogram.count < this.minSamples) return this.defaultHedgeMs;
+        return histogram.percentile(this.hedgePercentile) ?? this.defaultHedgeMs;
+    }
+
+    /**
+     * Runs the candidates as described above and resolves with the first result.
+     * Rejects with the last error when every candidate failed, or on `timeoutMs`.
+     */
+    dispatch<T>(candidates: DispatchCandidate<T>[], options: DispatchOptions = {}): Promise<T> {
+        if (!candidates.length) return Promise.reject(new Error('No AI provider configured'));
+        this.stats.requests++;
+
+        return new Promise<T>((resolve, reject) => {
+            const controllers: AbortController[] = [];
+            // Candidates still waiting for an answer
+            const running = new Set<{ histogram: LatencyHistogram; started: number }>();
+            let next = 0;
+            let pending = 0;
+            let settled = false;
+            let lastError: unknown = null;
+            let hedgeTimer: ReturnType<typeof setTimeout> | undefined;
+            let deadline: ReturnType<typeof setTimeout> | undefined;
+
+            const settle = () => {
+                settled = true;
+                clearTimeout(hedgeTimer);
+                clearTimeout(deadline);
+                controllers.forEach(c => c.abort());
+            };
+
+            const launch = () => {
+                if (settled || next >= candidates.length) return;
+                const candidate = candidates[next++];
+                const histogram = this.histogram(candidate.provider, candidate.model);
+                const controller = new AbortController();
+                controllers.push(controller);
+                pending++;
+
+                clearTimeout(hedgeTimer);
+                if (next < candidates.length) {
+                    hedgeTimer = setTimeout(() => {
+                        this.stats.hedged++;
+                        launch();
+                    }, this.hedgeDelay(candidate.provider, candidate.model));
+                }
+
+                const started = Date.now();
+                const call = { histogram, started };
+                running.add(call);
+                // False once the deadline has already recorded this call
+                const finish = () => {
+                    pending--;
+                    return running.delete(call);
+                };
+                Promise.resolve().then(() => candidate.run(controller.signal)).then(value => {
+                    if (finish()) histogram.record(Date.now() - started);
+                    if (settled) return;
+                    settle();
+                    resolve(value);
+                }, error => {
+                    finish();
+                    // Losers aborted after another candidate won are not errors
+                    if (controller.signal.aborted) return;
+                    histogram.recordError();
+                    lastError = error;
+                    if (settled) return;
+                    if (next < candidates.length) {
+                        this.stats.failovers++;
+                        launch();
+                    } else if (pending === 0) {
+                        settle();
+                        reject(lastError);
+                    }
+                });
+            };
+
+            if (options.timeoutMs) {
+                deadline = setTimeout(() => {
+                    if (settled) return;
+                    this.stats.timeouts++;
+                    // The calls cut off here are the slowest ones: count them at the time they ran,
+                    // or the p90 that drives hedging would only ever see the calls that finished
+                    const now = Date.now();
+                    running.forEach(call => call.histogram.record(now - call.started));
+                    running.clear();
+                    settle();
+                    reject(new Error(`AI request timed out after ${options.timeoutMs}ms`));
+                }, options.timeoutMs);
+            }
+
+            launch();
+        });
+    }
+
+    latencyStats(): LatencyStats[] {
+        return Array.from(this.histograms.entries()).map(([key, h]) => {
+            const slash = key.indexOf('/'); // Model ids may contain '/' themselves
+            return {
+                provider: key.slice(0, slash),
+                model: key.slice(slash + 1),
+                count: h.count,
+                errors: h.errors,
+                p50: h.percentile(0.5),
+                p90: h.percentile(0.9),
+                p99: h.percentile(0.99),
+            };
+        });
+    }
+}
+
+// Shared by all AIService instances, so latency history survives across requests.
+export const providerDispatcher = new ProviderDispatcher();
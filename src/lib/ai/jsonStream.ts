@@ -0,0 +1,133 @@
+/**
+ * Incremental parser for streamed workout JSON (mirrored by scripts/coach/json_stream.py).
+ *
+ * Feed model output as it arrives; every block of the top-level "structure"
+ * array is returned as soon as its closing brace is seen, so the warmup can be
+ * rendered while the main set is still being generated. Each chunk is scanned once.
+ */
+
+const ZONES = ['Z1', 'Z2', 'Z3', 'Z4', 'Z5'];
+
+/**
+ * Minimal shape check before a streamed block is handed to the UI.
+ */
+export function isValidBlock(block: any): boolean {
+    if (!block || typeof block !== 'object' || typeof block.type !== 'string') return false;
+    if (typeof block.duration_min !== 'number' || !(block.duration_min > 0)) return false;
+    return block.zone === undefined || block.zone === null || ZONES.includes(block.zone);
+}
+
+export class StructureStreamParser {
+    private buffer = '';
+    private pos = 0;
+    private depth = 0;
+    private inString = false;
+    private stringStart = -1;
+    private lastString: string | null = null;
+    private pendingKey: string | null = null;
+    private arrayDepth = -1; // depth of the structure array once found
+    private elementStart = -1;
+    private done = false;
+    rejected = 0;
+
+    constructor(private key = 'structure') { }
+
+    /**
+     * Adds a chunk of model output and returns the blocks completed by it.
+     */
+    push(chunk: string): any[] {
+        this.buffer += chunk;
+        const blocks: any[] = [];
+        if (this.done) return blocks;
+
+        const text = this.buffer;
+        let i = this.pos;
+        if (this.depth === 0 && !this.inString) {
+            // Skip any prose / markdown fence before the JSON object
+            const start = text.indexOf('{', i);
+            if (start === -1) {
+                this.pos = text.length;
+                return blocks;
+            }
+            i = start;
+        }
+
+        for (; i < text.length; i++) {
+            const c = text[i];
+
+            if (this.inString) {
+                if (c === '\\') {
+                    if (i + 1 >= text.length) break; // escape split across chunks; rescan it next time
+                    i++;
+                } else if (c === '"') {
+                    this.inString = false;
+                    this.lastString = text.slice(this.stringStart + 1, i);
+                }
+                continue;
+            }
+
+            if (c === '"') {
+                this.inString = true;
+                this.stringStart = i;
+            } else if (c === '{' || c === '[') {
+                this.depth++;
+                if (this.arrayDepth === -1) {
+                    if (c === '[' && this.depth === 2 && this.pendingKey === this.key) {
+                        this.arrayDepth = this.depth;
+                    }
+                } else if (c === '{' && this.depth === this.arrayDepth + 1) {
+                    this.elementStart = i;
+                }
+            } else if (c === '}' || c === ']') {
+                this.depth--;
+                if (this.arrayDepth !== -1) {
+                    if (this.depth < this.arrayDepth) {
+                        this.done = true;
+                        break;
+                    }
+                    if (this.depth === this.arrayDepth && this.elementStart >= 0) {
+                        this.emit(text.slice(this.elementStart, i + 1), blocks);
+                        this.elementStart = -1;
+                    }
+                }
+            } else if (c === ':' && this.depth === 1) {
+                this.pendingKey = this.lastString;
+            } else if (c === ',' && this.depth === 1) {
+                this.pendingKey = null;
+            }
+        }
+
+        this.pos = i;
+        return blocks;
+    }
+
+    private emit(raw: string, blocks: any[]) {
+        try {
+            const block = JSON.parse(raw);
+            if (isValidBlock(block)) {
+                blocks.push(block);
+                return;
+            }
+        } catch (e) {
+            // Fall through and count it as rejected
+        }
+        this.rejected++;
+    }
+
+    get text(): string {
+        return this.buffer;
+    }
+
+    /**
+     * The JSON text of the complete response (first '{' to last '}').
+     * Throws if the response is not valid JSON.
+     */
+    json(): string {
+        const start = this.buffer.indexOf('{');
+        const end = this.buffer.lastIndexOf('}');
+        if (start === -1 || end === -1) throw new Error("No JSON found");
+        const jsonStr = this.buffer.substring(start, end + 1);
+        JSON.parse(jsonStr);
+        return jsonStr;
+    }
+}
@@ -0,0 +1,295 @@
+import { z } from 'zod';
+import { MacroPlanSchema, WorkoutSchema } from './schemas';
+
+/**
+ * Validation + local repair for model output.
+ *
+ * Each repairer normalizes the common ways a model drifts from the schema
+ * (synonyms for enums, numbers as strings, zone_position out of range, blocks
+ * that don't add up to the requested duration) and then validates with the
+ * module-level zod schemas. Only output that still fails after repair is
+ * reported as unrecoverable, so the caller regenerates instead of shipping it.
+ */
+
+export type RepairResult<T> =
+    | { success: true; data: T; repairs: string[] }
+    | { success: false; error: string; repairs: string[] };
+
+const BLOCK_TYPES = ['warmup', 'interval', 'recovery', 'cooldown', 'steady'];
+const INTENSITIES = ['easy', 'endurance', 'tempo', 'threshold', 'vo2max', 'anaerobic', 'hill'];
+const METRICS = ['pace', 'power', 'hr', 'rpe'];
+const SPORTS = ['run', 'bike', 'strength', 'yoga', 'mobility'];
+const FOCUSES = ['base', 'build', 'peak', 'taper', 'recovery'];
+
+const BLOCK_TYPE_ALIASES: Record<string, string> = {
+    'warm up': 'warmup', 'warm-up': 'warmup', 'warm_up': 'warmup',
+    'cool down': 'cooldown', 'cool-down': 'cooldown', 'cool_down': 'cooldown',
+    main: 'interval', work: 'interval', rep: 'interval', intervals: 'interval',
+    rest: 'recovery', jog: 'recovery', float: 'recovery',
+    continuous: 'steady', tempo: 'steady', main_set: 'steady',
+};
+
+const INTENSITY_ALIASES: Record<string, string> = {
+    recovery: 'easy', 'very easy': 'easy', z1: 'easy',
+    aerobic: 'endurance', base: 'endurance', steady: 'endurance', z2: 'endurance', moderate: 'endurance',
+    'marathon pace': 'tempo', 'sweet spot': 'tempo', z3: 'tempo',
+    lt: 'threshold', 'lactate threshold': 'threshold', hard: 'threshold', z4: 'threshold',
+    vo2: 'vo2max', 'vo2 max': 'vo2max', vo2_max: 'vo2max', interval: 'vo2max', z5: 'vo2max',
+    sprint: 'anaerobic', max: 'anaerobic', strides: 'anaerobic',
+    hills: 'hill', uphill: 'hill',
+};
+
+const INTENSITY_BY_ZONE: Record<string, string> = { Z1: 'easy', Z2: 'endurance', Z3: 'tempo', Z4: 'threshold', Z5: 'vo2max' };
+const ZONE_BY_INTENSITY: Record<string, string> = { easy: 'Z1', endurance: 'Z2', tempo: 'Z3', threshold: 'Z4', vo2max: 'Z5', anaerobic: 'Z5' };
+
+const SPORT_ALIASES: Record<string, string> = {
+    running: 'run', ride: 'bike', cycling: 'bike', biking: 'bike', virtualride: 'bike',
+    gym: 'strength', weights: 'strength', stretching: 'mobility',
+};
+
+const FOCUS_ALIASES: Record<string, string> = {
+    foundation: 'base', aerobic: 'base', 'base building': 'base', general: 'base',
+    specific: 'build', development: 'build', intensity: 'build',
+    sharpen: 'peak', race: 'peak', 'race specific': 'peak',
+    deload: 'recovery', rest: 'recovery', 'recovery week': 'recovery',
+};
+
+// Steady blocks are rescaled when the total is further than this from the requested duration.
+const DURATION_TOLERANCE = 0.1;
+
+function toNumber(value: any): number | null {
+    const n = typeof value === 'string' ? parseFloat(value) : value;
+    return typeof n === 'number' && Number.isFinite(n) ? n : null;
+}
+
+/**
+ * Maps a value onto one of `allowed` directly, through `aliases`, or returns null.
+ */
+function normalizeEnum(value: any, allowed: string[], aliases: Record<string, string> = {}): string | null {
+    if (typeof value !== 'string') return null;
+    const key = value.trim().toLowerCase();
+    if (allowed.includes(key)) return key;
+    if (aliases[key]) return aliases[key];
+    const compact = key.replace(/[\s_-]+/g, '');
+    return allowed.find(a => a === compact) ?? null;
+}
+
+function normalizeZone(value: any): string | null {
+    if (value == null) return null;
+    const match = String(value).trim().toUpperCase().match(/^(?:Z|ZONE)?\s*([1-5])$/);
+    return match ? `Z${match[1]}` : null;
+}
+
+function finish<T>(schema: z.ZodType<T>, value: any, repairs: string[]): RepairResult<T> {
+    const parsed = schema.safeParse(value);
+    if (parsed.success) return { success: true, data: parsed.data, repairs };
+    const issue = parsed.error.issues[0];
+    return { success: false, error: `${issue.path.join('.') || 'response'}: ${issue.message}`, repairs };
+}
+
+/**
+ * Total minutes of a structure, counting repeat groups (reps x (interval + recoveries)).
+ */
+export function structureDuration(structure: any[]): number {
+    let total = 0;
+    let group = 0;
+    let reps = 1;
+    for (const block of structure || []) {
+        const blockReps = block.reps && block.reps > 1 ? Math.floor(block.reps) : 1;
+        if (reps > 1 && block.type === 'recovery' && blockReps === 1) {
+            group += block.duration_min;
+            continue;
+        }
+        total += group * reps;
+        group = block.duration_min;
+        reps = blockReps;
+    }
+    return total + group * reps;
+}
+
+function repairBlock(raw: any, index: number, repairs: string[]): any | null {
+    if (!raw || typeof raw !== 'object') {
+        repairs.push(`structure.${index}: dropped non-object block`);
+        return null;
+    }
+    const block: any = { ...raw };
+
+    const duration = toNumber(block.duration_min ?? block.duration ?? block.minutes);
+    if (duration === null || duration <= 0) {
+        repairs.push(`structure.${index}: dropped block without a duration`);
+        return null;
+    }
+    if (block.duration_min !== duration) {
+        repairs.push(`structure.${index}.duration_min: ${JSON.stringify(block.duration_min)} -> ${duration}`);
+    }
+    block.duration_min = duration;
+    delete block.duration;
+    delete block.minutes;
+
+    const type = normalizeEnum(block.type, BLOCK_TYPES, BLOCK_TYPE_ALIASES) ?? 'steady';
+    if (type !== block.type) repairs.push(`structure.${index}.type: ${JSON.stringify(block.type)} -> ${type}`);
+    block.type = type;
+
+    if (block.reps != null) {
+        const reps = toNumber(block.reps);
+        const fixed = reps !== null && reps >= 1 ? Math.round(reps) : null;
+        if (fixed !== block.reps) repairs.push(`structure.${index}.reps: ${JSON.stringify(block.reps)} -> ${fixed}`);
+        block.reps = fixed;
+    }
+
+    // Zone and intensity fill in for each other when one is missing or unknown
+    let zone = normalizeZone(block.zone);
+    let intensity = normalizeEnum(block.intensity, INTENSITIES, INTENSITY_ALIASES);
+    if (!intensity) intensity = zone ? INTENSITY_BY_ZONE[zone] : 'endurance';
+    if (!zone && block.zone != null) zone = ZONE_BY_INTENSITY[intensity] ?? null;
+    if (intensity !== block.intensity) repairs.push(`structure.${index}.intensity: ${JSON.stringify(block.intensity)} -> ${intensity}`);
+    block.intensity = intensity;
+    if (zone) {
+        if (zone !== block.zone) repairs.push(`structure.${index}.zone: ${JSON.stringify(block.zone)} -> ${zone}`);
+        block.zone = zone;
+    } else {
+        delete block.zone;
+    }
+
+    if (block.zone_position != null) {
+        const position = toNumber(block.zone_position);
+        const clamped = position === null ? 0.5 : Math.min(1, Math.max(0, position));
+        if (clamped !== block.zone_position) {
+            repairs.push(`structure.${index}.zone_position: ${JSON.stringify(block.zone_position)} -> ${clamped}`);
+        }
+        block.zone_position = clamped;
+    }
+
+    const target = block.target && typeof block.target === 'object' ? block.target : {};
+    const metric = normalizeEnum(target.metric, METRICS) ?? (zone ? 'hr' : 'rpe');
+    const value = target.value != null ? String(target.value) : (zone ?? intensity);
+    if (metric !== target.metric || value !== target.value) repairs.push(`structure.${index}.target repaired`);
+    block.target = { metric, value };
+
+    return block;
+}
+
+/**
+ * Scales steady / interval blocks so the workout lasts `targetMin`; warmup,
+ * cooldown and recoveries keep their length. Durations are rounded to 30 seconds.
+ */
+function fitDuration(structure: any[], targetMin: number, repairs: string[]) {
+    const total = structureDuration(structure);
+    if (Math.abs(total - targetMin) <= targetMin * DURATION_TOLERANCE) return;
+
+    const main = structure.filter(b => b.type === 'steady' || b.type === 'interval');
+    const mainTotal = structureDuration(main);
+    const fixed = total - mainTotal;
+    if (!main.length || targetMin <= fixed) return; // Nothing sensible to scale
+
+    const scale = (targetMin - fixed) / mainTotal;
+    main.forEach(block => {
+        block.duration_min = Math.max(0.5, Math.round(block.duration_min * scale * 2) / 2);
+    });
+    repairs.push(`structure: total ${total}min -> ${structureDuration(structure)}min (requested ${targetMin}min)`);
+}
+
+/**
+ * Repairs and validates a generated workout. `targetDurationMin` (the requested
+ * duration, or the model's own total_duration_min) is used to fix the duration sum.
+ */
+export function repairWorkout(raw: any, options: { targetDurationMin?: number | null } = {}): RepairResult<z.infer<typeof WorkoutSchema>> {
+    const repairs: string[] = [];
+    if (!raw || typeof raw !== 'object' || Array.isArray(raw)) {
+        return { success: false, error: 'response is not a JSON object', repairs };
+    }
+    const wrapped = raw.workout && typeof raw.workout === 'object' && !Array.isArray(raw.workout);
+    const workout: any = { ...(wrapped ? raw.workout : raw) };
+    if (wrapped) repairs.push('unwrapped "workout" envelope');
+
+    if (typeof workout.workout_name !== 'string' || !workout.workout_name.trim()) {
+        workout.workout_name = typeof workout.name === 'string' && workout.name.trim() ? workout.name : 'Workout';
+        repairs.push(`workout_name -> ${JSON.stringify(workout.workout_name)}`);
+    }
+
+    const sport = normalizeEnum(workout.sport, SPORTS, SPORT_ALIASES) ?? 'run';
+    if (sport !== workout.sport) repairs.push(`sport: ${JSON.stringify(workout.sport)} -> ${sport}`);
+    workout.sport = sport;
+
+    if (typeof workout.description !== 'string') {
+        workout.description = workout.description == null ? '' : String(workout.description);
+        repairs.push('description -> string');
+    }
+
+    if (!Array.isArray(workout.tags)) {
+        workout.tags = typeof workout.tags === 'string' ? workout.tags.split(',').map((t: string) => t.trim()).filter(Boolean) : [];
+        repairs.push('tags -> array');
+    } else if (workout.tags.some((t: any) => typeof t !== 'string')) {
+        workout.tags = workout.tags.filter((t: any) => t != null).map(String);
+        repairs.push('tags -> strings');
+    }
+
+    if (!Array.isArray(workout.structure)) {
+        return { success: false, error: 'structure: missing', repairs };
+    }
+    workout.structure = workout.structure
+        .map((block: any, i: number) => repairBlock(block, i, repairs))
+        .filter((block: any) => block !== null);
+
+    const target = toNumber(options.targetDurationMin) ?? toNumber(workout.total_duration_min);
+    if (target && target > 0 && workout.structure.length) fitDuration(workout.structure, target, repairs);
+
+    const exportField = workout.intervals_icu_export;
+    if (!exportField || exportField.format !== 'builder_v1' || !Array.isArray(exportField.blocks)) {
+        workout.intervals_icu_export = { format: 'builder_v1', blocks: Array.isArray(exportField?.blocks) ? exportField.blocks : [] };
+        repairs.push('intervals_icu_export -> builder_v1');
+    }
+
+    return finish(WorkoutSchema, workout, repairs);
+}
+
+/**
+ * Repairs and validates a macro plan: weeks numbered, focus mapped onto the phase
+ * enum, volumes and session counts coerced to non-negative numbers.
+ */
+export function repairMacroPlan(raw: any): RepairResult<z.infer<typeof MacroPlanSchema>> {
+    const repairs: string[] = [];
+    let weeks: any = Array.isArray(raw) ? raw : raw?.macro_plan ?? raw?.plan ?? raw?.weeks;
+    if (!Array.isArray(raw) && raw && !Array.isArray(raw.macro_plan) && Array.isArray(weeks)) {
+        repairs.push('macro_plan taken from alternate key');
+    }
+    if (!Array.isArray(weeks)) return { success: false, error: 'macro_plan: missing', repairs };
+
+    const count = (value: any, field: string, index: number) => {
+        const n = toNumber(value);
+        const fixed = n === null ? 0 : Math.max(0, Math.round(n));
+        if (fixed !== value) repairs.push(`macro_plan.${index}.${field}: ${JSON.stringify(value)} -> ${fixed}`);
+        return fixed;
+    };
+
+    weeks = weeks.filter((w: any) => w && typeof w === 'object').map((entry: any, i: number) => {
+        const week: any = { ...entry };
+
+        const number = toNumber(week.week);
+        week.week = number === null ? i + 1 : Math.round(number);
+        if (week.week !== entry.week) repairs.push(`macro_plan.${i}.week -> ${week.week}`);
+
+        const focus = normalizeEnum(week.focus, FOCUSES, FOCUS_ALIASES)
+            ?? FOCUSES.find(f => typeof week.focus === 'string' && week.focus.toLowerCase().includes(f))
+            ?? 'base';
+        if (focus !== week.focus) repairs.push(`macro_plan.${i}.focus: ${JSON.stringify(week.focus)} -> ${focus}`);
+        week.focus = focus;
+
+        const hours = toNumber(week.target_volume_hours);
+        week.target_volume_hours = hours === null ? 0 : Math.max(0, hours);
+        if (week.target_volume_hours !== entry.target_volume_hours) repairs.push(`macro_plan.${i}.target_volume_hours -> ${week.target_volume_hours}`);
+
+        if (!Array.isArray(week.key_sessions)) {
+            week.key_sessions = typeof week.key_sessions === 'string' ? [week.key_sessions] : [];
+            repairs.push(`macro_plan.${i}.key_sessions -> array`);
+        } else {
+            week.key_sessions = week.key_sessions.map((s: any) => typeof s === 'string' ? s : JSON.stringify(s));
+        }
+
+        week.strength_sessions = count(week.strength_sessions, 'strength_sessions', i);
+        week.yoga_sessions = count(week.yoga_sessions, 'yoga_sessions', i);
+        return week;
+    });
+
+    return finish(MacroPlanSchema, { ...(Array.isArray(raw) ? {} : raw), macro_plan: weeks }, repairs);
+}
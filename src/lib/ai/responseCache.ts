@@ -0,0 +1,131 @@
+import crypto from 'crypto';
+
+/**
+ * Content-addressed cache for model responses (mirrored by scripts/coach/ai_cache.py).
+ *
+ * Keys hash the provider, model, normalized prompt and a canonical hash of the
+ * athlete profile, so identical requests (e.g. the morning "Train Now" spike)
+ * are answered from memory. Entries expire after a TTL and the least recently
+ * used entry is evicted past maxEntries. Concurrent identical requests share
+ * one in-flight call; failures are never cached.
+ */
+
+const DEFAULT_TTL_MS = 6 * 60 * 60 * 1000;
+const DEFAULT_MAX_ENTRIES = 500;
+
+/**
+ * Collapses whitespace so indentation / trailing spaces in prompt templates don't split the cache.
+ */
+export function normalizePrompt(prompt: string): string {
+    return prompt
+        .split('\n')
+        .map(line => line.trim().replace(/\s+/g, ' '))
+        .filter(Boolean)
+        .join('\n');
+}
+
+/**
+ * JSON with sorted object keys, so equal profiles hash equally regardless of key order.
+ */
+function canonicalJSON(value: any): string {
+    if (value instanceof Date) return JSON.stringify(value.toISOString());
+    if (Array.isArray(value)) return `[${value.map(canonicalJSON).join(',')}]`;
+    if (value && typeof value === 'object') {
+        return `{${Object.keys(value).sort()
+            .filter(key => value[key] !== undefined)
+            .map(key => `${JSON.stringify(key)}:${canonicalJSON(value[key])}`)
+            .join(',')}}`;
+    }
+    return JSON.stringify(value ?? null);
+}
+
+function sha256(text: string): string {
+    return crypto.createHash('sha256').update(text).digest('hex');
+}
+
+export function profileHash(profile: any): string {
+    return sha256(canonicalJSON(profile ?? null));
+}
+
+export function cacheKey(provider: string, model: string, prompt: string, profile?: any): string {
+    return sha256([provider, model, normalizePrompt(prompt), profileHash(profile)].join('\u0000'));
+}
+
+interface CacheEntry {
+    value: string;
+    expiresAt: number;
+}
+
+export class AIResponseCache {
+    private entries = new Map<string, CacheEntry>();
+    private inFlight = new Map<string, Promise<string>>();
+    readonly stats = { hits: 0, misses: 0, coalesced: 0, expired: 0, evictions: 0 };
+
+    constructor(private ttlMs = DEFAULT_TTL_MS, private maxEntries = DEFAULT_MAX_ENTRIES) { }
+
+    get(key: string): string | undefined {
+        const entry = this.entries.get(key);
+        if (!entry) return undefined;
+        if (entry.expiresAt <= Date.now()) {
+            this.entries.delete(key);
+            this.stats.expired++;
+            return undefined;
+        }
+        // Refresh LRU position
+        this.entries.delete(key);
+        this.entries.set(key, entry);
+        return entry.value;
+    }
+
+    set(key: string, value: string) {
+        this.entries.delete(key);
+        this.entries.set(key, { value, expiresAt: Date.now() + this.ttlMs });
+        if (this.entries.size > this.maxEntries) {
+            // Map keeps insertion order, so the first key is the least recently used.
+            this.entries.delete(this.entries.keys().next().value as string);
+            this.stats.evictions++;
+        }
+    }
+
+    /**
+     * Returns the cached value for key, or runs create() once and caches its result.
+     * Callers arriving while create() is running await the same promise.
+     */
+    async getOrCreate(key: string, create: () => Promise<string>): Promise<string> {
+        const cached = this.get(key);
+        if (cached !== undefined) {
+            this.stats.hits++;
+            return cached;
+        }
+
+        const pending = this.inFlight.get(key);
+        if (pending) {
+            this.stats.coalesced++;
+            return pending;
+        }
+
+        this.stats.misses++;
+        const promise = create()
+            .then(value => {
+                this.set(key, value);
+                return value;
+            })
+            .finally(() => this.inFlight.delete(key));
+        this.inFlight.set(key, promise);
+        return promise;
+    }
+
+    invalidate(key: string) {
+        this.entries.delete(key);
+    }
+
+    clear() {
+        this.entries.clear();
+    }
+
+    get size() {
+        return this.entries.size;
+    }
+}
+
+export const aiResponseCache = new AIResponseCache();
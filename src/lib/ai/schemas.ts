@@ -0,0 +1,52 @@
+import { z } from 'zod';
+
+// Define schemas for structured output
+export const WorkoutBlockSchema = z.object({
+    type: z.enum(['warmup', 'interval', 'recovery', 'cooldown', 'steady']),
+    reps: z.number().nullable().optional(),
+    duration_min: z.number().positive(),
+    intensity: z.enum(['easy', 'endurance', 'tempo', 'threshold', 'vo2max', 'anaerobic', 'hill']),
+    target: z.object({
+        metric: z.enum(['pace', 'power', 'hr', 'rpe']),
+        value: z.string(),
+    }),
+    // Resolved to pace / HR at runtime from the athlete's zones
+    zone: z.enum(['Z1', 'Z2', 'Z3', 'Z4', 'Z5']).optional(),
+    zone_position: z.number().min(0).max(1).optional(),
+});
+
+export const WorkoutSchema = z.object({
+    workout_name: z.string(),
+    sport: z.enum(['run', 'bike', 'strength', 'yoga', 'mobility']),
+    description: z.string(),
+    tags: z.array(z.string()),
+    structure: z.array(WorkoutBlockSchema).min(1),
+    intervals_icu_export: z.object({
+        format: z.literal('builder_v1'),
+        blocks: z.array(z.any()), // Flexible for now, strictly intervals.icu format
+    }),
+});
+
+export const WeeklyAdjustmentSchema = z.object({
+    adjusted_week: z.array(z.any()), // Placeholder for full week structure
+    summary: z.string(),
+    load_change: z.enum(['increase', 'maintain', 'reduce']),
+});
+
+export const MacroPlanSchema = z.object({
+    macro_plan: z.array(
+        z.object({
+            week: z.number(),
+            focus: z.enum(['base', 'build', 'peak', 'taper', 'recovery']),
+            target_volume_hours: z.number(),
+            key_sessions: z.array(z.string()),
+            strength_sessions: z.number(),
+            yoga_sessions: z.number(),
+        })
+    ).min(1),
+});
+
+export type Workout = z.infer<typeof WorkoutSchema>;
+export type WorkoutBlock = z.infer<typeof WorkoutBlockSchema>;
+export type WeeklyAdjustment = z.infer<typeof WeeklyAdjustmentSchema>;
+export type MacroPlan = z.infer<typeof MacroPlanSchema>;
@@ -1,82 +1,189 @@
 import { createOpenAI } from '@ai-sdk/openai';
 import { createGoogleGenerativeAI } from '@ai-sdk/google';
 import { createAnthropic } from '@ai-sdk/anthropic';
-import { generateText } from 'ai';
-import { z } from 'zod';
-
-// Define schemas for structured output
-export const WorkoutSchema = z.object({
-    workout_name: z.string(),
-    sport: z.enum(['run', 'bike', 'strength', 'yoga', 'mobility']),
-    description: z.string(),
-    tags: z.array(z.string()),
-    structure: z.array(
-        z.object({
-            type: z.enum(['warmup', 'interval', 'recovery', 'cooldown', 'steady']),
-            reps: z.number().nullable().optional(),
-            duration_min: z.number(),
-            intensity: z.enum(['easy', 'endurance', 'tempo', 'threshold', 'vo2max', 'anaerobic', 'hill']),
-            target: z.object({
-                metric: z.enum(['pace', 'power', 'hr', 'rpe']),
-                value: z.string(),
-            }),
-        })
-    ),
-    intervals_icu_export: z.object({
-        format: z.literal('builder_v1'),
-        blocks: z.array(z.any()), // Flexible for now, strictly intervals.icu format
-    }),
-});
-
-export const WeeklyAdjustmentSchema = z.object({
-    adjusted_week: z.array(z.any()), // Placeholder for full week structure
-    summary: z.string(),
-    load_change: z.enum(['increase', 'maintain', 'reduce']),
-});
-
-export const MacroPlanSchema = z.object({
-    macro_plan: z.array(
-        z.object({
-            week: z.number(),
-            focus: z.enum(['base', 'build', 'peak', 'taper', 'recovery']),
-            target_volume_hours: z.number(),
-            key_sessions: z.array(z.string()),
-            strength_sessions: z.number(),
-            yoga_sessions: z.number(),
-        })
-    ),
-});
+import { generateText, streamText } from 'ai';
+import { AIResponseCache, aiResponseCache, cacheKey } from './responseCache';
+import { StructureStreamParser } from './jsonStream';
+import { RepairResult, repairMacroPlan, repairWorkout } from './repair';
+import { ProviderDispatcher, providerDispatcher } from './dispatcher';
+
+export { WorkoutSchema, WeeklyAdjustmentSchema, MacroPlanSchema } from './schemas';
 
 export type AIProvider = 'openai' | 'gemini' | 'claude';
 
+const MODEL_IDS: Record<AIProvider, string> = {
+    openai: 'gpt-4-turbo', // Or gpt-4o
+    gemini: 'models/gemini-2.0-flash',
+    claude: 'claude-3-opus-20240229',
+};
+
+// Server-side keys that may serve hedged requests, for providers listed in AI_HEDGE_PROVIDERS.
+const SERVER_KEYS: Record<AIProvider, string | undefined> = {
+    openai: process.env.OPENAI_API_KEY,
+    gemini: process.env.GOOGLE_API_KEY,
+    claude: process.env.ANTHROPIC_API_KEY,
+};
+
+// Model calls per request: the first answer plus one regeneration if it can't be repaired.
+const MAX_ATTEMPTS = 2;
+// Upper bound on one request (all attempts and hedges included), so a stuck provider can't hang it.
+const REQUEST_TIMEOUT_MS = 90000;
+
+export interface ProviderConfig {
+    provider: AIProvider;
+    apiKey: string;
+}
+
+/**
+ * Providers other than `primary` that are enabled for hedging
+ * (AI_HEDGE_PROVIDERS="gemini,claude") and have a server key configured.
+ */
+export function hedgeProvidersFromEnv(primary: AIProvider): ProviderConfig[] {
+    return (process.env.AI_HEDGE_PROVIDERS || '')
+        .split(',')
+        .map(p => p.trim() as AIProvider)
+        .filter(p => p !== primary && SERVER_KEYS[p])
+        .map(p => ({ provider: p, apiKey: SERVER_KEYS[p]! }));
+}
+
+function createModel(provider: AIProvider, apiKey: string) {
+    switch (provider) {
+        case 'openai':
+            const openai = createOpenAI({ apiKey });
+            return openai(MODEL_IDS.openai);
+        case 'gemini':
+            const google = createGoogleGenerativeAI({ apiKey });
+            return google(MODEL_IDS.gemini);
+        case 'claude':
+            const anthropic = createAnthropic({ apiKey });
+            return anthropic(MODEL_IDS.claude);
+        default:
+            throw new Error('Invalid AI Provider');
+    }
+}
+
+type Repairer = (raw: any) => RepairResult<any>;
+
+/**
+ * Cached generateJSON result: the JSON text plus the provider / model that answered,
+ * which differs from the cache key's provider when a hedge won.
+ */
+interface CachedAnswer {
+    provider: AIProvider;
+    model: string;
+    data: string;
+}
+
+/**
+ * Extracts the JSON object from model text, then repairs / validates it.
+ * Returns the JSON string to cache, or throws if the output is unrecoverable.
+ */
+function parseResponse(text: string, repair?: Repairer): string {
+    const start = text.indexOf('{');
+    const end = text.lastIndexOf('}');
+    if (start === -1 || end === -1) throw new Error("No JSON found");
+    const extracted = text.substring(start, end + 1);
+    const value = JSON.parse(extracted);
+    if (!repair) return extracted;
+
+    const result = repair(value);
+    if (result.repairs.length) console.warn("Repaired AI response:", result.repairs.join('; '));
+    if (!result.success) throw new Error(`AI response did not match schema (${result.error})`);
+    return JSON.stringify(result.data);
+}
+
 export class AIService {
     private provider: AIProvider;
     private apiKey: string;
+    private cache: AIResponseCache;
+    private hedges: ProviderConfig[];
+    private dispatcher: ProviderDispatcher;
 
-    constructor(provider: AIProvider, apiKey: string) {
+    constructor(
+        provider: AIProvider,
+        apiKey: string,
+        cache: AIResponseCache = aiResponseCache,
+        hedges: ProviderConfig[] = hedgeProvidersFromEnv(provider),
+        dispatcher: ProviderDispatcher = providerDispatcher,
+    ) {
         this.provider = provider;
         this.apiKey = apiKey;
+        this.cache = cache;
+        this.hedges = hedges;
+        this.dispatcher = dispatcher;
     }
 
     private getModel() {
-        switch (this.provider) {
-            case 'openai':
-                const openai = createOpenAI({ apiKey: this.apiKey });
-                return openai('gpt-4-turbo'); // Or gpt-4o
-            case 'gemini':
-                const google = createGoogleGenerativeAI({ apiKey: this.apiKey });
-                return google('models/gemini-2.0-flash');
-            case 'claude':
-                const anthropic = createAnthropic({ apiKey: this.apiKey });
-                return anthropic('claude-3-opus-20240229');
-            default:
-                throw new Error('Invalid AI Provider');
+        return createModel(this.provider, this.apiKey);
+    }
+
+    /**
+     * The JSON text of a cached answer, noting when a hedge provider produced it.
+     */
+    private answerData(cached: string): string {
+        const answer: CachedAnswer = JSON.parse(cached);
+        if (answer.provider !== this.provider) {
+            console.info(`AI response served by hedge provider ${answer.provider} (${answer.model})`);
         }
+        return answer.data;
     }
 
-    async generateWorkout(userProfile: any, context: string) {
-        const model = this.getModel();
+    /**
+     * Runs the prompt and returns the parsed JSON object from the response.
+     * The user's provider is asked first; configured hedge providers are started when it
+     * is slower than its p90 or fails (see ProviderDispatcher), and the first response
+     * that parses and passes the repairer wins. Only when every provider's output is
+     * unrecoverable is the whole dispatch repeated (up to MAX_ATTEMPTS), within one
+     * REQUEST_TIMEOUT_MS deadline for all attempts together.
+     * Responses are cached on the user's (provider, model, normalized prompt, profile hash)
+     * and identical concurrent requests share one model call. A hedged answer is shared
+     * under that key too, so the cached value records the provider and model that
+     * actually produced it. Each caller gets its own copy.
+     */
+    private async generateJSON(prompt: string, profile: any, repair?: Repairer) {
+        const key = cacheKey(this.provider, MODEL_IDS[this.provider] ?? '', prompt, profile);
+
+        const cached = await this.cache.getOrCreate(key, async () => {
+            const candidates = [{ provider: this.provider, apiKey: this.apiKey }, ...this.hedges].map(config => ({
+                provider: config.provider,
+                model: MODEL_IDS[config.provider] ?? '',
+                run: async (signal: AbortSignal) => {
+                    const { text } = await generateText({
+                        model: createModel(config.provider, config.apiKey) as any,
+                        system: "You are a helpful assistant that outputs strictly JSON.",
+                        prompt,
+                        abortSignal: signal,
+                    });
+                    try {
+                        // Only valid JSON is cached
+                        const data = parseResponse(text, repair);
+                        return JSON.stringify({ provider: config.provider, model: MODEL_IDS[config.provider] ?? '', data });
+                    } catch (e) {
+                        console.error(`Failed to parse ${config.provider} response`, text);
+                        throw e;
+                    }
+                },
+            }));
+
+            const deadline = Date.now() + REQUEST_TIMEOUT_MS;
+            let lastError: unknown;
+            for (let attempt = 1; attempt <= MAX_ATTEMPTS; attempt++) {
+                const timeoutMs = deadline - Date.now();
+                if (timeoutMs <= 0) break;
+                try {
+                    return await this.dispatcher.dispatch(candidates, { timeoutMs });
+                } catch (e) {
+                    console.error(`AI request failed (attempt ${attempt}/${MAX_ATTEMPTS})`, e);
+                    lastError = e;
+                }
+            }
+            throw new Error(`AI response was not valid JSON: ${lastError instanceof Error ? lastError.message : lastError}`);
+        });
+
+        return JSON.parse(this.answerData(cached));
+    }
 
+    private workoutPrompt(userProfile: any, context: string): string {
         const systemPrompt = `
       You are an expert endurance training coach.
       Your goal is to generate a specific workout based on the user's request and context.
@@ -111,27 +218,77 @@ export class AIService {
       - Each block has: "type" (warmup, interval, recovery, cooldown), "duration_min", "intensity" (description), "zone" (Z1-Z5), "zone_position" (0.0-1.0).
     `;
 
-        const { text } = await generateText({
+        return systemPrompt + "\n\nUser Request: " + context + "\n\nProfile: " + JSON.stringify(userProfile);
+    }
+
+    /**
+     * `targetDurationMin` (when the request asked for a duration) is used to fix
+     * structures whose blocks don't add up to it.
+     */
+    async generateWorkout(userProfile: any, context: string, targetDurationMin?: number | null) {
+        return this.generateJSON(this.workoutPrompt(userProfile, context), userProfile,
+            raw => repairWorkout(raw, { targetDurationMin }));
+    }
+
+    /**
+     * Streaming variant of generateWorkout.
+     * Calls onBlock with each structure block as soon as the model has finished writing it,
+     * and resolves with the complete workout. Shares the response cache with generateWorkout.
+     * Not hedged (blocks from one provider are already on screen), but the stream's
+     * duration feeds the provider's latency histogram. `targetDurationMin` is applied
+     * as in generateWorkout, to the final workout (blocks already sent are not rescaled).
+     */
+    async streamWorkout(
+        userProfile: any,
+        context: string,
+        onBlock: (block: any, index: number) => void,
+        targetDurationMin?: number | null,
+    ) {
+        const prompt = this.workoutPrompt(userProfile, context);
+        const key = cacheKey(this.provider, MODEL_IDS[this.provider] ?? '', prompt, userProfile);
+
+        const cached = this.cache.get(key);
+        if (cached !== undefined) {
+            const workout = JSON.parse(this.answerData(cached));
+            (workout.structure || []).forEach(onBlock);
+            return workout;
+        }
+
+        const started = Date.now();
+        const model = this.getModel();
+        const result = await streamText({
             model: model as any,
             system: "You are a helpful assistant that outputs strictly JSON.",
-            prompt: systemPrompt + "\n\nUser Request: " + context + "\n\nProfile: " + JSON.stringify(userProfile)
+            prompt
         });
 
+        const parser = new StructureStreamParser();
+        const reader = result.textStream.getReader();
+        let index = 0;
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            for (const block of parser.push(value)) {
+                onBlock(block, index++);
+            }
+        }
+        this.dispatcher.histogram(this.provider, MODEL_IDS[this.provider] ?? '').record(Date.now() - started);
+
+        let jsonStr: string;
         try {
-            const start = text.indexOf('{');
-            const end = text.lastIndexOf('}');
-            if (start === -1 || end === -1) throw new Error("No JSON found");
-            const jsonStr = text.substring(start, end + 1);
-            return JSON.parse(jsonStr);
+            jsonStr = parseResponse(parser.text, raw => repairWorkout(raw, { targetDurationMin }));
         } catch (e) {
-            console.error("Failed to parse AI response", text);
-            throw new Error("AI response was not valid JSON");
+            // Blocks already sent stay on screen; the final workout comes from a regular call
+            console.error("Failed to parse streamed AI response", parser.text);
+            return this.generateWorkout(userProfile, context, targetDurationMin);
         }
+        const answer: CachedAnswer = { provider: this.provider, model: MODEL_IDS[this.provider] ?? '', data: jsonStr };
+        this.cache.set(key, JSON.stringify(answer));
+        return JSON.parse(jsonStr);
     }
 
 
     async generateMacroPlan(userProfile: any, goal: any, history: any) {
-        const model = this.getModel();
         const prompt = `
         Create a macro training plan for an athlete.
         
@@ -154,21 +311,28 @@ export class AIService {
         Output strictly JSON.
       `;
 
-        const { text } = await generateText({
-            model: model as any,
-            system: "You are a helpful assistant that outputs strictly JSON.",
-            prompt
-        });
+        return this.generateJSON(prompt, userProfile, repairMacroPlan);
+    }
 
-        try {
-            const start = text.indexOf('{');
-            const end = text.lastIndexOf('}');
-            if (start === -1 || end === -1) throw new Error("No JSON found");
-            const jsonStr = text.substring(start, end + 1);
-            return JSON.parse(jsonStr);
-        } catch (e) {
-            console.error("Failed to parse AI response", text);
-            throw new Error("AI response was not valid JSON");
+    /**
+     * Coach-voice summary of a weekly adjustment that has already been decided
+     * (training/adjust.ts). `context` lists the changes and the reasons for them;
+     * the model only writes the text.
+     */
+    async summarizeAdjustment(userProfile: any, context: string): Promise<string> {
+        const prompt = `
+        Explain this week's training plan adjustment to the athlete in 2-3 short sentences.
+        The changes are final: describe them and why, do not suggest others.
+
+        ${context}
+
+        Output strictly JSON: { "summary": string }
+      `;
+
+        const result = await this.generateJSON(prompt, userProfile);
+        if (!result || typeof result.summary !== 'string' || !result.summary.trim()) {
+            throw new Error('AI response has no summary');
         }
+        return result.summary.trim();
     }
 }
@@ -0,0 +1,100 @@
+import { prisma, userCache } from './db';
+import { decryptToBuffer, encrypt, needsReencryption } from './encryption';
+
+/**
+ * Decrypted third-party credentials (Intervals.icu and AI provider keys).
+ *
+ * Plaintexts are cached by ciphertext for a few minutes, so a user's requests and
+ * the jobs of a bulk sync decrypt each key once. Saving a new key produces a new
+ * ciphertext (fresh IV), so stale entries are never served and only need to expire.
+ * Cached bytes are zeroed on expiry and eviction; the strings handed to callers
+ * are ordinary JS strings and are not.
+ */
+
+const CREDENTIAL_TTL_MS = 5 * 60 * 1000;
+const MAX_CREDENTIALS = 5000;
+
+export class CredentialCache {
+    // Insertion order is expiry order (hits don't extend the TTL), so expired entries sit at the front
+    private entries = new Map<string, { plain: Buffer; expires: number }>();
+    readonly stats = { hits: 0, misses: 0, evictions: 0 };
+
+    constructor(private ttlMs = CREDENTIAL_TTL_MS, private maxEntries = MAX_CREDENTIALS) { }
+
+    decrypt(ciphertext: string): string {
+        const now = Date.now();
+        this.sweep(now);
+        const cached = this.entries.get(ciphertext);
+        if (cached) {
+            this.stats.hits++;
+            return cached.plain.toString();
+        }
+
+        this.stats.misses++;
+        const plain = decryptToBuffer(ciphertext);
+        this.entries.set(ciphertext, { plain, expires: now + this.ttlMs });
+        if (this.entries.size > this.maxEntries) {
+            this.evict(this.entries.keys().next().value as string);
+        }
+        return plain.toString();
+    }
+
+    private sweep(now: number) {
+        const entries = this.entries.entries();
+        for (let next = entries.next(); !next.done && next.value[1].expires <= now; next = entries.next()) {
+            this.evict(next.value[0]);
+        }
+    }
+
+    private evict(key: string) {
+        const entry = this.entries.get(key);
+        if (!entry) return;
+        entry.plain.fill(0);
+        this.entries.delete(key);
+        this.stats.evictions++;
+    }
+
+    clear() {
+        Array.from(this.entries.keys()).forEach(key => this.evict(key));
+    }
+
+    get size(): number {
+        return this.entries.size;
+    }
+}
+
+export const credentialCache = new CredentialCache();
+
+type CredentialField = 'intervalsApiKey' | 'aiApiKey';
+
+// Ciphertexts with a rotation write in flight
+const rotating = new Set<string>();
+
+/**
+ * Re-encrypts a value written with an older key in the background. The update only
+ * applies if the stored ciphertext is unchanged, so a concurrent save wins.
+ */
+function reencryptLater(userId: string, field: CredentialField, ciphertext: string, plain: string) {
+    if (rotating.has(ciphertext)) return;
+    rotating.add(ciphertext);
+    prisma.user
+        .updateMany({ where: { id: userId, [field]: ciphertext }, data: { [field]: encrypt(plain) } })
+        .then(() => userCache.invalidate(userId))
+        .catch(error => console.error(`Could not re-encrypt ${field} for ${userId}:`, error))
+        .finally(() => rotating.delete(ciphertext));
+}
+
+type CredentialUser = { id: string; intervalsApiKey: string | null; aiApiKey: string | null };
+
+/**
+ * One decrypted key of a user, or null when not configured. Keys written with an
+ * older encryption key are rotated to the current one as they are read.
+ */
+export function userCredential(user: CredentialUser, field: CredentialField): string | null {
+    const ciphertext = user[field];
+    if (!ciphertext) return null;
+    const plain = credentialCache.decrypt(ciphertext);
+    if (needsReencryption(ciphertext)) reencryptLater(user.id, field, ciphertext, plain);
+    return plain;
+}
+
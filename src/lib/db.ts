@@ -0,0 +1,135 @@
+import { Prisma, PrismaClient } from '@prisma/client';
+
+/**
+ * Shared data access for API routes.
+ *
+ * One PrismaClient (and so one connection pool) per server process instead of one
+ * per route module, with per-query timing, plus a short-TTL cache of users with
+ * their athlete profile, the lookup nearly every route starts with.
+ */
+
+export type UserWithProfile = Prisma.UserGetPayload<{ include: { profile: true } }>;
+
+// Queries slower than this are logged (PRISMA_SLOW_QUERY_MS, 0 disables)
+const SLOW_QUERY_MS = Number(process.env.PRISMA_SLOW_QUERY_MS ?? 200);
+const USER_CACHE_TTL_MS = 30 * 1000;
+
+// --- Query timing ---
+
+export interface QueryStat {
+    count: number;
+    totalMs: number;
+    maxMs: number;
+}
+
+const queryTimings = new Map<string, QueryStat>();
+
+function recordQuery(key: string, ms: number) {
+    const stat = queryTimings.get(key);
+    if (stat) {
+        stat.count++;
+        stat.totalMs += ms;
+        stat.maxMs = Math.max(stat.maxMs, ms);
+    } else {
+        queryTimings.set(key, { count: 1, totalMs: ms, maxMs: ms });
+    }
+    if (SLOW_QUERY_MS > 0 && ms >= SLOW_QUERY_MS) {
+        console.warn(`Slow query ${key}: ${Math.round(ms)}ms`);
+    }
+}
+
+/**
+ * Count / total / max milliseconds per "Model.action" since the process started.
+ */
+export function queryStats(): Record<string, QueryStat & { meanMs: number }> {
+    const stats: Record<string, QueryStat & { meanMs: number }> = {};
+    queryTimings.forEach((stat, key) => {
+        stats[key] = { ...stat, meanMs: stat.totalMs / stat.count };
+    });
+    return stats;
+}
+
+function createClient(): PrismaClient {
+    const client = new PrismaClient();
+    client.$use(async (params, next) => {
+        const started = performance.now();
+        try {
+            return await next(params);
+        } finally {
+            recordQuery(`${params.model ?? 'raw'}.${params.action}`, performance.now() - started);
+        }
+    });
+    return client;
+}
+
+// Next.js dev reloads route modules on every change; keep the client on globalThis
+// so reloads don't open a new pool each time.
+const globalForPrisma = globalThis as unknown as { prisma?: PrismaClient };
+
+export const prisma = globalForPrisma.prisma ?? createClient();
+
+if (process.env.NODE_ENV !== 'production') globalForPrisma.prisma = prisma;
+
+// --- User cache ---
+
+/**
+ * Users with their profile, cached for `ttlMs` per userId (LRU beyond `maxEntries`).
+ * Concurrent misses for the same user share one query. Call invalidate() after
+ * writing the user or profile; the TTL bounds staleness across server instances.
+ */
+export class UserCache {
+    private entries = new Map<string, { user: Promise<UserWithProfile | null>; expires: number }>();
+    readonly stats = { hits: 0, misses: 0, invalidations: 0 };
+
+    constructor(
+        private load: (userId: string) => Promise<UserWithProfile | null>,
+        private ttlMs = USER_CACHE_TTL_MS,
+        private maxEntries = 1000,
+    ) { }
+
+    get(userId: string): Promise<UserWithProfile | null> {
+        const now = Date.now();
+        const cached = this.entries.get(userId);
+        if (cached && cached.expires > now) {
+            this.stats.hits++;
+            // Refresh LRU position
+            this.entries.delete(userId);
+            this.entries.set(userId, cached);
+            return cached.user;
+        }
+
+        this.stats.misses++;
+        const user = this.load(userId);
+        const entry = { user, expires: now + this.ttlMs };
+        this.entries.delete(userId);
+        this.entries.set(userId, entry);
+        // Failed lookups and unknown users aren't kept
+        user.then(
+            found => { if (!found && this.entries.get(userId) === entry) this.entries.delete(userId); },
+            () => { if (this.entries.get(userId) === entry) this.entries.delete(userId); },
+        );
+        if (this.entries.size > this.maxEntries) {
+            // Map keeps insertion order, so the first key is the least recently used.
+            this.entries.delete(this.entries.keys().next().value as string);
+        }
+        return user;
+    }
+
+    invalidate(userId: string) {
+        if (this.entries.delete(userId)) {
+            this.stats.invalidations++;
+        }
+    }
+}
+
+export const userCache = new UserCache(userId =>
+    prisma.user.findUnique({ where: { id: userId }, include: { profile: true } }),
+);
+
+/**
+ * The user and profile for a request, or null when `userId` is missing or unknown.
+ */
+export function getUserWithProfile(userId: string | null | undefined): Promise<UserWithProfile | null> {
+    if (!userId || typeof userId !== 'string') return Promise.resolve(null);
+    return userCache.get(userId);
+}
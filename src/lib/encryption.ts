@@ -1,22 +1,71 @@
 import crypto from 'crypto';
 
-const ENCRYPTION_KEY = process.env.ENCRYPTION_KEY || 'default_key_must_be_32_bytes_long!'; // Must be 256 bits (32 characters)
 const IV_LENGTH = 16; // For AES, this is always 16
 
+/**
+ * Key versions.
+ *
+ * Ciphertexts are written as "v<version>:<iv>:<data>" with the current key
+ * (ENCRYPTION_KEY, version ENCRYPTION_KEY_VERSION, default 1). Older keys stay
+ * readable through ENCRYPTION_KEY_V<version>. Untagged "<iv>:<data>" values
+ * predate versioning and are version 1. To rotate, move the old key to
+ * ENCRYPTION_KEY_V<old>, set the new key and version, and let values be
+ * re-encrypted as they are read (see needsReencryption) or saved.
+ */
+const CURRENT_VERSION = Number(process.env.ENCRYPTION_KEY_VERSION) || 1;
+const LEGACY_VERSION = 1;
+
+// Keys are the raw 32 bytes of the env value (AES-256), prepared once per version
+const keys = new Map<number, Buffer>();
+
+function keyFor(version: number): Buffer {
+    let key = keys.get(version);
+    if (!key) {
+        const secret = version === CURRENT_VERSION
+            ? process.env.ENCRYPTION_KEY || 'default_key_must_be_32_bytes_long!' // Must be 256 bits (32 characters)
+            : process.env[`ENCRYPTION_KEY_V${version}`];
+        if (!secret) throw new Error(`No encryption key configured for version ${version}`);
+        key = Buffer.from(secret);
+        if (key.length !== 32) throw new Error(`Encryption key version ${version} must be 32 bytes`);
+        keys.set(version, key);
+    }
+    return key;
+}
+
+/**
+ * Key version a ciphertext was written with.
+ */
+export function keyVersion(text: string): number {
+    const match = /^v(\d+):/.exec(text);
+    return match ? Number(match[1]) : LEGACY_VERSION;
+}
+
+/**
+ * True when `text` was encrypted with an older key (or without a version tag).
+ */
+export function needsReencryption(text: string): boolean {
+    return !text.startsWith(`v${CURRENT_VERSION}:`);
+}
+
 export function encrypt(text: string) {
     const iv = crypto.randomBytes(IV_LENGTH);
-    const cipher = crypto.createCipheriv('aes-256-cbc', Buffer.from(ENCRYPTION_KEY), iv);
-    let encrypted = cipher.update(text);
-    encrypted = Buffer.concat([encrypted, cipher.final()]);
-    return iv.toString('hex') + ':' + encrypted.toString('hex');
+    const cipher = crypto.createCipheriv('aes-256-cbc', keyFor(CURRENT_VERSION), iv);
+    const encrypted = Buffer.concat([cipher.update(text), cipher.final()]);
+    return `v${CURRENT_VERSION}:` + iv.toString('hex') + ':' + encrypted.toString('hex');
 }
 
-export function decrypt(text: string) {
-    const textParts = text.split(':');
+/**
+ * Plaintext bytes of `text`. Callers holding secrets for a while can zero the buffer when done.
+ */
+export function decryptToBuffer(text: string): Buffer {
+    const version = keyVersion(text);
+    const textParts = (/^v\d+:/.test(text) ? text.slice(text.indexOf(':') + 1) : text).split(':');
     const iv = Buffer.from(textParts.shift()!, 'hex');
     const encryptedText = Buffer.from(textParts.join(':'), 'hex');
-    const decipher = crypto.createDecipheriv('aes-256-cbc', Buffer.from(ENCRYPTION_KEY), iv);
-    let decrypted = decipher.update(encryptedText);
-    decrypted = Buffer.concat([decrypted, decipher.final()]);
-    return decrypted.toString();
+    const decipher = crypto.createDecipheriv('aes-256-cbc', keyFor(version), iv);
+    return Buffer.concat([decipher.update(encryptedText), decipher.final()]);
+}
+
+export function decrypt(text: string) {
+    return decryptToBuffer(text).toString();
 }
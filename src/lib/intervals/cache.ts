@@ -0,0 +1,197 @@
+import type { PrismaClient } from '@prisma/client';
+import { IntervalsClient } from './client';
+
+/**
+ * Incremental, per-athlete cache of Intervals.icu activities and wellness
+ * (the TS side of scripts/coach/cache.py, stored in Postgres instead of SQLite).
+ *
+ * Records are kept per user, kind and record id, indexed by their local date.
+ * For each user and kind the covered date range is stored; its newest day is the
+ * high-water mark. A range query only fetches:
+ *   - days before the covered range that were never fetched, and
+ *   - the last LOOKBACK_DAYS before the high-water mark plus anything newer,
+ *     since recent activities and wellness entries still change (late uploads,
+ *     end-of-day HRV), and only when the last sync is older than `maxAgeMs`.
+ * Every other day is served from the database, so repeated "Train Now" and
+ * dashboard requests don't download the whole range again.
+ */
+
+export type CachedKind = 'activities' | 'wellness';
+
+// Days before the high-water mark that are re-fetched on every sync
+export const LOOKBACK_DAYS = 2;
+// A sync younger than this is served entirely from the database
+export const DEFAULT_MAX_AGE_MS = 15 * 60 * 1000;
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+export interface SyncState {
+    oldest: string;   // YYYY-MM-DD
+    newest: string;   // YYYY-MM-DD, the high-water mark
+    syncedAt: number; // epoch ms of the last fetch that reached the tail
+}
+
+export interface CachedRecord {
+    recordId: string;
+    date: string;     // YYYY-MM-DD
+    payload: any;
+}
+
+export interface IntervalsCacheStore {
+    syncState(userId: string, kind: CachedKind): Promise<SyncState | null>;
+    /**
+     * Replaces every record dated in [start, end] (and any record with the same id
+     * stored under another day) with `records`, and saves `state`.
+     */
+    replaceRange(userId: string, kind: CachedKind, start: string, end: string, records: CachedRecord[], state: SyncState): Promise<void>;
+    /** Payloads dated in [oldest, newest], ordered by date. */
+    query(userId: string, kind: CachedKind, oldest: string, newest: string): Promise<any[]>;
+}
+
+function addDays(date: string, days: number): string {
+    return new Date(Date.parse(date + 'T00:00:00Z') + days * DAY_MS).toISOString().split('T')[0];
+}
+
+function utcDay(date: string): Date {
+    return new Date(Date.parse(date.slice(0, 10) + 'T00:00:00Z'));
+}
+
+/**
+ * Local date (YYYY-MM-DD) a record belongs to. Wellness records are keyed by their date.
+ */
+export function recordDate(kind: CachedKind, record: any): string {
+    if (kind === 'wellness') return String(record.id).slice(0, 10);
+    return String(record.start_date_local || record.start_date).slice(0, 10);
+}
+
+/**
+ * The [start, end] windows that must be fetched before [oldest, newest] can be
+ * answered from the cache.
+ */
+export function missingRanges(
+    state: SyncState | null,
+    oldest: string,
+    newest: string,
+    now: number,
+    lookbackDays = LOOKBACK_DAYS,
+    maxAgeMs = DEFAULT_MAX_AGE_MS,
+): [string, string][] {
+    if (!state) return [[oldest, newest]];
+
+    const ranges: [string, string][] = [];
+    if (oldest < state.oldest) {
+        ranges.push([oldest, addDays(state.oldest, -1)]);
+    }
+
+    // Re-check the still-changing tail when it is stale or the query runs past it
+    const tailStart = addDays(state.newest, -lookbackDays);
+    const stale = now - state.syncedAt >= maxAgeMs;
+    if (newest > state.newest || (stale && newest >= tailStart)) {
+        ranges.push([tailStart > state.oldest ? tailStart : state.oldest, newest > state.newest ? newest : state.newest]);
+    }
+    return ranges;
+}
+
+export function prismaIntervalsCacheStore(prisma: PrismaClient): IntervalsCacheStore {
+    return {
+        syncState: async (userId, kind) => {
+            const row = await prisma.intervalsSync.findUnique({ where: { userId_kind: { userId, kind } } });
+            return row ? {
+                oldest: row.oldest.toISOString().split('T')[0],
+                newest: row.newest.toISOString().split('T')[0],
+                syncedAt: row.syncedAt.getTime(),
+            } : null;
+        },
+        replaceRange: async (userId, kind, start, end, records, state) => {
+            const sync = { oldest: utcDay(state.oldest), newest: utcDay(state.newest), syncedAt: new Date(state.syncedAt) };
+            await prisma.$transaction([
+                // Deleting first picks up remote deletions inside the window
+                prisma.intervalsRecord.deleteMany({
+                    where: {
+                        userId,
+                        kind,
+                        OR: [
+                            { date: { gte: utcDay(start), lte: utcDay(end) } },
+                            { recordId: { in: records.map(r => r.recordId) } },
+                        ],
+                    },
+                }),
+                prisma.intervalsRecord.createMany({
+                    data: records.map(r => ({
+                        userId,
+                        kind,
+                        recordId: r.recordId,
+                        date: utcDay(r.date),
+                        payload: JSON.stringify(r.payload),
+                    })),
+                    skipDuplicates: true,
+                }),
+                prisma.intervalsSync.upsert({
+                    where: { userId_kind: { userId, kind } },
+                    create: { userId, kind, ...sync },
+                    update: sync,
+                }),
+            ]);
+        },
+        query: async (userId, kind, oldest, newest) => {
+            const rows = await prisma.intervalsRecord.findMany({
+                where: { userId, kind, date: { gte: utcDay(oldest), lte: utcDay(newest) } },
+                orderBy: [{ date: 'asc' }, { recordId: 'asc' }],
+                select: { payload: true },
+            });
+            return rows.map(row => JSON.parse(row.payload));
+        },
+    };
+}
+
+/**
+ * Range queries through the cache: fetches only the missing windows with the
+ * user's client, stores them, then answers from the store.
+ */
+export class IntervalsCache {
+    readonly stats = { hits: 0, fetches: 0 };
+
+    constructor(
+        private store: IntervalsCacheStore,
+        private lookbackDays = LOOKBACK_DAYS,
+        private maxAgeMs = DEFAULT_MAX_AGE_MS,
+        private clock: () => number = Date.now,
+    ) { }
+
+    async getRange(userId: string, client: IntervalsClient, kind: CachedKind, oldest: string, newest: string): Promise<any[]> {
+        let state = await this.store.syncState(userId, kind);
+        const windows = missingRanges(state, oldest, newest, this.clock(), this.lookbackDays, this.maxAgeMs);
+        if (!windows.length) this.stats.hits++;
+
+        for (const [start, end] of windows) {
+            this.stats.fetches++;
+            const fetched = kind === 'activities'
+                ? await client.getActivities(start, end)
+                : await client.getWellness(start, end);
+            const records = (Array.isArray(fetched) ? fetched : [])
+                .filter((r: any) => r && r.id !== undefined && r.id !== null)
+                .map((r: any) => ({ recordId: String(r.id), date: recordDate(kind, r), payload: r }));
+
+            // Back-filling older days does not make the tail any fresher
+            const syncedAt = state && end < state.newest ? state.syncedAt : this.clock();
+            state = state
+                ? {
+                    oldest: start < state.oldest ? start : state.oldest,
+                    newest: end > state.newest ? end : state.newest,
+                    syncedAt,
+                }
+                : { oldest: start, newest: end, syncedAt };
+            await this.store.replaceRange(userId, kind, start, end, records, state);
+        }
+
+        return this.store.query(userId, kind, oldest, newest);
+    }
+
+    getActivities(userId: string, client: IntervalsClient, oldest: string, newest: string) {
+        return this.getRange(userId, client, 'activities', oldest, newest);
+    }
+
+    getWellness(userId: string, client: IntervalsClient, oldest: string, newest: string) {
+        return this.getRange(userId, client, 'wellness', oldest, newest);
+    }
+}
@@ -1,17 +1,52 @@
 import { resolvePaceTarget, formatPace, Zone, getPaceZoneAsPercent } from '../training/zones';
 
+// Descriptive step label per zone, so Garmin/Intervals show what the step is for.
+const ZONE_LABELS: Record<Zone, string> = {
+    Z5: 'VO2 Max',
+    Z4: 'Threshold',
+    Z3: 'Tempo',
+    Z2: 'Endurance',
+    Z1: 'Recovery',
+};
+
+// Maps our sport names to Intervals.icu activity types
+const SPORT_TYPES: Record<string, string> = {
+    run: 'Run',
+    bike: 'Ride',
+    strength: 'WeightTraining',
+    yoga: 'Yoga',
+    mobility: 'Workout',
+};
+
+const DEFAULT_START_TIME = '09:00:00';
+
+function upperFirst(value: string): string {
+    return value.charAt(0).toUpperCase() + value.slice(1);
+}
+
+/**
+ * 10 -> "10m", 1.5 -> "1m30s", 0.5 -> "30s"
+ */
+function formatDuration(minutes: number): string {
+    const seconds = Math.round(minutes * 60);
+    const mins = Math.floor(seconds / 60);
+    const secs = seconds % 60;
+    if (!secs) return `${mins}m`;
+    return mins ? `${mins}m${secs}s` : `${secs}s`;
+}
+
 export class IntervalsClient {
     private apiKey: string;
     private athleteId: string;
-    private baseUrl = 'https://intervals.icu/api/v1';
+    private baseUrl = process.env.INTERVALS_BASE_URL || 'https://intervals.icu/api/v1';
 
     constructor(apiKey: string, athleteId: string = '0') {
         this.apiKey = apiKey;
         this.athleteId = athleteId;
     }
 
-    private async fetch(endpoint: string, options: RequestInit = {}) {
-        const url = `${this.baseUrl}/athlete/${this.athleteId}${endpoint}`;
+    private async fetch(endpoint: string, options: RequestInit = {}, athleteScoped = true) {
+        const url = athleteScoped ? `${this.baseUrl}/athlete/${this.athleteId}${endpoint}` : `${this.baseUrl}${endpoint}`;
         const headers = {
             'Authorization': `Basic ${btoa('API_KEY:' + this.apiKey)}`,
             'Content-Type': 'application/json',
@@ -38,6 +73,18 @@ export class IntervalsClient {
         return this.fetch(`/activities?oldest=${startDate}&newest=${endDate}`);
     }
 
+    /**
+     * Per-second streams of one activity keyed by type (time, heartrate, velocity_smooth, ...).
+     */
+    async getActivityStreams(activityId: string | number, types = ['time', 'heartrate', 'velocity_smooth']): Promise<Record<string, number[]>> {
+        const streams = await this.fetch(`/activity/${activityId}/streams?types=${types.join(',')}`, {}, false);
+        const byType: Record<string, number[]> = {};
+        (Array.isArray(streams) ? streams : []).forEach((stream: any) => {
+            if (stream?.type && Array.isArray(stream.data)) byType[stream.type] = stream.data;
+        });
+        return byType;
+    }
+
     async getWellness(startDate: string, endDate: string) {
         return this.fetch(`/wellness?oldest=${startDate}&newest=${endDate}`);
     }
@@ -54,7 +101,7 @@ export class IntervalsClient {
      * Checks if a date string is today or in the future.
      * Date string can be YYYY-MM-DD or ISO.
      */
-    private isFutureOrToday(dateStr: string): boolean {
+    isFutureOrToday(dateStr: string): boolean {
         const date = new Date(dateStr);
         const today = new Date();
         today.setHours(0, 0, 0, 0);
@@ -73,31 +120,39 @@ export class IntervalsClient {
      * SAFEGUARD: Only allows uploading to today or future.
      */
     async uploadWorkout(workout: any, date: string, profile: { thresholdPace?: number | null }) {
-        // Ensure date has time component if missing
-        const startDate = date.includes('T') ? date : `${date}T09:00:00`;
+        const payload = [workoutToEvent(workout, date)];
 
-        if (!this.isFutureOrToday(startDate)) {
+        if (!this.isFutureOrToday(payload[0].start_date_local)) {
             throw new Error("Cannot upload workouts to the past. Please select today or a future date.");
         }
 
-        // Convert JSON structure to Intervals.icu Builder Text
-        const description = this.convertStructureToText(workout.structure, profile.thresholdPace);
-
-        const payload = [{
-            category: 'WORKOUT',
-            start_date_local: startDate,
-            name: workout.workout_name,
-            description: description + `\n\n${workout.description}`, // Append AI description
-            type: workout.sport === 'run' ? 'Run' : 'Ride', // Map to Intervals types
-            moving_time: workout.structure.reduce((acc: number, curr: any) => acc + (curr.duration_min * 60), 0)
-        }];
-
         return this.fetch('/events/bulk', {
             method: 'POST',
             body: JSON.stringify(payload),
         });
     }
 
+    /**
+     * Creates/updates many events in one /events/bulk call.
+     * With upsert, events carrying an external_id update their existing copy.
+     */
+    async uploadEvents(events: any[], upsert = false) {
+        return this.fetch(upsert ? '/events/bulk?upsert=true' : '/events/bulk', {
+            method: 'POST',
+            body: JSON.stringify(events),
+        });
+    }
+
+    /**
+     * Deletes many events in one /events/bulk-delete call.
+     */
+    async deleteEvents(ids: (string | number)[]) {
+        return this.fetch('/events/bulk-delete', {
+            method: 'PUT',
+            body: JSON.stringify(ids.map(id => ({ id }))),
+        });
+    }
+
     /**
      * Deletes an event by ID.
      * SAFEGUARD: Checks if the event is in the future before deleting.
@@ -116,56 +171,120 @@ export class IntervalsClient {
         // 2. Delete
         return this.fetch(`/events/${id}`, { method: 'DELETE' });
     }
+}
 
-    /**
-     * Converts the structured JSON workout into Intervals.icu text format.
-     * Resolves Zones to concrete values if thresholdPace is provided.
-     */
-    private convertStructureToText(structure: any[], thresholdPace?: number | null): string {
-        if (!structure || !Array.isArray(structure)) return '';
+/**
+ * Converts the structured JSON workout into Intervals.icu text format.
+ * Zones are exported as % of threshold pace so Intervals.icu resolves the exact pace.
+ * Lines are collected and joined once; a block with reps > 1 opens a repeat
+ * group ("Interval 5x") that also holds the recovery blocks right after it.
+ */
+export function convertStructureToText(structure: any[]): string {
+    if (!structure || !Array.isArray(structure)) return '';
+
+    const lines: string[] = [];
+    let currentGroup = '';
+    let inRepeat = false;
+
+    structure.forEach(block => {
+        const reps = block.reps && block.reps > 1 ? Math.floor(block.reps) : 1;
 
-        let text = '';
-        let currentGroup = '';
+        // Recoveries right after a repeated block belong to its repeat group
+        if (inRepeat && block.type === 'recovery' && reps === 1) {
+            lines.push(formatStep(block));
+            return;
+        }
+        inRepeat = false;
 
-        structure.forEach(block => {
-            const groupName = block.type.charAt(0).toUpperCase() + block.type.slice(1);
+        const groupName = upperFirst(block.type);
 
+        if (reps > 1) {
+            if (lines.length) lines.push('');
+            lines.push(`${groupName} ${reps}x`);
+            inRepeat = true;
+            currentGroup = '';
+        } else if (groupName !== currentGroup) {
             // Add Group Header if it changes (e.g. Warmup, Main, Cooldown)
-            if (groupName !== currentGroup) {
-                text += `\n${groupName}\n`;
-                currentGroup = groupName;
-            }
-
-            // Add descriptive label for the step (e.g. "VO2 Max Interval", "Recovery")
-            // This helps Garmin/Intervals display what the step is for.
-            // We can infer this from the zone or explicit type if available.
-            let label = block.type; // Default to type (interval, recovery, etc)
-            if (block.zone === 'Z5') label = "VO2 Max";
-            else if (block.zone === 'Z4') label = "Threshold";
-            else if (block.zone === 'Z3') label = "Tempo";
-            else if (block.zone === 'Z2') label = "Endurance";
-            else if (block.zone === 'Z1') label = "Recovery";
-
-            // Capitalize label
-            label = label.charAt(0).toUpperCase() + label.slice(1);
-
-            let line = `- ${block.duration_min}m`;
-
-            // Resolve Target
-            if (block.zone) {
-                // Use Percentage Range for Pace (e.g. "77%-87% pace")
-                // This allows Intervals.icu to calculate exact pace based on user's threshold
-                const range = getPaceZoneAsPercent(block.zone as Zone);
-                line += ` ${range.min}%-${range.max}% pace ${label}`;
-            } else if (block.target && block.target.value) {
-                line += ` ${block.target.value} ${label}`;
-            } else {
-                line += ` ${block.intensity} ${label}`;
-            }
-
-            text += `${line}\n`;
-        });
+            if (lines.length) lines.push('');
+            lines.push(groupName);
+            currentGroup = groupName;
+        }
+
+        lines.push(formatStep(block));
+    });
+
+    return lines.join('\n');
+}
 
-        return text.trim();
+/**
+ * Formats a single step line, e.g. "- 5m 95%-100% pace Threshold".
+ */
+function formatStep(block: any): string {
+    const line = `- ${formatDuration(block.duration_min)}`;
+
+    // Resolve Target
+    if (block.zone && ZONE_LABELS[block.zone as Zone]) {
+        // Use Percentage Range for Pace (e.g. "77%-87% pace")
+        // This allows Intervals.icu to calculate exact pace based on user's threshold
+        const range = getPaceZoneAsPercent(block.zone as Zone);
+        return `${line} ${range.min}%-${range.max}% pace ${ZONE_LABELS[block.zone as Zone]}`;
+    }
+
+    const label = upperFirst(block.type);
+    const value = block.target?.value || block.intensity;
+    return value ? `${line} ${value} ${label}` : `${line} ${label}`;
+}
+
+/**
+ * Total duration in minutes, counting each repeat group `reps` times.
+ */
+export function totalDurationMin(structure: any[]): number {
+    let total = 0;
+    let group = 0;
+    let reps = 1;
+
+    for (const block of structure || []) {
+        const blockReps = block.reps && block.reps > 1 ? Math.floor(block.reps) : 1;
+        if (reps > 1 && block.type === 'recovery' && blockReps === 1) {
+            group += block.duration_min;
+            continue;
+        }
+        total += group * reps;
+        group = block.duration_min;
+        reps = blockReps;
     }
+
+    return total + group * reps;
+}
+
+/**
+ * Event start for a YYYY-MM-DD date or a stored Workout date: local 09:00 unless a time is given.
+ */
+function startDateLocal(date: string | Date): string {
+    if (date instanceof Date) return `${date.toISOString().split('T')[0]}T${DEFAULT_START_TIME}`;
+    return date.includes('T') ? date.slice(0, 19) : `${date}T${DEFAULT_START_TIME}`;
+}
+
+/**
+ * Intervals.icu event payload (mirrors workout_to_event in scripts/coach/plan_upload.py)
+ * for a stored Workout row (date/title/sport/durationMin, structure as blocks) or an
+ * AI-generated workout (workout_name/sport/description/structure) plus `date`.
+ * Rows carry their id as external_id, so a re-push updates the same event.
+ */
+export function workoutToEvent(workout: any, date?: string) {
+    const structure = Array.isArray(workout.structure) ? workout.structure : [];
+    const builderText = convertStructureToText(structure);
+    const notes = workout.description || '';
+    const event: any = {
+        category: 'WORKOUT',
+        start_date_local: startDateLocal(date ?? workout.date),
+        name: workout.title || workout.workout_name,
+        description: builderText ? `${builderText}\n\n${notes}`.trim() : notes,
+        type: SPORT_TYPES[workout.sport] ?? 'Ride',
+        moving_time: workout.durationMin != null
+            ? workout.durationMin * 60
+            : Math.round(totalDurationMin(structure) * 60),
+    };
+    if (workout.id) event.external_id = String(workout.id);
+    return event;
 }
@@ -0,0 +1,145 @@
+import crypto from 'crypto';
+import { IntervalsClient, workoutToEvent } from './client';
+
+/**
+ * Diff-based calendar reconciliation (mirrored by scripts/coach/reconcile.py).
+ *
+ * Lists the remote events for a range once, compares content hashes against the
+ * desired payloads and only sends what changed: creates + updates in one upsert
+ * bulk call (matched on external_id), deletes in one bulk-delete call.
+ * Unchanged workouts cost no writes, so re-pushing a plan is a single GET.
+ * SAFEGUARD: Events before today are never updated or deleted.
+ */
+
+const BULK_CHUNK_SIZE = 50;
+
+export interface ReconcilePlan {
+    create: any[];
+    update: any[];
+    delete: any[];
+    unchanged: number;
+}
+
+/**
+ * Hash of the fields we write (category, start_date_local, name, description, type, moving_time).
+ * Remote events carry many more fields that must not affect the diff.
+ */
+export function contentHash(event: any): string {
+    const values = [
+        String(event.category || ''),
+        String(event.start_date_local || '').slice(0, 19),
+        event.name || '',
+        (event.description || '').trim(),
+        event.type || '',
+        Math.trunc(Number(event.moving_time) || 0),
+    ];
+    return crypto.createHash('sha1').update(JSON.stringify(values)).digest('hex');
+}
+
+/**
+ * `owns(event)` decides which remote events may be updated or deleted. There is no
+ * default: other integrations set external_ids too, so having one doesn't make an
+ * event ours (see reconcilePlanWorkouts for the id-set check).
+ */
+export function diffEvents(
+    desired: any[],
+    remote: any[],
+    isFutureOrToday: (date: string) => boolean,
+    owns: (event: any) => boolean,
+): ReconcilePlan {
+    const remoteByExternal = new Map<string, any>();
+    const toDelete: any[] = [];
+
+    for (const event of remote) {
+        // Undated events can't be checked against the past-date safeguard, so they are left alone
+        if (!owns(event) || !event.start_date_local || !isFutureOrToday(event.start_date_local)) continue;
+        if (event.external_id && !remoteByExternal.has(event.external_id)) {
+            remoteByExternal.set(event.external_id, event);
+        } else {
+            // Owned but unmatched, or a duplicate left behind by delete-then-push
+            toDelete.push(event);
+        }
+    }
+
+    const plan: ReconcilePlan = { create: [], update: [], delete: toDelete, unchanged: 0 };
+    const seen = new Set<string>();
+
+    for (const payload of desired) {
+        seen.add(payload.external_id);
+        const current = remoteByExternal.get(payload.external_id);
+        if (!current) {
+            plan.create.push(payload);
+        } else if (contentHash(current) !== contentHash(payload)) {
+            plan.update.push(payload);
+        } else {
+            plan.unchanged++;
+        }
+    }
+
+    remoteByExternal.forEach((event, externalId) => {
+        if (!seen.has(externalId)) plan.delete.push(event);
+    });
+    return plan;
+}
+
+function chunks<T>(items: T[], size: number): T[][] {
+    const out: T[][] = [];
+    for (let i = 0; i < items.length; i += size) out.push(items.slice(i, i + size));
+    return out;
+}
+
+/**
+ * Makes the calendar between oldest and newest (YYYY-MM-DD) match `desired`.
+ * Every desired payload must carry an external_id; past-dated ones are skipped.
+ */
+export async function reconcileEvents(
+    client: IntervalsClient,
+    desired: any[],
+    oldest: string,
+    newest: string,
+    options: { owns: (event: any) => boolean, dryRun?: boolean },
+): Promise<ReconcilePlan> {
+    const isFutureOrToday = (date: string) => client.isFutureOrToday(date);
+
+    for (const payload of desired) {
+        if (!payload.external_id) {
+            throw new Error(`Workout '${payload.name}' has no external_id to reconcile on.`);
+        }
+    }
+
+    const remote = (await client.getEvents(oldest, newest)) || [];
+    const plan = diffEvents(desired.filter(e => isFutureOrToday(e.start_date_local)), remote, isFutureOrToday, options.owns);
+    if (options.dryRun) return plan;
+
+    for (const chunk of chunks([...plan.create, ...plan.update], BULK_CHUNK_SIZE)) {
+        await client.uploadEvents(chunk, true);
+    }
+    for (const chunk of chunks(plan.delete.map(e => e.id), BULK_CHUNK_SIZE)) {
+        await client.deleteEvents(chunk);
+    }
+    return plan;
+}
+
+/**
+ * Pushes a plan's stored Workout rows (structure already decoded) to the calendar
+ * from today on. Each row's event is keyed by its workout id, and only events
+ * carrying one of these ids are ever updated or deleted, so other calendar
+ * entries are left alone.
+ */
+export async function reconcilePlanWorkouts(
+    client: IntervalsClient,
+    workouts: any[],
+    options: { dryRun?: boolean } = {},
+): Promise<ReconcilePlan> {
+    const ids = new Set(workouts.map(w => String(w.id)));
+    const desired = workouts.map(w => workoutToEvent(w));
+    const dates = desired.map(e => e.start_date_local.split('T')[0]).sort();
+    const today = new Date().toISOString().split('T')[0];
+    if (!dates.length || dates[dates.length - 1] < today) {
+        return { create: [], update: [], delete: [], unchanged: 0 };
+    }
+    return reconcileEvents(client, desired, today, dates[dates.length - 1], {
+        owns: event => ids.has(String(event.external_id)),
+        dryRun: options.dryRun,
+    });
+}
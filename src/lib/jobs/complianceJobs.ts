@@ -0,0 +1,143 @@
+import type { PrismaClient } from '@prisma/client';
+import { userCredential } from '../credentials';
+import { IntervalsClient } from '../intervals/client';
+import { workoutBlocks } from '../training/blockCodec';
+import { computeCompliance, matchActivities, MATCH_WINDOW_DAYS } from '../training/compliance';
+import { zoneTableCache } from '../training/zoneTables';
+import { PlanUser } from './planJobs';
+import { Job } from './queue';
+import { JobHandler } from './worker';
+
+/**
+ * Links synced Intervals.icu activities to planned workouts after each sync.
+ *
+ * Incremental: only the sync window is read (via the (userId, date) index),
+ * activities already linked to a completed workout are skipped, and streams are
+ * fetched only for newly matched activities. Planned workouts before today
+ * that nothing matched become 'skipped' (and can still be matched later).
+ */
+
+export const DEFAULT_MATCH_DAYS = 7;
+// Stream requests in flight per athlete
+const STREAM_CONCURRENCY = 4;
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+export interface ComplianceWorkout {
+    id: string;
+    date: Date;
+    sport: string;
+    durationMin: number | null;
+    status: string;
+    blocks: Uint8Array | null;
+    structure: string | null;
+    completionData: string | null;
+}
+
+export interface ComplianceStore {
+    getUser(userId: string): Promise<PlanUser | null>;
+    /** The user's workouts dated in [from, to). */
+    workoutsInRange(userId: string, from: Date, to: Date): Promise<ComplianceWorkout[]>;
+    saveCompletion(id: string, status: string, completionData: string | null): Promise<void>;
+}
+
+export interface ActivitySource {
+    activities(user: PlanUser, oldest: string, newest: string): Promise<any[]>;
+    streams(user: PlanUser, activityId: string): Promise<Record<string, number[]> | null>;
+}
+
+export interface ComplianceJobDeps {
+    store: ComplianceStore;
+    source: ActivitySource;
+}
+
+export function prismaComplianceStore(prisma: PrismaClient): ComplianceStore {
+    return {
+        getUser: userId => prisma.user.findUnique({ where: { id: userId }, include: { profile: true } }),
+        workoutsInRange: (userId, from, to) => prisma.workout.findMany({
+            // Rows stored before Workout.userId existed only link to the user through their plan
+            where: { OR: [{ userId }, { userId: null, plan: { userId } }], date: { gte: from, lt: to } },
+            orderBy: { date: 'asc' },
+            select: {
+                id: true, date: true, sport: true, durationMin: true, status: true,
+                blocks: true, structure: true, completionData: true,
+            },
+        }),
+        saveCompletion: async (id, status, completionData) => {
+            await prisma.workout.update({ where: { id }, data: { status, completionData } });
+        },
+    };
+}
+
+export const intervalsActivitySource: ActivitySource = {
+    activities: (user, oldest, newest) => {
+        const apiKey = userCredential(user, 'intervalsApiKey');
+        return apiKey ? new IntervalsClient(apiKey).getActivities(oldest, newest) : Promise.resolve([]);
+    },
+    streams: async (user, activityId) => {
+        const apiKey = userCredential(user, 'intervalsApiKey');
+        if (!apiKey) return null;
+        try {
+            return await new IntervalsClient(apiKey).getActivityStreams(activityId);
+        } catch (e) {
+            // Manual entries have no streams; fall back to zone times
+            return null;
+        }
+    },
+};
+
+function linkedActivityId(workout: ComplianceWorkout): string | null {
+    if (workout.status !== 'completed' || !workout.completionData) return null;
+    try {
+        return JSON.parse(workout.completionData).activityId ?? null;
+    } catch (e) {
+        return null;
+    }
+}
+
+/**
+ * Matches the last `days` of activities to the user's planned workouts and stores
+ * compliance on each matched workout.
+ */
+export async function matchActivitiesForUser(deps: ComplianceJobDeps, userId: string, days = DEFAULT_MATCH_DAYS) {
+    const user = await deps.store.getUser(userId);
+    if (!user || !user.profile) throw new Error('User not found');
+
+    const now = new Date();
+    const today = new Date(Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate()));
+    const from = new Date(today.getTime() - days * DAY_MS);
+    const to = new Date(today.getTime() + DAY_MS);
+    // Activities one day either side, so workouts at the window edges can still match
+    const oldest = new Date(from.getTime() - MATCH_WINDOW_DAYS * DAY_MS).toISOString().split('T')[0];
+    const newest = today.toISOString().split('T')[0];
+
+    const workouts = await deps.store.workoutsInRange(user.id, from, to);
+    const linked = new Set(workouts.map(linkedActivityId).filter(Boolean));
+    const open = workouts.filter(w => w.status !== 'completed');
+    if (!open.length) return { matched: 0, skipped: 0 };
+
+    const activities = (await deps.source.activities(user, oldest, newest)).filter(a => !linked.has(String(a.id)));
+    const matches = matchActivities(open, activities);
+    const tables = zoneTableCache.get(user.id, user.profile);
+
+    for (let i = 0; i < matches.length; i += STREAM_CONCURRENCY) {
+        await Promise.all(matches.slice(i, i + STREAM_CONCURRENCY).map(async ({ workout, activity }) => {
+            const blocks = workoutBlocks(workout);
+            const streams = blocks.length ? await deps.source.streams(user, String(activity.id)) : null;
+            const result = computeCompliance(blocks, activity, tables, streams);
+            await deps.store.saveCompletion(workout.id, 'completed', JSON.stringify(result));
+        }));
+    }
+
+    const matchedIds = new Set(matches.map(m => m.workout.id));
+    const missed = open.filter(w => w.status === 'planned' && !matchedIds.has(w.id) && w.date.getTime() < today.getTime());
+    for (const workout of missed) {
+        await deps.store.saveCompletion(workout.id, 'skipped', null);
+    }
+    return { matched: matches.length, skipped: missed.length };
+}
+
+export function complianceJobHandlers(deps: ComplianceJobDeps): Record<'matchActivities', JobHandler> {
+    return {
+        matchActivities: (job: Job) => matchActivitiesForUser(deps, job.userId, job.payload?.days),
+    };
+}
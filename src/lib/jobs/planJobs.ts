@@ -0,0 +1,284 @@
+import type { PrismaClient } from '@prisma/client';
+import { AIService } from '../ai/service';
+import type { UserCache } from '../db';
+import { userCredential } from '../credentials';
+import { IntervalsClient } from '../intervals/client';
+import { adjustWeek, AdjustableWorkout, PlanAdjustment } from '../training/adjust';
+import { encodeBlocks, workoutBlocks } from '../training/blockCodec';
+import { weeklyLoadSummary } from '../training/load';
+import { MaterializedWorkout, materializePlan, planStartMonday } from '../training/materialize';
+import { ReadinessState } from '../training/readiness';
+import { Job } from './queue';
+import { JobHandler } from './worker';
+
+/**
+ * Plan-generation and weekly-adjustment jobs.
+ *
+ * Handlers only talk to a PlanStore (persistence) and a PlanModel (the AI),
+ * so the worker can run against Prisma + AIService in production and against
+ * in-memory fakes + a stub model locally.
+ */
+
+// CTL needs ~6 weeks to settle, so fetch more than the 8-12 weeks the prompt analyzes.
+const HISTORY_DAYS = 16 * 7;
+const HISTORY_WEEKS = 12;
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+export interface PlanUser {
+    id: string;
+    aiProvider: string;
+    aiApiKey: string | null;
+    intervalsApiKey: string | null;
+    profile: any;
+}
+
+export interface PlanStore {
+    getUser(userId: string): Promise<PlanUser | null>;
+    /**
+     * Stores the plan and its workouts in one transaction, so a failed write (and the
+     * job's retry) never leaves a plan without workouts behind.
+     */
+    createPlan(
+        data: { userId: string; startDate: Date; endDate: Date; macroPlan: string; jobId?: string | null },
+        rows: MaterializedWorkout[],
+    ): Promise<{ id: string; workouts: number }>;
+    /** The plan a generatePlan job already stored, if any. */
+    planForJob(jobId: string): Promise<{ id: string; macroPlan: string; workouts: number } | null>;
+    getPlan(planId: string): Promise<{ id: string; userId: string; status: string; macroPlan: string } | null>;
+    /** The plan's workouts (any status) dated in [from, to), ordered by date (the (planId, date) index). */
+    planWorkouts(planId: string, from: Date, to: Date): Promise<PlanWorkoutRow[]>;
+    updateWorkout(id: string, data: WorkoutUpdate): Promise<void>;
+}
+
+export interface PlanWorkoutRow {
+    id: string;
+    date: Date;
+    week: number | null;
+    title: string;
+    type: string;
+    sport: string;
+    durationMin: number;
+    status: string;
+    blocks: Uint8Array | null;
+    structure: string | null;
+    completionData: string | null;
+}
+
+export interface WorkoutUpdate {
+    title?: string;
+    type?: string;
+    durationMin?: number;
+    description?: string;
+    blocks?: Buffer;
+}
+
+export interface PlanModel {
+    generateMacroPlan(profile: any, goal: any, history: any[]): Promise<any>;
+    /** Narrative for an adjustment already decided by training/adjust.ts. */
+    summarizeAdjustment(profile: any, context: string): Promise<string>;
+}
+
+export interface PlanJobDeps {
+    store: PlanStore;
+    model: (user: PlanUser) => PlanModel;
+    history?: (user: PlanUser) => Promise<any[]>;
+    /** Latest readiness state, e.g. from readinessJobs.updateReadinessForUser. */
+    readiness?: (user: PlanUser) => Promise<ReadinessState | null>;
+}
+
+/**
+ * Pass the shared `users` cache when running inside the app so a request that has
+ * just loaded the user doesn't query it again.
+ */
+export function prismaPlanStore(prisma: PrismaClient, users?: UserCache): PlanStore {
+    return {
+        getUser: userId => users
+            ? users.get(userId)
+            : prisma.user.findUnique({ where: { id: userId }, include: { profile: true } }),
+        createPlan: (data, rows) => prisma.$transaction(async tx => {
+            const plan = await tx.plan.create({ data, select: { id: true } });
+            const { count } = await tx.workout.createMany({
+                data: rows.map(({ structure, ...row }) => ({
+                    ...row,
+                    planId: plan.id,
+                    userId: data.userId,
+                    blocks: structure.length ? encodeBlocks(structure) : null,
+                })),
+            });
+            return { id: plan.id, workouts: count };
+        }),
+        planForJob: async jobId => {
+            const plan = await prisma.plan.findUnique({
+                where: { jobId },
+                select: { id: true, macroPlan: true, _count: { select: { workouts: true } } },
+            });
+            return plan ? { id: plan.id, macroPlan: plan.macroPlan, workouts: plan._count.workouts } : null;
+        },
+        getPlan: planId => prisma.plan.findUnique({
+            where: { id: planId },
+            select: { id: true, userId: true, status: true, macroPlan: true },
+        }),
+        planWorkouts: (planId, from, to) => prisma.workout.findMany({
+            where: { planId, date: { gte: from, lt: to } },
+            orderBy: { date: 'asc' },
+            select: {
+                id: true, date: true, week: true, title: true, type: true, sport: true, durationMin: true,
+                status: true, blocks: true, structure: true, completionData: true,
+            },
+        }),
+        updateWorkout: async (id, data) => {
+            await prisma.workout.update({ where: { id }, data });
+        },
+    };
+}
+
+/**
+ * The user's own AI provider and key.
+ */
+export function aiPlanModel(user: PlanUser): PlanModel {
+    if (!user.aiApiKey) throw new Error('AI API Key not configured');
+    return new AIService(user.aiProvider as any, userCredential(user, 'aiApiKey')!);
+}
+
+/**
+ * Weekly hours / load / CTL / ATL / TSB from Intervals.icu, or [] when not connected.
+ */
+export async function intervalsHistory(user: PlanUser): Promise<any[]> {
+    if (!user.intervalsApiKey) return [];
+    try {
+        const intervals = new IntervalsClient(userCredential(user, 'intervalsApiKey')!);
+        const endDate = new Date().toISOString().split('T')[0];
+        const startDate = new Date(Date.now() - HISTORY_DAYS * 24 * 60 * 60 * 1000).toISOString().split('T')[0];
+        const activities = await intervals.getActivities(startDate, endDate);
+        return weeklyLoadSummary(activities, startDate, endDate, user.profile?.lthr).slice(-HISTORY_WEEKS);
+    } catch (e) {
+        console.error('Could not load training history, planning without it:', e);
+        return [];
+    }
+}
+
+/**
+ * Generates a macro plan for `goal` ({ event, date, description }) and stores it
+ * together with its dated workouts, starting next Monday.
+ * With a `jobId`, a job that already stored its plan (and is run again, e.g. after
+ * requeueStale) returns that plan instead of creating a second one.
+ */
+export async function generatePlanForUser(deps: PlanJobDeps, userId: string, goal: any, jobId?: string) {
+    if (jobId) {
+        const existing = await deps.store.planForJob(jobId);
+        if (existing) {
+            const weeks = JSON.parse(existing.macroPlan).macro_plan?.length ?? 0;
+            return { planId: existing.id, weeks, workouts: existing.workouts };
+        }
+    }
+
+    const user = await deps.store.getUser(userId);
+    if (!user || !user.profile) throw new Error('User not found');
+
+    const history = await (deps.history ?? intervalsHistory)(user);
+    const planJson = await deps.model(user).generateMacroPlan(user.profile, goal, history);
+
+    const startDate = planStartMonday();
+    const plan = await deps.store.createPlan({
+        userId: user.id,
+        startDate,
+        endDate: new Date(goal.date),
+        macroPlan: JSON.stringify(planJson),
+        jobId: jobId ?? null,
+    }, materializePlan(planJson, user.profile, startDate));
+    return { planId: plan.id, weeks: planJson.macro_plan?.length ?? 0, workouts: plan.workouts };
+}
+
+function adjustable(row: PlanWorkoutRow): AdjustableWorkout {
+    let completion = null;
+    if (row.status === 'completed' && row.completionData) {
+        try {
+            completion = JSON.parse(row.completionData);
+        } catch (e) {
+            // Hand-written completion notes: fall back to the planned duration
+        }
+    }
+    return { ...row, structure: workoutBlocks(row), completion };
+}
+
+function summaryContext(adjustment: PlanAdjustment, upcoming: PlanWorkoutRow[], feedback: any): string {
+    const titles = new Map(upcoming.map(w => [w.id, w.title]));
+    const { decision } = adjustment;
+    return `
+        Week ${decision.week ?? '?'}${decision.focus ? ` (${decision.focus})` : ''}: ${adjustment.summary}
+        Run volume: planned ${decision.plannedMin} min, last week ${decision.previousMin} min.
+        Changes: ${JSON.stringify(adjustment.adjusted_week.map(c => ({
+            from: titles.get(c.workoutId), to: c.title, durationMin: c.durationMin,
+        })))}
+        Athlete Feedback: ${JSON.stringify(feedback ?? null)}
+    `;
+}
+
+/**
+ * Adjusts the plan's next 7 days with the rule engine (training/adjust.ts) from
+ * last week's completion, `feedback` and readiness, and stores the changed
+ * workouts. The model, when the user has one, only writes the summary; a failed
+ * or missing model call keeps the rule engine's own summary.
+ */
+export async function adjustPlanForUser(deps: PlanJobDeps, userId: string, planId: string, feedback: any) {
+    const user = await deps.store.getUser(userId);
+    if (!user) throw new Error('User not found');
+    const plan = await deps.store.getPlan(planId);
+    if (!plan || plan.userId !== userId) throw new Error('Plan not found');
+
+    const now = new Date();
+    const today = new Date(Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate()));
+    const rows = await deps.store.planWorkouts(planId, new Date(today.getTime() - 7 * DAY_MS), new Date(today.getTime() + 7 * DAY_MS));
+    const upcoming = rows.filter(w => w.date.getTime() >= today.getTime() && w.status === 'planned');
+    const previous = rows.filter(w => w.date.getTime() < today.getTime());
+    const latest = deps.readiness ? await deps.readiness(user).catch(error => {
+        console.error('Could not load readiness, adjusting without it:', error);
+        return null;
+    }) : null;
+    // A reading older than yesterday says nothing about this week
+    const readiness = latest && Date.parse(latest.date) >= today.getTime() - DAY_MS ? latest : null;
+
+    const adjustment = adjustWeek({
+        profile: user.profile,
+        macroPlan: JSON.parse(plan.macroPlan),
+        upcoming: upcoming.map(adjustable),
+        previous: previous.map(adjustable),
+        feedback,
+        readiness,
+    });
+
+    for (const change of adjustment.adjusted_week) {
+        await deps.store.updateWorkout(change.workoutId, {
+            title: change.title,
+            type: change.type,
+            durationMin: change.durationMin,
+            description: change.description,
+            ...(change.structure ? { blocks: encodeBlocks(change.structure) } : {}),
+        });
+    }
+
+    let summary = adjustment.summary;
+    if (user.aiApiKey && adjustment.adjusted_week.length) {
+        try {
+            summary = await deps.model(user).summarizeAdjustment(user.profile, summaryContext(adjustment, upcoming, feedback));
+        } catch (error) {
+            console.error('Could not write adjustment summary, using the rule summary:', error);
+        }
+    }
+
+    return {
+        planId,
+        summary,
+        load_change: adjustment.load_change,
+        adjusted_week: adjustment.adjusted_week.map(({ structure, ...change }) => change),
+        updatedWorkouts: adjustment.adjusted_week.length,
+        readiness: readiness?.status ?? null,
+    };
+}
+
+export function planJobHandlers(deps: PlanJobDeps): Record<'generatePlan' | 'adjustPlan', JobHandler> {
+    return {
+        generatePlan: (job: Job) => generatePlanForUser(deps, job.userId, job.payload.goal, job.id),
+        adjustPlan: (job: Job) => adjustPlanForUser(deps, job.userId, job.payload.planId, job.payload.feedback),
+    };
+}
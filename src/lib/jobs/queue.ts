@@ -0,0 +1,309 @@
+import type { PrismaClient } from '@prisma/client';
+
+/**
+ * Background job queue for plan generation / weekly adjustments.
+ *
+ * Two backends share one interface: PrismaJobQueue (the Job table, safe with
+ * several worker processes) and MemoryJobQueue (local runs and tests).
+ * Jobs carry the AI provider they will call (or 'intervals' for sync-side jobs)
+ * so a worker can claim only jobs for providers that still have free slots.
+ */
+
+export type JobType = 'generatePlan' | 'adjustPlan' | 'matchActivities' | 'updateReadiness';
+export type JobStatus = 'queued' | 'running' | 'completed' | 'failed';
+
+export interface JobInput {
+    type: JobType;
+    userId: string;
+    provider: string;
+    payload: any;
+    maxAttempts?: number;
+}
+
+export interface Job {
+    id: string;
+    type: JobType;
+    userId: string;
+    provider: string;
+    payload: any;
+    result: any;
+    error: string | null;
+    status: JobStatus;
+    attempts: number;
+    maxAttempts: number;
+    runAt: Date;
+    createdAt: Date;
+    startedAt: Date | null;
+    finishedAt: Date | null;
+}
+
+export interface JobQueue {
+    enqueue(input: JobInput): Promise<Job>;
+    enqueueMany(inputs: JobInput[]): Promise<number>;
+    /**
+     * Enqueues unless the user already has a queued or running job of the same type
+     * (then returns null), for jobs that pick up all pending work when they run.
+     */
+    enqueueUnique(input: JobInput): Promise<Job | null>;
+    /** Marks up to `limit` due jobs as running and returns them, skipping `excludeProviders`. */
+    claim(limit: number, excludeProviders?: string[]): Promise<Job[]>;
+    complete(id: string, result: any): Promise<void>;
+    /** Requeues with backoff while attempts remain, otherwise marks the job failed. */
+    fail(id: string, error: string): Promise<void>;
+    /**
+     * Jobs left 'running' for longer than `olderThanMs` (by a crashed worker, or one that
+     * could not record the outcome) go back in the queue, or are failed once they have
+     * used all their attempts. Returns how many were requeued or failed.
+     */
+    requeueStale(olderThanMs: number): Promise<number>;
+    get(id: string): Promise<Job | null>;
+    counts(): Promise<Record<JobStatus, number>>;
+}
+
+export const DEFAULT_MAX_ATTEMPTS = 3;
+const RETRY_BASE_MS = 30000;
+const STALE_ERROR = 'Worker stopped while running the job';
+
+/**
+ * Exponential backoff before retry `attempt` (1-based): 30s, 60s, 120s, ...
+ */
+export function retryDelayMs(attempt: number): number {
+    return RETRY_BASE_MS * Math.pow(2, Math.max(0, attempt - 1));
+}
+
+function emptyCounts(): Record<JobStatus, number> {
+    return { queued: 0, running: 0, completed: 0, failed: 0 };
+}
+
+/**
+ * In-process queue: jobs live in a Map in insertion (FIFO) order.
+ */
+export class MemoryJobQueue implements JobQueue {
+    private jobs = new Map<string, Job>();
+    private nextId = 1;
+
+    constructor(private now: () => number = Date.now) { }
+
+    async enqueue(input: JobInput): Promise<Job> {
+        const at = new Date(this.now());
+        const job: Job = {
+            id: `job_${this.nextId++}`,
+            type: input.type,
+            userId: input.userId,
+            provider: input.provider,
+            payload: input.payload,
+            result: null,
+            error: null,
+            status: 'queued',
+            attempts: 0,
+            maxAttempts: input.maxAttempts ?? DEFAULT_MAX_ATTEMPTS,
+            runAt: at,
+            createdAt: at,
+            startedAt: null,
+            finishedAt: null,
+        };
+        this.jobs.set(job.id, job);
+        return { ...job };
+    }
+
+    async enqueueMany(inputs: JobInput[]): Promise<number> {
+        for (const input of inputs) await this.enqueue(input);
+        return inputs.length;
+    }
+
+    async enqueueUnique(input: JobInput): Promise<Job | null> {
+        const pending = Array.from(this.jobs.values()).some(job =>
+            job.userId === input.userId && job.type === input.type && (job.status === 'queued' || job.status === 'running'));
+        return pending ? null : this.enqueue(input);
+    }
+
+    async claim(limit: number, excludeProviders: string[] = []): Promise<Job[]> {
+        const now = this.now();
+        const claimed: Job[] = [];
+        for (const job of Array.from(this.jobs.values())) {
+            if (claimed.length >= limit) break;
+            if (job.status !== 'queued' || job.runAt.getTime() > now || excludeProviders.includes(job.provider)) continue;
+            job.status = 'running';
+            job.attempts++;
+            job.startedAt = new Date(now);
+            claimed.push({ ...job });
+        }
+        return claimed;
+    }
+
+    async complete(id: string, result: any): Promise<void> {
+        const job = this.jobs.get(id);
+        if (!job) return;
+        job.status = 'completed';
+        job.result = result;
+        job.error = null;
+        job.finishedAt = new Date(this.now());
+    }
+
+    async fail(id: string, error: string): Promise<void> {
+        const job = this.jobs.get(id);
+        if (!job) return;
+        job.error = error;
+        if (job.attempts < job.maxAttempts) {
+            job.status = 'queued';
+            job.runAt = new Date(this.now() + retryDelayMs(job.attempts));
+        } else {
+            job.status = 'failed';
+            job.finishedAt = new Date(this.now());
+        }
+    }
+
+    async requeueStale(olderThanMs: number): Promise<number> {
+        const cutoff = this.now() - olderThanMs;
+        let count = 0;
+        this.jobs.forEach(job => {
+            if (job.status !== 'running' || !job.startedAt || job.startedAt.getTime() >= cutoff) return;
+            if (job.attempts < job.maxAttempts) {
+                job.status = 'queued';
+            } else {
+                job.status = 'failed';
+                job.error = STALE_ERROR;
+                job.finishedAt = new Date(this.now());
+            }
+            count++;
+        });
+        return count;
+    }
+
+    async get(id: string): Promise<Job | null> {
+        const job = this.jobs.get(id);
+        return job ? { ...job } : null;
+    }
+
+    async counts(): Promise<Record<JobStatus, number>> {
+        const counts = emptyCounts();
+        this.jobs.forEach(job => { counts[job.status]++; });
+        return counts;
+    }
+}
+
+function fromRow(row: any): Job {
+    return {
+        ...row,
+        payload: JSON.parse(row.payload),
+        result: row.result ? JSON.parse(row.result) : null,
+    };
+}
+
+/**
+ * Job-table queue. Claiming is optimistic (status must still be 'queued' when the
+ * row is updated), so several worker processes can poll the same table.
+ */
+export class PrismaJobQueue implements JobQueue {
+    constructor(private prisma: PrismaClient) { }
+
+    async enqueue(input: JobInput): Promise<Job> {
+        const row = await this.prisma.job.create({
+            data: {
+                type: input.type,
+                userId: input.userId,
+                provider: input.provider,
+                payload: JSON.stringify(input.payload ?? {}),
+                maxAttempts: input.maxAttempts ?? DEFAULT_MAX_ATTEMPTS,
+            },
+        });
+        return fromRow(row);
+    }
+
+    async enqueueMany(inputs: JobInput[]): Promise<number> {
+        const { count } = await this.prisma.job.createMany({
+            data: inputs.map(input => ({
+                type: input.type,
+                userId: input.userId,
+                provider: input.provider,
+                payload: JSON.stringify(input.payload ?? {}),
+                maxAttempts: input.maxAttempts ?? DEFAULT_MAX_ATTEMPTS,
+            })),
+        });
+        return count;
+    }
+
+    async enqueueUnique(input: JobInput): Promise<Job | null> {
+        // Not atomic: two concurrent requests can both enqueue, which only costs one redundant run
+        const pending = await this.prisma.job.findFirst({
+            where: { userId: input.userId, type: input.type, status: { in: ['queued', 'running'] } },
+            select: { id: true },
+        });
+        return pending ? null : this.enqueue(input);
+    }
+
+    async claim(limit: number, excludeProviders: string[] = []): Promise<Job[]> {
+        if (limit <= 0) return [];
+        const now = new Date();
+        const candidates = await this.prisma.job.findMany({
+            where: {
+                status: 'queued',
+                runAt: { lte: now },
+                ...(excludeProviders.length ? { provider: { notIn: excludeProviders } } : {}),
+            },
+            orderBy: { createdAt: 'asc' },
+            take: limit,
+            select: { id: true },
+        });
+
+        const claimed: Job[] = [];
+        for (const { id } of candidates) {
+            const { count } = await this.prisma.job.updateMany({
+                where: { id, status: 'queued' },
+                data: { status: 'running', startedAt: now, attempts: { increment: 1 } },
+            });
+            if (count === 1) {
+                const row = await this.prisma.job.findUnique({ where: { id } });
+                if (row) claimed.push(fromRow(row));
+            }
+        }
+        return claimed;
+    }
+
+    async complete(id: string, result: any): Promise<void> {
+        await this.prisma.job.update({
+            where: { id },
+            data: { status: 'completed', result: JSON.stringify(result ?? null), error: null, finishedAt: new Date() },
+        });
+    }
+
+    async fail(id: string, error: string): Promise<void> {
+        const job = await this.prisma.job.findUnique({ where: { id }, select: { attempts: true, maxAttempts: true } });
+        if (!job) return;
+        await this.prisma.job.update({
+            where: { id },
+            data: job.attempts < job.maxAttempts
+                ? { status: 'queued', error, runAt: new Date(Date.now() + retryDelayMs(job.attempts)) }
+                : { status: 'failed', error, finishedAt: new Date() },
+        });
+    }
+
+    async requeueStale(olderThanMs: number): Promise<number> {
+        const stale = { status: 'running', startedAt: { lt: new Date(Date.now() - olderThanMs) } };
+        const maxAttempts = this.prisma.job.fields.maxAttempts;
+        const [failed, requeued] = await this.prisma.$transaction([
+            // A job that keeps taking its worker down must not be retried forever
+            this.prisma.job.updateMany({
+                where: { ...stale, attempts: { gte: maxAttempts } },
+                data: { status: 'failed', error: STALE_ERROR, finishedAt: new Date() },
+            }),
+            this.prisma.job.updateMany({
+                where: { ...stale, attempts: { lt: maxAttempts } },
+                data: { status: 'queued' },
+            }),
+        ]);
+        return failed.count + requeued.count;
+    }
+
+    async get(id: string): Promise<Job | null> {
+        const row = await this.prisma.job.findUnique({ where: { id } });
+        return row ? fromRow(row) : null;
+    }
+
+    async counts(): Promise<Record<JobStatus, number>> {
+        const groups = await this.prisma.job.groupBy({ by: ['status'], _count: { _all: true } });
+        const counts = emptyCounts();
+        groups.forEach((g: any) => { counts[g.status as JobStatus] = g._count._all; });
+        return counts;
+    }
+}
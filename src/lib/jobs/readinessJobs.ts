@@ -0,0 +1,196 @@
+import type { PrismaClient } from '@prisma/client';
+import { userCredential } from '../credentials';
+import { UserCache } from '../db';
+import { IntervalsClient } from '../intervals/client';
+import {
+    emptyBaseline, ReadinessBaseline, ReadinessState, ReadinessStatus, readinessSeries, wellnessDays,
+} from '../training/readiness';
+import { PlanUser } from './planJobs';
+import { Job } from './queue';
+import { JobHandler } from './worker';
+
+/**
+ * Keeps each athlete's stored readiness (see training/readiness.ts) up to date.
+ *
+ * Incremental: every stored day carries the baselines after it, so an update reads
+ * the last stored day before the window, fetches wellness only for the days since
+ * (the last REFRESH_DAYS are always recomputed, since HRV and subjective scores
+ * arrive during the day) and writes those days back. An athlete without history
+ * is backfilled over BACKFILL_DAYS in one pass.
+ */
+
+export const BACKFILL_DAYS = 90;
+export const REFRESH_DAYS = 2;
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+export interface ReadinessDay {
+    state: ReadinessState;
+    baseline: ReadinessBaseline;
+}
+
+export interface ReadinessStore {
+    getUser(userId: string): Promise<PlanUser | null>;
+    /** The last stored day dated before `before`. */
+    lastBefore(userId: string, before: Date): Promise<ReadinessDay | null>;
+    /** Date (YYYY-MM-DD) of the newest stored day. */
+    newestDate(userId: string): Promise<string | null>;
+    /** The user's DailyLog rows dated in [from, to). */
+    dailyLogs(userId: string, from: Date, to: Date): Promise<any[]>;
+    save(userId: string, days: ReadinessDay[]): Promise<void>;
+}
+
+export interface WellnessSource {
+    wellness(user: PlanUser, oldest: string, newest: string): Promise<any[]>;
+}
+
+export interface ReadinessJobDeps {
+    store: ReadinessStore;
+    source: WellnessSource;
+}
+
+function utcDay(date: Date | string): Date {
+    return new Date(Date.parse((date instanceof Date ? date.toISOString() : date).slice(0, 10) + 'T00:00:00Z'));
+}
+
+function isoDay(date: Date): string {
+    return date.toISOString().split('T')[0];
+}
+
+function fromRow(row: any): ReadinessDay {
+    return {
+        state: {
+            date: isoDay(row.date),
+            score: row.score,
+            status: row.status as ReadinessStatus,
+            hrvZ: row.hrvZ,
+            rhrZ: row.rhrZ,
+            strain: row.strain,
+        },
+        baseline: {
+            hrv: { mean: row.hrvMean, variance: row.hrvVariance, days: row.hrvDays },
+            rhr: { mean: row.rhrMean, variance: row.rhrVariance, days: row.rhrDays },
+        },
+    };
+}
+
+export function prismaReadinessStore(prisma: PrismaClient, users?: UserCache): ReadinessStore {
+    return {
+        getUser: userId => users
+            ? users.get(userId)
+            : prisma.user.findUnique({ where: { id: userId }, include: { profile: true } }),
+        lastBefore: async (userId, before) => {
+            const row = await prisma.readiness.findFirst({
+                where: { userId, date: { lt: before } },
+                orderBy: { date: 'desc' },
+            });
+            return row ? fromRow(row) : null;
+        },
+        newestDate: async userId => {
+            const row = await prisma.readiness.findFirst({
+                where: { userId },
+                orderBy: { date: 'desc' },
+                select: { date: true },
+            });
+            return row ? isoDay(row.date) : null;
+        },
+        dailyLogs: (userId, from, to) => prisma.dailyLog.findMany({
+            where: { userId, date: { gte: from, lt: to } },
+            orderBy: { date: 'asc' },
+        }),
+        save: async (userId, days) => {
+            await prisma.$transaction(days.map(({ state, baseline }) => {
+                const date = utcDay(state.date);
+                const data = {
+                    score: state.score,
+                    status: state.status,
+                    hrvZ: state.hrvZ,
+                    rhrZ: state.rhrZ,
+                    strain: state.strain,
+                    hrvMean: baseline.hrv.mean,
+                    hrvVariance: baseline.hrv.variance,
+                    hrvDays: baseline.hrv.days,
+                    rhrMean: baseline.rhr.mean,
+                    rhrVariance: baseline.rhr.variance,
+                    rhrDays: baseline.rhr.days,
+                };
+                return prisma.readiness.upsert({
+                    where: { userId_date: { userId, date } },
+                    create: { userId, date, ...data },
+                    update: data,
+                });
+            }));
+        },
+    };
+}
+
+export const intervalsWellnessSource: WellnessSource = {
+    wellness: (user, oldest, newest) => {
+        const apiKey = userCredential(user, 'intervalsApiKey');
+        return apiKey ? new IntervalsClient(apiKey).getWellness(oldest, newest) : Promise.resolve([]);
+    },
+};
+
+/**
+ * Recomputes [from, to] (inclusive days) from `wellness` already fetched for that range,
+ * continuing from the last stored day before `from`. Returns the newest state.
+ *
+ * The days are only stored when the window reaches the newest stored day: stored days
+ * after `to` were chained from the old baselines and would need wellness outside the
+ * window to recompute, so a historical window is computed without being saved.
+ */
+export async function applyWellness(
+    store: ReadinessStore,
+    userId: string,
+    wellness: any[],
+    from: string,
+    to: string,
+): Promise<ReadinessState | null> {
+    const start = utcDay(from);
+    const end = new Date(utcDay(to).getTime() + DAY_MS);
+    const previous = await store.lastBefore(userId, start);
+    const logs = await store.dailyLogs(userId, start, end);
+
+    const days = wellnessDays(wellness, logs).filter(d => d.date >= from && d.date <= to);
+    if (!days.length) return previous?.state ?? null;
+
+    const series = readinessSeries(days, previous?.baseline ?? emptyBaseline());
+    const newest = await store.newestDate(userId);
+    if (!newest || newest <= to) await store.save(userId, series);
+    return series[series.length - 1].state;
+}
+
+/**
+ * Brings the user's readiness up to today, fetching only the days not stored yet
+ * (plus the last `refreshDays`). Returns today's state, or the latest one when
+ * there is no reading today.
+ */
+export async function updateReadinessForUser(deps: ReadinessJobDeps, userId: string, refreshDays = REFRESH_DAYS) {
+    const user = await deps.store.getUser(userId);
+    if (!user) throw new Error('User not found');
+
+    const today = utcDay(new Date());
+    const refreshFrom = new Date(today.getTime() - (Math.max(1, refreshDays) - 1) * DAY_MS);
+    const earliest = new Date(today.getTime() - (BACKFILL_DAYS - 1) * DAY_MS);
+    const last = await deps.store.lastBefore(user.id, refreshFrom);
+    const from = last
+        ? new Date(Math.max(earliest.getTime(), Math.min(refreshFrom.getTime(), utcDay(last.state.date).getTime() + DAY_MS)))
+        : earliest;
+
+    const wellness = await deps.source.wellness(user, isoDay(from), isoDay(today));
+    return applyWellness(deps.store, user.id, wellness, isoDay(from), isoDay(today));
+}
+
+/**
+ * Readiness lookup for plan jobs (PlanJobDeps.readiness): brought up to date first,
+ * null for users without Intervals.icu.
+ */
+export function readinessFor(deps: ReadinessJobDeps) {
+    return (user: PlanUser): Promise<ReadinessState | null> =>
+        user.intervalsApiKey ? updateReadinessForUser(deps, user.id) : Promise.resolve(null);
+}
+
+export function readinessJobHandlers(deps: ReadinessJobDeps): Record<'updateReadiness', JobHandler> {
+    return {
+        updateReadiness: (job: Job) => updateReadinessForUser(deps, job.userId, job.payload?.days),
+    };
+}
@@ -0,0 +1,50 @@
+import { PlanModel } from './planJobs';
+
+/**
+ * Deterministic stand-in for the AI in local worker runs and load tests.
+ * Produces schema-valid macro plans / adjustment summaries after `latencyMs`, and throws
+ * for goals whose event name contains `failOn` (to exercise retries).
+ */
+export class StubPlanModel implements PlanModel {
+    calls = 0;
+
+    constructor(private latencyMs = 0, private failOn?: string) { }
+
+    private async delay() {
+        this.calls++;
+        if (this.latencyMs) await new Promise(resolve => setTimeout(resolve, this.latencyMs));
+    }
+
+    async generateMacroPlan(profile: any, goal: any, history: any[]) {
+        await this.delay();
+        if (this.failOn && String(goal?.event || '').includes(this.failOn)) {
+            throw new Error('Stub model failure');
+        }
+
+        const weeksToGoal = Math.ceil((new Date(goal.date).getTime() - Date.now()) / (7 * 24 * 60 * 60 * 1000));
+        const weeks = Math.min(24, Math.max(4, weeksToGoal || 12));
+        const lastHours = history?.length ? history[history.length - 1].hours : null;
+        let hours = lastHours || (profile?.availableHours ?? 6) * 0.7;
+
+        const macro_plan = [];
+        for (let week = 1; week <= weeks; week++) {
+            const focus = week > weeks - 2 ? 'taper' : week % 4 === 0 ? 'recovery' : week <= weeks * 0.4 ? 'base' : week > weeks - 5 ? 'peak' : 'build';
+            if (focus !== 'recovery' && focus !== 'taper') hours = Math.min(hours * 1.08, profile?.availableHours ?? hours);
+            const volume = focus === 'recovery' ? hours * 0.7 : focus === 'taper' ? hours * 0.5 : hours;
+            macro_plan.push({
+                week,
+                focus,
+                target_volume_hours: Math.round(volume * 10) / 10,
+                key_sessions: focus === 'base' ? ['Long Run'] : ['Long Run', 'Threshold'],
+                strength_sessions: profile?.strengthDays ?? 2,
+                yoga_sessions: profile?.yogaDays ?? 2,
+            });
+        }
+        return { macro_plan };
+    }
+
+    async summarizeAdjustment(profile: any, context: string) {
+        await this.delay();
+        return 'Plan adjusted (stub model).';
+    }
+}
@@ -0,0 +1,182 @@
+import { Job, JobQueue, JobType } from './queue';
+
+/**
+ * Worker pool over a JobQueue.
+ *
+ * At most `concurrency` jobs run at once, and at most `perProvider[p]`
+ * (or `defaultPerProvider`) of them call the same AI provider, so a season
+ * rollover can't exceed one provider's rate limits while others sit idle.
+ */
+
+export type JobHandler = (job: Job) => Promise<any>;
+
+export interface WorkerOptions {
+    concurrency?: number;
+    perProvider?: Record<string, number>;
+    defaultPerProvider?: number;
+    pollIntervalMs?: number;
+    /** run() periodically requeues jobs left 'running' this long (see JobQueue.requeueStale). */
+    staleAfterMs?: number;
+    onError?: (job: Job, error: unknown) => void;
+}
+
+export const DEFAULT_CONCURRENCY = 8;
+export const DEFAULT_PER_PROVIDER = 4;
+const DEFAULT_POLL_MS = 2000;
+// Longest wait between claim retries while the queue is unreachable
+const MAX_BACKOFF_MS = 60 * 1000;
+// How often run() looks for stale jobs
+const STALE_CHECK_MS = 60 * 1000;
+
+export class JobWorker {
+    private running = new Map<string, Promise<void>>();
+    private perProviderRunning = new Map<string, number>();
+    private stopped = true;
+    private wake: (() => void) | null = null;
+    stats = { completed: 0, failed: 0, queueErrors: 0 };
+
+    private concurrency: number;
+    private perProvider: Record<string, number>;
+    private defaultPerProvider: number;
+    private pollIntervalMs: number;
+
+    constructor(
+        private queue: JobQueue,
+        private handlers: Partial<Record<JobType, JobHandler>>,
+        private options: WorkerOptions = {},
+    ) {
+        this.concurrency = options.concurrency ?? DEFAULT_CONCURRENCY;
+        this.perProvider = options.perProvider ?? {};
+        this.defaultPerProvider = options.defaultPerProvider ?? DEFAULT_PER_PROVIDER;
+        this.pollIntervalMs = options.pollIntervalMs ?? DEFAULT_POLL_MS;
+    }
+
+    private limitFor(provider: string): number {
+        return this.perProvider[provider] ?? this.defaultPerProvider;
+    }
+
+    private saturatedProviders(): string[] {
+        const saturated: string[] = [];
+        this.perProviderRunning.forEach((count, provider) => {
+            if (count >= this.limitFor(provider)) saturated.push(provider);
+        });
+        return saturated;
+    }
+
+    /**
+     * Claims jobs until every slot is used or nothing claimable is left. Returns how many started.
+     * One job per claim, so per-provider limits are re-checked after each.
+     */
+    async fill(): Promise<number> {
+        let started = 0;
+        while (this.running.size < this.concurrency) {
+            const [job] = await this.queue.claim(1, this.saturatedProviders());
+            if (!job) break;
+            this.start(job);
+            started++;
+        }
+        return started;
+    }
+
+    private start(job: Job) {
+        this.perProviderRunning.set(job.provider, (this.perProviderRunning.get(job.provider) ?? 0) + 1);
+        const run = this.execute(job).finally(() => {
+            this.running.delete(job.id);
+            this.perProviderRunning.set(job.provider, (this.perProviderRunning.get(job.provider) ?? 1) - 1);
+            if (this.wake) this.wake();
+        });
+        this.running.set(job.id, run);
+    }
+
+    /**
+     * Never rejects: a handler error fails the job, and a queue error while recording
+     * the outcome is logged (the job stays 'running' until requeueStale picks it up).
+     */
+    private async execute(job: Job) {
+        const handler = this.handlers[job.type];
+        let result: any;
+        try {
+            if (!handler) throw new Error(`No handler for job type ${job.type}`);
+            result = await handler(job);
+        } catch (error) {
+            this.stats.failed++;
+            this.options.onError?.(job, error);
+            await this.record(job, 'failed', () => this.queue.fail(job.id, error instanceof Error ? error.message : String(error)));
+            return;
+        }
+        if (await this.record(job, 'completed', () => this.queue.complete(job.id, result))) {
+            this.stats.completed++;
+        }
+    }
+
+    private async record(job: Job, outcome: string, write: () => Promise<void>): Promise<boolean> {
+        try {
+            await write();
+            return true;
+        } catch (error) {
+            this.stats.queueErrors++;
+            console.error(`Could not record job ${job.id} (${job.type}) as ${outcome}:`, error);
+            return false;
+        }
+    }
+
+    /**
+     * Runs until no job is due and none is running (backed-off retries that aren't
+     * due yet are left in the queue). Used by the batch script and tests.
+     */
+    async drain(): Promise<void> {
+        while (true) {
+            await this.fill();
+            if (!this.running.size) return;
+            await Promise.race(Array.from(this.running.values()));
+        }
+    }
+
+    /**
+     * Long-running mode: refills as soon as a slot frees up, polls otherwise.
+     * Claim errors (e.g. the database is briefly unreachable) are retried with
+     * exponential backoff instead of ending the loop. With `staleAfterMs`, jobs left
+     * running by crashed workers are recovered every STALE_CHECK_MS.
+     */
+    async run(): Promise<void> {
+        this.stopped = false;
+        let failures = 0;
+        let staleCheckedAt = Date.now();
+        while (!this.stopped) {
+            try {
+                if (this.options.staleAfterMs && Date.now() - staleCheckedAt >= STALE_CHECK_MS) {
+                    const recovered = await this.queue.requeueStale(this.options.staleAfterMs);
+                    if (recovered) console.log(`Requeued or failed ${recovered} stale job(s)`);
+                    staleCheckedAt = Date.now();
+                }
+                await this.fill();
+                failures = 0;
+            } catch (error) {
+                failures++;
+                this.stats.queueErrors++;
+                console.error(`Job queue unavailable (${failures} failures in a row), backing off:`, error);
+            }
+            const delay = failures
+                ? Math.min(this.pollIntervalMs * 2 ** (failures - 1), MAX_BACKOFF_MS)
+                : this.pollIntervalMs;
+            await new Promise<void>(resolve => {
+                const timer = setTimeout(resolve, delay);
+                this.wake = () => {
+                    clearTimeout(timer);
+                    resolve();
+                };
+            });
+            this.wake = null;
+        }
+        await Promise.all(Array.from(this.running.values()));
+    }
+
+    stop() {
+        this.stopped = true;
+        if (this.wake) this.wake();
+    }
+
+    get active(): number {
+        return this.running.size;
+    }
+}
@@ -0,0 +1,393 @@
+import { WeeklyAdjustment, WeeklyAdjustmentSchema } from '../ai/schemas';
+import { structureDuration } from '../ai/repair';
+import { ReadinessState } from './readiness';
+import { generateRuleWorkout, RuleWorkoutType } from './workoutRules';
+
+/**
+ * Rule-based weekly plan adjustment.
+ *
+ * Rescales the upcoming week's planned workouts from last week's completion,
+ * athlete feedback and readiness, following the rules the macro-plan prompt
+ * gives the model:
+ *   - run volume never exceeds last week's completed volume by more than 10%
+ *     (except when coming back from a planned recovery week),
+ *   - a recovery week (~70% volume, one key session) is forced after four loaded
+ *     weeks, or after three when the athlete is already strained,
+ *   - recovery and taper weeks are never increased.
+ * Intensity follows the same signals: key sessions lose a repeat, are swapped to
+ * easy runs, or (for a reported injury) all runs become easy. Every run is then
+ * regenerated from the current profile, so pace / HR targets are re-resolved to
+ * the athlete's current zones. Only the summary text is left to a model.
+ */
+
+export const MAX_WEEKLY_INCREASE = 0.1;
+// Consecutive loaded weeks after which a recovery week is forced
+export const RECOVERY_AFTER_WEEKS = 4;
+const RECOVERY_VOLUME = 0.7;
+const INJURY_VOLUME = 0.5;
+const STRONG_REDUCE_VOLUME = 0.7;
+const MILD_REDUCE_VOLUME = 0.85;
+const INCREASE_VOLUME = 1.05;
+// Completed share of last week's sessions below which load is reduced / above which it may grow
+const LOW_COMPLETION = 0.6;
+const HIGH_COMPLETION = 0.9;
+// Shortest runs after cutting; long runs are capped like in materialize.ts
+const MIN_RUN_MIN: Record<RuleWorkoutType, number> = { easy: 20, long: 30, tempo: 35, threshold: 35, vo2max: 35 };
+const LONG_MAX_MIN = 150;
+// Below this a rescaled run keeps its planned duration
+const MIN_CHANGE_MIN = 5;
+// Feedback on the DailyLog scale: 1 (best) - 5 (worst)
+const FEEDBACK_FIELDS = ['fatigue', 'soreness', 'stress', 'sleepQuality', 'mood'];
+const FEEDBACK_SCALE = 5;
+
+const TIRED_WORDS = /tired|fatigue|exhaust|sore|heavy|sick|\bill\b|cold|flu|stress|poor sleep|slept badly|overtrain/i;
+const INJURY_WORDS = /injur|pain|hurt|strain(ed)?\b|sprain|niggle/i;
+const FRESH_WORDS = /too easy|fresh|strong|great|more volume|ready for more/i;
+
+const RULE_TYPE_BY_ROW: Record<string, RuleWorkoutType> = {
+    recovery: 'easy', endurance: 'long', tempo: 'tempo', threshold: 'threshold', vo2max: 'vo2max', anaerobic: 'vo2max',
+};
+// Workout.type per rule type (as materialize.ts writes it)
+const ROW_TYPE: Record<RuleWorkoutType, string> = {
+    easy: 'recovery', long: 'endurance', tempo: 'tempo', threshold: 'threshold', vo2max: 'vo2max',
+};
+const KEY_TYPES: RuleWorkoutType[] = ['tempo', 'threshold', 'vo2max'];
+const LOADED_FOCUS = ['base', 'build', 'peak'];
+// TSB that makes generateRuleWorkout drop a repeat
+const TRIM_TSB = -25;
+
+export interface AdjustableWorkout {
+    id: string;
+    date: Date | string;
+    week?: number | null;
+    title: string;
+    type: string;
+    sport: string;
+    durationMin: number;
+    status: string;
+    structure: any[];   // Decoded blocks
+    completion?: { durationMin?: number } | null;   // Parsed completionData of completed workouts
+}
+
+export interface AdjustmentInput {
+    profile: any;
+    macroPlan: any;                    // { macro_plan: [...] }
+    upcoming: AdjustableWorkout[];     // Planned workouts of the week being adjusted
+    previous: AdjustableWorkout[];     // The 7 days before it, any status
+    feedback?: any;
+    readiness?: ReadinessState | null;
+}
+
+export interface WorkoutChange {
+    workoutId: string;
+    title: string;
+    type: string;
+    durationMin: number;
+    description?: string;
+    structure?: any[];
+}
+
+export type AdjustmentAction = 'keep' | 'trim' | 'easy';
+
+export interface AdjustmentDecision {
+    week: number | null;
+    focus: string | null;
+    factor: number;
+    keyAction: AdjustmentAction;       // For key sessions after the first
+    firstKeyAction: AdjustmentAction;
+    plannedMin: number;
+    targetMin: number;
+    previousMin: number;
+    reasons: string[];
+}
+
+export interface PlanAdjustment extends WeeklyAdjustment {
+    adjusted_week: WorkoutChange[];
+    decision: AdjustmentDecision;
+}
+
+function round5(minutes: number): number {
+    return Math.round(minutes / 5) * 5;
+}
+
+function ruleType(workout: AdjustableWorkout): RuleWorkoutType | null {
+    return workout.sport === 'run' ? RULE_TYPE_BY_ROW[workout.type] ?? null : null;
+}
+
+function runMinutes(workouts: AdjustableWorkout[]): number {
+    return workouts.filter(w => w.sport === 'run').reduce((sum, w) => sum + (w.durationMin || 0), 0);
+}
+
+/**
+ * Completed run minutes and completed share of sessions that were due, from last
+ * week's rows (actual duration from completionData when it was matched).
+ */
+function lastWeek(previous: AdjustableWorkout[]) {
+    const due = previous.filter(w => w.status === 'completed' || w.status === 'skipped' || w.status === 'planned');
+    const completed = due.filter(w => w.status === 'completed');
+    const minutes = completed
+        .filter(w => w.sport === 'run')
+        .reduce((sum, w) => sum + (w.completion?.durationMin ?? w.durationMin ?? 0), 0);
+    return { minutes, completion: due.length ? completed.length / due.length : null };
+}
+
+/**
+ * 0 (fresh) - 1 (worst) from feedback fields on the DailyLog scale, or null.
+ */
+function feedbackStrain(feedback: any): number | null {
+    if (!feedback || typeof feedback !== 'object') return null;
+    const values = FEEDBACK_FIELDS
+        .filter(field => typeof feedback[field] === 'number')
+        .map(field => Math.min(1, Math.max(0, (feedback[field] - 1) / (FEEDBACK_SCALE - 1))));
+    if (typeof feedback.rpe === 'number') values.push(Math.min(1, Math.max(0, (feedback.rpe - 5) / 5)));
+    return values.length ? values.reduce((a, b) => a + b, 0) / values.length : null;
+}
+
+function feedbackText(feedback: any): string {
+    if (typeof feedback === 'string') return feedback;
+    if (!feedback || typeof feedback !== 'object') return '';
+    return ['notes', 'comment', 'message', 'text', 'injuryStatus']
+        .map(field => (typeof feedback[field] === 'string' ? feedback[field] : ''))
+        .join(' ');
+}
+
+function reportsInjury(feedback: any): boolean {
+    const status = feedback?.injury ?? feedback?.injuryStatus;
+    if (status === true) return true;
+    if (typeof status === 'string' && status.trim() && !/^(none|no|ok|healthy)$/i.test(status.trim())) return true;
+    return INJURY_WORDS.test(feedbackText(feedback));
+}
+
+/**
+ * Loaded (base / build / peak) weeks immediately before `week` in the macro plan.
+ */
+function loadedWeeksBefore(weeks: any[], week: number): number {
+    let count = 0;
+    for (let i = weeks.findIndex(w => w.week === week) - 1; i >= 0 && LOADED_FOCUS.includes(weeks[i].focus); i--) count++;
+    return count;
+}
+
+/**
+ * Volume factor and intensity actions for the week, with the reasons behind them.
+ */
+export function decideAdjustment(input: AdjustmentInput): AdjustmentDecision {
+    const weeks: any[] = input.macroPlan?.macro_plan || [];
+    const week = input.upcoming.find(w => w.week != null)?.week ?? null;
+    const plannedWeek = week !== null ? weeks.find(w => w.week === week) : null;
+    const focus: string | null = plannedWeek?.focus ?? null;
+    const previousWeek = week !== null ? weeks.find(w => w.week === week - 1) : null;
+
+    const plannedMin = runMinutes(input.upcoming);
+    const last = lastWeek(input.previous);
+    const strain = feedbackStrain(input.feedback);
+    const text = feedbackText(input.feedback);
+    const readiness = input.readiness?.status ?? null;
+    const reasons: string[] = [];
+
+    // --- Signals ---
+    let reduce = 0;
+    if (readiness === 'strained') {
+        reduce += 2;
+        reasons.push('readiness is strained (HRV / resting HR off baseline)');
+    }
+    if (strain !== null && strain >= 0.6) {
+        reduce += 2;
+        reasons.push('feedback reports high fatigue');
+    } else if ((strain !== null && strain >= 0.4) || TIRED_WORDS.test(text)) {
+        reduce += 1;
+        reasons.push('feedback reports some fatigue');
+    }
+    if (last.completion !== null && last.completion < LOW_COMPLETION) {
+        reduce += 1;
+        reasons.push(`only ${Math.round(last.completion * 100)}% of last week's sessions were completed`);
+    }
+    let fresh = 0;
+    if (readiness === 'ready') fresh++;
+    if (strain !== null && strain <= 0.2) fresh++;
+    if (FRESH_WORDS.test(text)) fresh++;
+    if (last.completion !== null && last.completion >= HIGH_COMPLETION) fresh++;
+
+    // --- Volume factor and intensity ---
+    let factor = 1;
+    let keyAction: AdjustmentAction = 'keep';
+    let firstKeyAction: AdjustmentAction = 'keep';
+    const easyWeek = focus === 'recovery' || focus === 'taper';
+    const loadedBefore = week !== null ? loadedWeeksBefore(weeks, week) : 0;
+
+    if (reportsInjury(input.feedback)) {
+        factor = INJURY_VOLUME;
+        keyAction = firstKeyAction = 'easy';
+        reasons.push('injury reported: easy running only');
+    } else if (!easyWeek && (loadedBefore >= RECOVERY_AFTER_WEEKS || (loadedBefore >= RECOVERY_AFTER_WEEKS - 1 && reduce >= 2))) {
+        factor = RECOVERY_VOLUME;
+        keyAction = 'easy';
+        firstKeyAction = 'trim';
+        reasons.push(`recovery week after ${loadedBefore} loaded weeks`);
+    } else if (reduce >= 3) {
+        factor = STRONG_REDUCE_VOLUME;
+        keyAction = 'easy';
+        firstKeyAction = 'trim';
+    } else if (reduce > 0) {
+        factor = MILD_REDUCE_VOLUME;
+        keyAction = firstKeyAction = 'trim';
+    } else if (fresh >= 3 && !easyWeek) {
+        factor = INCREASE_VOLUME;
+        reasons.push('athlete is fresh and completed last week');
+    }
+
+    // --- 10% rule against what was actually run last week ---
+    let targetMin = plannedMin * factor;
+    const afterRecovery = previousWeek && !LOADED_FOCUS.includes(previousWeek.focus);
+    if (last.minutes > 0 && !afterRecovery) {
+        const cap = last.minutes * (1 + MAX_WEEKLY_INCREASE);
+        if (targetMin > cap) {
+            targetMin = cap;
+            reasons.push(`volume capped at +10% over last week's ${Math.round(last.minutes)} min`);
+        }
+    }
+    if (easyWeek) targetMin = Math.min(targetMin, plannedMin);
+
+    return {
+        week,
+        focus,
+        factor,
+        keyAction,
+        firstKeyAction,
+        plannedMin,
+        targetMin: Math.round(targetMin),
+        previousMin: Math.round(last.minutes),
+        reasons,
+    };
+}
+
+/**
+ * Run durations rescaled to `targetMin`: easy and long runs absorb the change first,
+ * key sessions are only cut once those reach their minimum.
+ */
+function rescale(runs: { type: RuleWorkoutType; minutes: number }[], targetMin: number): number[] {
+    const minutes = runs.map(r => r.minutes);
+    const total = () => minutes.reduce((a, b) => a + b, 0);
+    const groups = [
+        runs.map((r, i) => (KEY_TYPES.includes(r.type) ? -1 : i)).filter(i => i >= 0),
+        runs.map((r, i) => (KEY_TYPES.includes(r.type) ? i : -1)).filter(i => i >= 0),
+    ];
+
+    if (targetMin > total()) {
+        // Growth goes to easy / long runs only
+        const flexible = groups[0];
+        const base = flexible.reduce((sum, i) => sum + minutes[i], 0);
+        const extra = targetMin - total();
+        flexible.forEach(i => {
+            const cap = runs[i].type === 'long' ? LONG_MAX_MIN : Infinity;
+            minutes[i] = Math.min(cap, minutes[i] + (base ? extra * minutes[i] / base : extra / flexible.length));
+        });
+    } else {
+        for (const group of groups) {
+            const excess = total() - targetMin;
+            if (excess <= 0) break;
+            const room = group.reduce((sum, i) => sum + Math.max(0, minutes[i] - MIN_RUN_MIN[runs[i].type]), 0);
+            if (!room) continue;
+            const share = Math.min(1, excess / room);
+            group.forEach(i => {
+                minutes[i] -= Math.max(0, minutes[i] - MIN_RUN_MIN[runs[i].type]) * share;
+            });
+        }
+    }
+    return minutes.map((m, i) => {
+        const rounded = Math.max(MIN_RUN_MIN[runs[i].type], round5(m));
+        return Math.abs(rounded - runs[i].minutes) < MIN_CHANGE_MIN ? runs[i].minutes : rounded;
+    });
+}
+
+function sameStructure(a: any[], b: any[]): boolean {
+    return JSON.stringify(a) === JSON.stringify(b);
+}
+
+/**
+ * Deterministic summary, used as is when no model is available and as the facts
+ * handed to the model otherwise.
+ */
+export function describeAdjustment(decision: AdjustmentDecision, loadChange: string, adjustedMin: number): string {
+    const change = loadChange === 'maintain'
+        ? `Keeping run volume at ${adjustedMin} min`
+        : `${loadChange === 'reduce' ? 'Reducing' : 'Increasing'} run volume from ${decision.plannedMin} to ${adjustedMin} min`;
+    const intensity = decision.firstKeyAction === 'easy'
+        ? ' All runs are easy.'
+        : decision.keyAction === 'easy'
+            ? ' Only the first key session stays (shortened); the others become easy runs.'
+            : decision.keyAction === 'trim' ? ' Key sessions lose one repeat.' : '';
+    return `${change}${decision.reasons.length ? ` (${decision.reasons.join('; ')})` : ''}.${intensity}`;
+}
+
+/**
+ * Adjusts the upcoming week. Runs in well under a millisecond per week.
+ */
+export function adjustWeek(input: AdjustmentInput): PlanAdjustment {
+    const decision = decideAdjustment(input);
+    const upcoming = [...input.upcoming].sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
+
+    // Intensity first: a key session swapped to an easy run is resized as one
+    let keys = 0;
+    const runs = upcoming
+        .map(workout => ({ workout, original: ruleType(workout) }))
+        .filter((r): r is { workout: AdjustableWorkout; original: RuleWorkoutType } => r.original !== null)
+        .map(({ workout, original }) => {
+            let type = original;
+            let trim = false;
+            if (KEY_TYPES.includes(original)) {
+                const action = keys++ === 0 ? decision.firstKeyAction : decision.keyAction;
+                if (action === 'easy') type = 'easy';
+                trim = action === 'trim';
+            } else if (decision.firstKeyAction === 'easy' && original === 'long') {
+                type = 'easy';
+            }
+            // A trimmed session is shorter by its dropped repeat before any rescaling
+            const minutes = trim
+                ? Math.round(structureDuration(generateRuleWorkout(type, input.profile, { durationMin: workout.durationMin, tsb: TRIM_TSB }).structure))
+                : workout.durationMin;
+            return { workout, type, trim, minutes };
+        });
+
+    const otherMin = runMinutes(upcoming) - runs.reduce((sum, r) => sum + r.workout.durationMin, 0);
+    const durations = rescale(runs, decision.targetMin - otherMin);
+
+    const changes: WorkoutChange[] = [];
+    runs.forEach((run, i) => {
+        const generated = generateRuleWorkout(run.type, input.profile, {
+            durationMin: durations[i],
+            tsb: run.trim ? TRIM_TSB : null,
+        });
+        const durationMin = Math.round(structureDuration(generated.structure));
+        const type = ROW_TYPE[run.type];
+        // Materialized key sessions are titled "<macro name> (<rule name>)"; keep the macro name
+        const custom = /^(.*) \((.+)\)$/.exec(run.workout.title);
+        const title = custom && type === run.workout.type ? `${custom[1]} (${generated.workout_name})` : generated.workout_name;
+
+        if (durationMin === run.workout.durationMin && type === run.workout.type && title === run.workout.title
+            && sameStructure(generated.structure, run.workout.structure)) {
+            return;
+        }
+        changes.push({
+            workoutId: run.workout.id,
+            title,
+            type,
+            durationMin,
+            description: generated.description,
+            structure: generated.structure,
+        });
+    });
+
+    const changed = new Map(changes.map(c => [c.workoutId, c.durationMin]));
+    const adjustedMin = upcoming
+        .filter(w => w.sport === 'run')
+        .reduce((sum, w) => sum + (changed.get(w.id) ?? w.durationMin), 0);
+    const ratio = decision.plannedMin ? adjustedMin / decision.plannedMin : 1;
+    const loadChange = ratio < 0.97 || (decision.keyAction !== 'keep' && ratio <= 1) ? 'reduce' : ratio > 1.03 ? 'increase' : 'maintain';
+
+    const adjustment = WeeklyAdjustmentSchema.parse({
+        adjusted_week: changes,
+        summary: describeAdjustment(decision, loadChange, adjustedMin),
+        load_change: loadChange,
+    });
+    return { ...adjustment, adjusted_week: changes, decision };
+}
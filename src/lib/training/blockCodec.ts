@@ -0,0 +1,131 @@
+/**
+ * Compact columnar encoding for workout block structures (Workout.blocks).
+ *
+ * Layout (little endian):
+ *   u8 version, u8 n
+ *   u8[n] type, u8[n] intensity, u8[n] zone (0 = none), u8[n] zone_position (255 = none, else x/200),
+ *   u8[n] reps, u16[n] duration (seconds), u8[n] target metric, u8[n] target value (string index, 255 = none)
+ *   u8 strings, then per string: u16 byte length + UTF-8 bytes
+ *
+ * Enum columns make a typical 4-6 block workout ~60-80 bytes instead of ~600 of JSON,
+ * and target values repeated across blocks (e.g. "Z1") are stored once.
+ */
+
+const VERSION = 1;
+const NONE = 255;
+
+const TYPES = ['warmup', 'interval', 'recovery', 'cooldown', 'steady'];
+const INTENSITIES = ['easy', 'endurance', 'tempo', 'threshold', 'vo2max', 'anaerobic', 'hill'];
+const ZONES = ['Z1', 'Z2', 'Z3', 'Z4', 'Z5'];
+const METRICS = ['pace', 'power', 'hr', 'rpe'];
+
+function code(values: string[], value: any, fallback = 0): number {
+    const i = values.indexOf(value);
+    return i === -1 ? fallback : i;
+}
+
+/**
+ * Encodes validated blocks (see WorkoutBlockSchema). Durations are kept to the second,
+ * zone_position to 0.005; unknown enum values fall back to the first entry.
+ */
+export function encodeBlocks(blocks: any[]): Buffer {
+    const n = blocks.length;
+    if (n > 254) throw new Error('Too many blocks to encode');
+
+    const strings: string[] = [];
+    const stringIndex = new Map<string, number>();
+    const valueIndex = blocks.map(b => {
+        const value = b.target?.value;
+        if (value == null) return NONE;
+        const text = String(value);
+        let i = stringIndex.get(text);
+        if (i === undefined) {
+            i = strings.length;
+            if (i >= NONE) throw new Error('Too many distinct target values to encode');
+            strings.push(text);
+            stringIndex.set(text, i);
+        }
+        return i;
+    });
+    const encoded = strings.map(s => Buffer.from(s, 'utf8'));
+
+    const size = 2 + n * 9 + 1 + encoded.reduce((sum, b) => sum + 2 + b.length, 0);
+    const buf = Buffer.alloc(size);
+    let o = 0;
+    buf[o++] = VERSION;
+    buf[o++] = n;
+    blocks.forEach(b => { buf[o++] = code(TYPES, b.type, TYPES.indexOf('steady')); });
+    blocks.forEach(b => { buf[o++] = code(INTENSITIES, b.intensity, INTENSITIES.indexOf('endurance')); });
+    blocks.forEach(b => { buf[o++] = b.zone ? code(ZONES, b.zone, -1) + 1 : 0; });
+    blocks.forEach(b => {
+        buf[o++] = typeof b.zone_position === 'number' ? Math.round(Math.min(1, Math.max(0, b.zone_position)) * 200) : NONE;
+    });
+    blocks.forEach(b => { buf[o++] = b.reps && b.reps > 1 ? Math.min(254, Math.floor(b.reps)) : 0; });
+    blocks.forEach(b => {
+        buf.writeUInt16LE(Math.min(65535, Math.round((b.duration_min || 0) * 60)), o);
+        o += 2;
+    });
+    blocks.forEach(b => { buf[o++] = code(METRICS, b.target?.metric, METRICS.indexOf('rpe')); });
+    valueIndex.forEach(i => { buf[o++] = i; });
+    buf[o++] = encoded.length;
+    encoded.forEach(bytes => {
+        buf.writeUInt16LE(bytes.length, o);
+        o += 2;
+        bytes.copy(buf, o);
+        o += bytes.length;
+    });
+    return buf;
+}
+
+export function decodeBlocks(data: Uint8Array): any[] {
+    const buf = Buffer.from(data.buffer, data.byteOffset, data.byteLength);
+    if (buf[0] !== VERSION) throw new Error(`Unsupported block encoding version ${buf[0]}`);
+    const n = buf[1];
+
+    const column = (index: number) => 2 + index * n;
+    const durations = 2 + 5 * n;
+    const metrics = durations + 2 * n;
+    const values = metrics + n;
+
+    let o = values + n;
+    const stringCount = buf[o++];
+    const strings: string[] = [];
+    for (let i = 0; i < stringCount; i++) {
+        const length = buf.readUInt16LE(o);
+        o += 2;
+        strings.push(buf.toString('utf8', o, o + length));
+        o += length;
+    }
+
+    const blocks: any[] = [];
+    for (let i = 0; i < n; i++) {
+        const zone = buf[column(2) + i];
+        const position = buf[column(3) + i];
+        const reps = buf[column(4) + i];
+        const value = buf[values + i];
+        blocks.push({
+            type: TYPES[buf[column(0) + i]],
+            ...(reps ? { reps } : {}),
+            duration_min: buf.readUInt16LE(durations + 2 * i) / 60,
+            intensity: INTENSITIES[buf[column(1) + i]],
+            target: { metric: METRICS[buf[metrics + i]], value: value === NONE ? '' : strings[value] },
+            ...(zone ? { zone: ZONES[zone - 1] } : {}),
+            ...(position !== NONE ? { zone_position: position / 200 } : {}),
+        });
+    }
+    return blocks;
+}
+
+/**
+ * Blocks of a Workout row: the compact column when present, else the legacy JSON string.
+ */
+export function workoutBlocks(workout: { blocks?: Uint8Array | null; structure?: string | null }): any[] {
+    if (workout.blocks && workout.blocks.length) return decodeBlocks(workout.blocks);
+    if (!workout.structure) return [];
+    try {
+        const parsed = JSON.parse(workout.structure);
+        return Array.isArray(parsed) ? parsed : parsed?.structure ?? [];
+    } catch (e) {
+        return [];
+    }
+}
@@ -0,0 +1,281 @@
+import { zoneSeconds } from './context';
+import { Zone, ZONES } from './zones';
+import { ZoneTables } from './zoneTables';
+
+/**
+ * Planned-vs-completed matching and compliance.
+ *
+ * Activities are paired with planned workouts through a per-sport index sorted
+ * by day: each activity binary-searches the days around its own date, so a sync
+ * costs O((activities + workouts) log workouts) instead of a cross-product scan.
+ * Same-day pairs are matched first, then leftovers within ±MATCH_WINDOW_DAYS.
+ *
+ * Compliance expands the planned blocks (repeat groups included) into a timeline
+ * and walks the activity's HR / speed streams once, counting seconds inside,
+ * below and above each block's resolved zone. Without streams, the session's HR
+ * zone times are compared to the planned time per zone instead.
+ */
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+export const MATCH_WINDOW_DAYS = 1;
+// Planned-to-actual duration ratios outside this range are different sessions
+const MIN_DURATION_RATIO = 0.4;
+const MAX_DURATION_RATIO = 2.5;
+// Longest gap between stream samples credited to one sample (pauses)
+const MAX_SAMPLE_GAP_S = 10;
+
+const ACTIVITY_SPORTS: Record<string, string> = {
+    Run: 'run', TrailRun: 'run', VirtualRun: 'run', Treadmill: 'run',
+    Ride: 'bike', VirtualRide: 'bike', GravelRide: 'bike', MountainBikeRide: 'bike', EBikeRide: 'bike',
+    WeightTraining: 'strength', Crossfit: 'strength',
+    Yoga: 'yoga', Pilates: 'mobility', Workout: 'mobility',
+};
+
+const ZONE_BY_INTENSITY: Record<string, Zone> = { easy: 'Z1', endurance: 'Z2', tempo: 'Z3', threshold: 'Z4', vo2max: 'Z5', anaerobic: 'Z5' };
+
+export interface PlannedSession {
+    id: string;
+    date: Date | string;
+    sport: string;
+    durationMin: number | null;
+}
+
+export interface SessionMatch<T extends PlannedSession = PlannedSession> {
+    workout: T;
+    activity: any;
+}
+
+/** Seconds in / below / above the target zone, as fractions of the block's time with data. */
+export type BlockCompliance = [number, number, number];
+
+export interface ComplianceResult {
+    activityId: string;
+    durationMin: number;
+    compliance: number | null;      // Share of planned time spent in the planned zones
+    source: 'streams' | 'zones' | 'none';
+    blocks?: (BlockCompliance | null)[]; // Per structure block, repeats combined (streams only)
+}
+
+function dayNumber(date: Date | string): number {
+    const ms = typeof date === 'string' ? Date.parse(date.slice(0, 10) + 'T00:00:00Z') : date.getTime();
+    return Math.floor(ms / DAY_MS);
+}
+
+function round2(value: number): number {
+    return Math.round(value * 100) / 100;
+}
+
+export function activitySport(activity: any): string | null {
+    return ACTIVITY_SPORTS[activity?.type] ?? null;
+}
+
+// --- Matching ---
+
+interface IndexEntry<T> {
+    day: number;
+    workout: T;
+    used: boolean;
+}
+
+function lowerBound<T>(entries: IndexEntry<T>[], day: number): number {
+    let lo = 0;
+    let hi = entries.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (entries[mid].day < day) lo = mid + 1;
+        else hi = mid;
+    }
+    return lo;
+}
+
+/**
+ * Pairs each activity with at most one planned workout of the same sport within
+ * `windowDays`, preferring the closest day and then the closest duration.
+ */
+export function matchActivities<T extends PlannedSession>(
+    planned: T[],
+    activities: any[],
+    windowDays = MATCH_WINDOW_DAYS,
+): SessionMatch<T>[] {
+    const index = new Map<string, IndexEntry<T>[]>();
+    planned.forEach(workout => {
+        const entries = index.get(workout.sport) ?? [];
+        entries.push({ day: dayNumber(workout.date), workout, used: false });
+        index.set(workout.sport, entries);
+    });
+    index.forEach(entries => entries.sort((a, b) => a.day - b.day));
+
+    const sessions = activities
+        .filter(a => a && a.start_date_local && activitySport(a))
+        .map(a => ({ activity: a, sport: activitySport(a)!, day: dayNumber(a.start_date_local), seconds: a.moving_time || 0 }))
+        .sort((a, b) => String(a.activity.start_date_local).localeCompare(String(b.activity.start_date_local)));
+
+    const matches: SessionMatch<T>[] = [];
+    const matched = new Set<any>();
+    // Same day first, so a double day can't take tomorrow's session before tomorrow's activity does
+    [0, windowDays].forEach(window => {
+        sessions.forEach(session => {
+            if (matched.has(session.activity)) return;
+            const entries = index.get(session.sport);
+            if (!entries) return;
+
+            let best: IndexEntry<T> | null = null;
+            let bestScore = Infinity;
+            for (let i = lowerBound(entries, session.day - window); i < entries.length && entries[i].day <= session.day + window; i++) {
+                const entry = entries[i];
+                if (entry.used) continue;
+                const plannedSeconds = (entry.workout.durationMin || 0) * 60;
+                const ratio = plannedSeconds ? session.seconds / plannedSeconds : 1;
+                if (ratio < MIN_DURATION_RATIO || ratio > MAX_DURATION_RATIO) continue;
+                const score = 2 * Math.abs(entry.day - session.day) + Math.abs(1 - ratio);
+                if (score < bestScore) {
+                    best = entry;
+                    bestScore = score;
+                }
+            }
+            if (best) {
+                best.used = true;
+                matched.add(session.activity);
+                matches.push({ workout: best.workout, activity: session.activity });
+            }
+        });
+    });
+    return matches;
+}
+
+// --- Compliance ---
+
+interface Segment {
+    block: number;
+    start: number;
+    end: number;
+    zone: Zone | null;
+    metric: string;
+}
+
+function blockZone(block: any): Zone | null {
+    if (ZONES.includes(block.zone)) return block.zone;
+    return ZONE_BY_INTENSITY[block.intensity] ?? null;
+}
+
+/**
+ * Planned blocks as consecutive [start, end) second ranges, expanding repeat
+ * groups (a block with reps plus the single recoveries after it), as structureDuration counts them.
+ */
+export function blockTimeline(blocks: any[]): Segment[] {
+    const segments: Segment[] = [];
+    let t = 0;
+    let group: number[] = [];
+    let reps = 1;
+    const flush = () => {
+        for (let r = 0; r < reps; r++) {
+            group.forEach(i => {
+                const seconds = Math.round((blocks[i].duration_min || 0) * 60);
+                segments.push({ block: i, start: t, end: t + seconds, zone: blockZone(blocks[i]), metric: blocks[i].target?.metric });
+                t += seconds;
+            });
+        }
+    };
+    blocks.forEach((block, i) => {
+        const blockReps = block.reps && block.reps > 1 ? Math.floor(block.reps) : 1;
+        if (reps > 1 && block.type === 'recovery' && blockReps === 1) {
+            group.push(i);
+            return;
+        }
+        flush();
+        group = [i];
+        reps = blockReps;
+    });
+    flush();
+    return segments;
+}
+
+/**
+ * -1 below (too easy), 0 in zone, 1 above, or null without usable data.
+ */
+function classify(segment: Segment, hr: number | undefined, speed: number | undefined, tables: ZoneTables): number | null {
+    if (!segment.zone) return null;
+    const usePace = speed !== undefined && speed > 0 && tables.pace && (segment.metric === 'pace' || !hr || !tables.hr);
+    if (usePace) {
+        // Pace zones are seconds per km: min is the fast end, max the slow end
+        const pace = 1000 / speed!;
+        const zone = tables.pace![segment.zone];
+        return pace > zone.max ? -1 : pace < zone.min ? 1 : 0;
+    }
+    if (hr && tables.hr) {
+        const zone = tables.hr[segment.zone];
+        return hr < zone.min ? -1 : hr > zone.max ? 1 : 0;
+    }
+    return null;
+}
+
+function fromStreams(blocks: any[], streams: Record<string, number[]>, tables: ZoneTables) {
+    const segments = blockTimeline(blocks);
+    const hr = streams.heartrate;
+    const speed = streams.velocity_smooth;
+    const samples = Math.max(hr?.length ?? 0, speed?.length ?? 0);
+    const time = streams.time ?? Array.from({ length: samples }, (_, i) => i);
+
+    const totals = blocks.map(() => [0, 0, 0]);
+    let s = 0;
+    for (let i = 0; i < samples && s < segments.length; i++) {
+        const t = time[i];
+        while (s < segments.length && t >= segments[s].end) s++;
+        if (s === segments.length) break;
+        const dt = i + 1 < time.length ? Math.min(MAX_SAMPLE_GAP_S, time[i + 1] - t) : 1;
+        const position = classify(segments[s], hr?.[i], speed?.[i], tables);
+        if (position !== null && dt > 0) totals[segments[s].block][position + 1] += dt;
+    }
+
+    let inZone = 0;
+    let measured = 0;
+    const perBlock = totals.map(([below, within, above]) => {
+        const total = below + within + above;
+        if (!total) return null;
+        inZone += within;
+        measured += total;
+        return [round2(within / total), round2(below / total), round2(above / total)] as BlockCompliance;
+    });
+    return { compliance: measured ? round2(inZone / measured) : null, blocks: perBlock };
+}
+
+/**
+ * Session-level fallback: planned seconds per zone vs the activity's HR zone times.
+ */
+function fromZoneTimes(blocks: any[], activity: any, lthr: number | null): number | null {
+    const planned = [0, 0, 0, 0, 0];
+    blockTimeline(blocks).forEach(segment => {
+        if (segment.zone) planned[ZONES.indexOf(segment.zone)] += segment.end - segment.start;
+    });
+    const total = planned.reduce((a, b) => a + b, 0);
+    if (!total || (!activity.icu_hr_zone_times && !(lthr && activity.average_heartrate))) return null;
+    const actual = zoneSeconds(activity, lthr);
+    return round2(planned.reduce((sum, seconds, z) => sum + Math.min(seconds, actual[z]), 0) / total);
+}
+
+/**
+ * Compliance of `activity` against the planned `blocks`, from streams when given.
+ */
+export function computeCompliance(
+    blocks: any[],
+    activity: any,
+    tables: ZoneTables,
+    streams?: Record<string, number[]> | null,
+): ComplianceResult {
+    const result: ComplianceResult = {
+        activityId: String(activity.id),
+        durationMin: Math.round((activity.moving_time || 0) / 60),
+        compliance: null,
+        source: 'none',
+    };
+    if (!blocks.length) return result;
+
+    if (streams && (streams.heartrate?.length || streams.velocity_smooth?.length)) {
+        const measured = fromStreams(blocks, streams, tables);
+        if (measured.compliance !== null) {
+            return { ...result, compliance: measured.compliance, source: 'streams', blocks: measured.blocks };
+        }
+    }
+    const compliance = fromZoneTimes(blocks, activity, tables.lthr);
+    return compliance === null ? result : { ...result, compliance, source: 'zones' };
+}
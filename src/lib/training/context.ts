@@ -0,0 +1,182 @@
+import { formatReadiness, ReadinessState } from './readiness';
+import { calculateHRZones, Zone, ZONES } from './zones';
+
+/**
+ * Compact training context for AI prompts (mirrored by scripts/coach/context.py).
+ *
+ * Reduces raw Intervals.icu activities / wellness into a fixed-size summary:
+ * acute/chronic load, HRV and resting HR trends, readiness, the last key session, today's
+ * subjective wellness and weekly minutes per zone. Lines are added in priority
+ * order until the token budget is reached, so the prompt size no longer grows
+ * with the number of activities or fields Intervals.icu returns.
+ */
+
+export const DEFAULT_CONTEXT_WEEKS = 4;
+export const DEFAULT_MAX_TOKENS = 400;
+
+// Minutes in Z4+Z5 that make a session a "key" session.
+const KEY_SESSION_HARD_MIN = 10;
+const KEY_SESSION_NAME = /interval|threshold|tempo|vo2|race|fartlek|hill|long/i;
+
+export interface ContextOptions {
+    lthr?: number | null;
+    today?: string;      // YYYY-MM-DD, defaults to the current date
+    weeks?: number;
+    maxTokens?: number;
+    readiness?: ReadinessState | null;   // Latest state from training/readiness.ts
+}
+
+/**
+ * Rough token estimate (~4 characters per token), good enough for a budget.
+ */
+export function estimateTokens(text: string): number {
+    return Math.ceil(text.length / 4);
+}
+
+function dayNumber(date: string): number {
+    return Math.floor(Date.parse(date.slice(0, 10) + 'T00:00:00Z') / 86400000);
+}
+
+function round1(value: number): number {
+    return Math.round(value * 10) / 10;
+}
+
+function mean(values: number[]): number | null {
+    return values.length ? values.reduce((a, b) => a + b, 0) / values.length : null;
+}
+
+function signedPercent(value: number, base: number): string {
+    const pct = Math.round((value / base - 1) * 100);
+    return `${pct >= 0 ? '+' : ''}${pct}%`;
+}
+
+/**
+ * Seconds per zone for one activity: Intervals.icu's HR zone times when present,
+ * otherwise the whole moving time in the zone of the average HR.
+ */
+export function zoneSeconds(activity: any, lthr?: number | null): number[] {
+    const seconds = [0, 0, 0, 0, 0];
+    const zoneTimes = activity.icu_hr_zone_times;
+    if (Array.isArray(zoneTimes) && zoneTimes.length) {
+        // Athletes with more than five HR zones: fold the top ones into Z5
+        zoneTimes.forEach((secs: number, i: number) => {
+            seconds[Math.min(i, 4)] += secs || 0;
+        });
+        return seconds;
+    }
+
+    const movingTime = activity.moving_time || 0;
+    let zone = 1; // Unknown intensity counts as endurance
+    if (lthr && activity.average_heartrate) {
+        const hrZones = calculateHRZones(lthr);
+        zone = 0;
+        ZONES.forEach((z: Zone, i: number) => {
+            if (activity.average_heartrate >= hrZones[z].min) zone = i;
+        });
+    }
+    seconds[zone] = movingTime;
+    return seconds;
+}
+
+/**
+ * Training load for one activity; falls back to minutes when Intervals.icu has no load.
+ */
+function activityLoad(activity: any): number {
+    return activity.icu_training_load ?? (activity.moving_time || 0) / 60;
+}
+
+export function buildTrainingContext(activities: any[], wellness: any[], options: ContextOptions = {}): string {
+    const weeks = options.weeks ?? DEFAULT_CONTEXT_WEEKS;
+    const maxTokens = options.maxTokens ?? DEFAULT_MAX_TOKENS;
+    const todayStr = options.today ?? new Date().toISOString().split('T')[0];
+    const today = dayNumber(todayStr);
+
+    const sessions = (activities || [])
+        .filter(a => a && a.start_date_local)
+        .map(a => ({ activity: a, daysAgo: today - dayNumber(a.start_date_local), zones: zoneSeconds(a, options.lthr) }))
+        .filter(s => s.daysAgo >= 0)
+        .sort((a, b) => a.daysAgo - b.daysAgo);
+
+    const days = (wellness || [])
+        .filter(w => w && w.id)
+        .map(w => ({ record: w, daysAgo: today - dayNumber(String(w.id)) }))
+        .filter(d => d.daysAgo >= 0)
+        .sort((a, b) => a.daysAgo - b.daysAgo);
+
+    const lines: string[] = [];
+
+    // --- Load ---
+    const loadWithin = (n: number) => sessions.filter(s => s.daysAgo < n).reduce((sum, s) => sum + activityLoad(s.activity), 0);
+    const acute = loadWithin(7) / 7;
+    const chronic = loadWithin(28) / 28;
+    lines.push(`Load/day: acute(7d) ${round1(acute)}, chronic(28d) ${round1(chronic)}` +
+        (chronic > 0 ? `, ratio ${(acute / chronic).toFixed(2)}` : ''));
+
+    const latestFitness = days.find(d => d.record.ctl != null && d.record.atl != null);
+    if (latestFitness) {
+        const { ctl, atl } = latestFitness.record;
+        lines.push(`Fitness: CTL ${Math.round(ctl)}, ATL ${Math.round(atl)}, TSB ${Math.round(ctl - atl)}`);
+    }
+
+    // --- HRV / RHR trends ---
+    const trend = (label: string, field: string) => {
+        const values = days.filter(d => typeof d.record[field] === 'number');
+        if (!values.length) return;
+        const recent = mean(values.filter(d => d.daysAgo < 7).map(d => d.record[field]));
+        const baseline = mean(values.filter(d => d.daysAgo < 28).map(d => d.record[field]));
+        let line = `${label}: last ${round1(values[0].record[field])} (${values[0].daysAgo}d ago)`;
+        if (recent !== null && baseline) {
+            line += `, 7d ${round1(recent)} vs 28d ${round1(baseline)} (${signedPercent(recent, baseline)})`;
+        }
+        lines.push(line);
+    };
+    trend('HRV', 'hrv');
+    trend('Resting HR', 'restingHR');
+    if (options.readiness) {
+        const age = today - dayNumber(options.readiness.date);
+        lines.push(formatReadiness(options.readiness) + (age > 0 ? ` (${age}d ago)` : ''));
+    }
+
+    // --- Last key session ---
+    const key = sessions.find(s => s.zones[3] + s.zones[4] >= KEY_SESSION_HARD_MIN * 60 || KEY_SESSION_NAME.test(s.activity.name || ''));
+    if (key) {
+        const a = key.activity;
+        lines.push(`Last key session: ${a.start_date_local.slice(0, 10)} (${key.daysAgo}d ago) "${(a.name || a.type || 'Session').slice(0, 40)}" ` +
+            `${Math.round((a.moving_time || 0) / 60)}min, load ${Math.round(activityLoad(a))}, Z4+ ${Math.round((key.zones[3] + key.zones[4]) / 60)}min`);
+    } else {
+        lines.push('Last key session: none in range');
+    }
+
+    // --- Today's subjective wellness ---
+    const latest = days[0]?.daysAgo === 0 ? days[0].record : null;
+    if (latest) {
+        const parts: string[] = [];
+        if (latest.sleepSecs) parts.push(`sleep ${round1(latest.sleepSecs / 3600)}h`);
+        ['sleepQuality', 'fatigue', 'soreness', 'stress', 'mood'].forEach(field => {
+            if (latest[field] != null) parts.push(`${field} ${latest[field]}/4`);
+        });
+        if (parts.length) lines.push(`Wellness today: ${parts.join(', ')}`);
+    }
+
+    // --- Weekly minutes per zone (most recent week first) ---
+    lines.push('Minutes per week Z1/Z2/Z3/Z4/Z5 = total (sessions):');
+    for (let w = 0; w < weeks; w++) {
+        const inWeek = sessions.filter(s => s.daysAgo >= w * 7 && s.daysAgo < (w + 1) * 7);
+        const minutes = [0, 0, 0, 0, 0];
+        inWeek.forEach(s => s.zones.forEach((secs, i) => { minutes[i] += secs / 60; }));
+        const total = minutes.reduce((a, b) => a + b, 0);
+        lines.push(`  ${w === 0 ? 'last 7d' : `${w * 7}-${(w + 1) * 7}d ago`}: ` +
+            `${minutes.map(m => Math.round(m)).join('/')} = ${Math.round(total)} (${inWeek.length})`);
+    }
+
+    // Keep whole lines in priority order until the budget is spent
+    const kept: string[] = [];
+    let used = 0;
+    for (const line of lines) {
+        const cost = estimateTokens(line + '\n');
+        if (used + cost > maxTokens) break;
+        kept.push(line);
+        used += cost;
+    }
+    return kept.join('\n');
+}
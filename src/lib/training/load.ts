@@ -0,0 +1,136 @@
+/**
+ * Training load: daily load and CTL / ATL / TSB (mirrored by scripts/coach/load_engine.py).
+ *
+ * CTL (fitness) and ATL (fatigue) are exponentially weighted daily load with
+ * 42- and 7-day time constants; TSB (form) is CTL - ATL. Daily load is
+ * Intervals.icu's icu_training_load when present, otherwise an hrTSS estimate
+ * from average HR relative to LTHR.
+ */
+
+export const CTL_DAYS = 42;
+export const ATL_DAYS = 7;
+// Same decay Intervals.icu uses: value += (load - value) * (1 - e^(-1/days))
+const CTL_ALPHA = 1 - Math.exp(-1 / CTL_DAYS);
+const ATL_ALPHA = 1 - Math.exp(-1 / ATL_DAYS);
+
+// Intensity factor assumed when an activity has neither load nor HR (easy aerobic).
+const DEFAULT_INTENSITY = 0.75;
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+export interface LoadState {
+    ctl: number;
+    atl: number;
+}
+
+export interface LoadSeries {
+    loads: Float64Array;
+    ctl: Float64Array;
+    atl: Float64Array;
+    tsb: Float64Array;
+}
+
+export interface WeekLoad {
+    week_start: string;
+    hours: number;
+    load: number;
+    ctl: number;
+    atl: number;
+    tsb: number;
+}
+
+function dayNumber(date: string): number {
+    return Math.floor(Date.parse(date.slice(0, 10) + 'T00:00:00Z') / DAY_MS);
+}
+
+function round1(value: number): number {
+    return Math.round(value * 10) / 10;
+}
+
+/**
+ * TSS-like load for one activity summary.
+ */
+export function activityLoad(activity: any, lthr?: number | null): number {
+    if (activity.icu_training_load != null) return activity.icu_training_load;
+    const hours = (activity.moving_time || 0) / 3600;
+    const intensity = lthr && activity.average_heartrate ? activity.average_heartrate / lthr : DEFAULT_INTENSITY;
+    return hours * intensity * intensity * 100;
+}
+
+/**
+ * Summed load per day for [start, end] (YYYY-MM-DD); activities outside the range are ignored.
+ */
+export function dailyLoads(activities: any[], start: string, end: string, lthr?: number | null): Float64Array {
+    const first = dayNumber(start);
+    const loads = new Float64Array(dayNumber(end) - first + 1);
+    for (const activity of activities || []) {
+        if (!activity?.start_date_local) continue;
+        const offset = dayNumber(activity.start_date_local) - first;
+        if (offset >= 0 && offset < loads.length) loads[offset] += activityLoad(activity, lthr);
+    }
+    return loads;
+}
+
+/**
+ * Advances CTL / ATL by one day of load.
+ */
+export function updateLoad(state: LoadState, load: number): LoadState {
+    return {
+        ctl: state.ctl + (load - state.ctl) * CTL_ALPHA,
+        atl: state.atl + (load - state.atl) * ATL_ALPHA,
+    };
+}
+
+/**
+ * CTL / ATL / TSB after each day, continuing from `initial` (the state the day before).
+ */
+export function computeLoadSeries(loads: Float64Array, initial: LoadState = { ctl: 0, atl: 0 }): LoadSeries {
+    const ctl = new Float64Array(loads.length);
+    const atl = new Float64Array(loads.length);
+    const tsb = new Float64Array(loads.length);
+    let state = initial;
+    for (let day = 0; day < loads.length; day++) {
+        state = updateLoad(state, loads[day]);
+        ctl[day] = state.ctl;
+        atl[day] = state.atl;
+        tsb[day] = state.ctl - state.atl;
+    }
+    return { loads, ctl, atl, tsb };
+}
+
+/**
+ * Week-by-week history for planning prompts: hours, load and CTL / ATL / TSB at the
+ * end of each 7-day block from `start` (a trailing partial week is included).
+ */
+export function weeklyLoadSummary(activities: any[], start: string, end: string, lthr?: number | null): WeekLoad[] {
+    const series = computeLoadSeries(dailyLoads(activities, start, end, lthr));
+    const days = series.loads.length;
+    const first = dayNumber(start);
+
+    const minutes = new Float64Array(days);
+    for (const activity of activities || []) {
+        if (!activity?.start_date_local) continue;
+        const offset = dayNumber(activity.start_date_local) - first;
+        if (offset >= 0 && offset < days) minutes[offset] += (activity.moving_time || 0) / 60;
+    }
+
+    const weeks: WeekLoad[] = [];
+    for (let w = 0; w < days; w += 7) {
+        const last = Math.min(w + 7, days) - 1;
+        let load = 0;
+        let mins = 0;
+        for (let d = w; d <= last; d++) {
+            load += series.loads[d];
+            mins += minutes[d];
+        }
+        weeks.push({
+            week_start: new Date((first + w) * DAY_MS).toISOString().split('T')[0],
+            hours: round1(mins / 60),
+            load: Math.round(load),
+            ctl: round1(series.ctl[last]),
+            atl: round1(series.atl[last]),
+            tsb: round1(series.tsb[last]),
+        });
+    }
+    return weeks;
+}
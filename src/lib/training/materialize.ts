@@ -0,0 +1,165 @@
+import { structureDuration } from '../ai/repair';
+import { generateRuleWorkout, isRunRequest, matchWorkoutType, RuleWorkoutType } from './workoutRules';
+
+/**
+ * Expands a macro plan into dated workouts (one Workout row each).
+ *
+ * Per week: the long run goes on the athlete's long-run day, key sessions on
+ * Tuesday / Thursday (then other free days), and easy runs fill the remaining
+ * target volume. Strength and yoga sessions are added on non-key days.
+ * Recovery and taper weeks keep at most one key session.
+ *
+ * Sessions come from the rule engine, which only builds runs, so only run
+ * athletes get materialized workouts; bike and multi-sport plans keep just
+ * the macro plan until rides can be generated too.
+ */
+
+export interface MaterializedWorkout {
+    date: Date;
+    week: number;
+    title: string;
+    description: string;
+    sport: string;
+    type: string;
+    durationMin: number;
+    structure: any[];
+}
+
+const DAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'];
+const KEY_DAYS = [1, 3, 5, 2]; // Tue, Thu, Sat, Wed (offsets from Monday)
+const EASY_DAYS = [0, 2, 4, 5, 1, 3]; // Mon, Wed, Fri, Sat, Tue, Thu
+
+const LONG_SHARE = 0.3;        // Long run as a share of weekly volume...
+const LONG_MAX_MIN = 150;      // ...capped here
+const EASY_MIN = 30;           // Shorter leftovers are dropped
+const EASY_MAX = 60;
+const MAX_RUN_DAYS = 6;
+const STRENGTH_MIN = 30;
+const YOGA_MIN = 20;
+
+// Workout.type per rule type
+const ROW_TYPE: Record<RuleWorkoutType, string> = {
+    easy: 'recovery',
+    long: 'endurance',
+    tempo: 'tempo',
+    threshold: 'threshold',
+    vo2max: 'vo2max',
+};
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+/**
+ * Day offset from Monday for a weekday name ("Sunday", "sun"), or `fallback`.
+ */
+function dayOffset(name: string | null | undefined, fallback: number): number {
+    const key = (name || '').trim().toLowerCase();
+    if (!key) return fallback;
+    const i = DAY_NAMES.findIndex(d => d.startsWith(key.slice(0, 3)));
+    return i === -1 ? fallback : i;
+}
+
+/**
+ * The Monday on or after `date` (UTC), where materialized plans start.
+ */
+export function planStartMonday(date: Date = new Date()): Date {
+    const day = new Date(Date.UTC(date.getUTCFullYear(), date.getUTCMonth(), date.getUTCDate()));
+    const offset = (8 - day.getUTCDay()) % 7; // Sunday=0 -> 1, Monday=1 -> 0
+    return new Date(day.getTime() + offset * DAY_MS);
+}
+
+function row(date: Date, week: number, workout: any, type: string): MaterializedWorkout {
+    return {
+        date,
+        week,
+        title: workout.workout_name,
+        description: workout.description,
+        sport: workout.sport,
+        type,
+        durationMin: Math.round(structureDuration(workout.structure)),
+        structure: workout.structure,
+    };
+}
+
+export function materializePlan(macroPlan: any, profile: any, start: Date): MaterializedWorkout[] {
+    if (!isRunRequest(null, profile)) return [];
+    const weeks: any[] = macroPlan?.macro_plan || [];
+    const longDay = dayOffset(profile?.longRunDay, 6);
+    const rows: MaterializedWorkout[] = [];
+
+    weeks.forEach((week, w) => {
+        const weekNumber = week.week ?? w + 1;
+        const monday = new Date(start.getTime() + w * 7 * DAY_MS);
+        const dateOf = (offset: number) => new Date(monday.getTime() + offset * DAY_MS);
+        const easyWeek = week.focus === 'recovery' || week.focus === 'taper';
+
+        let remaining = Math.round((week.target_volume_hours || 0) * 60);
+        const used = new Set<number>();
+
+        // --- Long run ---
+        const keyTypes: { type: RuleWorkoutType; name: string }[] = [];
+        let hasLong = false;
+        for (const name of week.key_sessions || []) {
+            const type = matchWorkoutType(name) ?? 'tempo';
+            if (type === 'long') hasLong = true;
+            else if (type !== 'easy') keyTypes.push({ type, name });
+        }
+        if (hasLong || week.focus !== 'taper') {
+            const duration = Math.min(LONG_MAX_MIN, Math.round(remaining * LONG_SHARE / 5) * 5);
+            if (duration >= EASY_MIN) {
+                const workout = generateRuleWorkout('long', profile, { durationMin: duration });
+                rows.push(row(dateOf(longDay), weekNumber, workout, ROW_TYPE.long));
+                used.add(longDay);
+                remaining -= duration;
+            }
+        }
+
+        // --- Key sessions ---
+        const keyDays = KEY_DAYS.filter(d => Math.abs(d - longDay) > 1 && Math.abs(d - longDay) < 6);
+        const keys = easyWeek ? keyTypes.slice(0, 1) : keyTypes.slice(0, keyDays.length);
+        keys.forEach((key, i) => {
+            const workout = generateRuleWorkout(key.type, profile);
+            const day = keyDays[i];
+            const materialized = row(dateOf(day), weekNumber, workout, ROW_TYPE[key.type]);
+            if (!matchWorkoutType(key.name)) materialized.title = `${key.name} (${workout.workout_name})`;
+            rows.push(materialized);
+            used.add(day);
+            remaining -= materialized.durationMin;
+        });
+        const keyDaysUsed = new Set(used);
+
+        // --- Easy runs fill the remaining volume ---
+        for (const day of EASY_DAYS) {
+            if (remaining < EASY_MIN || used.size >= MAX_RUN_DAYS) break;
+            if (used.has(day)) continue;
+            const duration = Math.min(EASY_MAX, Math.round(remaining / 5) * 5);
+            const workout = generateRuleWorkout('easy', profile, { durationMin: duration });
+            rows.push(row(dateOf(day), weekNumber, workout, ROW_TYPE.easy));
+            used.add(day);
+            remaining -= duration;
+        }
+
+        // --- Strength / yoga on days without key sessions ---
+        const supportDays = [0, 2, 4, 1, 3, 5, 6].filter(d => !keyDaysUsed.has(d));
+        const supportSessions = [
+            ...Array.from({ length: week.strength_sessions || 0 }, () => ({ sport: 'strength', minutes: STRENGTH_MIN })),
+            ...Array.from({ length: week.yoga_sessions || 0 }, () => ({ sport: 'yoga', minutes: YOGA_MIN })),
+        ];
+        supportSessions.slice(0, supportDays.length).forEach((session, i) => {
+            const title = session.sport === 'strength' ? 'Strength' : 'Yoga';
+            rows.push({
+                date: dateOf(supportDays[i]),
+                week: weekNumber,
+                title: `${title} ${session.minutes}min`,
+                description: session.sport === 'strength'
+                    ? 'Runner-specific strength: squats, lunges, calf raises, core.'
+                    : 'Mobility-focused yoga flow.',
+                sport: session.sport,
+                type: 'recovery',
+                durationMin: session.minutes,
+                structure: [],
+            });
+        });
+    });
+
+    return rows.sort((a, b) => a.date.getTime() - b.date.getTime());
+}
@@ -0,0 +1,201 @@
+/**
+ * Daily readiness from HRV, resting HR and subjective wellness (mirrored by scripts/coach/readiness.py).
+ *
+ * Each athlete keeps an exponentially weighted baseline (mean and variance, ~28-day
+ * time constant) of ln(HRV) and resting HR. A day's reading is scored as a z-score
+ * against the baseline as it stood before that day, then folded into it, so a new
+ * day is an O(1) update from the previous day's stored baseline. Days without a
+ * reading leave the baseline unchanged.
+ *
+ * Subjective scores use Intervals.icu's direction (1 = best): its 1-4 wellness
+ * fields and the DailyLog 1-5 fields are both mapped to a 0 (fresh) - 1 (worst)
+ * strain. DailyLog entries override Intervals.icu values for the same day.
+ */
+
+export const BASELINE_DAYS = 28;
+const ALPHA = 1 - Math.exp(-1 / BASELINE_DAYS);
+// Readings folded in before z-scores are reported
+export const MIN_BASELINE_DAYS = 7;
+// |z| cap, so a single artefact reading cannot dominate the score
+const MAX_Z = 3;
+// Std floors: ln HRV 0.05 (~5%), RHR 1.5 bpm; a very steady baseline otherwise turns noise into big z-scores
+const MIN_STD = { hrv: 0.05, rhr: 1.5 };
+
+const SUBJECTIVE_FIELDS = ['sleepQuality', 'fatigue', 'soreness', 'stress', 'mood'];
+const INTERVALS_SCALE = 4;
+const DAILY_LOG_SCALE = 5;
+
+// Composite z (HRV up, RHR down is good) and strain thresholds for the status
+const READY_Z = 0.5;
+const STRAINED_Z = -1.5;
+const STRAINED_STRAIN = 0.75;
+
+export type ReadinessStatus = 'ready' | 'normal' | 'strained' | 'unknown';
+
+export interface Baseline {
+    mean: number | null;
+    variance: number;
+    days: number;
+}
+
+export interface ReadinessBaseline {
+    hrv: Baseline;   // ln(HRV)
+    rhr: Baseline;
+}
+
+export interface WellnessDay {
+    date: string;    // YYYY-MM-DD
+    hrv: number | null;
+    rhr: number | null;
+    strain: number | null;
+}
+
+export interface ReadinessState {
+    date: string;
+    score: number | null;       // 0-100, 50 = baseline
+    status: ReadinessStatus;
+    hrvZ: number | null;
+    rhrZ: number | null;
+    strain: number | null;
+}
+
+function round2(value: number): number {
+    return Math.round(value * 100) / 100;
+}
+
+function clip(value: number, low: number, high: number): number {
+    return Math.min(high, Math.max(low, value));
+}
+
+export function emptyBaseline(): ReadinessBaseline {
+    return { hrv: { mean: null, variance: 0, days: 0 }, rhr: { mean: null, variance: 0, days: 0 } };
+}
+
+/**
+ * z-score of `value` against `baseline` (null while the baseline is short) and the
+ * baseline with `value` folded in (incremental EWMA mean / variance).
+ */
+function advance(baseline: Baseline, value: number | null, minStd: number): { baseline: Baseline; z: number | null } {
+    if (value === null) return { baseline, z: null };
+    if (baseline.mean === null) return { baseline: { mean: value, variance: 0, days: 1 }, z: null };
+
+    const diff = value - baseline.mean;
+    const z = baseline.days >= MIN_BASELINE_DAYS
+        ? clip(diff / Math.max(Math.sqrt(baseline.variance), minStd), -MAX_Z, MAX_Z)
+        : null;
+    const increment = ALPHA * diff;
+    return {
+        baseline: {
+            mean: baseline.mean + increment,
+            variance: (1 - ALPHA) * (baseline.variance + diff * increment),
+            days: baseline.days + 1,
+        },
+        z,
+    };
+}
+
+/**
+ * Mean of the subjective fields present, each mapped from 1..scale to 0..1.
+ */
+function subjectiveStrain(record: any, scale: number): number | null {
+    const values = SUBJECTIVE_FIELDS
+        .filter(field => typeof record[field] === 'number')
+        .map(field => clip((record[field] - 1) / (scale - 1), 0, 1));
+    return values.length ? values.reduce((a, b) => a + b, 0) / values.length : null;
+}
+
+function positive(value: any): number | null {
+    return typeof value === 'number' && value > 0 ? value : null;
+}
+
+/**
+ * One entry per day from Intervals.icu wellness records and DailyLog rows, oldest first.
+ */
+export function wellnessDays(wellness: any[], logs: any[] = []): WellnessDay[] {
+    const days = new Map<string, WellnessDay>();
+    (wellness || []).forEach(w => {
+        if (!w || !w.id) return;
+        const date = String(w.id).slice(0, 10);
+        days.set(date, {
+            date,
+            hrv: positive(w.hrv),
+            rhr: positive(w.restingHR),
+            strain: subjectiveStrain(w, INTERVALS_SCALE),
+        });
+    });
+    (logs || []).forEach(log => {
+        if (!log || !log.date) return;
+        const date = (log.date instanceof Date ? log.date.toISOString() : String(log.date)).slice(0, 10);
+        const day = days.get(date) ?? { date, hrv: null, rhr: null, strain: null };
+        const strain = subjectiveStrain(log, DAILY_LOG_SCALE);
+        days.set(date, {
+            date,
+            hrv: positive(log.hrv) ?? day.hrv,
+            rhr: positive(log.rhr) ?? day.rhr,
+            strain: strain ?? day.strain,
+        });
+    });
+    return Array.from(days.values()).sort((a, b) => a.date.localeCompare(b.date));
+}
+
+function readinessState(date: string, hrvZ: number | null, rhrZ: number | null, strain: number | null): ReadinessState {
+    const signals = [hrvZ, rhrZ === null ? null : -rhrZ].filter((z): z is number => z !== null);
+    const physio = signals.length ? signals.reduce((a, b) => a + b, 0) / signals.length : null;
+    if (physio === null && strain === null) {
+        return { date, score: null, status: 'unknown', hrvZ, rhrZ, strain };
+    }
+
+    const score = Math.round(clip(50 + 15 * (physio ?? 0) - 40 * ((strain ?? 0.25) - 0.25), 0, 100));
+    let status: ReadinessStatus = 'normal';
+    if ((physio !== null && physio <= STRAINED_Z) || (strain !== null && strain >= STRAINED_STRAIN)
+        || (physio !== null && physio <= -1 && strain !== null && strain >= 0.5)) {
+        status = 'strained';
+    } else if (physio !== null && physio >= READY_Z && (strain ?? 0) <= 0.5) {
+        status = 'ready';
+    }
+    return {
+        date,
+        score,
+        status,
+        hrvZ: hrvZ === null ? null : round2(hrvZ),
+        rhrZ: rhrZ === null ? null : round2(rhrZ),
+        strain: strain === null ? null : round2(strain),
+    };
+}
+
+/**
+ * Readiness for `day` from the baseline at the end of the previous day, plus the
+ * baseline to carry into the next day. O(1).
+ */
+export function updateReadiness(baseline: ReadinessBaseline, day: WellnessDay): { state: ReadinessState; baseline: ReadinessBaseline } {
+    const hrv = advance(baseline.hrv, day.hrv === null ? null : Math.log(day.hrv), MIN_STD.hrv);
+    const rhr = advance(baseline.rhr, day.rhr, MIN_STD.rhr);
+    return {
+        state: readinessState(day.date, hrv.z, rhr.z, day.strain),
+        baseline: { hrv: hrv.baseline, rhr: rhr.baseline },
+    };
+}
+
+/**
+ * Readiness for consecutive `days` (oldest first) and the baseline after each one.
+ */
+export function readinessSeries(days: WellnessDay[], initial: ReadinessBaseline = emptyBaseline()) {
+    let baseline = initial;
+    return days.map(day => {
+        const next = updateReadiness(baseline, day);
+        baseline = next.baseline;
+        return next;
+    });
+}
+
+/**
+ * One prompt line, e.g. "Readiness: strained (score 31), HRV z -1.8, RHR z +1.2, strain 0.50".
+ */
+export function formatReadiness(state: ReadinessState): string {
+    const signed = (z: number) => `${z >= 0 ? '+' : ''}${z.toFixed(1)}`;
+    const parts = [`Readiness: ${state.status}` + (state.score !== null ? ` (score ${state.score})` : '')];
+    if (state.hrvZ !== null) parts.push(`HRV z ${signed(state.hrvZ)}`);
+    if (state.rhrZ !== null) parts.push(`RHR z ${signed(state.rhrZ)}`);
+    if (state.strain !== null) parts.push(`strain ${state.strain.toFixed(2)}`);
+    return parts.join(', ');
+}
@@ -0,0 +1,241 @@
+import { calculateHRZones, calculatePaceZones, formatPace, Zone } from './zones';
+import { computeLoadSeries, dailyLoads } from './load';
+import { zoneSeconds } from './context';
+import { ReadinessState } from './readiness';
+
+/**
+ * Rule-based workout generator (mirrored by scripts/coach/workout_rules.py).
+ *
+ * Builds WorkoutSchema-conformant workouts for the routine session types the
+ * AI prompt already spells out (easy, long, tempo, threshold, VO2 max) from the
+ * profile and current load state, without a model call. Requests that do not
+ * map onto one of these types still go to the LLM.
+ */
+
+export type RuleWorkoutType = 'easy' | 'long' | 'tempo' | 'threshold' | 'vo2max';
+
+export const RULE_WORKOUT_TYPES: RuleWorkoutType[] = ['easy', 'long', 'tempo', 'threshold', 'vo2max'];
+
+export const DEFAULT_DURATIONS: Record<RuleWorkoutType, number> = {
+    easy: 45,
+    long: 90,
+    tempo: 50,
+    threshold: 55,
+    vo2max: 50,
+};
+
+// TSB below which hard sessions are replaced / trimmed.
+const FATIGUED_TSB = -20;
+// Minutes in Z4+Z5 that make a session "hard" for the back-to-back rule.
+const HARD_SESSION_MIN = 10;
+const LONG_RUN_MIN = 75;
+// Shortest session that still fits warmup, main set and cooldown.
+const MIN_DURATION: Record<RuleWorkoutType, number> = { easy: 20, long: 30, tempo: 35, threshold: 35, vo2max: 35 };
+
+const INTENSITY_BY_ZONE: Record<Zone, string> = {
+    Z1: 'easy',
+    Z2: 'endurance',
+    Z3: 'tempo',
+    Z4: 'threshold',
+    Z5: 'vo2max',
+};
+
+// First match wins, so "easy long run" is a long run and "tempo intervals" a tempo.
+const TYPE_PATTERNS: [RuleWorkoutType, RegExp][] = [
+    ['long', /\blong\b/],
+    ['vo2max', /\bvo2\s*(max)?\b|\bv02\b/],
+    ['threshold', /\bthreshold\b|\blt\b|\bcruise\b/],
+    ['tempo', /\btempo\b|\bsteady state\b/],
+    ['easy', /\beasy\b|\brecovery\b|\baerobic\b|\bbase\b|\bz[12]\b/],
+];
+
+// Requests for anything but a run; the rule engine only builds runs.
+const OTHER_SPORT_PATTERN = /\b(ride|bike|cycl\w*|spin|swim\w*|strength|gym|yoga|mobility|row\w*)\b/;
+const RUN_PATTERN = /\brun(ning)?\b/;
+
+export interface RuleWorkoutOptions {
+    durationMin?: number | null;
+    tsb?: number | null;
+}
+
+/**
+ * Whether a request is for a run: the sport named in the request ("Easy Run",
+ * "Long Ride"), otherwise the athlete's primary sport. Only runs can come from
+ * the rule engine; everything else goes to the model.
+ */
+export function isRunRequest(request: string | null | undefined, profile: any): boolean {
+    const text = (request || '').toLowerCase();
+    if (OTHER_SPORT_PATTERN.test(text)) return false;
+    if (RUN_PATTERN.test(text)) return true;
+    return (profile?.primarySport ?? 'run') === 'run';
+}
+
+/**
+ * Maps a free-text workout request ("Easy Run", "VO2 Max", "long") onto a rule type.
+ * Returns null for anything else, e.g. "hill sprints", "fartlek" or "Easy Ride".
+ */
+export function matchWorkoutType(request?: string | null): RuleWorkoutType | null {
+    const text = (request || '').toLowerCase().replace(/\brun\b/g, '').trim();
+    if (!text || text === 'any' || OTHER_SPORT_PATTERN.test(text)) return null;
+    for (const [type, pattern] of TYPE_PATTERNS) {
+        if (pattern.test(text)) return type;
+    }
+    return null;
+}
+
+/**
+ * Picks today's session from recent activities:
+ * fatigued (TSB < -20), strained readiness today or a hard session yesterday -> easy,
+ * weekend without a long run in the last 6 days -> long,
+ * otherwise the fresher the athlete, the harder the session.
+ */
+export function chooseWorkoutType(
+    activities: any[],
+    options: { lthr?: number | null; today?: string; readiness?: ReadinessState | null } = {},
+) {
+    const today = options.today ?? new Date().toISOString().split('T')[0];
+    const start = new Date(Date.parse(today + 'T00:00:00Z') - 83 * 24 * 60 * 60 * 1000).toISOString().split('T')[0];
+    const series = computeLoadSeries(dailyLoads(activities, start, today, options.lthr));
+    const last = series.loads.length - 1;
+    // State going into today: yesterday's values, today's sessions are not done yet
+    const tsb = last > 0 ? series.tsb[last - 1] : 0;
+
+    const todayMs = Date.parse(today + 'T00:00:00Z');
+    const daysAgo = (a: any) => Math.round((todayMs - Date.parse(a.start_date_local.slice(0, 10) + 'T00:00:00Z')) / 86400000);
+    const recent = (activities || []).filter(a => a && a.start_date_local && daysAgo(a) > 0);
+
+    const hardYesterday = recent.some(a => {
+        const zones = zoneSeconds(a, options.lthr);
+        return daysAgo(a) === 1 && zones[3] + zones[4] >= HARD_SESSION_MIN * 60;
+    });
+    const recentLong = recent.some(a => daysAgo(a) <= 6 && (a.moving_time || 0) >= LONG_RUN_MIN * 60);
+    const weekday = new Date(todayMs).getUTCDay();
+
+    // Only today's readiness counts; an old reading says nothing about today
+    const strained = options.readiness?.date === today && options.readiness.status === 'strained';
+
+    let type: RuleWorkoutType;
+    if (tsb < FATIGUED_TSB || strained || hardYesterday) type = 'easy';
+    else if ((weekday === 0 || weekday === 6) && !recentLong) type = 'long';
+    else if (tsb > 5) type = 'vo2max';
+    else if (tsb > -5) type = 'threshold';
+    else if (tsb > -10) type = 'tempo';
+    else type = 'easy';
+
+    return { type, tsb: Math.round(tsb * 10) / 10 };
+}
+
+function target(profile: any, zone: Zone) {
+    if (profile?.thresholdPace) {
+        const range = calculatePaceZones(profile.thresholdPace)[zone];
+        return { metric: 'pace', value: `${formatPace(range.max)}-${formatPace(range.min)}/km` };
+    }
+    if (profile?.lthr) {
+        const range = calculateHRZones(profile.lthr)[zone];
+        return { metric: 'hr', value: `${range.min}-${range.max} bpm` };
+    }
+    return { metric: 'rpe', value: zone };
+}
+
+function block(profile: any, type: string, durationMin: number, zone: Zone, zonePosition: number, reps?: number) {
+    return {
+        type,
+        ...(reps && reps > 1 ? { reps } : {}),
+        duration_min: durationMin,
+        intensity: INTENSITY_BY_ZONE[zone],
+        target: target(profile, zone),
+        zone,
+        zone_position: zonePosition,
+    };
+}
+
+/**
+ * Work / recovery pairs that fit between warmup and cooldown, within [min, max];
+ * one fewer when fatigued.
+ */
+function fitReps(available: number, work: number, rest: number, min: number, max: number, fatigued: boolean): number {
+    const reps = Math.min(max, Math.floor(available / (work + rest))) - (fatigued ? 1 : 0);
+    return Math.max(min, reps);
+}
+
+/**
+ * Generates a WorkoutSchema-conformant workout for a rule type.
+ * Steady sessions fill `durationMin` exactly; interval sessions use as many
+ * repeats as fit, one fewer when fatigued.
+ */
+export function generateRuleWorkout(type: RuleWorkoutType, profile: any, options: RuleWorkoutOptions = {}) {
+    const duration = Math.max(MIN_DURATION[type], Math.round(options.durationMin || DEFAULT_DURATIONS[type]));
+    const fatigued = options.tsb != null && options.tsb < FATIGUED_TSB;
+    const structure: any[] = [];
+    let name: string;
+    let description: string;
+    let tags: string[];
+
+    switch (type) {
+        case 'easy':
+            name = `Easy Run ${duration}min`;
+            description = 'Conversational aerobic running. Stay low in Z2; walk breaks are fine if HR drifts.';
+            tags = ['easy', 'aerobic'];
+            structure.push(block(profile, 'warmup', 5, 'Z1', 0.5));
+            structure.push(block(profile, 'steady', duration - 5, 'Z2', fatigued ? 0.0 : 0.2));
+            break;
+
+        case 'long': {
+            const finish = !fatigued && duration >= LONG_RUN_MIN ? 15 : 0;
+            name = `Long Run ${duration}min`;
+            description = 'Long aerobic run in Z2.' + (finish ? ' Finish the last 15 minutes at the top of Z2 if it feels good.' : '');
+            tags = ['long', 'endurance'];
+            structure.push(block(profile, 'warmup', 10, 'Z1', 0.5));
+            structure.push(block(profile, 'steady', duration - 10 - finish, 'Z2', 0.5));
+            if (finish) structure.push(block(profile, 'steady', finish, 'Z2', 0.9));
+            break;
+        }
+
+        case 'tempo': {
+            const main = Math.max(10, duration - 25);
+            name = `Tempo ${main}min`;
+            description = 'Continuous tempo in the middle of Z3: comfortably hard, controlled breathing.';
+            tags = ['tempo'];
+            structure.push(block(profile, 'warmup', 15, 'Z1', 0.8));
+            structure.push(block(profile, 'steady', main, 'Z3', 0.5));
+            structure.push(block(profile, 'cooldown', duration - 15 - main, 'Z1', 0.5));
+            break;
+        }
+
+        case 'threshold': {
+            const reps = fitReps(duration - 25, 8, 2, 2, 6, fatigued);
+            name = `Threshold ${reps}x8min`;
+            description = `${reps} x 8 minutes in Z4 with 2 minutes easy jog recovery. Even pacing across all reps.`;
+            tags = ['threshold', 'intervals'];
+            structure.push(block(profile, 'warmup', 15, 'Z1', 0.8));
+            structure.push(block(profile, 'interval', 8, 'Z4', 0.5, reps));
+            structure.push(block(profile, 'recovery', 2, 'Z1', 0.3));
+            structure.push(block(profile, 'cooldown', 10, 'Z1', 0.5));
+            break;
+        }
+
+        case 'vo2max': {
+            const reps = fitReps(duration - 25, 3, 3, 3, 8, fatigued);
+            name = `VO2 Max ${reps}x3min`;
+            description = `${reps} x 3 minutes in Z5 with 3 minutes easy jog recovery. Hard but repeatable.`;
+            tags = ['vo2max', 'intervals'];
+            structure.push(block(profile, 'warmup', 15, 'Z1', 0.8));
+            structure.push(block(profile, 'interval', 3, 'Z5', 0.5, reps));
+            structure.push(block(profile, 'recovery', 3, 'Z1', 0.3));
+            structure.push(block(profile, 'cooldown', 10, 'Z1', 0.5));
+            break;
+        }
+
+        default:
+            throw new Error(`Unknown workout type: ${type}`);
+    }
+
+    return {
+        workout_name: name,
+        sport: 'run' as const,
+        description,
+        tags: [...tags, 'rule-based'],
+        structure,
+        intervals_icu_export: { format: 'builder_v1' as const, blocks: [] as any[] },
+    };
+}
@@ -0,0 +1,151 @@
+import {
+    calculateHRZones,
+    calculatePaceZones,
+    HRZones,
+    PaceZones,
+    ZONES,
+} from './zones';
+
+/**
+ * Precomputed zone tables for one athlete.
+ * Built once from thresholdPace / lthr and reused until those metrics change.
+ * Builder text export does not use them: its %-of-threshold ranges are the same
+ * for every athlete (PACE_ZONE_PERCENT in zones.ts).
+ */
+export interface ZoneTables {
+    thresholdPace: number | null;
+    lthr: number | null;
+    pace: PaceZones | null;
+    hr: HRZones | null;
+}
+
+/**
+ * Compact form stored in AthleteProfile.paceZones / hrZones:
+ * the source metric plus [min, max] pairs in Z1..Z5 order.
+ */
+interface StoredPaceZones {
+    thresholdPace: number;
+    zones: [number, number][];
+}
+
+interface StoredHRZones {
+    lthr: number;
+    zones: [number, number][];
+}
+
+export interface ZoneProfile {
+    thresholdPace?: number | null;
+    lthr?: number | null;
+    paceZones?: string | null;
+    hrZones?: string | null;
+}
+
+export function buildZoneTables(thresholdPace?: number | null, lthr?: number | null): ZoneTables {
+    return {
+        thresholdPace: thresholdPace ?? null,
+        lthr: lthr ?? null,
+        pace: thresholdPace ? calculatePaceZones(thresholdPace) : null,
+        hr: lthr ? calculateHRZones(lthr) : null,
+    };
+}
+
+function toPairs(zones: PaceZones | HRZones): [number, number][] {
+    return ZONES.map(zone => [zones[zone].min, zones[zone].max] as [number, number]);
+}
+
+function fromPairs(pairs: [number, number][]): PaceZones & HRZones {
+    const zones = {} as PaceZones & HRZones;
+    ZONES.forEach((zone, i) => {
+        zones[zone] = { min: pairs[i][0], max: pairs[i][1] };
+    });
+    return zones;
+}
+
+/**
+ * Serializes tables into the AthleteProfile paceZones / hrZones columns.
+ */
+export function serializeZoneTables(tables: ZoneTables): { paceZones: string | null, hrZones: string | null } {
+    const pace: StoredPaceZones | null = tables.pace && tables.thresholdPace
+        ? { thresholdPace: tables.thresholdPace, zones: toPairs(tables.pace) }
+        : null;
+    const hr: StoredHRZones | null = tables.hr && tables.lthr
+        ? { lthr: tables.lthr, zones: toPairs(tables.hr) }
+        : null;
+
+    return {
+        paceZones: pace ? JSON.stringify(pace) : null,
+        hrZones: hr ? JSON.stringify(hr) : null,
+    };
+}
+
+/**
+ * Reads tables back from the profile columns.
+ * Returns null if nothing is stored or the stored tables were built from different metrics.
+ */
+export function parseStoredZoneTables(profile: ZoneProfile): ZoneTables | null {
+    try {
+        const pace: StoredPaceZones | null = profile.paceZones ? JSON.parse(profile.paceZones) : null;
+        const hr: StoredHRZones | null = profile.hrZones ? JSON.parse(profile.hrZones) : null;
+
+        if ((pace?.thresholdPace ?? null) !== (profile.thresholdPace ?? null)) return null;
+        if ((hr?.lthr ?? null) !== (profile.lthr ?? null)) return null;
+
+        return {
+            thresholdPace: profile.thresholdPace ?? null,
+            lthr: profile.lthr ?? null,
+            pace: pace ? fromPairs(pace.zones) : null,
+            hr: hr ? fromPairs(hr.zones) : null,
+        };
+    } catch (e) {
+        return null;
+    }
+}
+
+/**
+ * In-memory cache of zone tables per athlete (keyed by userId).
+ * An entry is only rebuilt when the athlete's thresholdPace / lthr change;
+ * call invalidate() when the profile is saved.
+ */
+export class ZoneTableCache {
+    private entries = new Map<string, ZoneTables>();
+    readonly stats = { hits: 0, loads: 0, misses: 0, invalidations: 0 };
+
+    constructor(private maxEntries = 1000) { }
+
+    get(key: string, profile: ZoneProfile): ZoneTables {
+        const cached = this.entries.get(key);
+        if (cached) {
+            if (cached.thresholdPace === (profile.thresholdPace ?? null) && cached.lthr === (profile.lthr ?? null)) {
+                this.stats.hits++;
+                // Refresh LRU position
+                this.entries.delete(key);
+                this.entries.set(key, cached);
+                return cached;
+            }
+            this.invalidate(key);
+        }
+
+        let tables = parseStoredZoneTables(profile);
+        if (tables) {
+            this.stats.loads++;
+        } else {
+            this.stats.misses++;
+            tables = buildZoneTables(profile.thresholdPace, profile.lthr);
+        }
+
+        this.entries.set(key, tables);
+        if (this.entries.size > this.maxEntries) {
+            // Map keeps insertion order, so the first key is the least recently used.
+            this.entries.delete(this.entries.keys().next().value as string);
+        }
+        return tables;
+    }
+
+    invalidate(key: string) {
+        if (this.entries.delete(key)) {
+            this.stats.invalidations++;
+        }
+    }
+}
+
+export const zoneTableCache = new ZoneTableCache();
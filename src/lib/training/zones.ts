@@ -73,26 +73,32 @@ export function formatPace(seconds: number): string {
     return `${mins}:${secs.toString().padStart(2, '0')}`;
 }
 
+export const ZONES: Zone[] = ['Z1', 'Z2', 'Z3', 'Z4', 'Z5'];
+
+/**
+ * Speed % Range of Threshold per zone, precomputed from the pace Time Factors.
+ * Speed % = 100 / TimeFactor:
+ * Z1: 1.30 - 1.45 (Slower) -> Speed: 1/1.45 - 1/1.30 -> ~69% - 77%
+ * Z2: 1.15 - 1.30 -> Speed: 1/1.30 - 1/1.15 -> ~77% - 87%
+ * Z3: 1.05 - 1.15 -> Speed: 1/1.15 - 1/1.05 -> ~87% - 95%
+ * Z4: 1.00 - 1.05 -> Speed: 1/1.05 - 1/1.00 -> ~95% - 100%
+ * Z5: 0.90 - 1.00 -> Speed: 1/1.00 - 1/0.90 -> ~100% - 111%
+ */
+export const PACE_ZONE_PERCENT: Readonly<Record<Zone, ZoneBoundaries>> = {
+    Z1: { min: 69, max: 77 },
+    Z2: { min: 77, max: 87 },
+    Z3: { min: 87, max: 95 },
+    Z4: { min: 95, max: 100 },
+    Z5: { min: 100, max: 111 },
+};
+
 /**
  * Returns the Speed % Range of Threshold for a given zone.
  * Used for Intervals.icu export (e.g. "77%-87% pace").
  * Derived from Time Factors: Speed % = 100 / TimeFactor.
  */
 export function getPaceZoneAsPercent(zone: Zone): { min: number, max: number } {
-    // Time Factors:
-    // Z1: 1.30 - 1.45 (Slower) -> Speed: 1/1.45 - 1/1.30 -> ~69% - 77%
-    // Z2: 1.15 - 1.30 -> Speed: 1/1.30 - 1/1.15 -> ~77% - 87%
-    // Z3: 1.05 - 1.15 -> Speed: 1/1.15 - 1/1.05 -> ~87% - 95%
-    // Z4: 1.00 - 1.05 -> Speed: 1/1.05 - 1/1.00 -> ~95% - 100%
-    // Z5: 0.90 - 1.00 -> Speed: 1/1.00 - 1/0.90 -> ~100% - 111%
-
-    switch (zone) {
-        case 'Z1': return { min: 69, max: 77 };
-        case 'Z2': return { min: 77, max: 87 };
-        case 'Z3': return { min: 87, max: 95 };
-        case 'Z4': return { min: 95, max: 100 };
-        case 'Z5': return { min: 100, max: 111 };
-    }
+    return PACE_ZONE_PERCENT[zone];
 }
 
 /**